@@ -0,0 +1,74 @@
+# ----------------------------------------------------------------------------
+# Copyright 2015 Grammarly, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ----------------------------------------------------------------------------
+"""
+Time of fprop and bprop of AttentionBlock for growing encoder lengths T,
+the number of decoder steps is fixed. Encoder steps after the first half
+of every sample are masked out.
+
+    python benchmarks/attention.py --lengths 16 32 64 128 256
+"""
+import argparse
+import numpy as np
+from common import measure
+
+
+def get_attention_block(batch_size, encoder_len, query_len, dim):
+    from quagga.utils import List
+    from quagga.matrix import Matrix
+    from quagga.context import Context
+    from quagga.connector import Connector
+    from quagga.blocks import AttentionBlock
+
+    rng = np.random.RandomState(42)
+    context = Context()
+
+    def sequence(length):
+        return List([Connector(Matrix.from_npa(rng.rand(batch_size, dim).astype(np.float32)), 0)
+                     for _ in xrange(length)])
+    encoder_states, queries = sequence(encoder_len), sequence(query_len)
+    mask = List([Connector(Matrix.from_npa(np.full((batch_size, 1), t < max(1, encoder_len // 2), np.float32)))
+                 for t in xrange(encoder_len)])
+    block = AttentionBlock(encoder_states, queries, mask)
+    for e in block.output:
+        _, dL_de = e.register_usage(0, 0)
+        dL_de.assign_npa(context, rng.rand(batch_size, dim).astype(np.float32))
+    for e in encoder_states.elements + queries.elements + mask.elements:
+        e.fprop()
+    return block
+
+
+def run(lengths, batch_size, query_len, dim, repeat):
+    results = []
+    for encoder_len in lengths:
+        block = get_attention_block(batch_size, encoder_len, query_len, dim)
+        block.fprop()
+        results.append((encoder_len, measure(block.fprop, repeat), measure(block.bprop, repeat)))
+    return results
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--lengths', type=int, nargs='+', default=[16, 32, 64, 128, 256])
+    parser.add_argument('--batch-size', type=int, default=64)
+    parser.add_argument('--query-len', type=int, default=32)
+    parser.add_argument('--dim', type=int, default=256)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    import quagga
+    quagga.processor_type = 'cpu'
+    for encoder_len, fprop, bprop in run(args.lengths, args.batch_size, args.query_len, args.dim, args.repeat):
+        print 'T = {:4d}: fprop {:10.3f} ms, bprop {:10.3f} ms'.format(encoder_len, 1e3 * fprop['median'], 1e3 * bprop['median'])
@@ -0,0 +1,82 @@
+# ----------------------------------------------------------------------------
+# Copyright 2015 Grammarly, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ----------------------------------------------------------------------------
+"""
+Throughput of GEMMs issued concurrently from several CPU contexts, every
+context runs in its own thread. Without budgets every GEMM uses the whole
+BLAS thread pool, with ``--divide`` the cores are divided between contexts
+with CpuContext.divide_cores.
+
+    python benchmarks/blas_threads.py --contexts 1 2 4 8 --size 1024
+"""
+import time
+import argparse
+import threading
+import numpy as np
+
+
+def run_concurrently(num_contexts, size, num_gemms, divide):
+    from quagga.matrix import CpuMatrix
+    from quagga.context import CpuContext, blas
+
+    device_ids = range(num_contexts)
+    if divide:
+        CpuContext.divide_cores(device_ids)
+    else:
+        for device_id in device_ids:
+            CpuContext.set_compute_budget(device_id)
+    rng = np.random.RandomState(42)
+    jobs = []
+    for device_id in device_ids:
+        a = CpuMatrix.from_npa(rng.rand(size, size).astype(np.float32))
+        b = CpuMatrix.from_npa(rng.rand(size, size).astype(np.float32))
+        c = CpuMatrix.empty(size, size)
+        jobs.append((CpuContext(device_id), a, b, c))
+
+    def work(context, a, b, c):
+        for _ in xrange(num_gemms):
+            c.assign_dot(context, a, b)
+
+    default_num_threads = blas.get_num_threads()
+    threads = [threading.Thread(target=work, args=job) for job in jobs]
+    t = time.time()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.time() - t
+    if default_num_threads:
+        blas.set_num_threads(default_num_threads)
+    gflops = 2.0 * size ** 3 * num_gemms * num_contexts / elapsed / 1e9
+    return elapsed, gflops
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--contexts', type=int, nargs='+', default=[1, 2, 4, 8])
+    parser.add_argument('--size', type=int, default=1024)
+    parser.add_argument('--gemms', type=int, default=20)
+    args = parser.parse_args()
+
+    import quagga
+    quagga.processor_type = 'cpu'
+    from quagga.context import blas
+    print 'BLAS threads: {}, CPUs: {}, per-thread control: {}'.\
+        format(blas.get_num_threads(), len(blas.get_affinity()), blas.is_thread_local)
+    for num_contexts in args.contexts:
+        for divide in [False, True]:
+            elapsed, gflops = run_concurrently(num_contexts, args.size, args.gemms, divide)
+            print '{:3d} contexts {:12s} {:8.3f}s {:8.1f} GFLOP/s'.\
+                format(num_contexts, 'divided' if divide else 'shared', elapsed, gflops)
@@ -0,0 +1,184 @@
+# ----------------------------------------------------------------------------
+# Copyright 2015 Grammarly, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ----------------------------------------------------------------------------
+"""
+Benchmarks of fprop and bprop of single blocks with all inputs and
+parameters being bpropagable.
+
+    python benchmarks/blocks.py --filter Lstm
+"""
+import re
+import argparse
+import numpy as np
+from common import measure
+from collections import OrderedDict
+
+
+SHAPES = [(1, 128), (32, 128), (64, 256), (128, 512)]
+VOCAB_SIZE = 10000
+SEQ_LEN = 8
+
+
+def get_blocks(batch_size, dim):
+    """
+    Returns dict of blocks, which output gradients are filled with random
+    values, so that ``bprop`` can be called repeatedly.
+    """
+    from quagga import Model
+    from quagga.utils import List
+    from quagga.matrix import Matrix
+    from quagga.context import Context
+    from quagga.blocks import GruBlock
+    from quagga.blocks import RnnBlock
+    from quagga.blocks import DotBlock
+    from quagga.blocks import AttentionBlock
+    from quagga.blocks import LstmBlock
+    from quagga.blocks import LstmpBlock
+    from quagga.connector import Connector
+    from quagga.blocks import SequencerBlock
+    from quagga.blocks import PackedLstmBlock
+    from quagga.blocks import SoftmaxCeBlock
+    from quagga.blocks import FusedSoftmaxCeBlock
+    from quagga.blocks import RowSlicingBlock
+    from quagga.blocks import TemporalConvBlock
+    from quagga.blocks import HorizontalStackBlock
+    from quagga.blocks import BidirectionalLstmBlock
+
+    rng = np.random.RandomState(42)
+    context = Context()
+    device_id = 0
+    B, D = batch_size, dim
+
+    def connector(nrows, ncols, bpropagable=True):
+        a = rng.rand(nrows, ncols).astype(np.float32)
+        return Connector(Matrix.from_npa(a), device_id if bpropagable else None)
+
+    def int_connector(high, nrows, ncols):
+        a = rng.randint(high, size=(nrows, ncols)).astype(np.int32)
+        return Connector(Matrix.from_npa(a))
+
+    def fill_output_gradients(*outputs):
+        for output in outputs:
+            _, dL_doutput = output.register_usage(device_id, device_id)
+            dL_doutput.assign_npa(context, rng.rand(B, int(output.ncols)).astype(np.float32))
+
+    blocks = OrderedDict()
+    W, b, x = connector(D, D), connector(1, D), connector(B, D)
+    blocks['DotBlock'] = DotBlock(W, b, x)
+    fill_output_gradients(blocks['DotBlock'].output)
+    inputs = [W, b, x]
+
+    W, R, b = connector(D, 4 * D), connector(D, 4 * D), connector(1, 4 * D)
+    x, prev_c, prev_h = connector(B, D), connector(B, D), connector(B, D)
+    mask = Connector(Matrix.from_npa((rng.rand(B, 1) < 0.8).astype(np.float32)))
+    blocks['LstmBlock'] = LstmBlock(W, R, b, None, x, mask, prev_c, prev_h)
+    fill_output_gradients(blocks['LstmBlock'].c, blocks['LstmBlock'].h)
+    inputs += [W, R, b, x, prev_c, prev_h, mask]
+
+    WRb = connector(2 * D + 1, 4 * D)
+    x, prev_c, prev_h = connector(B, D), connector(B, D), connector(B, D)
+    blocks['PackedLstmBlock'] = PackedLstmBlock(WRb, None, x, mask, prev_c, prev_h)
+    fill_output_gradients(blocks['PackedLstmBlock'].c, blocks['PackedLstmBlock'].h)
+    inputs += [WRb, x, prev_c, prev_h]
+
+    # the projection has a quarter of the cell size
+    W, R, b, P = connector(D, 4 * D), connector(D // 4, 4 * D), connector(1, 4 * D), connector(D, D // 4)
+    x, prev_c, prev_h = connector(B, D), connector(B, D), connector(B, D // 4)
+    blocks['LstmpBlock'] = LstmpBlock(W, R, b, P, None, x, mask, prev_c, prev_h)
+    fill_output_gradients(blocks['LstmpBlock'].c, blocks['LstmpBlock'].h)
+    inputs += [W, R, b, P, x, prev_c, prev_h]
+
+    # recurrent blocks with the hidden size of the LSTM
+    W, R, b = connector(D, 3 * D), connector(D, 3 * D), connector(1, 3 * D)
+    x, prev_h = connector(B, D), connector(B, D)
+    blocks['GruBlock'] = GruBlock(W, R, b, None, x, mask, prev_h)
+    fill_output_gradients(blocks['GruBlock'].h)
+    inputs += [W, R, b, x, prev_h]
+
+    W, R, b = connector(D, D), connector(D, D), connector(1, D)
+    x, prev_h = connector(B, D), connector(B, D)
+    blocks['RnnBlock'] = RnnBlock(W, R, b, None, x, mask, prev_h)
+    fill_output_gradients(blocks['RnnBlock'].h)
+    inputs += [W, R, b, x, prev_h]
+
+    # the bidirectional block against the composition it replaces: two
+    # sequencers and a sequencer of horizontal stacks
+    params = [[connector(D, 4 * D), connector(D, 4 * D), connector(1, 4 * D), None] for _ in xrange(2)]
+    paddings = [[connector(B, D), connector(B, D)] for _ in xrange(2)]
+    x = List([connector(B, D) for _ in xrange(SEQ_LEN)])
+    mask = List([Connector(Matrix.from_npa((rng.rand(B, 1) < 0.8).astype(np.float32)))
+                 for _ in xrange(SEQ_LEN)])
+    blocks['BidirectionalLstmBlock'] = BidirectionalLstmBlock(params[0], params[1], x, mask, paddings[0], paddings[1])
+    fill_output_gradients(*blocks['BidirectionalLstmBlock'].output)
+    fwd_block = SequencerBlock(LstmBlock, params[0], [x, mask], ['h'], ['c', 'h'], paddings[0])
+    bwd_block = SequencerBlock(LstmBlock, params[1], [x, mask], ['h'], ['c', 'h'], paddings[1], reverse=True)
+    hstack_block = SequencerBlock(HorizontalStackBlock, [], [fwd_block.h, bwd_block.h], ['output'])
+    blocks['BidirectionalLstmComposition'] = Model([fwd_block, bwd_block, hstack_block])
+    fill_output_gradients(*hstack_block.output)
+    inputs += sum(params, []) + sum(paddings, []) + x.elements + mask.elements
+
+    # a parallel-over-time encoder layer against the recurrent one
+    W, b = connector(3 * D, D), connector(1, D)
+    blocks['TemporalConvBlock'] = TemporalConvBlock(W, b, x, mask, dilation=2)
+    fill_output_gradients(*blocks['TemporalConvBlock'].output)
+    blocks['LstmSequencer'] = SequencerBlock(LstmBlock, params[0], [x, mask], ['h'], ['c', 'h'], paddings[0])
+    fill_output_gradients(*blocks['LstmSequencer'].h)
+    inputs += [W, b]
+
+    queries = List([connector(B, D) for _ in xrange(SEQ_LEN)])
+    blocks['AttentionBlock'] = AttentionBlock(x, queries, mask)
+    fill_output_gradients(*blocks['AttentionBlock'].output)
+    inputs += queries.elements
+
+    x, true_labels = connector(B, D), int_connector(D, B, 1)
+    blocks['SoftmaxCeBlock'] = SoftmaxCeBlock(x, true_labels)
+    blocks['FusedSoftmaxCeBlock'] = FusedSoftmaxCeBlock(x, true_labels)
+    inputs += [x, true_labels]
+
+    embd_W, row_indexes = connector(VOCAB_SIZE, D), int_connector(VOCAB_SIZE, B, SEQ_LEN)
+    blocks['RowSlicingBlock'] = RowSlicingBlock(embd_W, row_indexes)
+    fill_output_gradients(*blocks['RowSlicingBlock'].output)
+    inputs += [embd_W, row_indexes]
+
+    for e in inputs:
+        if e is not None:
+            e.fprop()
+    return blocks
+
+
+def run(shapes=SHAPES, pattern=None, repeat=7, min_time=0.05):
+    results = OrderedDict()
+    for batch_size, dim in shapes:
+        for name, block in get_blocks(batch_size, dim).iteritems():
+            for method_name in ['fprop', 'bprop']:
+                key = 'block/{}.{}/{}x{}'.format(name, method_name, batch_size, dim)
+                if pattern and not re.search(pattern, key):
+                    continue
+                if method_name == 'bprop':
+                    block.fprop()
+                results[key] = measure(getattr(block, method_name), repeat, min_time)
+    return results
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--filter')
+    parser.add_argument('--repeat', type=int, default=7)
+    args = parser.parse_args()
+
+    import quagga
+    quagga.processor_type = 'cpu'
+    for key, r in run(pattern=args.filter, repeat=args.repeat).iteritems():
+        print '{:60s} {:12.3f} us'.format(key, r['median'] * 1e6)
\ No newline at end of file
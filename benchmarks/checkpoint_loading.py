@@ -0,0 +1,132 @@
+# ----------------------------------------------------------------------------
+# Copyright 2015 Grammarly, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ----------------------------------------------------------------------------
+"""
+Measures cold-start time and resident memory of building a
+ParameterContainer from an HDF5 file (H5pyInitializer) and from a
+Checkpoint file (CheckpointInitializer). Every loader runs in a fresh
+process, so that peak RSS is not polluted by the other one.
+
+    python benchmarks/checkpoint_loading.py --size-mb 1024
+"""
+import os
+import sys
+import json
+import h5py
+import time
+import shutil
+import argparse
+import resource
+import tempfile
+import subprocess
+import numpy as np
+
+
+def get_rss_mb():
+    with open('/proc/self/status') as f:
+        for line in f:
+            if line.startswith('VmRSS:'):
+                return int(line.split()[1]) / 1024.0
+
+
+def get_peak_rss_mb():
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024.0
+
+
+def get_parameter_shapes(size_mb, ncols=1024):
+    # embedding-like tables of ncols float32 columns, 256 MB at most each
+    nrows_left = size_mb * 2 ** 20 / (4 * ncols)
+    max_nrows = 256 * 2 ** 20 / (4 * ncols)
+    shapes = {}
+    while nrows_left > 0:
+        nrows = min(nrows_left, max_nrows)
+        shapes['W_{}'.format(len(shapes))] = (nrows, ncols)
+        nrows_left -= nrows
+    return shapes
+
+
+def write_files(dir_path, size_mb):
+    rng = np.random.RandomState(42)
+    shapes = get_parameter_shapes(size_mb)
+    h5_path = os.path.join(dir_path, 'parameters.hdf5')
+    checkpoint_path = os.path.join(dir_path, 'parameters.ckpt')
+    arrays = {}
+    for name, shape in shapes.iteritems():
+        arrays[name] = rng.rand(*shape).astype(np.float32)
+    with h5py.File(h5_path, 'w') as f:
+        for name, a in arrays.iteritems():
+            f[name] = a
+    Checkpoint.save(checkpoint_path, arrays)
+    return h5_path, checkpoint_path, shapes.keys()
+
+
+def load(loader, path, names):
+    base_rss = get_rss_mb()
+    t = time.time()
+    if loader == 'h5py':
+        definitions = {name: {'init': H5pyInitializer(path, name), 'device_id': 0} for name in names}
+    else:
+        checkpoint = Checkpoint(path, 'r')
+        definitions = {name: {'init': CheckpointInitializer(checkpoint, name), 'device_id': 0} for name in names}
+    p = ParameterContainer(**definitions)
+    startup_time = time.time() - t
+    resident_mb = get_rss_mb() - base_rss
+    # touch every parameter as the first inference request would do
+    t = time.time()
+    checksum = sum(float(p[name].npa.sum()) for name in names)
+    first_pass_time = time.time() - t
+    return {'loader': loader,
+            'startup_time': startup_time,
+            'first_pass_time': first_pass_time,
+            'startup_rss_mb': resident_mb,
+            'peak_rss_mb': get_peak_rss_mb() - base_rss,
+            'checksum': checksum}
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--size-mb', type=int, default=1024)
+    parser.add_argument('--load', choices=['h5py', 'checkpoint'])
+    parser.add_argument('--path')
+    parser.add_argument('--names')
+    args = parser.parse_args()
+
+    import quagga
+    quagga.processor_type = 'cpu'
+    from quagga.utils import Checkpoint
+    from quagga.blocks import ParameterContainer
+    from quagga.utils.initializers import H5pyInitializer
+    from quagga.utils.initializers import CheckpointInitializer
+
+    if args.load:
+        print json.dumps(load(args.load, args.path, args.names.split(',')))
+        sys.exit(0)
+
+    dir_path = tempfile.mkdtemp()
+    try:
+        h5_path, checkpoint_path, names = write_files(dir_path, args.size_mb)
+        print 'parameters: {} MB in {} matrices'.format(args.size_mb, len(names))
+        for loader, path in [('h5py', h5_path), ('checkpoint', checkpoint_path)]:
+            output = subprocess.check_output([sys.executable, __file__,
+                                              '--load', loader,
+                                              '--path', path,
+                                              '--names', ','.join(names)])
+            r = json.loads(output.splitlines()[-1])
+            print '{:12s} startup: {:8.3f}s  first pass: {:8.3f}s  ' \
+                  'startup RSS: {:8.1f} MB  peak RSS: {:8.1f} MB'.\
+                format(r['loader'], r['startup_time'], r['first_pass_time'],
+                       r['startup_rss_mb'], r['peak_rss_mb'])
+    finally:
+        shutil.rmtree(dir_path)
\ No newline at end of file
@@ -0,0 +1,101 @@
+# ----------------------------------------------------------------------------
+# Copyright 2015 Grammarly, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ----------------------------------------------------------------------------
+"""
+Time of a training step and memory of the output layer of a language
+model over a sequence: DotBlock followed by SoftmaxCeBlock for every
+timestep against ChunkedSoftmaxCeBlock with different chunk sizes.
+Memory is the live tracked memory by category after one training step,
+parameters and their gradients are the same for all layers.
+
+    python benchmarks/chunked_softmax.py --vocab-size 200000 --chunk-sizes 4096 16384
+"""
+import argparse
+import numpy as np
+from common import measure
+
+
+def get_output_layer(batch_size, seq_len, dim, vocab_size, chunk_size):
+    from quagga import Model
+    from quagga.utils import List
+    from quagga.matrix import Matrix
+    from quagga.connector import Connector
+    from quagga.blocks import DotBlock
+    from quagga.blocks import SequencerBlock
+    from quagga.blocks import SoftmaxCeBlock
+    from quagga.blocks import ChunkedSoftmaxCeBlock
+
+    rng = np.random.RandomState(42)
+
+    def connector(nrows, ncols):
+        a = (rng.rand(nrows, ncols).astype(np.float32) - 0.5) * 0.1
+        return Connector(Matrix.from_npa(a), 0)
+
+    W, b = connector(dim, vocab_size), connector(1, vocab_size)
+    x = List([connector(batch_size, dim) for _ in xrange(seq_len)])
+    true_labels = List([Connector(Matrix.from_npa(rng.randint(vocab_size, size=(batch_size, 1)).astype(np.int32)))
+                        for _ in xrange(seq_len)], x.length)
+    if chunk_size:
+        model = SequencerBlock(ChunkedSoftmaxCeBlock, [W, b, chunk_size], [x, true_labels])
+    else:
+        dot_block = SequencerBlock(DotBlock, [W, b], [x], ['output'])
+        model = Model([dot_block, SequencerBlock(SoftmaxCeBlock, [], [dot_block.output, true_labels])])
+    inputs = [W, b] + x.elements + true_labels.elements
+    return model, inputs
+
+
+def run(batch_size, seq_len, dim, vocab_size, chunk_size, repeat):
+    from quagga.matrix import MemoryTracker
+
+    tracker = MemoryTracker()
+    tracker.enable()
+    try:
+        model, inputs = get_output_layer(batch_size, seq_len, dim, vocab_size, chunk_size)
+
+        def step():
+            for e in inputs:
+                e.fprop()
+            model.fprop()
+            model.bprop()
+        step()
+        memory = tracker.get_breakdown('category')
+        result = measure(step, repeat, min_time=0.5)
+        result['memory'] = memory
+        result['total_memory'] = tracker.live_bytes
+        return result
+    finally:
+        tracker.disable()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--batch-size', type=int, default=64)
+    parser.add_argument('--seq-len', type=int, default=8)
+    parser.add_argument('--dim', type=int, default=256)
+    parser.add_argument('--vocab-size', type=int, default=50000)
+    parser.add_argument('--chunk-sizes', type=int, nargs='+', default=[2048, 8192])
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    import quagga
+    from quagga.matrix import MemoryTracker
+    quagga.processor_type = 'cpu'
+    mb = 2.0 ** 20
+    print '{:16s} {:>10s} {}'.format('', 'ms', ' '.join('{:>16s}'.format(c) for c in MemoryTracker.categories + ['total']))
+    for chunk_size in [None] + args.chunk_sizes:
+        r = run(args.batch_size, args.seq_len, args.dim, args.vocab_size, chunk_size, args.repeat)
+        memory = [r['memory'].get(c, 0) for c in MemoryTracker.categories] + [r['total_memory']]
+        name = 'chunked {}'.format(chunk_size) if chunk_size else 'full'
+        print '{:16s} {:10.1f} {}'.format(name, 1e3 * r['median'], ' '.join('{:13.2f} MB'.format(m / mb) for m in memory))
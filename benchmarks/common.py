@@ -0,0 +1,90 @@
+# ----------------------------------------------------------------------------
+# Copyright 2015 Grammarly, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ----------------------------------------------------------------------------
+"""
+Timing and result serialization shared by the benchmark suites.
+"""
+import os
+import sys
+import json
+import time
+import platform
+import subprocess
+import numpy as np
+from timeit import default_timer
+
+
+def measure(function, repeat=7, min_time=0.05, warmup=1):
+    """
+    Calls ``function`` in ``repeat`` rounds, every round has as many calls
+    as needed to take at least ``min_time`` seconds. Returns statistics of
+    the time of one call in seconds.
+    """
+    for _ in xrange(warmup):
+        function()
+    number = 1
+    while True:
+        t = default_timer()
+        for _ in xrange(number):
+            function()
+        elapsed = default_timer() - t
+        if elapsed >= min_time or number >= 1 << 20:
+            break
+        number *= 2 if elapsed == 0 else max(2, int(1.2 * min_time / elapsed))
+    times = [elapsed / number]
+    for _ in xrange(repeat - 1):
+        t = default_timer()
+        for _ in xrange(number):
+            function()
+        times.append((default_timer() - t) / number)
+    return {'median': float(np.median(times)),
+            'min': float(np.min(times)),
+            'std': float(np.std(times)),
+            'repeat': repeat,
+            'number': number}
+
+
+def get_git_revision():
+    try:
+        path = os.path.dirname(os.path.abspath(__file__))
+        return subprocess.check_output(['git', 'rev-parse', 'HEAD'], cwd=path,
+                                       stderr=open(os.devnull, 'w')).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def get_environment():
+    blas_info = np.__config__.get_info('blas_opt_info')
+    return {'python': sys.version.split()[0],
+            'numpy': np.__version__,
+            'blas': blas_info.get('libraries'),
+            'machine': platform.machine(),
+            'processor': platform.processor(),
+            'cpu_count': os.sysconf('SC_NPROCESSORS_ONLN'),
+            'threads': {name: os.environ.get(name) for name in
+                        ['OMP_NUM_THREADS', 'OPENBLAS_NUM_THREADS', 'MKL_NUM_THREADS']},
+            'revision': get_git_revision(),
+            'date': time.strftime('%Y-%m-%d %H:%M:%S')}
+
+
+def save_results(path, results):
+    with open(path, 'w') as f:
+        json.dump({'environment': get_environment(), 'results': results},
+                  f, indent=1, sort_keys=True)
+
+
+def load_results(path):
+    with open(path) as f:
+        return json.load(f)['results']
\ No newline at end of file
@@ -0,0 +1,78 @@
+# ----------------------------------------------------------------------------
+# Copyright 2015 Grammarly, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ----------------------------------------------------------------------------
+"""
+Compares two result files of ``benchmarks/run.py`` and flags benchmarks,
+which time changed by more than the threshold. The minimum over rounds is
+compared by default, it is the least sensitive to background load. Exits with status 1
+when there are regressions.
+
+    python benchmarks/compare.py base.json new.json --threshold 0.1
+"""
+import sys
+import argparse
+from common import load_results
+
+
+def compare(base_results, new_results, threshold, statistic='min'):
+    """
+    Returns list of ``(name, base_time, new_time, ratio, status)`` tuples,
+    where status is one of ``'regression'``, ``'improvement'``, ``''``,
+    ``'added'`` or ``'removed'``.
+    """
+    rows = []
+    for name in sorted(set(base_results) | set(new_results)):
+        if name not in new_results:
+            rows.append((name, base_results[name][statistic], None, None, 'removed'))
+        elif name not in base_results:
+            rows.append((name, None, new_results[name][statistic], None, 'added'))
+        else:
+            base_time = base_results[name][statistic]
+            new_time = new_results[name][statistic]
+            ratio = new_time / base_time
+            if ratio > 1.0 + threshold:
+                status = 'regression'
+            elif ratio < 1.0 / (1.0 + threshold):
+                status = 'improvement'
+            else:
+                status = ''
+            rows.append((name, base_time, new_time, ratio, status))
+    return rows
+
+
+def format_time(t):
+    return '{:12.3f}'.format(t * 1e6) if t is not None else '{:>12s}'.format('-')
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('base')
+    parser.add_argument('new')
+    parser.add_argument('--threshold', type=float, default=0.1,
+                        help='relative change of the time to flag')
+    parser.add_argument('--statistic', choices=['min', 'median'], default='min')
+    parser.add_argument('--all', action='store_true', help='print unchanged benchmarks too')
+    args = parser.parse_args()
+
+    rows = compare(load_results(args.base), load_results(args.new), args.threshold, args.statistic)
+    print '{:60s} {:>12s} {:>12s} {:>8s}'.format('benchmark', 'base, us', 'new, us', 'ratio')
+    for name, base_time, new_time, ratio, status in rows:
+        if status or args.all:
+            ratio = '{:8.3f}'.format(ratio) if ratio is not None else '{:>8s}'.format('-')
+            print '{:60s} {} {} {} {}'.format(name, format_time(base_time), format_time(new_time), ratio, status)
+    regressions = [row for row in rows if row[4] == 'regression']
+    print '{} regressions, {} improvements out of {} benchmarks'.\
+        format(len(regressions), sum(row[4] == 'improvement' for row in rows), len(rows))
+    sys.exit(1 if regressions else 0)
\ No newline at end of file
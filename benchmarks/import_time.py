@@ -0,0 +1,87 @@
+# ----------------------------------------------------------------------------
+# Copyright 2015 Grammarly, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ----------------------------------------------------------------------------
+"""
+Import time of quagga packages with the CPU backend. Every import runs in
+a fresh interpreter, so that modules are not cached between rounds, and
+reports which CUDA modules it has loaded, there must be none.
+
+    python benchmarks/import_time.py
+"""
+import os
+import re
+import sys
+import json
+import argparse
+import subprocess
+import numpy as np
+from collections import OrderedDict
+
+
+PACKAGES = ['quagga', 'quagga.matrix', 'quagga.context', 'quagga.connector',
+            'quagga.blocks', 'quagga.learning']
+# numpy alone is imported as a reference of what is out of our hands
+BASELINE = 'numpy'
+
+_CHILD = """
+import sys
+import json
+from timeit import default_timer
+t = default_timer()
+import {}
+elapsed = default_timer() - t
+cuda_modules = sorted(name for name in sys.modules
+                      if sys.modules[name] and ('cuda' in name or 'Gpu' in name))
+print json.dumps({{'time': elapsed, 'cuda_modules': cuda_modules}})
+"""
+
+
+def import_in_fresh_process(package, backend='cpu'):
+    path = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    env = dict(os.environ, QUAGGA_BACKEND=backend)
+    env['PYTHONPATH'] = os.pathsep.join(filter(None, [path, env.get('PYTHONPATH')]))
+    output = subprocess.check_output([sys.executable, '-c', _CHILD.format(package)], env=env)
+    return json.loads(output.splitlines()[-1])
+
+
+def run(packages=PACKAGES, pattern=None, repeat=7):
+    results = OrderedDict()
+    for package in [BASELINE] + packages:
+        key = 'import/{}'.format(package)
+        if pattern and not re.search(pattern, key):
+            continue
+        times = []
+        for _ in xrange(repeat):
+            r = import_in_fresh_process(package)
+            if r['cuda_modules']:
+                raise AssertionError('import {} with the CPU backend loads {}'.
+                                     format(package, ', '.join(r['cuda_modules'])))
+            times.append(r['time'])
+        results[key] = {'median': float(np.median(times)),
+                        'min': float(np.min(times)),
+                        'std': float(np.std(times)),
+                        'repeat': repeat,
+                        'number': 1}
+    return results
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--filter')
+    parser.add_argument('--repeat', type=int, default=7)
+    args = parser.parse_args()
+
+    for key, r in run(pattern=args.filter, repeat=args.repeat).iteritems():
+        print '{:40s} {:12.3f} ms'.format(key, r['median'] * 1e3)
@@ -0,0 +1,70 @@
+# ----------------------------------------------------------------------------
+# Copyright 2015 Grammarly, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ----------------------------------------------------------------------------
+"""
+Training iterations per second and memory of the character-level LM with
+a plain LSTM layer and with an LSTMP layer of the same cell size, whose
+output is projected to a smaller dimension. Memory is the live tracked
+memory by category after one training iteration.
+
+    python benchmarks/lstmp.py --dim 1024 --proj-dim 256
+"""
+import argparse
+from common import measure
+from models import get_char_lstm_lm
+
+
+def run(batch_size, seq_len, dim, proj_dim, repeat):
+    from quagga.matrix import MemoryTracker
+
+    tracker = MemoryTracker()
+    tracker.enable()
+    try:
+        model, observers = get_char_lstm_lm(batch_size, seq_len, dim=dim, proj_dim=proj_dim)
+
+        def iteration():
+            model.fprop()
+            model.bprop()
+            for observer in observers:
+                observer.notify()
+        iteration()
+        memory = tracker.get_breakdown('category')
+        result = measure(iteration, repeat, min_time=0.5)
+        result['memory'] = memory
+        result['total_memory'] = tracker.live_bytes
+        return result
+    finally:
+        tracker.disable()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--batch-size', type=int, default=64)
+    parser.add_argument('--seq-len', type=int, default=64)
+    parser.add_argument('--dim', type=int, default=1024)
+    parser.add_argument('--proj-dim', type=int, nargs='+', default=[128, 256, 512])
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    import quagga
+    from quagga.matrix import MemoryTracker
+    quagga.processor_type = 'cpu'
+    mb = 2.0 ** 20
+    print '{:12s} {:>10s} {}'.format('', 'it/s', ' '.join('{:>16s}'.format(c) for c in MemoryTracker.categories + ['total']))
+    for proj_dim in [None] + args.proj_dim:
+        r = run(args.batch_size, args.seq_len, args.dim, proj_dim, args.repeat)
+        memory = [r['memory'].get(c, 0) for c in MemoryTracker.categories] + [r['total_memory']]
+        name = 'lstmp {}'.format(proj_dim) if proj_dim else 'lstm'
+        print '{:12s} {:10.2f} {}'.format(name, 1.0 / r['median'], ' '.join('{:13.2f} MB'.format(m / mb) for m in memory))
@@ -0,0 +1,188 @@
+# ----------------------------------------------------------------------------
+# Copyright 2015 Grammarly, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ----------------------------------------------------------------------------
+"""
+Micro-benchmarks of CpuMatrix methods on the shapes used by blocks: a batch
+of ``batch_size`` rows by ``dim`` columns, LSTM gates of ``4 * dim``
+columns, an embedding table of ``vocab_size`` rows and sequences of
+``seq_len`` matrices.
+
+    python benchmarks/matrix_ops.py --filter dot
+"""
+import re
+import inspect
+import argparse
+import numpy as np
+from common import measure
+from collections import OrderedDict
+
+
+SHAPES = [(1, 128), (32, 128), (64, 256), (128, 512)]
+VOCAB_SIZE = 10000
+SEQ_LEN = 8
+
+
+def get_cases(batch_size, dim):
+    from quagga.context import Context
+    from quagga.matrix import CpuMatrix
+
+    rng = np.random.RandomState(42)
+    context = Context()
+    B, D, V, T = batch_size, dim, VOCAB_SIZE, SEQ_LEN
+
+    def rand(nrows, ncols):
+        return CpuMatrix.from_npa(rng.rand(nrows, ncols).astype(np.float32))
+
+    def randint(high, nrows, ncols):
+        return CpuMatrix.from_npa(rng.randint(high, size=(nrows, ncols)).astype(np.int32))
+
+    x, y, out, der = rand(B, D), rand(B, D), rand(B, D), rand(B, D)
+    one = CpuMatrix.from_npa(np.ones((B, D), np.float32))
+    half_x = rand(B, D / 2)
+    xy = rand(B, 2 * D)
+    x_over_y = rand(2 * B, D)
+    row = rand(1, D)
+    col = rand(B, 1)
+    mask = CpuMatrix.from_npa((rng.rand(B, 1) < 0.8).astype(np.float32))
+    zifo, zifo_out, zifo_der = rand(B, 4 * D), rand(B, 4 * D), rand(B, 4 * D)
+    W, dW = rand(D, 4 * D), rand(D, 4 * D)
+    embd_W = rand(V, D)
+    embd_W_T = rand(D, V)
+    row_indxs = randint(V, B, 1)
+    rows_indxs = randint(V, B, T)
+    column_indxs = randint(D, D / 2, 1)
+    labels = randint(D, B, 1)
+    argmax_out = randint(D, B, 1)
+    lengths = randint(T + 1, B, 1)
+    seq_mask = rand(B, T)
+    xs = [rand(B, D) for _ in xrange(T)]
+    ys = [rand(B, D) for _ in xrange(T)]
+    xys = [rand(B, 2 * D) for _ in xrange(T)]
+    npa = rng.rand(B, D).astype(np.float32)
+    generator = CpuMatrix.get_random_generator(42)
+
+    cases = OrderedDict()
+    cases['empty'] = lambda: CpuMatrix.empty(B, D)
+    cases['empty_like'] = lambda: CpuMatrix.empty_like(x)
+    cases['from_npa'] = lambda: CpuMatrix.from_npa(npa)
+    cases['get_random_generator'] = lambda: CpuMatrix.get_random_generator(42)
+    cases['to_host'] = lambda: x.to_host()
+    cases['assign'] = lambda: out.assign(context, x)
+    cases['assign_npa'] = lambda: out.assign_npa(context, npa)
+    cases['fill'] = lambda: out.fill(context, 0.0)
+    cases['sync_fill'] = lambda: out.sync_fill(0.0)
+    cases['slice_columns'] = lambda: x.slice_columns(context, column_indxs, half_x)
+    cases['add_scaled_columns_slice'] = lambda: out.add_scaled_columns_slice(context, column_indxs, 1e-3, half_x)
+    cases['add_columns_slice'] = lambda: out.add_columns_slice(context, column_indxs, half_x)
+    cases['slice_columns_and_transpose'] = lambda: embd_W_T.slice_columns_and_transpose(context, row_indxs, out)
+    cases['slice_rows'] = lambda: embd_W.slice_rows(context, row_indxs, out)
+    cases['add_scaled_rows_slice'] = lambda: embd_W.add_scaled_rows_slice(context, row_indxs, 1e-3, x)
+    cases['add_rows_slice'] = lambda: embd_W.add_rows_slice(context, row_indxs, x)
+    cases['slice_rows_batch'] = lambda: embd_W.slice_rows_batch(context, rows_indxs, xs)
+    cases['add_scaled_rows_batch_slice'] = lambda: embd_W.add_scaled_rows_batch_slice(context, rows_indxs, 1e-3, xs)
+    cases['add_rows_batch_slice'] = lambda: embd_W.add_rows_batch_slice(context, rows_indxs, xs)
+    cases['assign_hstack'] = lambda: xy.assign_hstack(context, [x, y])
+    cases['hsplit'] = lambda: xy.hsplit(context, [out, der])
+    cases['batch_hstack'] = lambda: CpuMatrix.batch_hstack(context, xs, ys, xys)
+    cases['batch_hsplit'] = lambda: CpuMatrix.batch_hsplit(context, xys, xs, ys)
+    cases['assign_vstack'] = lambda: x_over_y.assign_vstack(context, [x, y])
+    cases['vsplit'] = lambda: x_over_y.vsplit(context, [out, der])
+    cases['assign_sequential_mean_pooling'] = lambda: out.assign_sequential_mean_pooling(context, xs)
+    cases['assign_sequential_sum_pooling'] = lambda: out.assign_sequential_sum_pooling(context, xs)
+    cases['sequentially_tile'] = lambda: CpuMatrix.sequentially_tile(context, x, ys)
+    cases['tile'] = lambda: out.tile(context, 0, row)
+    cases['assign_repeat'] = lambda: out.assign_repeat(context, row, B, 0)
+    cases['add_repeat_derivative'] = lambda: row.add_repeat_derivative(context, x, B, 0)
+    cases['dropout'] = lambda: x.dropout(context, generator, 0.5, out)
+    cases['add_gaussian_noise'] = lambda: x.add_gaussian_noise(context, generator, 0.0, 1.0, out)
+    cases['assign_mask_zeros'] = lambda: out.assign_mask_zeros(context, x, y)
+    cases['add_mask_zeros'] = lambda: out.add_mask_zeros(context, x, y)
+    cases['assign_masked_addition'] = lambda: out.assign_masked_addition(context, mask, x, y)
+    cases['add_hprod_one_minus_mask'] = lambda: out.add_hprod_one_minus_mask(context, mask, x)
+    cases['mask_column_numbers_row_wise'] = lambda: seq_mask.mask_column_numbers_row_wise(context, lengths)
+    cases['clip'] = lambda: x.clip(context, 0.1, 0.9, out)
+    cases['tanh'] = lambda: x.tanh(context, out, der)
+    cases['sigmoid'] = lambda: x.sigmoid(context, out, der)
+    cases['tanh_sigm'] = lambda: zifo.tanh_sigm(context, zifo_out, zifo_der, axis=1)
+    cases['relu'] = lambda: x.relu(context, out, der)
+    cases['softmax'] = lambda: x.softmax(context, out)
+    cases['add_softmax_derivative'] = lambda: out.add_softmax_derivative(context, x, y)
+    cases['assign_softmax_ce_derivative'] = lambda: out.assign_softmax_ce_derivative(context, x, labels)
+    cases['add_softmax_ce_derivative'] = lambda: out.add_softmax_ce_derivative(context, x, labels)
+    cases['scale'] = lambda: x.scale(context, 0.5, out)
+    cases['assign_scaled_addition'] = lambda: out.assign_scaled_addition(context, 0.5, x, y)
+    cases['assign_add'] = lambda: out.assign_add(context, x, y)
+    cases['assign_scaled_subtraction'] = lambda: out.assign_scaled_subtraction(context, 0.5, x, y)
+    cases['add_scaled_subtraction'] = lambda: out.add_scaled_subtraction(context, 1e-3, x, y)
+    cases['assign_sub'] = lambda: out.assign_sub(context, x, y)
+    cases['add_scaled'] = lambda: out.add_scaled(context, 1e-3, x)
+    cases['add'] = lambda: out.add(context, x)
+    cases['sub'] = lambda: out.sub(context, x)
+    cases['assign_sum'] = lambda: out.assign_sum(context, xs)
+    cases['add_sum'] = lambda: out.add_sum(context, xs)
+    cases['hprod'] = lambda: out.hprod(context, one)
+    cases['add_hprod'] = lambda: out.add_hprod(context, x, y)
+    cases['add_scaled_hprod'] = lambda: out.add_scaled_hprod(context, x, y, 0.5, 0.5)
+    cases['assign_hprod'] = lambda: out.assign_hprod(context, x, y)
+    cases['assign_sum_hprod'] = lambda: out.assign_sum_hprod(context, x, y, der, y)
+    cases['assign_hprod_sum'] = lambda: col.assign_hprod_sum(context, x, y)
+    cases['add_scaled_div_sqrt'] = lambda: out.add_scaled_div_sqrt(context, 1e-3, x, y, 1e-8)
+    cases['assign_dot'] = lambda: zifo.assign_dot(context, x, W)
+    cases['add_dot'] = lambda: zifo.add_dot(context, x, W)
+    cases['add_dot_TN'] = lambda: dW.add_dot(context, x, zifo, 'T')
+    cases['add_dot_NT'] = lambda: out.add_dot(context, zifo, W, 'N', 'T')
+    cases['argmax'] = lambda: x.argmax(context, argmax_out)
+    return cases
+
+
+def get_uncovered_methods():
+    """
+    Public CpuMatrix methods without a benchmark case.
+    """
+    from quagga.matrix import CpuMatrix
+    cases = get_cases(4, 4)
+    methods = set()
+    for name, member in inspect.getmembers(CpuMatrix):
+        if not name.startswith('_') and (inspect.ismethod(member) or inspect.isfunction(member)):
+            methods.add(name)
+    covered = set(name.split('_TN')[0].split('_NT')[0] for name in cases)
+    return sorted(methods - covered - {'str_to_dtype', 'array_to_dtypes', 'get_setable_attributes',
+                                       'same_shape', 'from_memmap', 'to_shared_memory'})
+
+
+def run(shapes=SHAPES, pattern=None, repeat=7, min_time=0.05):
+    results = OrderedDict()
+    for batch_size, dim in shapes:
+        for name, function in get_cases(batch_size, dim).iteritems():
+            key = 'matrix/{}/{}x{}'.format(name, batch_size, dim)
+            if pattern and not re.search(pattern, key):
+                continue
+            results[key] = measure(function, repeat, min_time)
+    return results
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--filter')
+    parser.add_argument('--repeat', type=int, default=7)
+    args = parser.parse_args()
+
+    import quagga
+    quagga.processor_type = 'cpu'
+    uncovered = get_uncovered_methods()
+    if uncovered:
+        print 'methods without benchmark: {}'.format(', '.join(uncovered))
+    for key, r in run(pattern=args.filter, repeat=args.repeat).iteritems():
+        print '{:60s} {:12.3f} us'.format(key, r['median'] * 1e6)
\ No newline at end of file
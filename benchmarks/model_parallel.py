@@ -0,0 +1,70 @@
+# ----------------------------------------------------------------------------
+# Copyright 2015 Grammarly, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ----------------------------------------------------------------------------
+"""
+Training iterations per second of the deep character-level LSTM LM with
+every layer on its own CPU device, each device runs on a worker thread
+started with CpuContext.start_workers. The baseline runs all layers on
+device 0 in the calling thread. The wavefront run issues the steps of the
+layers in diagonal wavefronts with WavefrontBlock, so that the workers
+run different layers at the same time.
+
+    OMP_NUM_THREADS=1 python benchmarks/model_parallel.py --layers 2 4
+"""
+import argparse
+from common import measure
+from models import get_deep_char_lstm_lm
+
+
+def run(num_layers, parallel, batch_size, seq_len, dim, repeat, wavefront=False):
+    from quagga.context import CpuWorker
+    from quagga.context import CpuContext
+
+    device_ids = range(1, num_layers + 1) if parallel else [0] * num_layers
+    if parallel:
+        CpuContext.start_workers(device_ids)
+    try:
+        model, observers = get_deep_char_lstm_lm(device_ids, batch_size=batch_size,
+                                                 seq_len=seq_len, dim=dim, wavefront=wavefront)
+
+        def iteration():
+            model.fprop()
+            model.bprop()
+            for observer in observers:
+                observer.notify()
+            CpuWorker.synchronize_all()
+        return measure(iteration, repeat, min_time=0.5)
+    finally:
+        CpuContext.stop_workers()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--layers', type=int, nargs='+', default=[2, 4])
+    parser.add_argument('--batch-size', type=int, default=64)
+    parser.add_argument('--seq-len', type=int, default=64)
+    parser.add_argument('--dim', type=int, default=256)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    import quagga
+    quagga.processor_type = 'cpu'
+    for num_layers in args.layers:
+        times = [run(num_layers, parallel, args.batch_size, args.seq_len, args.dim, args.repeat, wavefront)['median']
+                 for parallel, wavefront in [(False, False), (True, False), (True, True)]]
+        print '{:2d} layers: {:8.2f} it/s on one device, {:8.2f} it/s on {} workers, speedup {:.2f}, ' \
+              '{:8.2f} it/s in wavefronts, speedup {:.2f}'.\
+            format(num_layers, 1.0 / times[0], 1.0 / times[1], num_layers, times[0] / times[1],
+                   1.0 / times[2], times[0] / times[2])
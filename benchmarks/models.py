@@ -0,0 +1,295 @@
+# ----------------------------------------------------------------------------
+# Copyright 2015 Grammarly, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ----------------------------------------------------------------------------
+"""
+End-to-end training iterations per second of the models from
+``examples/`` on synthetic data: the MNIST MLP and the character-level
+LSTM language model.
+
+    python benchmarks/models.py
+"""
+import re
+import argparse
+import numpy as np
+from common import measure
+from functools import partial
+from collections import OrderedDict
+
+
+class SyntheticDataBlock(object):
+    def __init__(self, *connectors):
+        self.connectors = connectors
+
+    def fprop(self):
+        for connector in self.connectors:
+            connector.fprop()
+
+
+def get_mnist_mlp(batch_size=1024):
+    from quagga import Model
+    from quagga.matrix import Matrix
+    from quagga.blocks import DotBlock
+    from quagga.blocks import DropoutBlock
+    from quagga.connector import Connector
+    from quagga.blocks import SoftmaxCeBlock
+    from quagga.blocks import NonlinearityBlock
+    from quagga.blocks import ParameterContainer
+    from quagga.learning.steps import NagStep
+    from quagga.utils.initializers import Constant
+    from quagga.utils.initializers import Orthogonal
+    from quagga.learning.policies import FixedValuePolicy
+
+    rng = np.random.RandomState(42)
+    p = ParameterContainer(first_dot_block_W={'init': Orthogonal(784, 1024), 'device_id': 0},
+                           first_dot_block_b={'init': Constant(1, 1024), 'device_id': 0},
+                           second_dot_block_W={'init': Orthogonal(1024, 512), 'device_id': 0},
+                           second_dot_block_b={'init': Constant(1, 512), 'device_id': 0},
+                           sce_dot_block_W={'init': Orthogonal(512, 10), 'device_id': 0},
+                           sce_dot_block_b={'init': Constant(1, 10), 'device_id': 0})
+    x = Connector(Matrix.from_npa(rng.rand(batch_size, 784).astype(np.float32)))
+    y = Connector(Matrix.from_npa(rng.randint(10, size=(batch_size, 1)).astype(np.int32)))
+    data_block = SyntheticDataBlock(x, y)
+    input_data_dropout_block = DropoutBlock(0.2, x)
+    first_dot_block = DotBlock(p['first_dot_block_W'], p['first_dot_block_b'], input_data_dropout_block.output)
+    first_nonl_block = NonlinearityBlock(first_dot_block.output, 'relu')
+    first_dropout_block = DropoutBlock(0.5, first_nonl_block.output)
+    second_dot_block = DotBlock(p['second_dot_block_W'], p['second_dot_block_b'], first_dropout_block.output)
+    second_nonl_block = NonlinearityBlock(second_dot_block.output, 'relu')
+    second_dropout_block = DropoutBlock(0.5, second_nonl_block.output)
+    sce_dot_block = DotBlock(p['sce_dot_block_W'], p['sce_dot_block_b'], second_dropout_block.output)
+    sce_block = SoftmaxCeBlock(sce_dot_block.output, y)
+    model = Model([p, data_block, input_data_dropout_block,
+                   first_dot_block, first_nonl_block, first_dropout_block,
+                   second_dot_block, second_nonl_block, second_dropout_block,
+                   sce_dot_block, sce_block])
+    nag_step = NagStep(p.trainable_parameters.values(), FixedValuePolicy(0.01), FixedValuePolicy(0.95))
+    return model, [nag_step]
+
+
+def get_char_lstm_lm(batch_size=64, seq_len=64, vocab_size=100, embd_dim=128, dim=256, proj_dim=None):
+    """
+    Character-level LM with one LSTM layer. With ``proj_dim`` the layer is
+    an LSTMP, whose output is projected to ``proj_dim`` before it is fed
+    back and to the softmax.
+    """
+    from quagga import Model
+    from quagga.utils import List
+    from quagga.matrix import Matrix
+    from quagga.blocks import DotBlock
+    from quagga.blocks import LstmBlock
+    from quagga.blocks import LstmpBlock
+    from quagga.blocks import RepeatBlock
+    from quagga.connector import Connector
+    from quagga.blocks import SequencerBlock
+    from quagga.blocks import SoftmaxCeBlock
+    from quagga.blocks import RowSlicingBlock
+    from quagga.blocks import ParameterContainer
+    from quagga.learning.steps import NagStep
+    from quagga.utils.initializers import Constant
+    from quagga.utils.initializers import Orthogonal
+    from quagga.learning.policies import FixedValuePolicy
+
+    rng = np.random.RandomState(42)
+    h_dim = proj_dim if proj_dim else dim
+    get_orth_W = Orthogonal(embd_dim, dim)
+    get_orth_R = Orthogonal(h_dim, dim)
+    definitions = {'embd_W': {'init': Orthogonal(vocab_size, embd_dim), 'device_id': 0},
+                   'lstm_c0': {'init': Constant(1, dim), 'device_id': 0},
+                   'lstm_h0': {'init': Constant(1, h_dim), 'device_id': 0},
+                   'lstm_W': {'init': lambda: np.hstack([get_orth_W() for _ in xrange(4)]), 'device_id': 0},
+                   'lstm_R': {'init': lambda: np.hstack([get_orth_R() for _ in xrange(4)]), 'device_id': 0},
+                   'lstm_b': {'init': Constant(1, 4 * dim), 'device_id': 0},
+                   'sce_dot_block_W': {'init': Orthogonal(h_dim, vocab_size), 'device_id': 0},
+                   'sce_dot_block_b': {'init': Constant(1, vocab_size), 'device_id': 0}}
+    if proj_dim:
+        definitions['lstm_P'] = {'init': Orthogonal(dim, proj_dim), 'device_id': 0}
+    p = ParameterContainer(**definitions)
+    x = Connector(Matrix.from_npa(rng.randint(vocab_size, size=(batch_size, seq_len)).astype(np.int32)))
+    y_matrix = Matrix.from_npa(rng.randint(vocab_size, size=(batch_size, seq_len)).astype(np.int32))
+    y = List([Connector(y_matrix[:, i]) for i in xrange(seq_len)], x.ncols)
+    mask_matrix = Matrix.from_npa(np.ones((batch_size, seq_len), np.float32))
+    mask = List([Connector(mask_matrix[:, i]) for i in xrange(seq_len)], x.ncols)
+    data_block = SyntheticDataBlock(x, y, mask)
+    embd_block = RowSlicingBlock(p['embd_W'], x)
+    c_repeat_block = RepeatBlock(p['lstm_c0'], x.nrows, axis=0)
+    h_repeat_block = RepeatBlock(p['lstm_h0'], x.nrows, axis=0)
+    if proj_dim:
+        block_class = LstmpBlock
+        params = [p['lstm_W'], p['lstm_R'], p['lstm_b'], p['lstm_P'], None]
+    else:
+        block_class = LstmBlock
+        params = [p['lstm_W'], p['lstm_R'], p['lstm_b'], None]
+    lstm_block = SequencerBlock(block_class=block_class,
+                                params=params,
+                                sequences=[embd_block.output, mask],
+                                output_names=['h'],
+                                prev_names=['c', 'h'],
+                                paddings=[c_repeat_block.output, h_repeat_block.output],
+                                reverse=False)
+    sce_dot_block = SequencerBlock(block_class=DotBlock,
+                                   params=[p['sce_dot_block_W'], p['sce_dot_block_b']],
+                                   sequences=[lstm_block.h],
+                                   output_names=['output'])
+    sce_block = SequencerBlock(block_class=SoftmaxCeBlock,
+                               params=[],
+                               sequences=[sce_dot_block.output, y, mask])
+    model = Model([p, data_block, embd_block, c_repeat_block, h_repeat_block,
+                   lstm_block, sce_dot_block, sce_block])
+    nag_step = NagStep(p.trainable_parameters.values(), FixedValuePolicy(0.01), FixedValuePolicy(0.95))
+    return model, [nag_step]
+
+
+def get_deep_char_lstm_lm(device_ids, batch_size=64, seq_len=64, vocab_size=100, embd_dim=128, dim=256,
+                          wavefront=False):
+    """
+    Character-level LM with one LSTM layer per element of ``device_ids``,
+    the layer is placed on that device. The embedding is on the device of
+    the first layer, the output softmax on the device of the last one.
+    With ``wavefront`` the LSTM layers are run by a WavefrontBlock.
+    """
+    from quagga import Model
+    from quagga.blocks import LstmBlock
+    from quagga.blocks import SequencerBlock
+    from quagga.blocks import WavefrontBlock
+    from quagga.learning.steps import NagStep
+    from quagga.learning.policies import FixedValuePolicy
+
+    p = get_deep_char_lstm_lm_parameters(device_ids, vocab_size, embd_dim, dim)
+    stages = get_deep_char_lstm_lm_stages(p, device_ids, np.random.RandomState(42),
+                                          batch_size, seq_len, vocab_size)
+    blocks = sum(stages, [])
+    if wavefront:
+        layers = [block for block in blocks if isinstance(block, SequencerBlock) and
+                  isinstance(block.blocks[0], LstmBlock)]
+        k = blocks.index(layers[-1])
+        blocks = [block for block in blocks[:k] if block not in layers] + \
+                 [WavefrontBlock(layers)] + blocks[k + 1:]
+    model = Model([p] + blocks)
+    nag_step = NagStep(p.trainable_parameters.values(), FixedValuePolicy(0.01), FixedValuePolicy(0.95))
+    return model, [nag_step]
+
+
+def get_deep_char_lstm_lm_parameters(device_ids, vocab_size=100, embd_dim=128, dim=256):
+    from quagga.blocks import ParameterContainer
+    from quagga.utils.initializers import Constant
+    from quagga.utils.initializers import Orthogonal
+
+    first_device_id, last_device_id = device_ids[0], device_ids[-1]
+    definitions = {'embd_W': {'init': Orthogonal(vocab_size, embd_dim), 'device_id': first_device_id},
+                   'sce_dot_block_W': {'init': Orthogonal(dim, vocab_size), 'device_id': last_device_id},
+                   'sce_dot_block_b': {'init': Constant(1, vocab_size), 'device_id': last_device_id}}
+    for k, device_id in enumerate(device_ids):
+        input_dim = embd_dim if k == 0 else dim
+        get_orth_W = Orthogonal(input_dim, dim)
+        get_orth_R = Orthogonal(dim, dim)
+        definitions['lstm{}_c0'.format(k)] = {'init': Constant(1, dim), 'device_id': device_id}
+        definitions['lstm{}_h0'.format(k)] = {'init': Constant(1, dim), 'device_id': device_id}
+        definitions['lstm{}_W'.format(k)] = {'init': lambda get_orth_W=get_orth_W: np.hstack([get_orth_W() for _ in xrange(4)]),
+                                             'device_id': device_id}
+        definitions['lstm{}_R'.format(k)] = {'init': lambda get_orth_R=get_orth_R: np.hstack([get_orth_R() for _ in xrange(4)]),
+                                             'device_id': device_id}
+        definitions['lstm{}_b'.format(k)] = {'init': Constant(1, 4 * dim), 'device_id': device_id}
+    return ParameterContainer(**definitions)
+
+
+def get_deep_char_lstm_lm_stages(p, device_ids, rng, batch_size=64, seq_len=64, vocab_size=100):
+    """
+    Builds blocks of the deep character-level LM on synthetic data with
+    parameters ``p``. Returns a list of blocks for every layer, the first
+    list also has the data and the embedding blocks, the last one the
+    output softmax.
+    """
+    from quagga.utils import List
+    from quagga.matrix import Matrix
+    from quagga.blocks import DotBlock
+    from quagga.blocks import LstmBlock
+    from quagga.blocks import RepeatBlock
+    from quagga.connector import Connector
+    from quagga.blocks import SequencerBlock
+    from quagga.blocks import SoftmaxCeBlock
+    from quagga.blocks import RowSlicingBlock
+
+    first_device_id, last_device_id = device_ids[0], device_ids[-1]
+    x = Connector(Matrix.from_npa(rng.randint(vocab_size, size=(batch_size, seq_len)).astype(np.int32)))
+    y_matrix = Matrix.from_npa(rng.randint(vocab_size, size=(batch_size, seq_len)).astype(np.int32))
+    y = List([Connector(y_matrix[:, i]) for i in xrange(seq_len)], x.ncols)
+    mask_matrix = Matrix.from_npa(np.ones((batch_size, seq_len), np.float32))
+    mask = List([Connector(mask_matrix[:, i]) for i in xrange(seq_len)], x.ncols)
+    data_block = SyntheticDataBlock(x, y, mask)
+    embd_block = RowSlicingBlock(p['embd_W'], x)
+    stages = [[data_block, embd_block]]
+    h = embd_block.output
+    for k, device_id in enumerate(device_ids):
+        c_repeat_block = RepeatBlock(p['lstm{}_c0'.format(k)], x.nrows, axis=0, device_id=device_id)
+        h_repeat_block = RepeatBlock(p['lstm{}_h0'.format(k)], x.nrows, axis=0, device_id=device_id)
+        lstm_block = SequencerBlock(block_class=LstmBlock,
+                                    params=[p['lstm{}_W'.format(k)], p['lstm{}_R'.format(k)],
+                                            p['lstm{}_b'.format(k)], None],
+                                    sequences=[h, mask],
+                                    output_names=['h'],
+                                    prev_names=['c', 'h'],
+                                    paddings=[c_repeat_block.output, h_repeat_block.output],
+                                    reverse=False,
+                                    device_id=device_id)
+        if k:
+            stages.append([])
+        stages[-1].extend([c_repeat_block, h_repeat_block, lstm_block])
+        h = lstm_block.h
+    sce_dot_block = SequencerBlock(block_class=DotBlock,
+                                   params=[p['sce_dot_block_W'], p['sce_dot_block_b']],
+                                   sequences=[h],
+                                   output_names=['output'],
+                                   device_id=last_device_id)
+    sce_block = SequencerBlock(block_class=SoftmaxCeBlock,
+                               params=[],
+                               sequences=[sce_dot_block.output, y, mask],
+                               device_id=last_device_id)
+    stages[-1].extend([sce_dot_block, sce_block])
+    return stages
+
+
+MODELS = OrderedDict([('mnist_mlp', get_mnist_mlp),
+                      ('char_lstm_lm', get_char_lstm_lm),
+                      ('char_lstmp_lm', partial(get_char_lstm_lm, dim=512, proj_dim=128))])
+
+
+def run(pattern=None, repeat=5, min_time=0.5):
+    results = OrderedDict()
+    for name, get_model in MODELS.iteritems():
+        key = 'model/{}'.format(name)
+        if pattern and not re.search(pattern, key):
+            continue
+        model, observers = get_model()
+
+        def iteration():
+            model.fprop()
+            model.bprop()
+            for observer in observers:
+                observer.notify()
+        results[key] = measure(iteration, repeat, min_time)
+        results[key]['iterations_per_sec'] = 1.0 / results[key]['median']
+    return results
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--filter')
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    import quagga
+    quagga.processor_type = 'cpu'
+    for key, r in run(pattern=args.filter, repeat=args.repeat).iteritems():
+        print '{:60s} {:12.3f} it/s'.format(key, r['iterations_per_sec'])
\ No newline at end of file
@@ -0,0 +1,93 @@
+# ----------------------------------------------------------------------------
+# Copyright 2015 Grammarly, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ----------------------------------------------------------------------------
+"""
+Training iterations per second of the deep character-level LSTM LM with
+every layer on its own CPU device, when the whole batch flows through the
+layers at once and when it is split into micro-batches with the GPipe and
+1F1B schedules of PipelineModel. Utilization is the fraction of the
+iteration time the worker of a stage was running work.
+
+    OMP_NUM_THREADS=1 python benchmarks/pipeline.py --layers 4 --micro-batches 4 8
+"""
+import argparse
+import numpy as np
+from common import measure
+from models import get_deep_char_lstm_lm_stages
+from models import get_deep_char_lstm_lm_parameters
+
+
+def run(num_layers, num_micro_batches, schedule, batch_size, seq_len, dim, repeat):
+    from quagga import Model
+    from quagga import PipelineModel
+    from quagga.context import CpuWorker
+    from quagga.context import CpuContext
+    from quagga.learning.steps import NagStep
+    from quagga.learning.policies import FixedValuePolicy
+
+    device_ids = range(1, num_layers + 1)
+    CpuContext.start_workers(device_ids)
+    try:
+        rng = np.random.RandomState(42)
+        p = get_deep_char_lstm_lm_parameters(device_ids, dim=dim)
+        if num_micro_batches == 1:
+            stages = get_deep_char_lstm_lm_stages(p, device_ids, rng, batch_size, seq_len)
+            model = Model([p] + sum(stages, []))
+        else:
+            micro_batch_size = batch_size // num_micro_batches
+            micro_batches = [get_deep_char_lstm_lm_stages(p, device_ids, rng, micro_batch_size, seq_len)
+                             for _ in xrange(num_micro_batches)]
+            model = PipelineModel(p, micro_batches, schedule)
+        nag_step = NagStep(p.trainable_parameters.values(), FixedValuePolicy(0.01), FixedValuePolicy(0.95))
+        workers = [CpuWorker.workers[device_id] for device_id in device_ids]
+
+        def iteration():
+            model.fprop()
+            model.bprop()
+            nag_step.notify()
+            CpuWorker.synchronize_all()
+        result = measure(iteration, repeat, min_time=0.5)
+        for worker in workers:
+            worker.busy_time = 0.0
+        iteration()
+        result['utilization'] = [worker.busy_time / result['median'] for worker in workers]
+        return result
+    finally:
+        CpuContext.stop_workers()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--layers', type=int, nargs='+', default=[4])
+    parser.add_argument('--micro-batches', type=int, nargs='+', default=[4, 8])
+    parser.add_argument('--batch-size', type=int, default=64)
+    parser.add_argument('--seq-len', type=int, default=64)
+    parser.add_argument('--dim', type=int, default=256)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    import quagga
+    quagga.processor_type = 'cpu'
+    for num_layers in args.layers:
+        configurations = [(1, 'whole batch')]
+        configurations += [(m, s) for m in args.micro_batches for s in ['gpipe', '1f1b']]
+        baseline = None
+        for num_micro_batches, schedule in configurations:
+            r = run(num_layers, num_micro_batches, schedule,
+                    args.batch_size, args.seq_len, args.dim, args.repeat)
+            baseline = baseline or r['median']
+            print '{:2d} layers, {:2d} x {:11s}: {:8.2f} it/s, speedup {:.2f}, stage utilization {}'.\
+                format(num_layers, num_micro_batches, schedule, 1.0 / r['median'], baseline / r['median'],
+                       ' '.join('{:.2f}'.format(u) for u in r['utilization']))
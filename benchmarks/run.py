@@ -0,0 +1,56 @@
+# ----------------------------------------------------------------------------
+# Copyright 2015 Grammarly, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ----------------------------------------------------------------------------
+"""
+Runs the CPU benchmark suites and writes results to JSON. For
+reproducible numbers pin BLAS threads and keep the machine idle:
+
+    OMP_NUM_THREADS=1 python benchmarks/run.py --output base.json
+    OMP_NUM_THREADS=1 python benchmarks/run.py --output new.json
+    python benchmarks/compare.py base.json new.json
+"""
+import blocks
+import models
+import argparse
+import matrix_ops
+import import_time
+import shape_propagation
+from common import save_results
+from collections import OrderedDict
+
+
+SUITES = OrderedDict([('matrix', matrix_ops),
+                      ('block', blocks),
+                      ('model', models),
+                      ('shape', shape_propagation),
+                      ('import', import_time)])
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--output', required=True)
+    parser.add_argument('--suites', nargs='+', choices=SUITES.keys(), default=SUITES.keys())
+    parser.add_argument('--filter', help='regular expression for benchmark names')
+    parser.add_argument('--repeat', type=int, default=7)
+    args = parser.parse_args()
+
+    import quagga
+    quagga.processor_type = 'cpu'
+    results = OrderedDict()
+    for suite_name in args.suites:
+        print 'running {} benchmarks ...'.format(suite_name)
+        results.update(SUITES[suite_name].run(pattern=args.filter, repeat=args.repeat))
+    save_results(args.output, results)
+    print '{} results are written to {}'.format(len(results), args.output)
\ No newline at end of file
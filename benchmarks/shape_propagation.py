@@ -0,0 +1,136 @@
+# ----------------------------------------------------------------------------
+# Copyright 2015 Grammarly, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ----------------------------------------------------------------------------
+"""
+Cost of changing batch size: setting ``nrows`` of a matrix with many views
+and derived shape elements followed by reading all or one of them, and
+training iterations per second of the
+character-level LSTM language model with a different batch size on every
+iteration. ``object_growth`` is the number of objects left alive after
+changing the shape 1000 times, it has to stay close to zero.
+
+    python benchmarks/shape_propagation.py
+"""
+import gc
+import re
+import argparse
+import numpy as np
+from common import measure
+from itertools import cycle
+from collections import OrderedDict
+from models import get_char_lstm_lm
+
+
+BATCH_SIZES = [64, 17, 40, 1, 33]
+NUM_VIEWS = [8, 64, 512]
+
+
+class VaryingBatchDataBlock(object):
+    def __init__(self, data_block, batch_sizes):
+        self.connectors = []
+        for connector in data_block.connectors:
+            self.connectors.extend(connector.elements if hasattr(connector, 'elements') else [connector])
+        self.batch_sizes = cycle(batch_sizes)
+
+    def fprop(self):
+        batch_size = next(self.batch_sizes)
+        for connector in self.connectors:
+            connector.nrows = batch_size
+            connector.fprop()
+
+
+def get_shape_change(num_views, read_all=True, batch_sizes=BATCH_SIZES):
+    """
+    Returns function that changes number of rows of a matrix with
+    ``num_views`` column views and derived shape elements, then reads
+    all of them or only the first one. If ``num_views`` is zero, a new
+    temporary view is created on every call instead.
+    """
+    from quagga.matrix import Matrix
+
+    m = Matrix.from_npa(np.zeros((max(batch_sizes), max(num_views, 1)), np.float32))
+    views = [m[:, i] for i in xrange(num_views)]
+    elements = [(m.nrows - i) * 2 for i in xrange(num_views)]
+    batch_sizes = cycle(batch_sizes)
+
+    def shape_change():
+        m.nrows = next(batch_sizes)
+        if not num_views:
+            m[:, 0].npa
+        elif read_all:
+            for view in views:
+                view.npa
+            for element in elements:
+                element.value
+        else:
+            views[0].npa
+            elements[0].value
+    return shape_change
+
+
+def get_object_growth(function, n=1000):
+    function()
+    gc.collect()
+    nobjects = len(gc.get_objects())
+    for _ in xrange(n):
+        function()
+    gc.collect()
+    return len(gc.get_objects()) - nobjects
+
+
+def run(pattern=None, repeat=7, min_time=0.2):
+    results = OrderedDict()
+    cases = [('new_view', 0, True)]
+    for num_views in NUM_VIEWS:
+        for read_all in [True, False]:
+            name = 'views{}_read_{}'.format(num_views, 'all' if read_all else 'one')
+            cases.append((name, num_views, read_all))
+    for name, num_views, read_all in cases:
+        key = 'shape/set_nrows/{}'.format(name)
+        if pattern and not re.search(pattern, key):
+            continue
+        shape_change = get_shape_change(num_views, read_all)
+        results[key] = measure(shape_change, repeat, min_time)
+        results[key]['object_growth'] = get_object_growth(shape_change)
+
+    key = 'shape/char_lstm_lm_varying_batch'
+    if not pattern or re.search(pattern, key):
+        from quagga import Model
+        model, observers = get_char_lstm_lm()
+        blocks = list(model.blocks)
+        blocks[1] = VaryingBatchDataBlock(blocks[1], BATCH_SIZES)
+        model = Model(blocks)
+
+        def iteration():
+            model.fprop()
+            model.bprop()
+            for observer in observers:
+                observer.notify()
+        results[key] = measure(iteration, repeat, min_time)
+        results[key]['iterations_per_sec'] = 1.0 / results[key]['median']
+        results[key]['object_growth'] = get_object_growth(iteration, 50)
+    return results
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--filter')
+    parser.add_argument('--repeat', type=int, default=7)
+    args = parser.parse_args()
+
+    import quagga
+    quagga.processor_type = 'cpu'
+    for key, r in run(pattern=args.filter, repeat=args.repeat).iteritems():
+        print '{:45s} {:12.4f} ms {:8d} objects'.format(key, 1000.0 * r['median'], r['object_growth'])
\ No newline at end of file
@@ -0,0 +1,115 @@
+# ----------------------------------------------------------------------------
+# Copyright 2015 Grammarly, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ----------------------------------------------------------------------------
+"""
+Time of a training step (fprop, bprop and the notification of a
+TrainLossTracker) of the output layers of a language model for growing
+vocabulary sizes.
+
+    python benchmarks/softmax.py --vocab-sizes 10000 50000 --filter Sampled
+"""
+import re
+import logging
+import argparse
+import numpy as np
+from common import measure
+from collections import OrderedDict
+
+
+def get_output_layers(batch_size, dim, vocab_size, num_samples):
+    """
+    Returns dict of models that compute the loss of ``x`` for targets from
+    a vocabulary of ``vocab_size`` words with Zipfian frequencies, of
+    their inputs, which derivatives are cleared before every step, and of
+    their loss blocks.
+    """
+    from quagga import Model
+    from quagga.matrix import Matrix
+    from quagga.utils import AliasSampler
+    from quagga.connector import Connector
+    from quagga.blocks import DotBlock
+    from quagga.blocks import SoftmaxCeBlock
+    from quagga.blocks import FusedSoftmaxCeBlock
+    from quagga.blocks import SampledSoftmaxCeBlock
+    from quagga.blocks import HierarchicalSoftmaxCeBlock
+
+    rng = np.random.RandomState(42)
+    counts = 1e6 / np.arange(1, vocab_size + 1)
+
+    def connector(nrows, ncols):
+        a = (rng.rand(nrows, ncols).astype(np.float32) - 0.5) * 0.1
+        return Connector(Matrix.from_npa(a), 0)
+
+    true_labels = rng.choice(vocab_size, size=(batch_size, 1), p=counts / counts.sum()).astype(np.int32)
+    true_labels = Connector(Matrix.from_npa(true_labels))
+    layers = OrderedDict()
+
+    W, b, x = connector(dim, vocab_size), connector(1, vocab_size), connector(batch_size, dim)
+    for block_class in [SoftmaxCeBlock, FusedSoftmaxCeBlock]:
+        dot_block = DotBlock(W, b, x)
+        loss_block = block_class(dot_block.output, true_labels)
+        layers[block_class.__name__] = Model([dot_block, loss_block]), [W, b, x], loss_block
+
+    W, x = connector(vocab_size, dim), connector(batch_size, dim)
+    sampler = AliasSampler.from_counts(counts, 0.75)
+    loss_block = SampledSoftmaxCeBlock(W, sampler, num_samples, x, true_labels)
+    layers['SampledSoftmaxCeBlock'] = loss_block, [W, x], loss_block
+
+    word_classes = HierarchicalSoftmaxCeBlock.get_frequency_classes(counts)
+    class_W, word_W, x = connector(np.max(word_classes) + 1, dim), connector(vocab_size, dim), connector(batch_size, dim)
+    loss_block = HierarchicalSoftmaxCeBlock(class_W, word_W, word_classes, x, true_labels)
+    layers['HierarchicalSoftmaxCeBlock'] = loss_block, [class_W, word_W, x], loss_block
+
+    true_labels.fprop()
+    return layers
+
+
+def run(vocab_sizes, batch_size, dim, num_samples, pattern=None, repeat=5):
+    from quagga.learning.observers import TrainLossTracker
+
+    logger = logging.getLogger('softmax')
+    results = OrderedDict()
+    for vocab_size in vocab_sizes:
+        for name, (layer, inputs, loss_block) in get_output_layers(batch_size, dim, vocab_size, num_samples).iteritems():
+            key = '{}/{}'.format(name, vocab_size)
+            if pattern and not re.search(pattern, key):
+                continue
+            loss_tracker = TrainLossTracker(loss_block, 100, logger)
+
+            def step():
+                for e in inputs:
+                    e.fprop()
+                layer.fprop()
+                layer.bprop()
+                loss_tracker.notify()
+            results[key] = measure(step, repeat)
+    return results
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--vocab-sizes', type=int, nargs='+', default=[10000, 50000])
+    parser.add_argument('--batch-size', type=int, default=64)
+    parser.add_argument('--dim', type=int, default=256)
+    parser.add_argument('--num-samples', type=int, default=512)
+    parser.add_argument('--filter')
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    import quagga
+    quagga.processor_type = 'cpu'
+    for key, r in run(args.vocab_sizes, args.batch_size, args.dim, args.num_samples,
+                      args.filter, args.repeat).iteritems():
+        print '{:40s} {:10.3f} ms'.format(key, r['median'] * 1e3)
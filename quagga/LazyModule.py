@@ -0,0 +1,51 @@
+# ----------------------------------------------------------------------------
+# Copyright 2015 Grammarly, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ----------------------------------------------------------------------------
+import sys
+import types
+import importlib
+
+
+class LazyModule(types.ModuleType):
+    """
+    Replaces the package in ``sys.modules`` and imports some of its
+    attributes on the first access, so that ``from package import name``
+    keeps working while the module with ``name`` is not imported until
+    it is needed.
+
+    Parameters
+    ----------
+    module_name : str
+        Name of the package, usually ``__name__``
+    lazy_attributes : dict
+        Maps attribute name to the name of the module that defines it
+    """
+    def __init__(self, module_name, lazy_attributes):
+        module = sys.modules[module_name]
+        super(LazyModule, self).__init__(module_name, module.__doc__)
+        self.__dict__.update(module.__dict__)
+        # keeps the globals of the replaced module from being cleared
+        self._module = module
+        self._lazy_attributes = lazy_attributes
+        sys.modules[module_name] = self
+
+    def __getattr__(self, name):
+        if name not in self.__dict__.get('_lazy_attributes', {}):
+            raise AttributeError("'module' object has no attribute '{}'".format(name))
+        module = importlib.import_module(self._lazy_attributes[name])
+        # the import binds the submodule with the same name to the package
+        value = getattr(module, name)
+        setattr(self, name, value)
+        return value
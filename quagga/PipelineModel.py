@@ -0,0 +1,143 @@
+# ----------------------------------------------------------------------------
+# Copyright 2015 Grammarly, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ----------------------------------------------------------------------------
+import ctypes as ct
+from quagga.Model import Model
+
+
+class PipelineModel(object):
+    """
+    Model whose blocks are split into consecutive stages, each placed on
+    its own device, and whose batch is split into micro-batches. Blocks of
+    every micro-batch are built separately and share parameters, so while
+    one stage works on a micro-batch the previous stage can already work on
+    the next one.
+
+    Forward and backward passes of stages are issued in the order of the
+    ``schedule``:
+
+    * ``'gpipe'`` -- forward passes of all micro-batches, then backward
+      passes of all micro-batches
+    * ``'1f1b'`` -- after a warm-up every stage alternates a forward pass of
+      the next micro-batch with a backward pass of the oldest one, which
+      keeps fewer micro-batches in flight
+
+    Derivatives of all micro-batches are accumulated in the parameters and
+    divided by the number of micro-batches, so that they match the
+    derivatives of the whole batch when every micro-batch loss is a mean
+    over its samples. The optimizer is notified after :meth:`bprop` as
+    usual.
+
+    Parameters
+    ----------
+    parameters : ParameterContainer
+        Parameters shared by all micro-batches
+    micro_batches : list
+        ``micro_batches[r][s]`` is the list of blocks of the stage ``s``
+        for the micro-batch ``r``
+    schedule : str
+        ``'gpipe'`` or ``'1f1b'``
+    """
+    def __init__(self, parameters, micro_batches, schedule='1f1b'):
+        if schedule not in ['gpipe', '1f1b']:
+            raise ValueError(u'Schedule: {} is undefined'.format(schedule))
+        num_stages = len(micro_batches[0])
+        if any(len(stages) != num_stages for stages in micro_batches):
+            raise ValueError('All micro-batches must have the same number of stages!')
+        self.parameters = parameters
+        self.stages = [[Model(blocks) for blocks in stages] for stages in micro_batches]
+        self.schedule = schedule
+        self.order = PipelineModel.get_order(len(micro_batches), num_stages, schedule)
+        self.training = True
+        self._alpha = ct.c_float(1.0 / len(micro_batches))
+
+    @staticmethod
+    def get_order(num_micro_batches, num_stages, schedule):
+        """
+        Returns a list of ``(pass, micro_batch, stage)`` tuples, where pass
+        is ``'f'`` or ``'b'``, in which the passes must be issued. Every
+        pass comes after the passes it depends on, because devices wait
+        only for the work that has been issued already.
+        """
+        m, n = num_micro_batches, num_stages
+        if schedule == 'gpipe':
+            return [('f', r, s) for r in xrange(m) for s in xrange(n)] + \
+                   [('b', r, s) for r in xrange(m) for s in reversed(xrange(n))]
+
+        queues = []
+        for s in xrange(n):
+            num_warmup = min(n - s - 1, m)
+            queue = [('f', r, s) for r in xrange(num_warmup)]
+            for r in xrange(m - num_warmup):
+                queue.append(('f', r + num_warmup, s))
+                queue.append(('b', r, s))
+            queue.extend(('b', r, s) for r in xrange(m - num_warmup, m))
+            queues.append(queue)
+        # stages are merged in a way that every pass is issued as early
+        # as its dependencies allow
+        order, issued = [], set()
+        while any(queues):
+            progress = False
+            for queue in queues:
+                while queue:
+                    p, r, s = queue[0]
+                    if p == 'f':
+                        dependencies = [('f', r, s - 1)] if s else []
+                    else:
+                        dependencies = [('f', r, s)]
+                        if s < n - 1:
+                            dependencies.append(('b', r, s + 1))
+                    if not issued.issuperset(dependencies):
+                        break
+                    order.append(queue.pop(0))
+                    issued.add(order[-1])
+                    progress = True
+            if not progress:
+                raise RuntimeError('The schedule has a cyclic dependency!')
+        return order
+
+    def set_training_mode(self):
+        self.training = True
+        for stages in self.stages:
+            for stage in stages:
+                stage.set_training_mode()
+
+    def set_testing_mode(self):
+        self.training = False
+        for stages in self.stages:
+            for stage in stages:
+                stage.set_testing_mode()
+
+    def fprop(self):
+        """
+        In the training mode with the ``'1f1b'`` schedule the forward
+        passes are interleaved with the backward ones and issued by
+        :meth:`bprop`, here only the parameters are propagated.
+        """
+        self.parameters.fprop()
+        if self.training and self.schedule == '1f1b':
+            return
+        for p, r, s in self.order:
+            if p == 'f':
+                self.stages[r][s].fprop()
+
+    def bprop(self):
+        for p, r, s in self.order:
+            if p == 'b':
+                self.stages[r][s].bprop()
+            elif self.schedule == '1f1b':
+                self.stages[r][s].fprop()
+        for param in self.parameters.trainable_parameters.itervalues():
+            param.scale_backward_matrices(self._alpha)
@@ -13,8 +13,37 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 # ----------------------------------------------------------------------------
-processor_type = 'gpu'
+import os
+
+
+# GPU modules are imported only when the first GPU matrix or context is
+# created, so that CPU-only hosts do not need CUDA libraries
+processor_type = os.environ.get('QUAGGA_BACKEND', 'gpu')
 dtype = 'float'
 
 
-from quagga.Model import Model
\ No newline at end of file
+def set_backend(name):
+    """
+    Selects the processor type of matrices and contexts created afterwards.
+    The modules of the backend are imported here, so that a missing library
+    is reported at the selection rather than while a model is being built.
+
+    Parameters
+    ----------
+    name : str
+        'cpu' or 'gpu'
+    """
+    global processor_type
+    if name == 'cpu':
+        from quagga.matrix import CpuMatrix
+        from quagga.context import CpuContext
+    elif name == 'gpu':
+        from quagga.matrix import GpuMatrix
+        from quagga.context import GpuContext
+    else:
+        raise ValueError(u'Processor type: {} is undefined'.format(name))
+    processor_type = name
+
+
+from quagga.Model import Model
+from quagga.PipelineModel import PipelineModel
\ No newline at end of file
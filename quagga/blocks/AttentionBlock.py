@@ -0,0 +1,156 @@
+# ----------------------------------------------------------------------------
+# Copyright 2015 Grammarly, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ----------------------------------------------------------------------------
+from quagga.utils import List
+from quagga.matrix import Matrix
+from quagga.context import Context
+from quagga.connector import Connector
+
+
+class AttentionBlock(object):
+    """
+    Dot-product attention of every step of ``queries`` (decoder states)
+    over the steps of ``encoder_states``:
+
+        scores[s][i, t] = queries[s][i] . encoder_states[t][i]
+        weights[s] = softmax(scores[s]) over the steps that are not masked out
+        output[s][i] = sum_t weights[s][i, t] * encoder_states[t][i]
+
+    Encoder states and queries are stacked into matrices that hold the
+    whole sequence of a sample in a row, ``batch_size x T*dim``, so the
+    scores, the weights and the outputs of all steps are computed with
+    batched matrix multiplications over the samples. Outputs of the steps
+    and their derivatives are column views of such matrices, so neither
+    the forward nor the backward pass copies them per step.
+
+    Parameters
+    ----------
+    encoder_states : List
+    queries : List
+    mask : List
+        Masks of the encoder steps, can be ``None``
+    device_id : int
+        Defines the device's id on which the computation will take place
+    """
+    def __init__(self, encoder_states, queries, mask=None, device_id=None):
+        self.context = Context(device_id)
+        device_id = self.context.device_id
+        if encoder_states.elements[0].bpropagable:
+            self.encoder_states, self.dL_dencoder_states = \
+                zip(*[e.register_usage(device_id, device_id) for e in encoder_states.elements])
+        else:
+            self.encoder_states = [e.register_usage(device_id) for e in encoder_states.elements]
+        if queries.elements[0].bpropagable:
+            self.queries, self.dL_dqueries = \
+                zip(*[e.register_usage(device_id, device_id) for e in queries.elements])
+        else:
+            self.queries = [e.register_usage(device_id) for e in queries.elements]
+        if mask:
+            self.mask = [e.register_usage(device_id) for e in mask.elements]
+        self.encoder_length = encoder_states.length
+        self.query_length = queries.length
+        self.learning = hasattr(self, 'dL_dencoder_states') or hasattr(self, 'dL_dqueries')
+        if self.learning:
+            self.b_context = Context(device_id)
+
+        max_encoder_len = len(self.encoder_states)
+        max_query_len = len(self.queries)
+        batch_size = self.encoder_states[0].nrows
+        dim = int(self.encoder_states[0].ncols)
+        self.dim = dim
+        self.stacked_encoder_states = Matrix.empty(batch_size, max_encoder_len * dim, device_id=device_id)
+        self.stacked_queries = Matrix.empty(batch_size, max_query_len * dim, device_id=device_id)
+        self.scores = Matrix.empty(batch_size, max_query_len * max_encoder_len, device_id=device_id)
+        self.weights = Matrix.empty_like(self.scores)
+        if hasattr(self, 'mask'):
+            self.stacked_mask = Matrix.empty(batch_size, max_encoder_len, device_id=device_id)
+            # the mask is repeated for every query step
+            self.repeated_mask = Matrix.empty_like(self.scores)
+            self.neg_inf = Matrix.empty_like(self.repeated_mask)
+            self.neg_inf.sync_fill(-1e30)
+        self.stacked_output = Matrix.empty(batch_size, max_query_len * dim, device_id=device_id)
+        output = []
+        for s in xrange(max_query_len):
+            e = Connector(self.stacked_output[:, s*dim:(s+1)*dim], device_id if self.learning else None)
+            output.append(e)
+        self.output = List(output, queries.length)
+
+        if self.learning:
+            self.dL_dstacked_output = Matrix.empty_like(self.stacked_output)
+            for s, e in enumerate(output):
+                e.register_usage_with_backward_matrix(self.dL_dstacked_output[:, s*dim:(s+1)*dim])
+            self.dL_dweights = Matrix.empty_like(self.scores)
+            self.dL_dscores = Matrix.empty_like(self.scores)
+            if hasattr(self, 'dL_dencoder_states'):
+                self.dL_dstacked_encoder_states = Matrix.empty_like(self.stacked_encoder_states)
+            if hasattr(self, 'dL_dqueries'):
+                self.dL_dstacked_queries = Matrix.empty_like(self.stacked_queries)
+
+    def _set_lengths(self, encoder_len, query_len):
+        for name, ncols in [('stacked_encoder_states', encoder_len * self.dim),
+                            ('dL_dstacked_encoder_states', encoder_len * self.dim),
+                            ('stacked_queries', query_len * self.dim),
+                            ('dL_dstacked_queries', query_len * self.dim),
+                            ('stacked_output', query_len * self.dim),
+                            ('dL_dstacked_output', query_len * self.dim),
+                            ('scores', query_len * encoder_len),
+                            ('weights', query_len * encoder_len),
+                            ('dL_dweights', query_len * encoder_len),
+                            ('dL_dscores', query_len * encoder_len),
+                            ('stacked_mask', encoder_len),
+                            ('repeated_mask', query_len * encoder_len),
+                            ('neg_inf', query_len * encoder_len)]:
+            if hasattr(self, name):
+                getattr(self, name).ncols = ncols
+
+    def fprop(self):
+        encoder_len, query_len = int(self.encoder_length), int(self.query_length)
+        self._set_lengths(encoder_len, query_len)
+        self.stacked_encoder_states.assign_hstack(self.context, self.encoder_states[:encoder_len])
+        self.stacked_queries.assign_hstack(self.context, self.queries[:query_len])
+        # scores[i] = queries[i] * encoder_states[i].T
+        self.scores.assign_batch_dot(self.context, self.stacked_queries, self.stacked_encoder_states, query_len, 'N', 'T')
+        if hasattr(self, 'mask'):
+            self.stacked_mask.assign_hstack(self.context, self.mask[:encoder_len])
+            self.repeated_mask.assign_repeat(self.context, self.stacked_mask, query_len, axis=1)
+            self.scores.assign_masked_addition(self.context, self.repeated_mask, self.scores, self.neg_inf)
+        # softmax over the encoder steps of every query step
+        self.scores.softmax(self.context, self.weights, encoder_len)
+        # output[i] = weights[i] * encoder_states[i]
+        self.stacked_output.assign_batch_dot(self.context, self.weights, self.stacked_encoder_states, query_len)
+        self.output.fprop()
+
+    def bprop(self):
+        if not self.learning:
+            return
+        encoder_len, query_len = int(self.encoder_length), int(self.query_length)
+        # derivatives obtained on other devices are summed into the
+        # views of the stacked backward matrix
+        self.output.bprop()
+        # dL/dweights[i] = dL/doutput[i] * encoder_states[i].T
+        self.dL_dweights.assign_batch_dot(self.b_context, self.dL_dstacked_output, self.stacked_encoder_states, query_len, 'N', 'T')
+        self.dL_dscores.fill(self.b_context, 0.0)
+        self.dL_dscores.add_softmax_derivative(self.b_context, self.weights, self.dL_dweights, encoder_len)
+        if hasattr(self, 'dL_dencoder_states'):
+            # dL/dencoder_states[i] = weights[i].T * dL/doutput[i] + dL/dscores[i].T * queries[i]
+            self.dL_dstacked_encoder_states.assign_batch_dot(self.b_context, self.weights, self.dL_dstacked_output, encoder_len, 'T')
+            self.dL_dstacked_encoder_states.add_batch_dot(self.b_context, self.dL_dscores, self.stacked_queries, encoder_len, 'T')
+            for t in xrange(encoder_len):
+                self.dL_dencoder_states[t].add(self.b_context, self.dL_dstacked_encoder_states[:, t*self.dim:(t+1)*self.dim])
+        if hasattr(self, 'dL_dqueries'):
+            # dL/dqueries[i] = dL/dscores[i] * encoder_states[i]
+            self.dL_dstacked_queries.assign_batch_dot(self.b_context, self.dL_dscores, self.stacked_encoder_states, query_len)
+            for s in xrange(query_len):
+                self.dL_dqueries[s].add(self.b_context, self.dL_dstacked_queries[:, s*self.dim:(s+1)*self.dim])
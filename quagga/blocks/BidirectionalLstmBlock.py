@@ -0,0 +1,94 @@
+# ----------------------------------------------------------------------------
+# Copyright 2015 Grammarly, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ----------------------------------------------------------------------------
+from quagga.utils import List
+from quagga.matrix import Matrix
+from quagga.context import Context
+from quagga.connector import Connector
+from quagga.blocks.LstmBlock import LstmBlock
+from quagga.blocks.SequencerBlock import SequencerBlock
+
+
+class BidirectionalLstmBlock(object):
+    """
+    Bidirectional LSTM layer: a forward and a reversed LSTM over the same
+    sequence. Hidden states of both directions are written straight into
+    the left and the right halves of one output matrix per step, and the
+    derivatives of the output are accumulated in the halves of one
+    backward matrix, which both directions use as derivatives of their
+    hidden states. Neither the concatenation of the forward pass nor the
+    split of the backward pass copies anything.
+
+    Steps of both directions are issued one after another, and every step
+    has its own contexts, so on a GPU the directions run concurrently.
+
+    Parameters
+    ----------
+    fwd_params : list
+        ``[W, R, b, grad_clipping]`` of the forward direction
+    bwd_params : list
+        ``[W, R, b, grad_clipping]`` of the backward direction
+    x : List
+        Input sequence
+    mask : List
+        Sequence of masks or ``None``
+    fwd_paddings : list
+        Initial ``[c, h]`` of the forward direction
+    bwd_paddings : list
+        Initial ``[c, h]`` of the backward direction
+    device_id : int
+        Defines the device's id on which the computation will take place
+    """
+    def __init__(self, fwd_params, bwd_params, x, mask, fwd_paddings, bwd_paddings, device_id=None):
+        self.context = Context(device_id)
+        device_id = self.context.device_id
+        dim = fwd_params[1].nrows
+        if bwd_params[1].nrows != dim:
+            raise ValueError('Both directions must have the same hidden dimension!')
+
+        output, fwd_h, bwd_h = [], [], []
+        for k in xrange(x.length):
+            matrix = Matrix.empty(x[k].nrows, 2 * dim, device_id=device_id)
+            output.append(Connector(matrix, device_id))
+            _, dL_dmatrix = output[-1].register_usage(device_id, device_id)
+            for h, col_slice in [(fwd_h, slice(0, dim)), (bwd_h, slice(dim, 2 * dim))]:
+                h.append(Connector(matrix[:, col_slice], device_id))
+                h[-1].register_usage_with_backward_matrix(dL_dmatrix[:, col_slice])
+        self.output = List(output, x.length)
+        if mask is None:
+            mask = List([None] * len(output), x.length)
+        sequences = [x, mask, List(fwd_h, x.length)]
+        self.fwd_lstm_block = SequencerBlock(_lstm_block_with_h, fwd_params, sequences, ['h'], ['c', 'h'],
+                                             fwd_paddings, reverse=False, device_id=device_id)
+        sequences[-1] = List(bwd_h, x.length)
+        self.bwd_lstm_block = SequencerBlock(_lstm_block_with_h, bwd_params, sequences, ['h'], ['c', 'h'],
+                                             bwd_paddings, reverse=True, device_id=device_id)
+
+    def fprop(self):
+        self.fwd_lstm_block.fprop()
+        self.bwd_lstm_block.fprop()
+        self.output.fprop()
+
+    def bprop(self):
+        # derivatives obtained on other devices are summed into
+        # the backward matrix, which halves the directions use
+        for e in self.output:
+            e.bprop()
+        self.fwd_lstm_block.bprop()
+        self.bwd_lstm_block.bprop()
+
+
+def _lstm_block_with_h(W, R, b, grad_clipping, x, mask, h, prev_c, prev_h, device_id=None):
+    return LstmBlock(W, R, b, grad_clipping, x, mask, prev_c, prev_h, device_id, h)
@@ -0,0 +1,162 @@
+# ----------------------------------------------------------------------------
+# Copyright 2015 Grammarly, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ----------------------------------------------------------------------------
+from quagga.matrix import Matrix
+from quagga.context import Context
+
+
+class ChunkedSoftmaxCeBlock(object):
+    """
+    Output projection ``x * W + b`` followed by softmax nonlinearity with
+    mean cross entropy loss for integer labels, that never holds the
+    logits of the whole vocabulary.
+
+    The projection is computed by chunks of ``chunk_size`` columns of
+    ``W`` into one ``batch_size x chunk_size`` buffer. ``fprop``
+    accumulates the log-sum-exp of the rows chunk by chunk, ``bprop``
+    computes the logits of every chunk again, turns them into the
+    derivative in place and accumulates derivatives of ``W``, ``b`` and
+    ``x`` from it. The logits are not computed again when the vocabulary
+    fits into one chunk. Memory of the block is bounded by the chunk size
+    instead of the vocabulary size at the cost of one more matrix product
+    in ``bprop``.
+
+    The loss is accumulated on the device like in
+    :class:`FusedSoftmaxCeBlock`.
+
+    Parameters
+    ----------
+    W
+        ``dim x vocab_size``
+    b
+        ``1 x vocab_size`` or ``None``
+    chunk_size : int
+    x
+        ``batch_size x dim``
+    true_labels
+        ``batch_size x 1``
+    mask
+    device_id : int
+        Defines the device's id on which the computation will take place
+    """
+    def __init__(self, W, b, chunk_size, x, true_labels, mask=None, device_id=None):
+        self.context = Context(device_id)
+        device_id = self.context.device_id
+        if W.bpropagable:
+            self.W, self.dL_dW = W.register_usage(device_id, device_id)
+        else:
+            self.W = W.register_usage(device_id)
+        if b:
+            if b.bpropagable:
+                self.b, self.dL_db = b.register_usage(device_id, device_id)
+            else:
+                self.b = b.register_usage(device_id)
+        if x.bpropagable:
+            self.x, self.dL_dx = x.register_usage(device_id, device_id)
+        else:
+            self.x = x.register_usage(device_id)
+        self.true_labels = true_labels.register_usage(device_id)
+        if mask:
+            self.mask = mask.register_usage(device_id)
+
+        vocab_size = self.W.ncols
+        chunk_size = min(chunk_size, vocab_size)
+        self.offsets = range(0, vocab_size, chunk_size)
+        self.logits = Matrix.empty(self.x.nrows, chunk_size, device_id=device_id)
+        self.chunks = []
+        for offset in self.offsets:
+            end = min(offset + chunk_size, vocab_size)
+            chunk = {'W': self.W[:, offset:end], 'logits': self.logits[:, :end - offset]}
+            if hasattr(self, 'b'):
+                chunk['b'] = self.b[:, offset:end]
+            if hasattr(self, 'dL_dW'):
+                chunk['dL_dW'] = self.dL_dW[:, offset:end]
+            if hasattr(self, 'dL_db'):
+                chunk['dL_db'] = self.dL_db[:, offset:end]
+            self.chunks.append(chunk)
+        self.log_sum_exps = Matrix.empty(self.x.nrows, 1, device_id=device_id)
+        self.true_logits = Matrix.empty(self.x.nrows, 1, device_id=device_id)
+        # the first column holds losses of the rows, the second one their weights
+        self.row_stats = Matrix.empty(self.x.nrows, 2, device_id=device_id)
+        self.losses = self.row_stats[:, 0:1]
+        self.weights = self.row_stats[:, 1:2]
+        if not mask:
+            self.weights.sync_fill(1.0)
+        self.ones = Matrix.empty(self.x.nrows, 1, device_id=device_id)
+        self.ones.sync_fill(1.0)
+        self.train_loss_stats = Matrix.empty(1, 2, device_id=device_id)
+        self.train_loss_stats.sync_fill(0.0)
+        self.test_loss_stats = Matrix.empty(1, 2, device_id=device_id)
+        self.test_loss_stats.sync_fill(0.0)
+        self.loss_stats = self.train_loss_stats
+        self.learning = hasattr(self, 'dL_dW') or hasattr(self, 'dL_db') or hasattr(self, 'dL_dx')
+        self.loss = None
+
+    def _calculate_logits(self, chunk):
+        chunk['logits'].assign_dot(self.context, self.x, chunk['W'])
+        if 'b' in chunk:
+            chunk['logits'].add(self.context, chunk['b'])
+
+    def fprop(self):
+        self.log_sum_exps.fill(self.context, float('-inf'))
+        for offset, chunk in zip(self.offsets, self.chunks):
+            self._calculate_logits(chunk)
+            chunk['logits'].accumulate_log_sum_exp(self.context, self.log_sum_exps, self.true_labels,
+                                                   offset, self.true_logits)
+        # losses = log(sum(exp(logits))) - true_logits
+        self.losses.assign_scaled_subtraction(self.context, 1.0, self.log_sum_exps, self.true_logits)
+        if hasattr(self, 'mask'):
+            self.losses.hprod(self.context, self.mask)
+            self.weights.assign(self.context, self.mask)
+        # loss_stats += [sum(losses), sum(weights)]
+        self.loss_stats.add_dot(self.context, self.ones, self.row_stats, 'T')
+
+    def bprop(self):
+        if not self.learning:
+            return
+        mask = self.mask if hasattr(self, 'mask') else None
+        for offset, chunk in zip(self.offsets, self.chunks):
+            if len(self.chunks) > 1:
+                self._calculate_logits(chunk)
+            # error = (probs - true_labels) / M
+            error = chunk['logits']
+            error.chunk_softmax_ce_derivative(self.context, self.log_sum_exps, self.true_labels, offset, mask)
+            # dL/dW = x.T * error
+            if 'dL_dW' in chunk:
+                chunk['dL_dW'].add_dot(self.context, self.x, error, 'T')
+            # dL/db = 1.T * error
+            if 'dL_db' in chunk:
+                chunk['dL_db'].add_dot(self.context, self.ones, error, 'T')
+            # dL/dx = error * W.T
+            if hasattr(self, 'dL_dx'):
+                self.dL_dx.add_dot(self.context, error, chunk['W'], 'N', 'T')
+
+    def set_training_mode(self):
+        self.loss_stats = self.train_loss_stats
+
+    def set_testing_mode(self):
+        self.loss_stats = self.test_loss_stats
+
+    def calculate_loss(self, context):
+        """
+        Sets ``loss`` to the mean loss of the rows passed through ``fprop``
+        in the current mode since the previous call.
+        """
+        loss_stats_np = self.loss_stats.to_host(context)
+        self.loss_stats.fill(context, 0.0)
+        context.add_callback(self._calculate_ce_loss, loss_stats_np)
+
+    def _calculate_ce_loss(self, loss_stats_np):
+        self.loss = loss_stats_np[0, 0] / loss_stats_np[0, 1]
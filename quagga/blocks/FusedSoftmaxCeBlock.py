@@ -0,0 +1,96 @@
+# ----------------------------------------------------------------------------
+# Copyright 2015 Grammarly, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ----------------------------------------------------------------------------
+from quagga.matrix import Matrix
+from quagga.context import Context
+from quagga.connector import Connector
+
+
+class FusedSoftmaxCeBlock(object):
+    """
+    Softmax nonlinearity with mean cross entropy loss for integer labels,
+    that keeps the loss on the device.
+
+    ``fprop`` computes the probabilities and the loss of every row from the
+    log-sum-exp of ``x`` in one pass and adds the sum of the losses and the
+    number of rows to ``loss_stats``, a ``1 x 2`` device matrix.
+    ``calculate_loss`` copies only these two numbers to the host and
+    resets them, so loss trackers ask for the loss only when they report.
+    There are separate statistics for training and testing mode.
+
+    ``bprop`` writes the derivative in place of ``probs``, so ``probs`` is
+    valid between ``fprop`` and ``bprop`` only.
+    """
+    def __init__(self, x, true_labels, mask=None, device_id=None):
+        self.context = Context(device_id)
+        device_id = self.context.device_id
+        if x.bpropagable:
+            self.x, self.dL_dx = x.register_usage(device_id, device_id)
+        else:
+            self.x = x.register_usage(device_id)
+        self.true_labels = true_labels.register_usage(device_id)
+        if mask:
+            self.mask = mask.register_usage(device_id)
+        self.probs = Connector(Matrix.empty_like(self.x))
+        # the error is computed in place of the probabilities
+        self.error = self.probs.register_usage(device_id)
+        # the first column holds losses of the rows, the second one their weights
+        self.row_stats = Matrix.empty(self.x.nrows, 2, device_id=device_id)
+        self.losses = self.row_stats[:, 0:1]
+        self.weights = self.row_stats[:, 1:2]
+        if not mask:
+            self.weights.sync_fill(1.0)
+        self.ones = Matrix.empty(self.x.nrows, 1, device_id=device_id)
+        self.ones.sync_fill(1.0)
+        self.train_loss_stats = Matrix.empty(1, 2, device_id=device_id)
+        self.train_loss_stats.sync_fill(0.0)
+        self.test_loss_stats = Matrix.empty(1, 2, device_id=device_id)
+        self.test_loss_stats.sync_fill(0.0)
+        self.loss_stats = self.train_loss_stats
+        self.loss = None
+
+    def fprop(self):
+        self.probs.assign_softmax_ce(self.context, self.x, self.true_labels, self.losses)
+        self.probs.fprop()
+        if hasattr(self, 'mask'):
+            self.losses.hprod(self.context, self.mask)
+            self.weights.assign(self.context, self.mask)
+        # loss_stats += [sum(losses), sum(weights)]
+        self.loss_stats.add_dot(self.context, self.ones, self.row_stats, 'T')
+
+    def bprop(self):
+        if not hasattr(self, 'dL_dx'):
+            return
+        # error = (probs - true_labels) / M
+        self.error.softmax_ce_derivative(self.context, self.true_labels, self.mask if hasattr(self, 'mask') else None)
+        self.dL_dx.add(self.context, self.error)
+
+    def set_training_mode(self):
+        self.loss_stats = self.train_loss_stats
+
+    def set_testing_mode(self):
+        self.loss_stats = self.test_loss_stats
+
+    def calculate_loss(self, context):
+        """
+        Sets ``loss`` to the mean loss of the rows passed through ``fprop``
+        in the current mode since the previous call.
+        """
+        loss_stats_np = self.loss_stats.to_host(context)
+        self.loss_stats.fill(context, 0.0)
+        context.add_callback(self._calculate_ce_loss, loss_stats_np)
+
+    def _calculate_ce_loss(self, loss_stats_np):
+        self.loss = loss_stats_np[0, 0] / loss_stats_np[0, 1]
@@ -0,0 +1,186 @@
+# ----------------------------------------------------------------------------
+# Copyright 2015 Grammarly, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ----------------------------------------------------------------------------
+from quagga.matrix import Matrix
+from quagga.context import Context
+from quagga.connector import Connector
+
+
+class GruBlock(object):
+    """
+    A gated recurrent unit (GRU) block. Gates are ordered as update ``z``,
+    reset ``r`` and candidate ``n``:
+
+        z[t] = sigm(x[t] * W_z + h[t-1] * R_z + b_z)
+        r[t] = sigm(x[t] * W_r + h[t-1] * R_r + b_r)
+        n[t] = tanh(x[t] * W_n + b_n + r[t] .* (h[t-1] * R_n))
+        h[t] = z[t] .* h[t-1] + (1 - z[t]) .* n[t]
+
+    The reset gate is applied after the recurrent projection, so that the
+    input and the recurrent projections of all gates are computed with one
+    GEMM each. Use it with ``prev_names=['h']`` in :class:`SequencerBlock`.
+
+    Parameters
+    ----------
+    W
+    R
+    b
+    grad_clipping
+    x
+    mask
+    prev_h
+    device_id : int
+        Defines the device's id on which the computation will take place
+
+
+    Returns
+    -------
+    """
+    def __init__(self, W, R, b, grad_clipping, x, mask, prev_h, device_id=None):
+        self.f_context = Context(device_id)
+        device_id = self.f_context.device_id
+        if W.bpropagable:
+            self.W, self.dL_dW = W.register_usage(device_id, device_id)
+            self.W_b_context = Context(device_id)
+        else:
+            self.W = W.register_usage(device_id)
+        if R.bpropagable:
+            self.R, self.dL_dR = R.register_usage(device_id, device_id)
+            self.R_b_context = Context(device_id)
+        else:
+            self.R = R.register_usage(device_id)
+        if b.bpropagable:
+            self.b, self.dL_db = b.register_usage(device_id, device_id)
+            self.b_b_context = Context(device_id)
+        else:
+            self.b = b.register_usage(device_id)
+        self.grad_clipping = grad_clipping
+        if x.bpropagable:
+            self.x, self.dL_dx = x.register_usage(device_id, device_id)
+            self.x_b_context = Context(device_id)
+        else:
+            self.x = x.register_usage(device_id)
+        if mask:
+            self.mask = mask.register_usage(device_id)
+        if prev_h.bpropagable:
+            self.prev_h, self.dL_dprev_h = prev_h.register_usage(device_id, device_id)
+        else:
+            self.prev_h = prev_h.register_usage(device_id)
+        self.learning = W.bpropagable or R.bpropagable or x.bpropagable or \
+                        prev_h.bpropagable
+        if self.learning:
+            self.b_context = Context(device_id)
+
+        dim = self.R.nrows
+        batch_size = self.x.nrows
+
+        self.pre_x = Matrix.empty(batch_size, 3 * dim, device_id=device_id)
+        self.pre_x_zr = self.pre_x[:, 0*dim:2*dim]
+        self.pre_x_n = self.pre_x[:, 2*dim:3*dim]
+        self.pre_h = Matrix.empty(batch_size, 3 * dim, device_id=device_id)
+        self.pre_h_zr = self.pre_h[:, 0*dim:2*dim]
+        self.pre_h_n = self.pre_h[:, 2*dim:3*dim]
+        self.zrn = Matrix.empty(batch_size, 3 * dim, device_id=device_id)
+        self.zr = self.zrn[:, 0*dim:2*dim]
+        self.z = self.zrn[:, 0*dim:1*dim]
+        self.r = self.zrn[:, 1*dim:2*dim]
+        self.n = self.zrn[:, 2*dim:3*dim]
+        self.h = Matrix.empty_like(self.prev_h, device_id)
+        self.h = Connector(self.h, device_id if self.learning else None)
+
+        if self.learning:
+            self._dzrn_dpre_zrn = Matrix.empty_like(self.zrn)
+            self.dzr_dpre_zr = self._dzrn_dpre_zrn[:, 0*dim:2*dim]
+            self.dz_dpre_z = self._dzrn_dpre_zrn[:, 0*dim:1*dim]
+            self.dr_dpre_r = self._dzrn_dpre_zrn[:, 1*dim:2*dim]
+            self.dn_dpre_n = self._dzrn_dpre_zrn[:, 2*dim:3*dim]
+            self.dL_dpre_x = Matrix.empty_like(self.pre_x)
+            self.dL_dpre_zr = self.dL_dpre_x[:, 0*dim:2*dim]
+            self.dL_dpre_z = self.dL_dpre_x[:, 0*dim:1*dim]
+            self.dL_dpre_r = self.dL_dpre_x[:, 1*dim:2*dim]
+            self.dL_dpre_n = self.dL_dpre_x[:, 2*dim:3*dim]
+            self.dL_dpre_h = Matrix.empty_like(self.pre_h)
+            self.dL_dpre_h_zr = self.dL_dpre_h[:, 0*dim:2*dim]
+            self.dL_dpre_h_n = self.dL_dpre_h[:, 2*dim:3*dim]
+        else:
+            # derivatives of nonlinearities are not needed
+            self.dzr_dpre_zr = None
+            self.dn_dpre_n = None
+
+    def fprop(self):
+        self.pre_x.assign_dot(self.f_context, self.x, self.W)
+        self.pre_x.add(self.f_context, self.b)
+        self.pre_h.assign_dot(self.f_context, self.prev_h, self.R)
+        # [z[t], r[t]] = sigm(pre_x_zr[t] + pre_h_zr[t])
+        self.zr.assign_add(self.f_context, self.pre_x_zr, self.pre_h_zr)
+        self.zr.sigmoid(self.f_context, self.zr, self.dzr_dpre_zr)
+        # n[t] = tanh(pre_x_n[t] + r[t] .* pre_h_n[t])
+        self.n.assign_hprod(self.f_context, self.r, self.pre_h_n)
+        self.n.add(self.f_context, self.pre_x_n)
+        self.n.tanh(self.f_context, self.n, self.dn_dpre_n)
+        # h[t] = z[t] .* h[t-1] + (1 - z[t]) .* n[t]
+        self.h.assign_masked_addition(self.f_context, self.z, self.prev_h, self.n)
+        if hasattr(self, 'mask'):
+            # h[t] = mask .* h[t] + (1 - mask) .* h[t-1]
+            self.h.assign_masked_addition(self.f_context, self.mask, self.h, self.prev_h)
+        self.h.fprop()
+
+    def bprop(self):
+        if not self.learning:
+            return
+        dL_dh = self.h.backward_matrix
+        if hasattr(self, 'mask'):
+            # dL/dh[t-1] = (1 - mask) .* dL/dh[t]
+            # dL/dh[t] = mask .* dL/dh[t]
+            if hasattr(self, 'dL_dprev_h'):
+                self.dL_dprev_h.add_hprod_one_minus_mask(self.b_context, self.mask, dL_dh)
+            dL_dh.hprod(self.b_context, self.mask)
+
+        # dL/dpre_n[t] = dL/dh[t] .* (1 - z[t]) .* dn[t]/dpre_n[t]
+        self.dL_dpre_n.assign_hprod(self.b_context, dL_dh, self.dn_dpre_n)
+        self.dL_dpre_n.add_scaled_hprod(self.b_context, self.z, self.dL_dpre_n, 1.0, -1.0)
+        # dL/dpre_r[t] = dL/dpre_n[t] .* pre_h_n[t] .* dr[t]/dpre_r[t]
+        self.dL_dpre_r.assign_hprod(self.b_context, self.dL_dpre_n, self.pre_h_n, self.dr_dpre_r)
+        # dL/dpre_z[t] = dL/dh[t] .* (h[t-1] - n[t]) .* dz[t]/dpre_z[t]
+        self.dL_dpre_z.assign_scaled_subtraction(self.b_context, 1.0, self.prev_h, self.n)
+        self.dL_dpre_z.assign_hprod(self.b_context, self.dL_dpre_z, dL_dh, self.dz_dpre_z)
+        self.dL_dpre_x.last_modification_context = self.b_context
+
+        if self.grad_clipping:
+            self.dL_dpre_x.clip(self.b_context, -self.grad_clipping, self.grad_clipping)
+
+        # derivatives of the recurrent projection differ from the ones of the
+        # input projection only for the candidate, which is gated by r[t]
+        if hasattr(self, 'dL_dR') or hasattr(self, 'dL_dprev_h'):
+            self.dL_dpre_h_zr.assign(self.b_context, self.dL_dpre_zr)
+            self.dL_dpre_h_n.assign_hprod(self.b_context, self.dL_dpre_n, self.r)
+            self.dL_dpre_h.last_modification_context = self.b_context
+
+        if hasattr(self, 'dL_dW'):
+            # dL_dW += x[t].T * dL/dpre_x[t]
+            self.dL_dW.add_dot(self.W_b_context, self.x, self.dL_dpre_x, 'T')
+        if hasattr(self, 'dL_dR'):
+            # dL_dR += h[t-1].T * dL/dpre_h[t]
+            self.dL_dR.add_dot(self.R_b_context, self.prev_h, self.dL_dpre_h, 'T')
+        if hasattr(self, 'dL_db'):
+            # dL_db += sum(dL/dpre_x[t], axis=0)
+            self.dL_db.add_repeat_derivative(self.b_b_context, self.dL_dpre_x, self.dL_dpre_x.nrows, axis=0)
+        if hasattr(self, 'dL_dx'):
+            # dL/dx[t] = dL/dpre_x[t] * W.T
+            self.dL_dx.add_dot(self.x_b_context, self.dL_dpre_x, self.W, 'N', 'T')
+        if hasattr(self, 'dL_dprev_h'):
+            # dL/dh[t-1] = dL/dh[t] .* z[t] + dL/dpre_h[t] * R.T
+            self.dL_dprev_h.add_hprod(self.b_context, dL_dh, self.z)
+            self.dL_dprev_h.add_dot(self.b_context, self.dL_dpre_h, self.R, 'N', 'T')
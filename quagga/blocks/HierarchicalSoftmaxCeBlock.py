@@ -0,0 +1,187 @@
+# ----------------------------------------------------------------------------
+# Copyright 2015 Grammarly, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ----------------------------------------------------------------------------
+import numpy as np
+from quagga.matrix import Matrix
+from quagga.context import Context
+
+
+class HierarchicalSoftmaxCeBlock(object):
+    """
+    Class-factored softmax with mean cross entropy loss. Every word
+    belongs to one class and its probability is factored as
+    ``P(class | x) * P(word | class, x)``, so only the softmax over
+    the classes and over the words of the class of the target are
+    computed. The loss is exact in training and in testing mode.
+
+    Words of the class of every target are gathered into a
+    ``batch_size x (max_class_size * dim)`` matrix, the logits of the
+    words and their derivatives are computed with batched products.
+    The derivative of ``word_W`` is a row-sparse ``SparseMatrix``.
+
+    Parameters
+    ----------
+    class_W
+        Output embedding of the classes ``num_classes x dim``
+    word_W
+        Output embedding of the words ``vocab_size x dim``
+    word_classes : array
+        Class of every word, see :meth:`get_frequency_classes`
+    x
+        ``batch_size x dim``
+    true_labels
+        Indexes of the true words ``batch_size x 1``
+    mask
+    device_id : int
+        Defines the device's id on which the computation will take place
+    """
+    def __init__(self, class_W, word_W, word_classes, x, true_labels, mask=None, device_id=None):
+        self.context = Context(device_id)
+        device_id = self.context.device_id
+        if class_W.bpropagable:
+            self.class_W, self.dL_dclass_W = class_W.register_usage(device_id, device_id)
+        else:
+            self.class_W = class_W.register_usage(device_id)
+        if word_W.bpropagable:
+            self.word_W, self.dL_dword_W = word_W.register_usage_with_sparse_backward_matrix()
+        else:
+            self.word_W = word_W.register_usage(device_id)
+        if x.bpropagable:
+            self.x, self.dL_dx = x.register_usage(device_id, device_id)
+        else:
+            self.x = x.register_usage(device_id)
+        self.true_labels = true_labels.register_usage(device_id)
+        if mask:
+            self.mask = mask.register_usage(device_id)
+
+        word_classes = np.asarray(word_classes, dtype=np.int32).flatten()
+        num_classes = self.class_W.nrows
+        class_sizes = np.bincount(word_classes, minlength=num_classes)
+        self.max_class_size = max_class_size = int(np.max(class_sizes))
+        # class_words[c] holds words of the class c padded with the word 0,
+        # logits of the padding are masked out by the large negative bias
+        class_words = np.zeros((num_classes, max_class_size), np.int32)
+        class_padding = np.full((num_classes, max_class_size), -1e30, np.float32)
+        word_positions = np.zeros(len(word_classes), np.int32)
+        for c in xrange(num_classes):
+            words = np.flatnonzero(word_classes == c)
+            class_words[c, :len(words)] = words
+            class_padding[c, :len(words)] = 0.0
+            word_positions[words] = np.arange(len(words))
+        self.word_classes = Matrix.from_npa(word_classes.reshape(-1, 1), device_id=device_id)
+        self.word_positions = Matrix.from_npa(word_positions.reshape(-1, 1), device_id=device_id)
+        self.class_words = Matrix.from_npa(class_words, device_id=device_id)
+        self.class_padding = Matrix.from_npa(class_padding, device_id=device_id)
+
+        batch_size = self.x.nrows
+        dim = self.x.ncols
+        self.true_classes = Matrix.empty(batch_size, 1, 'int', device_id)
+        self.true_positions = Matrix.empty(batch_size, 1, 'int', device_id)
+        self.words = Matrix.empty(batch_size, max_class_size, 'int', device_id)
+        self.class_probs = Matrix.empty(batch_size, num_classes, device_id=device_id)
+        self.word_logits = Matrix.empty(batch_size, max_class_size, device_id=device_id)
+        self.word_probs = Matrix.empty_like(self.word_logits)
+        self.padding = Matrix.empty_like(self.word_logits)
+        # every row holds max_class_size x dim matrix of the rows of word_W
+        # of the words of the class of the target
+        self.words_W = Matrix.empty(batch_size, max_class_size * dim, device_id=device_id)
+        self.words_W_parts = [self.words_W[:, k*dim:(k+1)*dim] for k in xrange(max_class_size)]
+        self.learning = class_W.bpropagable or word_W.bpropagable or x.bpropagable
+        if self.learning:
+            self.dL_dclass_logits = Matrix.empty_like(self.class_probs)
+            self.dL_dword_logits = Matrix.empty_like(self.word_logits)
+            if word_W.bpropagable:
+                self.dL_dwords_W = Matrix.empty_like(self.words_W)
+                self.dL_dwords_W_parts = [self.dL_dwords_W[:, k*dim:(k+1)*dim] for k in xrange(max_class_size)]
+        self.loss = None
+
+    @staticmethod
+    def get_frequency_classes(counts, num_classes=None):
+        """
+        Splits words into ``num_classes`` (``ceil(sqrt(vocab_size))`` by
+        default) classes of consecutive words in the order of decreasing
+        frequency, every class gets about the same mass of square roots of
+        the ``counts``. Frequent words end up in small classes, rare words
+        in big ones, but the biggest class stays of order ``sqrt(vocab_size)``.
+
+        Returns array with the class of every word.
+        """
+        counts = np.asarray(counts, dtype=np.float64).flatten()
+        if num_classes is None:
+            num_classes = int(np.ceil(np.sqrt(len(counts))))
+        order = np.argsort(-counts, kind='mergesort')
+        mass = np.sqrt(counts[order])
+        mass_before = (np.cumsum(mass) - mass) / np.sum(mass)
+        word_classes = np.empty(len(counts), np.int32)
+        word_classes[order] = np.minimum((mass_before * num_classes).astype(np.int32), num_classes - 1)
+        return word_classes
+
+    def fprop(self):
+        self.word_classes.slice_rows(self.context, self.true_labels, self.true_classes)
+        self.word_positions.slice_rows(self.context, self.true_labels, self.true_positions)
+        # P(class | x) = softmax(x * class_W.T)
+        self.class_probs.assign_dot(self.context, self.x, self.class_W, 'N', 'T')
+        self.class_probs.softmax(self.context, self.class_probs)
+        # P(word | class, x) = softmax(x * words_W.T) over the words of the class
+        self.class_words.slice_rows(self.context, self.true_classes, self.words)
+        self.class_padding.slice_rows(self.context, self.true_classes, self.padding)
+        self.word_W.slice_rows_batch(self.context, self.words, self.words_W_parts)
+        self.word_logits.assign_batch_dot(self.context, self.x, self.words_W, 1, 'N', 'T')
+        self.word_logits.add(self.context, self.padding)
+        self.word_logits.softmax(self.context, self.word_probs)
+
+    def bprop(self):
+        if not self.learning:
+            return
+        self.dL_dclass_logits.assign_softmax_ce_derivative(self.context, self.class_probs, self.true_classes)
+        self.dL_dword_logits.assign_softmax_ce_derivative(self.context, self.word_probs, self.true_positions)
+        if hasattr(self, 'mask'):
+            self.dL_dclass_logits.hprod(self.context, self.mask)
+            self.dL_dword_logits.hprod(self.context, self.mask)
+        if hasattr(self, 'dL_dclass_W'):
+            # dL/dclass_W += dL/dclass_logits.T * x
+            self.dL_dclass_W.add_dot(self.context, self.dL_dclass_logits, self.x, 'T')
+        if hasattr(self, 'dL_dword_W'):
+            # dL/dwords_W[i] = dL/dword_logits[i].T * x[i]
+            self.dL_dwords_W.assign_batch_dot(self.context, self.dL_dword_logits, self.x,
+                                              self.max_class_size, 'T', 'N')
+            self.dL_dword_W.add_rows_batch_slice(self.words, self.dL_dwords_W_parts)
+        if hasattr(self, 'dL_dx'):
+            # dL/dx += dL/dclass_logits * class_W + dL/dword_logits[i] * words_W[i]
+            self.dL_dx.add_dot(self.context, self.dL_dclass_logits, self.class_W)
+            self.dL_dx.add_batch_dot(self.context, self.dL_dword_logits, self.words_W, 1)
+
+    def calculate_loss(self, context):
+        true_classes_np = self.true_classes.to_host(context)
+        true_positions_np = self.true_positions.to_host(context)
+        class_probs_np = self.class_probs.to_host(context)
+        word_probs_np = self.word_probs.to_host(context)
+        if hasattr(self, 'mask'):
+            mask = self.mask.to_host(context)
+            context.add_callback(self._calculate_ce_loss, true_classes_np, true_positions_np,
+                                 class_probs_np, word_probs_np, mask)
+        else:
+            context.add_callback(self._calculate_ce_loss, true_classes_np, true_positions_np,
+                                 class_probs_np, word_probs_np)
+
+    def _calculate_ce_loss(self, true_classes_np, true_positions_np, class_probs_np, word_probs_np, mask=None):
+        rows = np.arange(class_probs_np.shape[0])
+        logs = np.log(class_probs_np[rows, true_classes_np[:, 0]] + 1e-20) + \
+            np.log(word_probs_np[rows, true_positions_np[:, 0]] + 1e-20)
+        if mask is not None:
+            logs *= mask[:, 0]
+            self.loss = - np.sum(logs) / np.sum(mask)
+        else:
+            self.loss = - np.mean(logs)
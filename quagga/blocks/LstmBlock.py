@@ -34,12 +34,15 @@ class LstmBlock(object):
     prev_h
     device_id : int
         Defines the device's id on which the computation will take place
+    h : Connector
+        Connector the hidden state is written to, for example one over a
+        view of a bigger matrix. A new one is created by default.
 
 
     Returns
     -------
     """
-    def __init__(self, W, R, b, grad_clipping, x, mask, prev_c, prev_h, device_id=None):
+    def __init__(self, W, R, b, grad_clipping, x, mask, prev_c, prev_h, device_id=None, h=None):
         self.f_context = Context(device_id)
         device_id = self.f_context.device_id
         if W.bpropagable:
@@ -89,8 +92,10 @@ class LstmBlock(object):
         self.c = Matrix.empty_like(self.prev_c, device_id)
         self.c = Connector(self.c, device_id if self.learning else None)
         self.tanh_c = Matrix.empty_like(self.c, device_id)
-        self.h = Matrix.empty_like(self.c, device_id)
-        self.h = Connector(self.h, device_id if self.learning else None)
+        if h is None:
+            h = Matrix.empty_like(self.c, device_id)
+            h = Connector(h, device_id if self.learning else None)
+        self.h = h
 
         if self.learning:
             self._dzifo_dpre_zifo = Matrix.empty_like(self.zifo)
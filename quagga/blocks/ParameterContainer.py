@@ -13,7 +13,9 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 # ----------------------------------------------------------------------------
+import numpy as np
 from quagga.matrix import Matrix
+from quagga.matrix import MemoryTracker
 from quagga.connector import Connector
 
 
@@ -23,17 +25,34 @@ class ParameterContainer(object):
         self.trainable_parameters = {}
         for name, definition in kwargs.iteritems():
             device_id = definition['device_id']
-            matrix = Matrix.from_npa(definition['init'](), device_id=device_id)
+            npa = definition['init']()
+            if isinstance(npa, np.memmap):
+                # huge embedding tables are not copied into memory,
+                # see `MemmapInitializer` and `H5pyMemmapInitializer`
+                row_cache_size = definition.get('row_cache_size')
+                matrix = Matrix.from_memmap(npa, device_id, row_cache_size)
+            else:
+                matrix = Matrix.from_npa(npa, device_id=device_id)
             if 'trainable' not in definition or definition['trainable']:
                 param = Connector(matrix, device_id)
                 self.trainable_parameters[name] = param
             else:
                 param = Connector(matrix)
+            MemoryTracker.tag(matrix, 'parameters')
             self.parameters[name] = param
 
     def __getitem__(self, item):
         return self.parameters[item]
 
+    def to_shared_memory(self):
+        """
+        Moves all parameters into read-only shared memory. Call it once
+        in the serving process before forking inference workers, they will
+        share parameters instead of holding private copies.
+        """
+        for param in self.parameters.itervalues():
+            param.to_shared_memory()
+
     def fprop(self):
         for param in self.parameters.itervalues():
             param.fprop()
\ No newline at end of file
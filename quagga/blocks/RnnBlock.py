@@ -0,0 +1,137 @@
+# ----------------------------------------------------------------------------
+# Copyright 2015 Grammarly, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ----------------------------------------------------------------------------
+from quagga.matrix import Matrix
+from quagga.context import Context
+from quagga.connector import Connector
+
+
+class RnnBlock(object):
+    """
+    A vanilla recurrent block:
+
+        h[t] = f(x[t] * W + h[t-1] * R + b)
+
+    Use it with ``prev_names=['h']`` in :class:`SequencerBlock`.
+
+    Parameters
+    ----------
+    W
+    R
+    b
+    grad_clipping
+    x
+    mask
+    prev_h
+    device_id : int
+        Defines the device's id on which the computation will take place
+    nonlinearity : string
+        ``'tanh'`` or ``'relu'``
+
+
+    Returns
+    -------
+    """
+    def __init__(self, W, R, b, grad_clipping, x, mask, prev_h, device_id=None, nonlinearity='tanh'):
+        self.f_context = Context(device_id)
+        device_id = self.f_context.device_id
+        if W.bpropagable:
+            self.W, self.dL_dW = W.register_usage(device_id, device_id)
+            self.W_b_context = Context(device_id)
+        else:
+            self.W = W.register_usage(device_id)
+        if R.bpropagable:
+            self.R, self.dL_dR = R.register_usage(device_id, device_id)
+            self.R_b_context = Context(device_id)
+        else:
+            self.R = R.register_usage(device_id)
+        if b.bpropagable:
+            self.b, self.dL_db = b.register_usage(device_id, device_id)
+            self.b_b_context = Context(device_id)
+        else:
+            self.b = b.register_usage(device_id)
+        self.grad_clipping = grad_clipping
+        if x.bpropagable:
+            self.x, self.dL_dx = x.register_usage(device_id, device_id)
+            self.x_b_context = Context(device_id)
+        else:
+            self.x = x.register_usage(device_id)
+        if mask:
+            self.mask = mask.register_usage(device_id)
+        if prev_h.bpropagable:
+            self.prev_h, self.dL_dprev_h = prev_h.register_usage(device_id, device_id)
+        else:
+            self.prev_h = prev_h.register_usage(device_id)
+        self.learning = W.bpropagable or R.bpropagable or x.bpropagable or \
+                        prev_h.bpropagable
+        if self.learning:
+            self.b_context = Context(device_id)
+
+        if nonlinearity not in ['tanh', 'relu']:
+            raise ValueError(u'Nonlinearity: {} is unsupported!'.format(nonlinearity))
+        self.nonlinearity = nonlinearity
+        self.pre_h = Matrix.empty_like(self.prev_h, device_id)
+        self.h = Matrix.empty_like(self.prev_h, device_id)
+        self.h = Connector(self.h, device_id if self.learning else None)
+        if self.learning:
+            self._dh_dpre_h = Matrix.empty_like(self.pre_h)
+            self.dL_dpre_h = self._dh_dpre_h
+
+    @property
+    def dh_dpre_h(self):
+        if self.learning:
+            return self._dh_dpre_h
+
+    def fprop(self):
+        # h[t] = f(x[t] * W + h[t-1] * R + b)
+        self.pre_h.assign_dot(self.f_context, self.x, self.W)
+        self.pre_h.add_dot(self.f_context, self.prev_h, self.R)
+        self.pre_h.add(self.f_context, self.b)
+        getattr(self.pre_h, self.nonlinearity)(self.f_context, self.h, self.dh_dpre_h)
+        if hasattr(self, 'mask'):
+            # h[t] = mask .* h[t] + (1 - mask) .* h[t-1]
+            self.h.assign_masked_addition(self.f_context, self.mask, self.h, self.prev_h)
+        self.h.fprop()
+
+    def bprop(self):
+        if not self.learning:
+            return
+        dL_dh = self.h.backward_matrix
+        if hasattr(self, 'mask'):
+            # dL/dh[t-1] = (1 - mask) .* dL/dh[t]
+            # dL/dh[t] = mask .* dL/dh[t]
+            if hasattr(self, 'dL_dprev_h'):
+                self.dL_dprev_h.add_hprod_one_minus_mask(self.b_context, self.mask, dL_dh)
+            dL_dh.hprod(self.b_context, self.mask)
+        # dL/dpre_h[t] = dL/dh[t] .* dh[t]/dpre_h[t]
+        self.dL_dpre_h.assign_hprod(self.b_context, dL_dh, self.dh_dpre_h)
+        if self.grad_clipping:
+            self.dL_dpre_h.clip(self.b_context, -self.grad_clipping, self.grad_clipping)
+
+        if hasattr(self, 'dL_dW'):
+            # dL_dW += x[t].T * dL/dpre_h[t]
+            self.dL_dW.add_dot(self.W_b_context, self.x, self.dL_dpre_h, 'T')
+        if hasattr(self, 'dL_dR'):
+            # dL_dR += h[t-1].T * dL/dpre_h[t]
+            self.dL_dR.add_dot(self.R_b_context, self.prev_h, self.dL_dpre_h, 'T')
+        if hasattr(self, 'dL_db'):
+            # dL_db += sum(dL/dpre_h[t], axis=0)
+            self.dL_db.add_repeat_derivative(self.b_b_context, self.dL_dpre_h, self.dL_dpre_h.nrows, axis=0)
+        if hasattr(self, 'dL_dx'):
+            # dL/dx[t] = dL/dpre_h[t] * W.T
+            self.dL_dx.add_dot(self.x_b_context, self.dL_dpre_h, self.W, 'N', 'T')
+        if hasattr(self, 'dL_dprev_h'):
+            # dL/dh[t-1] = dL/dpre_h[t] * R.T
+            self.dL_dprev_h.add_dot(self.b_context, self.dL_dpre_h, self.R, 'N', 'T')
@@ -0,0 +1,169 @@
+# ----------------------------------------------------------------------------
+# Copyright 2015 Grammarly, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ----------------------------------------------------------------------------
+import numpy as np
+from quagga.matrix import Matrix
+from quagga.context import Context
+from quagga.connector import Connector
+
+
+class SampledSoftmaxCeBlock(object):
+    """
+    Softmax with mean cross entropy loss computed over the true class and
+    ``num_samples`` negative classes instead of the whole vocabulary
+    (sampled softmax). Negatives are drawn with replacement by ``sampler``
+    once per ``fprop`` and are shared by all rows of the batch. Logits are
+    corrected by ``-log(q(w))``, where ``q`` is the sampling distribution,
+    so the loss is a consistent estimate of the full softmax loss.
+    Negatives that coincide with the true class are not removed.
+
+    Only the rows of ``W`` of the true classes and of the negatives are
+    gathered, the derivative of ``W`` is a row-sparse ``SparseMatrix``.
+    In testing mode the softmax over the whole vocabulary is computed, so
+    that the validation loss is exact.
+
+    Parameters
+    ----------
+    W
+        Output embedding ``vocab_size x dim``
+    sampler : AliasSampler
+        Sampler of the negatives, can be shared by many blocks
+    num_samples : int
+    x
+        ``batch_size x dim``
+    true_labels
+        Indexes of the true classes ``batch_size x 1``
+    mask
+    device_id : int
+        Defines the device's id on which the computation will take place
+    """
+    def __init__(self, W, sampler, num_samples, x, true_labels, mask=None, device_id=None):
+        self.context = Context(device_id)
+        device_id = self.context.device_id
+        if W.bpropagable:
+            self.W, self.dL_dW = W.register_usage_with_sparse_backward_matrix()
+        else:
+            self.W = W.register_usage(device_id)
+        if x.bpropagable:
+            self.x, self.dL_dx = x.register_usage(device_id, device_id)
+        else:
+            self.x = x.register_usage(device_id)
+        self.true_labels = true_labels.register_usage(device_id)
+        if mask:
+            self.mask = mask.register_usage(device_id)
+        self.sampler = sampler
+        self.num_samples = num_samples
+        self.neg_log_probs = sampler.get_neg_log_probs(device_id)
+        self.training_mode = True
+        self.loss = None
+
+        batch_size = self.x.nrows
+        dim = self.W.ncols
+        self.sampled_ids = Matrix.empty(num_samples, 1, 'int', device_id)
+        self.true_W = Matrix.empty(batch_size, dim, device_id=device_id)
+        self.sampled_W = Matrix.empty(num_samples, dim, device_id=device_id)
+        self.sampled_neg_log_probs = Matrix.empty(num_samples, 1, device_id=device_id)
+        self.true_neg_log_probs = Matrix.empty(batch_size, 1, device_id=device_id)
+        # the true class is the first column of the logits
+        self.logits = Matrix.empty(batch_size, 1 + num_samples, device_id=device_id)
+        self.true_logits = self.logits[:, 0:1]
+        self.sampled_logits = self.logits[:, 1:]
+        self.probs = Matrix.empty_like(self.logits)
+        self.true_probs = self.probs[:, 0:1]
+        self.ones_batch = Matrix.empty(batch_size, 1, device_id=device_id)
+        self.ones_batch.sync_fill(1.0)
+        self.learning = W.bpropagable or x.bpropagable
+        if self.learning:
+            self.zero_labels = Matrix.empty(batch_size, 1, 'int', device_id)
+            self.zero_labels.sync_fill(0)
+            self.dL_dlogits = Matrix.empty_like(self.logits)
+            self.dL_dtrue_logits = self.dL_dlogits[:, 0:1]
+            self.dL_dsampled_logits = self.dL_dlogits[:, 1:]
+            if W.bpropagable:
+                self.dL_dtrue_W = Matrix.empty_like(self.true_W)
+                self.dL_dsampled_W = Matrix.empty_like(self.sampled_W)
+            if x.bpropagable:
+                self.dL_dx_true = Matrix.empty_like(self.true_W)
+
+    def fprop(self):
+        if not self.training_mode:
+            # full_probs = softmax(x * W.T)
+            self.full_probs.assign_dot(self.context, self.x, self.W, 'N', 'T')
+            self.full_probs.softmax(self.context, self.full_probs)
+            return
+        sampled_ids = self.sampler.sample(self.num_samples).astype(np.int32).reshape(-1, 1)
+        self.sampled_ids.assign_npa(self.context, sampled_ids)
+        self.W.slice_rows(self.context, self.true_labels, self.true_W)
+        self.W.slice_rows(self.context, self.sampled_ids, self.sampled_W)
+        # logits[i, 0] = x[i] . W[true_labels[i]] - log(q(true_labels[i]))
+        self.true_logits.assign_hprod_sum(self.context, self.x, self.true_W)
+        self.neg_log_probs.slice_rows(self.context, self.true_labels, self.true_neg_log_probs)
+        self.true_logits.add(self.context, self.true_neg_log_probs)
+        # logits[i, 1+j] = x[i] . W[sampled_ids[j]] - log(q(sampled_ids[j]))
+        self.neg_log_probs.slice_rows(self.context, self.sampled_ids, self.sampled_neg_log_probs)
+        self.sampled_logits.assign_dot(self.context, self.x, self.sampled_W, 'N', 'T')
+        self.sampled_logits.add_dot(self.context, self.ones_batch, self.sampled_neg_log_probs, 'N', 'T')
+        self.logits.softmax(self.context, self.probs)
+
+    def bprop(self):
+        if not self.learning or not self.training_mode:
+            return
+        # dL/dlogits = (probs - [1, 0, ..., 0]) / M
+        self.dL_dlogits.assign_softmax_ce_derivative(self.context, self.probs, self.zero_labels)
+        if hasattr(self, 'mask'):
+            self.dL_dlogits.hprod(self.context, self.mask)
+        if hasattr(self, 'dL_dW'):
+            # dL/dW[true_labels[i]] += dL/dlogits[i, 0] * x[i]
+            self.dL_dtrue_W.assign(self.context, self.x)
+            self.dL_dtrue_W.hprod(self.context, self.dL_dtrue_logits)
+            self.dL_dW.add_rows_slice(self.true_labels, self.dL_dtrue_W)
+            # dL/dW[sampled_ids] += dL/dlogits[:, 1:].T * x
+            self.dL_dsampled_W.assign_dot(self.context, self.dL_dsampled_logits, self.x, 'T')
+            self.dL_dW.add_rows_slice(self.sampled_ids, self.dL_dsampled_W)
+        if hasattr(self, 'dL_dx'):
+            # dL/dx += dL/dlogits[:, 1:] * W[sampled_ids] + dL/dlogits[:, 0] .* W[true_labels]
+            self.dL_dx.add_dot(self.context, self.dL_dsampled_logits, self.sampled_W)
+            self.dL_dx_true.assign(self.context, self.true_W)
+            self.dL_dx_true.hprod(self.context, self.dL_dtrue_logits)
+            self.dL_dx.add(self.context, self.dL_dx_true)
+
+    def set_training_mode(self):
+        self.training_mode = True
+
+    def set_testing_mode(self):
+        self.training_mode = False
+        if not hasattr(self, 'full_probs'):
+            self.full_probs = Matrix.empty(self.x.nrows, self.W.nrows, device_id=self.context.device_id)
+
+    def calculate_loss(self, context):
+        true_labels_np = self.true_labels.to_host(context)
+        if self.training_mode:
+            true_probs_np = self.true_probs.to_host(context)
+        else:
+            true_probs_np = self.full_probs.to_host(context)
+            true_probs_np = true_probs_np[range(true_probs_np.shape[0]), true_labels_np.flatten()]
+        if hasattr(self, 'mask'):
+            mask = self.mask.to_host(context)
+            context.add_callback(self._calculate_ce_loss, true_probs_np, mask)
+        else:
+            context.add_callback(self._calculate_ce_loss, true_probs_np)
+
+    def _calculate_ce_loss(self, true_probs_np, mask=None):
+        logs = np.log(true_probs_np.flatten() + 1e-20)
+        if mask is not None:
+            logs *= mask[:, 0]
+            self.loss = - np.sum(logs) / np.sum(mask)
+        else:
+            self.loss = - np.mean(logs)
@@ -0,0 +1,175 @@
+# ----------------------------------------------------------------------------
+# Copyright 2015 Grammarly, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ----------------------------------------------------------------------------
+from quagga.utils import List
+from quagga.matrix import Matrix
+from quagga.context import Context
+from quagga.connector import Connector
+
+
+class TemporalConvBlock(object):
+    """
+    One-dimensional convolution over time, which computes all steps of a
+    sequence at once instead of one after another:
+
+        output[t] = b + sum_j x[t + offset_j] * W_j
+
+    where ``W_j`` is the ``j``-th block of ``input_dim`` rows of ``W``.
+    With ``causal`` the offsets are ``(j - kernel_size + 1) * dilation``,
+    so an output depends on the current and previous steps only, otherwise
+    the kernel is centered on the current step. Steps outside of the
+    sequence and masked out steps of ``x`` are zeros, masked out steps of
+    the output are zeros as well.
+
+    The inputs shifted by ``offset_j`` are stacked vertically into the
+    ``j``-th column slice of a ``T*batch_size x kernel_size*input_dim``
+    matrix (im2col), then the outputs of all steps are computed with one
+    matrix multiplication.
+
+    Parameters
+    ----------
+    W
+        ``kernel_size*input_dim x output_dim``
+    b
+        ``1 x output_dim``
+    x : List
+    mask : List
+        Masks of the steps, can be ``None``
+    dilation : int
+    causal : bool
+    device_id : int
+        Defines the device's id on which the computation will take place
+    """
+    def __init__(self, W, b, x, mask=None, dilation=1, causal=True, device_id=None):
+        self.f_context = Context(device_id)
+        device_id = self.f_context.device_id
+        if W.bpropagable:
+            self.W, self.dL_dW = W.register_usage(device_id, device_id)
+            self.W_b_context = Context(device_id)
+        else:
+            self.W = W.register_usage(device_id)
+        if b.bpropagable:
+            self.b, self.dL_db = b.register_usage(device_id, device_id)
+            self.b_b_context = Context(device_id)
+        else:
+            self.b = b.register_usage(device_id)
+        if x.elements[0].bpropagable:
+            self.x, self.dL_dx = zip(*[e.register_usage(device_id, device_id) for e in x.elements])
+        else:
+            self.x = [e.register_usage(device_id) for e in x.elements]
+        if mask:
+            self.mask = [e.register_usage(device_id) for e in mask.elements]
+        self.length = x.length
+        self.learning = W.bpropagable or b.bpropagable or hasattr(self, 'dL_dx')
+        if self.learning:
+            self.b_context = Context(device_id)
+
+        max_len = len(self.x)
+        # per step buffers follow the batch size, stacked ones are
+        # preallocated for the current one and resized in `_set_length`
+        batch_size = self.x[0].nrows
+        max_nrows = max_len * int(batch_size)
+        input_dim = int(self.x[0].ncols)
+        output_dim = int(self.W.ncols)
+        kernel_size = int(self.W.nrows) // input_dim
+        if kernel_size * input_dim != self.W.nrows:
+            raise ValueError('The number of rows of W must be a multiple of '
+                             'the number of columns of x!')
+        if causal:
+            self.offsets = [(j - kernel_size + 1) * dilation for j in xrange(kernel_size)]
+        else:
+            self.offsets = [j * dilation - (kernel_size - 1) * dilation // 2 for j in xrange(kernel_size)]
+
+        self.unfolded_x = Matrix.empty(max_nrows, kernel_size * input_dim, device_id=device_id)
+        self.x_taps = [self.unfolded_x[:, j*input_dim:(j+1)*input_dim] for j in xrange(kernel_size)]
+        self.zeros = Matrix.empty(batch_size, input_dim, device_id=device_id)
+        self.zeros.sync_fill(0.0)
+        if hasattr(self, 'mask'):
+            self.unfolded_mask = Matrix.empty(max_nrows, kernel_size, device_id=device_id)
+            self.mask_taps = [self.unfolded_mask[:, j:j+1] for j in xrange(kernel_size)]
+            self.output_mask = Matrix.empty(max_nrows, 1, device_id=device_id)
+            self.zero_mask = Matrix.empty(batch_size, 1, device_id=device_id)
+            self.zero_mask.sync_fill(0.0)
+        self.stacked_output = Matrix.empty(max_nrows, output_dim, device_id=device_id)
+        output = []
+        for _ in xrange(max_len):
+            e = Matrix.empty(batch_size, output_dim, device_id=device_id)
+            output.append(Connector(e, device_id if self.learning else None))
+        self.output = List(output, x.length)
+
+        if self.learning:
+            self.dL_dstacked_output = Matrix.empty_like(self.stacked_output)
+            if hasattr(self, 'dL_db'):
+                self.ones = Matrix.empty(max_nrows, 1, device_id=device_id)
+                self.ones.sync_fill(1.0)
+            if hasattr(self, 'dL_dx'):
+                self.dL_dunfolded_x = Matrix.empty_like(self.unfolded_x)
+                self.dL_dx_taps = [self.dL_dunfolded_x[:, j*input_dim:(j+1)*input_dim] for j in xrange(kernel_size)]
+                self.dL_dx_parts = [Matrix.empty_like(self.zeros) for _ in xrange(max_len)]
+
+    def _set_length(self, length):
+        nrows = length * int(self.x[0].nrows)
+        for name in ['unfolded_x', 'unfolded_mask', 'output_mask', 'stacked_output',
+                     'dL_dstacked_output', 'ones', 'dL_dunfolded_x']:
+            if hasattr(self, name):
+                getattr(self, name).nrows = nrows
+
+    def fprop(self):
+        length = int(self.length)
+        self._set_length(length)
+        for offset, x_tap in zip(self.offsets, self.x_taps):
+            x_tap.assign_vstack(self.f_context, [self.x[t + offset] if 0 <= t + offset < length else self.zeros
+                                                 for t in xrange(length)])
+        if hasattr(self, 'mask'):
+            # inputs of masked out steps are zeros
+            for offset, x_tap, mask_tap in zip(self.offsets, self.x_taps, self.mask_taps):
+                mask_tap.assign_vstack(self.f_context, [self.mask[t + offset] if 0 <= t + offset < length else self.zero_mask
+                                                        for t in xrange(length)])
+                x_tap.hprod(self.f_context, mask_tap)
+        # output = unfolded_x * W + b
+        self.stacked_output.assign_dot(self.f_context, self.unfolded_x, self.W)
+        self.stacked_output.add(self.f_context, self.b)
+        if hasattr(self, 'mask'):
+            self.output_mask.assign_vstack(self.f_context, self.mask[:length])
+            self.stacked_output.hprod(self.f_context, self.output_mask)
+        self.stacked_output.vsplit(self.f_context, self.output[:length])
+        self.output.fprop()
+
+    def bprop(self):
+        if not self.learning:
+            return
+        length = int(self.length)
+        batch_size = int(self.x[0].nrows)
+        self.dL_dstacked_output.assign_vstack(self.b_context, self.output.bprop())
+        if hasattr(self, 'mask'):
+            self.dL_dstacked_output.hprod(self.b_context, self.output_mask)
+        if hasattr(self, 'dL_dW'):
+            # dL/dW += unfolded_x.T * dL/doutput
+            self.dL_dW.add_dot(self.W_b_context, self.unfolded_x, self.dL_dstacked_output, 'T')
+        if hasattr(self, 'dL_db'):
+            # dL/db += 1.T * dL/doutput
+            self.dL_db.add_dot(self.b_b_context, self.ones, self.dL_dstacked_output, 'T')
+        if hasattr(self, 'dL_dx'):
+            # dL/dunfolded_x = dL/doutput * W.T
+            self.dL_dunfolded_x.assign_dot(self.b_context, self.dL_dstacked_output, self.W, 'N', 'T')
+            for j, offset in enumerate(self.offsets):
+                dL_dx_tap = self.dL_dx_taps[j]
+                if hasattr(self, 'mask'):
+                    dL_dx_tap.hprod(self.b_context, self.mask_taps[j])
+                steps = [t for t in xrange(length) if 0 <= t + offset < length]
+                dL_dx_parts = self.dL_dx_parts[:len(steps)]
+                dL_dx_tap.vsplit(self.b_context, dL_dx_parts, [(t * batch_size, (t + 1) * batch_size) for t in steps])
+                for t, dL_dx_part in zip(steps, dL_dx_parts):
+                    self.dL_dx[t + offset].add(self.b_context, dL_dx_part)
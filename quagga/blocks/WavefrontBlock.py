@@ -0,0 +1,56 @@
+# ----------------------------------------------------------------------------
+# Copyright 2015 Grammarly, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ----------------------------------------------------------------------------
+class WavefrontBlock(object):
+    """
+    Runs stacked :class:`SequencerBlock` layers step by step in diagonal
+    wavefronts instead of one whole layer after another. A step of a layer
+    needs the same step of the layers below and the previous step of its
+    own, so steps on one diagonal of the (layer, step) grid are
+    independent. When layers are placed on different devices, the devices
+    work on a diagonal concurrently, because every step is issued right
+    after the steps it depends on rather than after whole layers. The
+    backward pass runs the diagonals in reverse.
+
+    The block replaces the wrapped layers in a model, their blocks must not
+    be listed in the model separately.
+
+    Parameters
+    ----------
+    sequencers : list of SequencerBlock
+        Layers from the bottom to the top, a layer may use outputs of the
+        layers listed before it at the same step. Reversed layers are not
+        supported.
+    """
+    def __init__(self, sequencers):
+        if any(sequencer.reverse for sequencer in sequencers):
+            raise ValueError('Reversed sequencers can not be run in wavefronts!')
+        self.sequencers = sequencers
+
+    def _get_wavefronts(self):
+        lengths = [int(sequencer._length) for sequencer in self.sequencers]
+        num_layers = len(self.sequencers)
+        for d in xrange(max(lengths) + num_layers - 1):
+            yield [(l, d - l) for l in xrange(num_layers) if 0 <= d - l < lengths[l]]
+
+    def fprop(self):
+        for wavefront in self._get_wavefronts():
+            for l, t in wavefront:
+                self.sequencers[l].blocks[t].fprop()
+
+    def bprop(self):
+        for wavefront in reversed(list(self._get_wavefronts())):
+            for l, t in reversed(wavefront):
+                self.sequencers[l].blocks[t].bprop()
@@ -15,22 +15,30 @@
 # ----------------------------------------------------------------------------
 from quagga.blocks.ArgmaxBlock import ArgmaxBlock
 from quagga.blocks.AttentionBlock import AttentionBlock
+from quagga.blocks.BidirectionalLstmBlock import BidirectionalLstmBlock
+from quagga.blocks.ChunkedSoftmaxCeBlock import ChunkedSoftmaxCeBlock
 from quagga.blocks.ColSlicingBlock import ColSlicingBlock
 from quagga.blocks.DotBlock import DotBlock
 from quagga.blocks.DropoutBlock import DropoutBlock
+from quagga.blocks.FusedSoftmaxCeBlock import FusedSoftmaxCeBlock
 from quagga.blocks.GaussianNoiseBlock import GaussianNoiseBlock
 from quagga.blocks.GradientReversalBlock import GradientReversalBlock
+from quagga.blocks.GruBlock import GruBlock
+from quagga.blocks.HierarchicalSoftmaxCeBlock import HierarchicalSoftmaxCeBlock
 from quagga.blocks.HorizontalStackBlock import HorizontalStackBlock
 from quagga.blocks.InputlessLstmBlock import InputlessLstmBlock
 from quagga.blocks.L2RegularizationBlock import L2RegularizationBlock
 from quagga.blocks.LastSelectorBlock import LastSelectorBlock
 from quagga.blocks.LstmBlock import LstmBlock
+from quagga.blocks.LstmpBlock import LstmpBlock
 from quagga.blocks.MeanPoolingBlock import MeanPoolingBlock
 from quagga.blocks.NonlinearityBlock import NonlinearityBlock
+from quagga.blocks.PackedLstmBlock import PackedLstmBlock
 from quagga.blocks.ParameterContainer import ParameterContainer
 from quagga.blocks.RepeatBlock import RepeatBlock
+from quagga.blocks.RnnBlock import RnnBlock
 from quagga.blocks.RowSlicingBlock import RowSlicingBlock
-from quagga.blocks.RowSlicingBlockDense import RowSlicingBlockDense
+from quagga.blocks.SampledSoftmaxCeBlock import SampledSoftmaxCeBlock
 from quagga.blocks.ScheduledSamplingBlock import ScheduledSamplingBlock
 from quagga.blocks.SequencerBlock import SequencerBlock
 from quagga.blocks.SequentialHorizontalStackBlock import SequentialHorizontalStackBlock
@@ -39,5 +47,7 @@ from quagga.blocks.SequentialSumPoolingBlock import SequentialSumPoolingBlock
 from quagga.blocks.SigmoidCeBlock import SigmoidCeBlock
 from quagga.blocks.SoftmaxBlock import SoftmaxBlock
 from quagga.blocks.SoftmaxCeBlock import SoftmaxCeBlock
+from quagga.blocks.TemporalConvBlock import TemporalConvBlock
 from quagga.blocks.VerticalStackBlock import VerticalStackBlock
+from quagga.blocks.WavefrontBlock import WavefrontBlock
 from quagga.blocks.SseBlock import SseBlock
\ No newline at end of file
@@ -16,6 +16,30 @@
 from quagga.matrix import Matrix
 from quagga.context import Context
 from quagga.matrix import SparseMatrix
+from quagga.matrix import MemoryTracker
+
+
+_delegated_classes = set()
+
+
+def _get_delegate(name):
+    def method(self, *args, **kwargs):
+        return getattr(self._f_matrix, name)(*args, **kwargs)
+    method.__name__ = name
+    return method
+
+
+def _add_delegates(matrix_class):
+    """
+    Adds to `Connector` a method for every public method of `matrix_class`
+    that is not shadowed by `Connector`.
+    """
+    for name in dir(matrix_class):
+        if name.startswith('_') or hasattr(Connector, name):
+            continue
+        if callable(getattr(matrix_class, name)):
+            setattr(Connector, name, _get_delegate(name))
+    _delegated_classes.add(matrix_class)
 
 
 class Connector(object):
@@ -53,19 +77,21 @@ class Connector(object):
 
     def __init__(self, f_matrix, bu_device_id=None):
         self._fo_device_id = f_matrix.device_id
+        self._f_matrix = f_matrix
         self._f_matrices = {self._fo_device_id: f_matrix}
+        MemoryTracker.tag(f_matrix, 'activations')
         self.context = {self._fo_device_id: Context(self._fo_device_id)}
         if bu_device_id is not None:
             self._bu_device_id = bu_device_id
             self._b_matrices = dict()
             self._b_matrices_pool = dict()
             self._b_sparse_matrix = None
-        # We need do this trick because instead we will add attribute
-        # to the Connector instance by setting it
-        # instead of setting attribute in f_matrix
-        self.__f_matrix_setable_attributes = f_matrix.get_setable_attributes()
-        for attr_name in self.__f_matrix_setable_attributes:
-            getattr(self, attr_name)
+        # delegates are plain class attributes, so calling a matrix method
+        # through the connector does not go through `__getattr__`, while the
+        # method itself is still looked up in the matrix class on every call,
+        # where the profiler and the tracer patch it
+        if type(f_matrix) not in _delegated_classes:
+            _add_delegates(type(f_matrix))
 
     @property
     def bpropagable(self):
@@ -82,6 +108,24 @@ class Connector(object):
         self._b_sparse_matrix = SparseMatrix(self._bu_device_id)
         return fwd_matrix, self._b_sparse_matrix
 
+    def register_usage_with_backward_matrix(self, b_matrix):
+        """
+        Registers usage of the connector on its backward usage device,
+        derivatives obtained there are accumulated directly in
+        ``b_matrix``, which can be a view of a bigger matrix.
+        """
+        if self._bu_device_id != self._fo_device_id or \
+                b_matrix.device_id != self._bu_device_id:
+            raise ValueError("Registering usage with backward matrix "
+                             "requires equal forward obtaining device, "
+                             "backward usage device and device of the "
+                             "backward matrix.")
+        if self._bu_device_id in self._b_matrices:
+            raise ValueError("Backward matrix of the backward usage device "
+                             "is already registered!")
+        self._b_matrices[self._bu_device_id] = b_matrix
+        return self._f_matrices[self._fo_device_id], b_matrix
+
     def register_usage(self, fu_device_id, bo_device_id=None):
         """
         Register usage of connector's forward_matrix.
@@ -96,6 +140,7 @@ class Connector(object):
                              "You mustn't register for backward propagate!")
         if fu_device_id != self._fo_device_id and fu_device_id not in self._f_matrices:
             self._f_matrices[fu_device_id] = Matrix.empty_like(self, fu_device_id)
+            MemoryTracker.tag(self._f_matrices[fu_device_id], 'activations')
             self.context[fu_device_id] = Context(fu_device_id)
         if bo_device_id is None:
             return self._f_matrices[fu_device_id]
@@ -103,10 +148,12 @@ class Connector(object):
         for device_id in [self._bu_device_id, bo_device_id]:
             if device_id not in self._b_matrices:
                 self._b_matrices[device_id] = Matrix.empty_like(self, device_id)
+                MemoryTracker.tag(self._b_matrices[device_id], 'gradients')
                 if device_id not in self.context:
                     self.context[device_id] = Context(device_id)
         if self._bu_device_id != bo_device_id and self._bu_device_id not in self._b_matrices_pool:
             self._b_matrices_pool[self._bu_device_id] = Matrix.empty_like(self, self._bu_device_id)
+            MemoryTracker.tag(self._b_matrices_pool[self._bu_device_id], 'gradients')
         return self._f_matrices[fu_device_id], self._b_matrices[bo_device_id]
 
     def fprop(self):
@@ -136,6 +183,7 @@ class Connector(object):
             # When no one registered for providing derivatives zero dense
             # matrix will be returned
             bwd = Matrix.empty_like(self, self._bu_device_id)
+            MemoryTracker.tag(bwd, 'gradients')
             if self._bu_device_id not in self.context:
                 self.context[self._bu_device_id] = Context(self._bu_device_id)
             bwd.fill(self.context[self._bu_device_id], 0.0)
@@ -153,21 +201,58 @@ class Connector(object):
             self._b_matrices[self._bu_device_id].add(self.context[self._bu_device_id], self._b_sparse_matrix)
         return self._b_matrices[self._bu_device_id]
 
+    def scale_backward_matrices(self, alpha):
+        """
+        Multiplies derivatives obtained so far on every device by ``alpha``.
+
+        :param alpha: ctypes scalar
+        """
+        for device_id, matrix in self._b_matrices.iteritems():
+            matrix.scale(self.context[device_id], alpha)
+        if self._b_sparse_matrix:
+            self._b_sparse_matrix.scale(self.context[self._bu_device_id], alpha)
+
     backward_matrix = property(lambda self: self.bprop())
 
+    # setable attributes of matrices must be properties, otherwise
+    # setting them would add an attribute to the connector instance
+    # instead of setting it in `forward_matrix`
+    @property
+    def nrows(self):
+        return self._f_matrix.nrows
+
+    @nrows.setter
+    def nrows(self, value):
+        self._f_matrix.nrows = value
+
+    @property
+    def ncols(self):
+        return self._f_matrix.ncols
+
+    @ncols.setter
+    def ncols(self, value):
+        self._f_matrix.ncols = value
+
+    @property
+    def npa(self):
+        return self._f_matrix.npa
+
+    @npa.setter
+    def npa(self, value):
+        self._f_matrix.npa = value
+
+    @property
+    def last_modification_context(self):
+        return self._f_matrix.last_modification_context
+
+    @last_modification_context.setter
+    def last_modification_context(self, value):
+        self._f_matrix.last_modification_context = value
+
     def __getattr__(self, name):
-        attribute = getattr(self._f_matrices[self._fo_device_id], name)
-        if hasattr(attribute, '__call__'):
-            setattr(self, name, attribute)
-        else:
-            # TODO(sergii): inspect this place. hyp: property belong to class not to instance
-            fget = lambda self: getattr(self._f_matrices[self._fo_device_id], name)
-            if name in self.__f_matrix_setable_attributes:
-                fset = lambda self, value: setattr(self._f_matrices[self._fo_device_id], name, value)
-                setattr(Connector, name, property(fget, fset))
-            else:
-                setattr(Connector, name, property(fget))
-        return getattr(self, name)
+        if name == '_f_matrix':
+            raise AttributeError(name)
+        return getattr(self._f_matrix, name)
 
     def __getitem__(self, item):
-        return self._f_matrices[self._fo_device_id][item]
\ No newline at end of file
+        return self._f_matrix[item]
\ No newline at end of file
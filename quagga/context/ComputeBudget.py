@@ -0,0 +1,83 @@
+# ----------------------------------------------------------------------------
+# Copyright 2015 Grammarly, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ----------------------------------------------------------------------------
+import threading
+from quagga.context import blas
+
+
+_local = threading.local()
+# last number of threads set when the library has only a process-wide setting
+_global_num_threads = [None]
+
+
+class ComputeBudget(object):
+    """
+    Share of the machine given to a :class:`CpuContext`: the number of BLAS
+    threads for its operations and, optionally, the CPUs its work is
+    pinned to.
+
+    Parameters
+    ----------
+    num_threads : int
+        Number of BLAS threads, the number of CPUs in ``cpu_affinity`` if
+        it is not given
+    cpu_affinity : list of int
+        CPUs the thread that runs the context's work is restricted to
+    """
+    def __init__(self, num_threads=None, cpu_affinity=None):
+        if num_threads is None and cpu_affinity is None:
+            raise ValueError('Either num_threads or cpu_affinity must be given!')
+        self.cpu_affinity = sorted(cpu_affinity) if cpu_affinity is not None else None
+        self.num_threads = num_threads if num_threads else len(self.cpu_affinity)
+
+    def apply(self):
+        """
+        Applies the budget to the calling thread. It does nothing when the
+        budget is already applied there, so it is cheap to call before
+        every operation. With a process-wide BLAS thread setting the number
+        of threads is set again whenever another budget was applied since.
+        """
+        if getattr(_local, 'budget', None) is not self:
+            if self.cpu_affinity is not None:
+                blas.set_affinity(self.cpu_affinity)
+            if blas.is_thread_local:
+                blas.set_num_threads(self.num_threads)
+            _local.budget = self
+        if not blas.is_thread_local and _global_num_threads[0] != self.num_threads:
+            blas.set_num_threads(self.num_threads)
+            _global_num_threads[0] = self.num_threads
+
+    @staticmethod
+    def divide(num_budgets, cpus=None):
+        """
+        Divides ``cpus`` (by default all CPUs the process may run on) into
+        ``num_budgets`` disjoint contiguous budgets of nearly equal size.
+        When there are fewer CPUs than budgets, CPUs are shared round-robin
+        and every budget gets one thread.
+        """
+        cpus = sorted(cpus) if cpus is not None else blas.get_affinity()
+        if num_budgets > len(cpus):
+            return [ComputeBudget(1, [cpus[i % len(cpus)]]) for i in xrange(num_budgets)]
+        budgets = []
+        start = 0
+        for i in xrange(num_budgets):
+            stop = start + (len(cpus) - start) / (num_budgets - i)
+            budgets.append(ComputeBudget(cpu_affinity=cpus[start:stop]))
+            start = stop
+        return budgets
+
+    def __repr__(self):
+        return 'ComputeBudget(num_threads={}, cpu_affinity={})'.\
+            format(self.num_threads, self.cpu_affinity)
@@ -15,13 +15,13 @@
 # ----------------------------------------------------------------------------
 import quagga
 from quagga.context import CpuContext
-from quagga.context import GpuContext
 
 
 def __get_context_class():
     if quagga.processor_type == 'cpu':
         return CpuContext
     elif quagga.processor_type == 'gpu':
+        from quagga.context import GpuContext
         return GpuContext
     else:
         raise ValueError(u'Processor type: {} is undefined'.
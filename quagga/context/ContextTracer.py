@@ -0,0 +1,221 @@
+# ----------------------------------------------------------------------------
+# Copyright 2015 Grammarly, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ----------------------------------------------------------------------------
+import json
+import quagga
+import threading
+from functools import wraps
+from itertools import count
+from timeit import default_timer
+from quagga.context import CpuContext
+
+
+class ContextTracer(object):
+    """
+    Records a timeline of the work submitted to contexts: start and end of
+    every matrix operation, every ``wait``/``block`` dependency between
+    contexts and every callback run. The timeline is exported in the
+    ``chrome://tracing`` JSON format, where a process is a device and a
+    thread is a context.
+
+    Methods of the matrix and context classes of the current
+    ``quagga.processor_type`` are patched only while the tracer is enabled.
+    Connectors look matrix methods up at call time, so operations issued
+    through them are recorded for a model built before :meth:`enable`.
+    For GPU contexts and CPU contexts run by workers operation spans show
+    the time of submission, callbacks are recorded when they are actually
+    run.
+
+    Examples
+    --------
+    >>> tracer = ContextTracer()
+    >>> tracer.register_model(model)
+    >>> tracer.enable()
+    >>> model.fprop(); model.bprop()
+    >>> tracer.disable()
+    >>> tracer.save('trace.json')
+    """
+    def __init__(self):
+        if quagga.processor_type == 'cpu':
+            from quagga.matrix import CpuMatrix
+            self.matrix_class, self.context_class = CpuMatrix, CpuContext
+        else:
+            from quagga.matrix import GpuMatrix
+            from quagga.context import GpuContext
+            self.matrix_class, self.context_class = GpuMatrix, GpuContext
+        self.events = []
+        self.enabled = False
+        self.context_names = {}
+        self._tids = {}
+        self._flow_ids = count()
+        self._local = threading.local()
+        self._originals = []
+        self._start_time = default_timer()
+
+    def register(self, obj, name):
+        """
+        Names contexts stored in attributes of ``obj`` (directly, in
+        lists or in dicts) as ``name.attribute``.
+        """
+        for attr, value in vars(obj).iteritems():
+            if isinstance(value, self.context_class):
+                values = [('{}.{}'.format(name, attr), value)]
+            elif isinstance(value, (list, tuple)):
+                values = [('{}.{}[{}]'.format(name, attr, i), e) for i, e in enumerate(value)]
+            elif isinstance(value, dict):
+                values = [('{}.{}[{}]'.format(name, attr, k), e) for k, e in value.iteritems()]
+            else:
+                continue
+            for context_name, context in values:
+                if isinstance(context, self.context_class) and context not in self.context_names:
+                    self.context_names[context] = context_name
+
+    def register_model(self, model):
+        for k, block in enumerate(model.blocks):
+            block_name = '{}#{}'.format(block.__class__.__name__, k)
+            self.register(block, block_name)
+            for i, sub_block in enumerate(getattr(block, 'blocks', [])):
+                self.register(sub_block, '{}/{}[{}]'.format(block_name, sub_block.__class__.__name__, i))
+
+    def enable(self):
+        if self.enabled:
+            return
+        self.enabled = True
+        # quagga.utils imports quagga.context
+        from quagga.utils.Profiler import get_operations
+        matrix_class = self.matrix_class
+        # only operations are traced, i.e. methods that take a context
+        for name, function, is_static in get_operations(matrix_class):
+            wrapper = self._wrap_op(name, function)
+            self._patch(matrix_class, name, staticmethod(wrapper) if is_static else wrapper)
+        context_class = self.context_class
+        self._patch(context_class, 'wait', self._wrap_dependency('wait', context_class.__dict__['wait']))
+        self._patch(context_class, 'block', self._wrap_dependency('block', context_class.__dict__['block']))
+        self._patch(context_class, 'add_callback', self._wrap_add_callback(context_class.__dict__['add_callback']))
+
+    def disable(self):
+        if not self.enabled:
+            return
+        self.enabled = False
+        for cls, name, original in reversed(self._originals):
+            setattr(cls, name, original)
+        del self._originals[:]
+
+    def reset(self):
+        del self.events[:]
+        self._start_time = default_timer()
+
+    def get_trace(self):
+        metadata = [{'name': 'process_name', 'ph': 'M', 'pid': 'host', 'tid': 0,
+                     'args': {'name': 'host'}},
+                    {'name': 'thread_name', 'ph': 'M', 'pid': 'host', 'tid': 0,
+                     'args': {'name': 'no context'}}]
+        for device_id in set(context.device_id for context in self._tids):
+            metadata.append({'name': 'process_name', 'ph': 'M', 'pid': device_id, 'tid': 0,
+                             'args': {'name': 'device {}'.format(device_id)}})
+        for context, tid in self._tids.iteritems():
+            name = self.context_names.get(context, 'context {}'.format(tid))
+            metadata.append({'name': 'thread_name', 'ph': 'M', 'pid': context.device_id,
+                             'tid': tid, 'args': {'name': name}})
+        return {'traceEvents': metadata + self.events, 'displayTimeUnit': 'ms'}
+
+    def save(self, path):
+        with open(path, 'w') as f:
+            json.dump(self.get_trace(), f)
+
+    def _patch(self, cls, name, attribute):
+        self._originals.append((cls, name, cls.__dict__[name]))
+        setattr(cls, name, attribute)
+
+    def _get_time(self):
+        return (default_timer() - self._start_time) * 1e6
+
+    def _get_location(self, context):
+        if context is None:
+            return 'host', 0
+        if context not in self._tids:
+            self._tids[context] = len(self._tids) + 1
+        return context.device_id, self._tids[context]
+
+    def _add_event(self, ph, name, cat, context, ts, **kwargs):
+        pid, tid = self._get_location(context)
+        event = {'ph': ph, 'name': name, 'cat': cat, 'pid': pid, 'tid': tid, 'ts': ts}
+        event.update(kwargs)
+        self.events.append(event)
+
+    def _add_flow(self, name, from_context, to_context, ts):
+        flow_id = next(self._flow_ids)
+        self._add_event('s', name, 'dependency', from_context, ts, id=flow_id)
+        self._add_event('f', name, 'dependency', to_context, ts, id=flow_id, bp='e')
+
+    def _wrap_op(self, name, function):
+        local = self._local
+        context_class = self.context_class
+
+        @wraps(function)
+        def wrapper(*args, **kwargs):
+            if not self.enabled or getattr(local, 'in_op', False):
+                return function(*args, **kwargs)
+            context = None
+            for arg in args[:2]:
+                if isinstance(arg, context_class):
+                    context = arg
+                    break
+            local.in_op = True
+            try:
+                start = self._get_time()
+                result = function(*args, **kwargs)
+                end = self._get_time()
+            finally:
+                local.in_op = False
+            self._add_event('X', name, 'op', context, start, dur=end - start,
+                            args={'thread': threading.current_thread().name})
+            return result
+        return wrapper
+
+    def _wrap_dependency(self, name, function):
+        @wraps(function)
+        def wrapper(context, *args):
+            if self.enabled and args:
+                ts = self._get_time()
+                self._add_event('i', name, 'dependency', context, ts, s='t')
+                for other in args:
+                    if name == 'wait':
+                        self._add_flow(name, other, context, ts)
+                    else:
+                        self._add_flow(name, context, other, ts)
+            return function(context, *args)
+        return wrapper
+
+    def _wrap_add_callback(self, function):
+        @wraps(function)
+        def wrapper(context, callback, *args, **kwargs):
+            if not self.enabled:
+                return function(context, callback, *args, **kwargs)
+            flow_id = next(self._flow_ids)
+            callback_name = getattr(callback, '__name__', repr(callback))
+            self._add_event('s', callback_name, 'callback', context, self._get_time(), id=flow_id)
+
+            def traced_callback(*args, **kwargs):
+                start = self._get_time()
+                self._add_event('f', callback_name, 'callback', context, start, id=flow_id, bp='e')
+                try:
+                    return callback(*args, **kwargs)
+                finally:
+                    end = self._get_time()
+                    self._add_event('X', callback_name, 'callback', context, start, dur=end - start,
+                                    args={'thread': threading.current_thread().name})
+            return function(context, traced_callback, *args, **kwargs)
+        return wrapper
\ No newline at end of file
@@ -13,26 +13,158 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 # ----------------------------------------------------------------------------
+from quagga.context.CpuWorker import CpuWorker
+from quagga.context.ComputeBudget import ComputeBudget
+
+
 class CpuContext(object):
     """
     Mock class created for compatibility purposes in order to enable
     quick switching GPU and CPU implementations.
+
+    By default operations are executed right away in the calling thread.
+    After :meth:`start_workers` every listed device gets its own
+    :class:`CpuWorker` thread, and work issued with contexts of the device
+    is run there asynchronously, like on a GPU. A model can then be split
+    between devices with ``device_id`` of blocks, the connectors copy
+    matrices between devices.
+
+    A context can have a :class:`ComputeBudget`, which limits BLAS threads
+    and CPUs used by operations issued with it. The budget is given to the
+    context directly or declared for all contexts of a device with
+    :meth:`set_compute_budget` or :meth:`divide_cores`.
+
+    Parameters
+    ----------
+    device_id : int
+    num_threads : int
+        Number of BLAS threads for operations issued with the context
+    cpu_affinity : list of int
+        CPUs the work of the context is restricted to
     """
-    def __init__(self, device_id=None):
+    _budgets = {}
+
+    def __init__(self, device_id=None, num_threads=None, cpu_affinity=None):
         self.device_id = device_id if device_id else 0
+        if num_threads is not None or cpu_affinity is not None:
+            self._budget = ComputeBudget(num_threads, cpu_affinity)
+        else:
+            self._budget = None
+
+    @property
+    def budget(self):
+        if self._budget is not None:
+            return self._budget
+        return CpuContext._budgets.get(self.device_id)
+
+    def activate(self):
+        """
+        Applies the compute budget of the context to the calling thread.
+        """
+        budget = self._budget or CpuContext._budgets.get(self.device_id)
+        if budget is not None:
+            budget.apply()
+
+    @staticmethod
+    def set_compute_budget(device_id, num_threads=None, cpu_affinity=None):
+        """
+        Declares the budget of all contexts of the device that have none of
+        their own. The budget is removed if neither argument is given.
+        """
+        if num_threads is None and cpu_affinity is None:
+            CpuContext._budgets.pop(device_id, None)
+        else:
+            CpuContext._budgets[device_id] = ComputeBudget(num_threads, cpu_affinity)
+
+    @staticmethod
+    def divide_cores(device_ids, cpus=None):
+        """
+        Divides CPUs between devices, whose contexts run concurrently, so
+        that their BLAS thread pools do not oversubscribe the machine.
+        Returns the dict from device id to its budget.
+        """
+        budgets = ComputeBudget.divide(len(device_ids), cpus)
+        for device_id, budget in zip(device_ids, budgets):
+            CpuContext._budgets[device_id] = budget
+        return dict(zip(device_ids, budgets))
+
+    @property
+    def worker(self):
+        return CpuWorker.workers.get(self.device_id)
+
+    @staticmethod
+    def start_workers(device_ids):
+        """
+        Starts a worker thread for every device in ``device_ids``, work of
+        other devices is still executed in the calling thread.
+        """
+        from quagga.matrix.ShapeElement import before_change_hooks as hooks
+        for device_id in device_ids:
+            if device_id not in CpuWorker.workers:
+                CpuWorker.workers[device_id] = CpuWorker(device_id)
+        if _synchronize_before_shape_change not in hooks:
+            hooks.append(_synchronize_before_shape_change)
+
+    @staticmethod
+    def stop_workers():
+        """
+        Waits for all submitted work and stops the worker threads.
+        """
+        from quagga.matrix.ShapeElement import before_change_hooks as hooks
+        if _synchronize_before_shape_change in hooks:
+            hooks.remove(_synchronize_before_shape_change)
+        workers = CpuWorker.workers.values()
+        CpuWorker.workers.clear()
+        for worker in workers:
+            worker.stop()
 
     def synchronize(self):
-        pass
+        """
+        Blocks the calling thread until all work submitted with the context
+        has completed.
+        """
+        worker = self.worker
+        if worker:
+            worker.synchronize()
 
     def wait(self, *args):
-        pass
+        """
+        Makes all future work submitted to the context wait until all
+        computations in ``args`` contexts have finished.
+        """
+        worker = self.worker
+        for context in args:
+            other_worker = context.worker
+            if other_worker is None or other_worker is worker:
+                # already finished or ordered by the same worker
+                continue
+            event = other_worker.record()
+            if worker is None or worker.is_current():
+                event.wait()
+            else:
+                worker.wait(event)
 
     def block(self, *args):
-        pass
+        """
+        Makes all future work submitted to the ``args`` contexts wait until
+        all computations in the context have finished.
+        """
+        for context in args:
+            context.wait(self)
 
     def add_callback(self, callback, *args, **kwargs):
-        callback(*args, **kwargs)
+        worker = self.worker
+        if worker is None or worker.is_current():
+            callback(*args, **kwargs)
+        else:
+            worker.submit(callback, *args, **kwargs)
 
     @staticmethod
     def callback(function):
-        return function
\ No newline at end of file
+        return function
+
+
+def _synchronize_before_shape_change():
+    # work submitted earlier reads shapes when it is run
+    if not CpuWorker.is_worker_thread():
+        CpuWorker.synchronize_all()
@@ -0,0 +1,125 @@
+# ----------------------------------------------------------------------------
+# Copyright 2015 Grammarly, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ----------------------------------------------------------------------------
+import sys
+import time
+from Queue import Queue
+from threading import Event
+from threading import Thread
+from threading import current_thread
+
+
+class CpuWorker(object):
+    """
+    Thread that runs the work submitted to contexts of one CPU device in
+    the order of submission, it plays the role of a CUDA device with a
+    single stream. Workers of different devices run concurrently, NumPy
+    and BLAS release the GIL for the heavy part of an operation.
+
+    An exception raised by the submitted work is re-raised in the thread
+    that submits or synchronizes next, work submitted after the failure is
+    skipped.
+
+    ``busy_time`` accumulates the seconds the worker spent running work,
+    waiting for other workers is not counted.
+
+    Parameters
+    ----------
+    device_id : int
+    """
+    workers = {}
+
+    def __init__(self, device_id):
+        self.device_id = device_id
+        self._queue = Queue()
+        self._exc_info = None
+        self.busy_time = 0.0
+        self._thread = Thread(target=self._run, name='quagga-cpu-{}'.format(device_id))
+        self._thread.daemon = True
+        self._thread.start()
+
+    def _run(self):
+        while True:
+            task = self._queue.get()
+            if task is None:
+                break
+            function, args, kwargs = task
+            if self._exc_info is not None and function is not _set_event:
+                continue
+            start = time.time()
+            try:
+                function(*args, **kwargs)
+            except Exception:
+                self._exc_info = sys.exc_info()
+            if function is not _wait_event and function is not _set_event:
+                self.busy_time += time.time() - start
+
+    def _raise_exception(self):
+        if self._exc_info is not None:
+            exc_info, self._exc_info = self._exc_info, None
+            raise exc_info[0], exc_info[1], exc_info[2]
+
+    def submit(self, function, *args, **kwargs):
+        self._raise_exception()
+        self._queue.put((function, args, kwargs))
+
+    def record(self):
+        """
+        Returns an event, which is set when all work submitted before
+        has completed.
+        """
+        event = Event()
+        self._queue.put((_set_event, (event, ), {}))
+        return event
+
+    def wait(self, event):
+        """
+        Makes work submitted afterwards wait until the ``event`` is set.
+        """
+        self.submit(_wait_event, event)
+
+    def synchronize(self):
+        """
+        Blocks the calling thread until all submitted work has completed.
+        """
+        if not self.is_current():
+            self.record().wait()
+        self._raise_exception()
+
+    def is_current(self):
+        return current_thread() is self._thread
+
+    def stop(self):
+        self._queue.put(None)
+        self._thread.join()
+        self._raise_exception()
+
+    @staticmethod
+    def is_worker_thread():
+        thread = current_thread()
+        return any(worker._thread is thread for worker in CpuWorker.workers.itervalues())
+
+    @staticmethod
+    def synchronize_all():
+        for worker in CpuWorker.workers.values():
+            worker.synchronize()
+
+
+def _set_event(event):
+    event.set()
+
+
+def _wait_event(event):
+    event.wait()
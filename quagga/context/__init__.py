@@ -13,6 +13,10 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 # ----------------------------------------------------------------------------
+from quagga.context.ComputeBudget import ComputeBudget
+from quagga.context.CpuWorker import CpuWorker
 from quagga.context.CpuContext import CpuContext
-from quagga.context.GpuContext import GpuContext
-from quagga.context.Context import Context
\ No newline at end of file
+from quagga.context.Context import Context
+from quagga.context.ContextTracer import ContextTracer
+from quagga.LazyModule import LazyModule
+LazyModule(__name__, {'GpuContext': 'quagga.context.GpuContext'})
\ No newline at end of file
@@ -0,0 +1,110 @@
+# ----------------------------------------------------------------------------
+# Copyright 2015 Grammarly, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ----------------------------------------------------------------------------
+"""
+Control of the BLAS thread pool and of the CPU affinity of the calling
+thread. BLAS libraries are found among the shared libraries loaded by
+numpy, so nothing is linked here explicitly.
+
+OpenMP and MKL keep the number of threads per calling thread, so every
+thread can have its own budget. OpenBLAS built with pthreads has one
+process-wide thread pool, the last value set is used by all threads.
+"""
+import os
+import ctypes as ct
+# loads the BLAS library numpy is linked with
+import numpy
+
+
+_libc = ct.CDLL(None, use_errno=True)
+
+
+def _find_loaded_libraries(*names):
+    try:
+        with open('/proc/self/maps') as f:
+            paths = set(line.split()[-1] for line in f if '.so' in line)
+    except IOError:
+        return []
+    return [ct.CDLL(path) for path in sorted(paths)
+            if any(name in os.path.basename(path) for name in names)]
+
+
+def _get_function(libraries, *names):
+    for library in libraries:
+        for name in names:
+            if hasattr(library, name):
+                return getattr(library, name)
+
+
+_libraries = _find_loaded_libraries('openblas', 'mkl_rt', 'libmkl', 'gomp', 'iomp')
+_set_num_threads_local = _get_function(_libraries, 'MKL_Set_Num_Threads_Local', 'omp_set_num_threads')
+_set_num_threads_global = _get_function(_libraries, 'openblas_set_num_threads', 'openblas_set_num_threads64_')
+_get_num_threads = _get_function(_libraries, 'MKL_Get_Max_Threads', 'openblas_get_num_threads',
+                                 'openblas_get_num_threads64_', 'omp_get_max_threads')
+# the process-wide OpenBLAS pool ignores the per-thread OpenMP setting
+is_thread_local = _set_num_threads_local is not None and _set_num_threads_global is None
+is_available = is_thread_local or _set_num_threads_global is not None
+
+
+def get_num_threads():
+    """
+    Returns the number of threads BLAS uses for the calling thread or
+    ``None`` if it is unknown.
+    """
+    return _get_num_threads() if _get_num_threads else None
+
+
+def set_num_threads(num_threads):
+    """
+    Sets the number of threads BLAS uses for calls from the calling thread,
+    or from all threads if the library has only a process-wide setting.
+    Does nothing if no supported BLAS library is loaded.
+    """
+    if _set_num_threads_local:
+        _set_num_threads_local(ct.c_int(num_threads))
+    if _set_num_threads_global:
+        _set_num_threads_global(ct.c_int(num_threads))
+
+
+_CPU_SET_SIZE = 1024
+_ct_cpu_set = ct.c_ulong * (_CPU_SET_SIZE / (8 * ct.sizeof(ct.c_ulong)))
+_bits_per_word = 8 * ct.sizeof(ct.c_ulong)
+
+
+def get_affinity():
+    """
+    Returns the list of CPUs the calling thread is allowed to run on.
+    """
+    if not hasattr(_libc, 'sched_getaffinity'):
+        return range(os.sysconf('SC_NPROCESSORS_ONLN'))
+    mask = _ct_cpu_set()
+    if _libc.sched_getaffinity(0, ct.sizeof(mask), ct.byref(mask)):
+        raise OSError(ct.get_errno(), os.strerror(ct.get_errno()))
+    return [cpu for cpu in xrange(_CPU_SET_SIZE)
+            if mask[cpu / _bits_per_word] >> (cpu % _bits_per_word) & 1]
+
+
+def set_affinity(cpus):
+    """
+    Restricts the calling thread to ``cpus``. Threads started by it
+    afterwards inherit the restriction.
+    """
+    if not hasattr(_libc, 'sched_setaffinity'):
+        return
+    mask = _ct_cpu_set()
+    for cpu in cpus:
+        mask[cpu / _bits_per_word] |= 1 << (cpu % _bits_per_word)
+    if _libc.sched_setaffinity(0, ct.sizeof(mask), ct.byref(mask)):
+        raise OSError(ct.get_errno(), os.strerror(ct.get_errno()))
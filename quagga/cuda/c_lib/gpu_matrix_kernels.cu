@@ -498,6 +498,137 @@ __global__ void addSoftmaxCeDerivative(int batchSize,
 }
 
 
+__global__ void softmaxCe(int batchSize,
+                          int numClasses,
+                          const float* __restrict__ x,
+                          const int* __restrict__ targetClasses,
+                          float* __restrict__ probs,
+                          float* __restrict__ losses) {
+    // one thread per row, the maximum and the sum of exponents are
+    // updated online, so x is read only once before the probs are written
+    const int nthreads = blockDim.x * gridDim.x;
+    const int start_i = blockIdx.x * blockDim.x + threadIdx.x;
+    float maximum, sum, value, logSumExp;
+
+    for (int i = start_i; i < batchSize; i += nthreads) {
+        maximum = x[i];
+        sum = 1.0f;
+        for (int j = 1; j < numClasses; j++) {
+            value = x[i + j * batchSize];
+            if (value > maximum) {
+                sum = sum * expf(maximum - value) + 1.0f;
+                maximum = value;
+            } else {
+                sum += expf(value - maximum);
+            }
+        }
+        logSumExp = maximum + logf(sum);
+        for (int j = 0; j < numClasses; j++) {
+            probs[i + j * batchSize] = expf(x[i + j * batchSize] - logSumExp);
+        }
+        losses[i] = logSumExp - x[i + targetClasses[i] * batchSize];
+    }
+}
+
+
+__global__ void softmaxCeDerivativeInplace(int batchSize,
+                                           int numClasses,
+                                           const int* __restrict__ targetClasses,
+                                           const float* __restrict__ mask,
+                                           float* __restrict__ probs) {
+    const int nthreads = blockDim.x * gridDim.x;
+    const int start_i = blockIdx.x * blockDim.x + threadIdx.x;
+    const int nelems = batchSize * numClasses;
+    int row;
+
+    for (int i = start_i; i < nelems; i += nthreads) {
+        row = i % batchSize;
+        probs[i] = (probs[i] - (i / batchSize == targetClasses[row])) / batchSize;
+        if (mask) {
+            probs[i] *= mask[row];
+        }
+    }
+}
+
+
+__global__ void accumulateLogSumExp(int batchSize,
+                                    int numClasses,
+                                    const float* __restrict__ logits,
+                                    const int* __restrict__ targetClasses,
+                                    int offset,
+                                    float* __restrict__ logSumExps,
+                                    float* __restrict__ targetLogits) {
+    // one block per row, logits are a chunk of columns that starts at
+    // the column offset. Every thread keeps the maximum and the sum of
+    // exponents of its columns online, then the pairs are reduced in
+    // shared memory, blockDim.x must be a power of two
+    __shared__ float maximums[MAX_NUM_THREADS_PER_BLOCK];
+    __shared__ float sums[MAX_NUM_THREADS_PER_BLOCK];
+    float maximum, sum, value, chunkLogSumExp, prevLogSumExp;
+    int column;
+
+    for (int i = blockIdx.x; i < batchSize; i += gridDim.x) {
+        maximum = -FLT_MAX;
+        sum = 0.0f;
+        for (int j = threadIdx.x; j < numClasses; j += blockDim.x) {
+            value = logits[i + j * batchSize];
+            if (value > maximum) {
+                sum = sum * expf(maximum - value) + 1.0f;
+                maximum = value;
+            } else {
+                sum += expf(value - maximum);
+            }
+        }
+        maximums[threadIdx.x] = maximum;
+        sums[threadIdx.x] = sum;
+        __syncthreads();
+        for (int k = blockDim.x / 2; k > 0; k /= 2) {
+            if (threadIdx.x < k) {
+                value = maximums[threadIdx.x + k];
+                maximum = fmaxf(maximums[threadIdx.x], value);
+                sums[threadIdx.x] = sums[threadIdx.x] * expf(maximums[threadIdx.x] - maximum) +
+                                    sums[threadIdx.x + k] * expf(value - maximum);
+                maximums[threadIdx.x] = maximum;
+            }
+            __syncthreads();
+        }
+        if (threadIdx.x == 0) {
+            chunkLogSumExp = maximums[0] + logf(sums[0]);
+            prevLogSumExp = logSumExps[i];
+            logSumExps[i] = fmaxf(prevLogSumExp, chunkLogSumExp) + log1pf(expf(-fabsf(prevLogSumExp - chunkLogSumExp)));
+            column = targetClasses[i] - offset;
+            if (column >= 0 && column < numClasses) {
+                targetLogits[i] = logits[i + column * batchSize];
+            }
+        }
+        // shared memory is reused by the next row
+        __syncthreads();
+    }
+}
+
+
+__global__ void chunkSoftmaxCeDerivative(int batchSize,
+                                         int numClasses,
+                                         const float* __restrict__ logSumExps,
+                                         const int* __restrict__ targetClasses,
+                                         int offset,
+                                         const float* __restrict__ mask,
+                                         float* __restrict__ logits) {
+    const int nthreads = blockDim.x * gridDim.x;
+    const int start_i = blockIdx.x * blockDim.x + threadIdx.x;
+    const int nelems = batchSize * numClasses;
+    int row;
+
+    for (int i = start_i; i < nelems; i += nthreads) {
+        row = i % batchSize;
+        logits[i] = (expf(logits[i] - logSumExps[row]) - (i / batchSize == targetClasses[row] - offset)) / batchSize;
+        if (mask) {
+            logits[i] *= mask[row];
+        }
+    }
+}
+
+
 
 __global__ void assignSequentialMeanPooling(int nrows,
                                             int ncols,
@@ -669,6 +800,40 @@ __global__ void matrixVectorColumnHprod(int nrows,
 }
 
 
+__global__ void batchDot(int batchSize,
+                         int nrows,
+                         int ncols,
+                         int k,
+                         bool transA,
+                         bool transB,
+                         float alpha,
+                         const float* __restrict__ a,
+                         const float* __restrict__ b,
+                         float beta,
+                         float* __restrict__ out) {
+    // every row of a matrix holds one matrix of the batch in row-major
+    // order, consecutive threads work on consecutive rows
+    const int nthreads = blockDim.x * gridDim.x;
+    const int start_i = blockIdx.x * blockDim.x + threadIdx.x;
+    const int nelems = batchSize * nrows * ncols;
+    int n, col, row, j;
+    float s;
+
+    for (int i = start_i; i < nelems; i += nthreads) {
+        n = i % batchSize;
+        col = i / batchSize;
+        row = col / ncols;
+        j = col % ncols;
+        s = 0.0f;
+        for (int l = 0; l < k; l++) {
+            s += a[n + (transA ? l * nrows + row : row * k + l) * batchSize] *
+                 b[n + (transB ? j * k + l : l * ncols + j) * batchSize];
+        }
+        out[i] = alpha * s + (beta == 0.0f ? 0.0f : beta * out[i]);
+    }
+}
+
+
 __global__ void maskColumnNumbersRowWise(int nrows,
                                          int ncols,
                                          const int* __restrict__ numbers,
@@ -1593,6 +1758,59 @@ extern "C" {
     }
 
 
+    cudaError_t _softmaxCe(cudaStream_t stream,
+                           int batchSize,
+                           int numClasses,
+                           const float* __restrict__ x,
+                           const int* __restrict__ targetClasses,
+                           float* __restrict__ probs,
+                           float* __restrict__ losses) {
+        int num_blocks = std::min(MAX_NUM_BLOCKS_PER_KERNEL, (batchSize - 1) / MAX_NUM_THREADS_PER_BLOCK + 1);
+        softmaxCe<<<num_blocks, MAX_NUM_THREADS_PER_BLOCK, 0, stream>>>(batchSize, numClasses, x, targetClasses, probs, losses);
+        return cudaGetLastError();
+    }
+
+
+    cudaError_t _softmaxCeDerivativeInplace(cudaStream_t stream,
+                                            int batchSize,
+                                            int numClasses,
+                                            const int* __restrict__ targetClasses,
+                                            const float* __restrict__ mask,
+                                            float* __restrict__ probs) {
+        int num_blocks = std::min(MAX_NUM_BLOCKS_PER_KERNEL, (batchSize * numClasses - 1) / MAX_NUM_THREADS_PER_BLOCK + 1);
+        softmaxCeDerivativeInplace<<<num_blocks, MAX_NUM_THREADS_PER_BLOCK, 0, stream>>>(batchSize, numClasses, targetClasses, mask, probs);
+        return cudaGetLastError();
+    }
+
+
+    cudaError_t _accumulateLogSumExp(cudaStream_t stream,
+                                     int batchSize,
+                                     int numClasses,
+                                     const float* __restrict__ logits,
+                                     const int* __restrict__ targetClasses,
+                                     int offset,
+                                     float* __restrict__ logSumExps,
+                                     float* __restrict__ targetLogits) {
+        int num_blocks = std::min(MAX_NUM_BLOCKS_PER_KERNEL, batchSize);
+        accumulateLogSumExp<<<num_blocks, MAX_NUM_THREADS_PER_BLOCK, 0, stream>>>(batchSize, numClasses, logits, targetClasses, offset, logSumExps, targetLogits);
+        return cudaGetLastError();
+    }
+
+
+    cudaError_t _chunkSoftmaxCeDerivative(cudaStream_t stream,
+                                          int batchSize,
+                                          int numClasses,
+                                          const float* __restrict__ logSumExps,
+                                          const int* __restrict__ targetClasses,
+                                          int offset,
+                                          const float* __restrict__ mask,
+                                          float* __restrict__ logits) {
+        int num_blocks = std::min(MAX_NUM_BLOCKS_PER_KERNEL, (batchSize * numClasses - 1) / MAX_NUM_THREADS_PER_BLOCK + 1);
+        chunkSoftmaxCeDerivative<<<num_blocks, MAX_NUM_THREADS_PER_BLOCK, 0, stream>>>(batchSize, numClasses, logSumExps, targetClasses, offset, mask, logits);
+        return cudaGetLastError();
+    }
+
+
     cudaError_t _matrixVectorColumnHprod(cudaStream_t stream,
                                          int nrows,
                                          int ncols,
@@ -1603,4 +1821,21 @@ extern "C" {
         matrixVectorColumnHprod<<<num_blocks, MAX_NUM_THREADS_PER_BLOCK, 0, stream>>>(nrows, ncols, matrix, vector, out);
         return cudaGetLastError();
     }
+
+    cudaError_t _batchDot(cudaStream_t stream,
+                          int batchSize,
+                          int nrows,
+                          int ncols,
+                          int k,
+                          bool transA,
+                          bool transB,
+                          float alpha,
+                          const float* __restrict__ a,
+                          const float* __restrict__ b,
+                          float beta,
+                          float* __restrict__ out) {
+        int num_blocks = std::min(MAX_NUM_BLOCKS_PER_KERNEL, (batchSize * nrows * ncols - 1) / MAX_NUM_THREADS_PER_BLOCK + 1);
+        batchDot<<<num_blocks, MAX_NUM_THREADS_PER_BLOCK, 0, stream>>>(batchSize, nrows, ncols, k, transA, transB, alpha, a, b, beta, out);
+        return cudaGetLastError();
+    }
 }
\ No newline at end of file
@@ -481,6 +481,59 @@ def add_softmax_ce_derivative(stream, batchSize, num_classes, probs, target_clas
     cudart.check_cuda_status(status)
 
 
+gpu_matrix_kernels._softmaxCe.restype = cudart.ct_cuda_error
+gpu_matrix_kernels._softmaxCe.argtypes = [cudart.ct_cuda_stream,
+                                          ct.c_int,
+                                          ct.c_int,
+                                          ct.POINTER(ct.c_float),
+                                          ct.POINTER(ct.c_int),
+                                          ct.POINTER(ct.c_float),
+                                          ct.POINTER(ct.c_float)]
+def softmax_ce(stream, batch_size, num_classes, x, target_classes, probs, losses):
+    status = gpu_matrix_kernels._softmaxCe(stream, batch_size, num_classes, x, target_classes, probs, losses)
+    cudart.check_cuda_status(status)
+
+
+gpu_matrix_kernels._softmaxCeDerivativeInplace.restype = cudart.ct_cuda_error
+gpu_matrix_kernels._softmaxCeDerivativeInplace.argtypes = [cudart.ct_cuda_stream,
+                                                           ct.c_int,
+                                                           ct.c_int,
+                                                           ct.POINTER(ct.c_int),
+                                                           ct.POINTER(ct.c_float),
+                                                           ct.POINTER(ct.c_float)]
+def softmax_ce_derivative_inplace(stream, batch_size, num_classes, target_classes, mask, probs):
+    status = gpu_matrix_kernels._softmaxCeDerivativeInplace(stream, batch_size, num_classes, target_classes, mask, probs)
+    cudart.check_cuda_status(status)
+
+
+gpu_matrix_kernels._accumulateLogSumExp.restype = cudart.ct_cuda_error
+gpu_matrix_kernels._accumulateLogSumExp.argtypes = [cudart.ct_cuda_stream,
+                                                    ct.c_int,
+                                                    ct.c_int,
+                                                    ct.POINTER(ct.c_float),
+                                                    ct.POINTER(ct.c_int),
+                                                    ct.c_int,
+                                                    ct.POINTER(ct.c_float),
+                                                    ct.POINTER(ct.c_float)]
+def accumulate_log_sum_exp(stream, batch_size, num_classes, logits, target_classes, offset, log_sum_exps, target_logits):
+    status = gpu_matrix_kernels._accumulateLogSumExp(stream, batch_size, num_classes, logits, target_classes, offset, log_sum_exps, target_logits)
+    cudart.check_cuda_status(status)
+
+
+gpu_matrix_kernels._chunkSoftmaxCeDerivative.restype = cudart.ct_cuda_error
+gpu_matrix_kernels._chunkSoftmaxCeDerivative.argtypes = [cudart.ct_cuda_stream,
+                                                         ct.c_int,
+                                                         ct.c_int,
+                                                         ct.POINTER(ct.c_float),
+                                                         ct.POINTER(ct.c_int),
+                                                         ct.c_int,
+                                                         ct.POINTER(ct.c_float),
+                                                         ct.POINTER(ct.c_float)]
+def chunk_softmax_ce_derivative(stream, batch_size, num_classes, log_sum_exps, target_classes, offset, mask, logits):
+    status = gpu_matrix_kernels._chunkSoftmaxCeDerivative(stream, batch_size, num_classes, log_sum_exps, target_classes, offset, mask, logits)
+    cudart.check_cuda_status(status)
+
+
 gpu_matrix_kernels._dropout.restype = cudart.ct_cuda_error
 gpu_matrix_kernels._dropout.argtypes = [cudart.ct_cuda_stream,
                                         ct.c_int,
@@ -576,6 +629,24 @@ def matrix_vector_column_hprod(stream, nrows, ncols, matrix, vector, out):
     cudart.check_cuda_status(status)
 
 
+gpu_matrix_kernels._batchDot.restype = cudart.ct_cuda_error
+gpu_matrix_kernels._batchDot.argtypes = [cudart.ct_cuda_stream,
+                                         ct.c_int,
+                                         ct.c_int,
+                                         ct.c_int,
+                                         ct.c_int,
+                                         ct.c_bool,
+                                         ct.c_bool,
+                                         ct.c_float,
+                                         ct.POINTER(ct.c_float),
+                                         ct.POINTER(ct.c_float),
+                                         ct.c_float,
+                                         ct.POINTER(ct.c_float)]
+def batch_dot(stream, batch_size, nrows, ncols, k, trans_a, trans_b, alpha, a, b, beta, out):
+    status = gpu_matrix_kernels._batchDot(stream, batch_size, nrows, ncols, k, trans_a, trans_b, alpha, a, b, beta, out)
+    cudart.check_cuda_status(status)
+
+
 gpu_matrix_kernels._maskColumnNumbersRowWise.restype = cudart.ct_cuda_error
 gpu_matrix_kernels._maskColumnNumbersRowWise.argtypes = [cudart.ct_cuda_stream,
                                                          ct.c_int,
@@ -0,0 +1,199 @@
+# ----------------------------------------------------------------------------
+# Copyright 2015 Grammarly, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ----------------------------------------------------------------------------
+import os
+import glob
+import h5py
+import json
+from Queue import Queue
+from threading import Thread
+from quagga.context import Context
+
+
+class Hdf5CheckpointSaver(object):
+    """
+    Periodically saves parameters together with the state of optimizer steps
+    and value policies, so that training can be resumed exactly.
+
+    Parameters are copied to host in their own contexts, the HDF5 file is
+    written by a background thread, so training is blocked only for the
+    time of the copy. A file is first written under a temporary name and
+    then renamed, a checkpoint on disk is either complete or absent.
+
+    Parameters
+    ----------
+    params : dict
+        Parameters to save (``ParameterContainer.parameters``).
+    period : int
+        Number of iterations between two checkpoints.
+    dir_path : str
+        Directory for checkpoint files.
+    logger
+    steps : list
+        Optimizer steps, each one must have ``get_state`` method.
+    policies : list
+        Value policies, each one must have ``get_state`` method.
+    compression : str
+        HDF5 compression filter (``'gzip'``, ``'lzf'``), datasets are
+        chunked when it is set.
+    keep_last : int
+        Number of most recent checkpoints to keep, all are kept if ``None``.
+    prefix : str
+        Prefix of checkpoint file names.
+    """
+    def __init__(self, params, period, dir_path, logger, steps=None,
+                 policies=None, compression=None, keep_last=None,
+                 prefix='checkpoint'):
+        self.params = params
+        self.period = period
+        self.dir_path = dir_path
+        self.logger = logger
+        self.steps = steps if steps else []
+        self.policies = policies if policies else []
+        self.compression = compression
+        self.keep_last = keep_last
+        self.prefix = prefix
+        self.iteration = 0
+        # see Hdf5Saver on why it is safe to use our own contexts
+        self.context = {}
+        for param in params.itervalues():
+            if param.device_id not in self.context:
+                self.context[param.device_id] = Context(param.device_id)
+        for step in self.steps:
+            for matrices in step.get_state().itervalues():
+                if isinstance(matrices, list):
+                    for matrix in matrices:
+                        if matrix.device_id not in self.context:
+                            self.context[matrix.device_id] = Context(matrix.device_id)
+        self.snapshots = Queue(maxsize=1)
+        writer_thread = Thread(target=self._write_snapshots)
+        writer_thread.daemon = True
+        writer_thread.start()
+
+    def notify(self):
+        if self.iteration % self.period == 0 and self.iteration != 0:
+            self.logger.info('Iteration {}: start saving checkpoint ...'.format(self.iteration))
+            snapshot = {'iteration': self.iteration,
+                        'parameters': {},
+                        'steps': [],
+                        'policies': [policy.get_state() for policy in self.policies]}
+            for param_name, param in self.params.iteritems():
+                context = self.context[param.device_id]
+                snapshot['parameters'][param_name] = param.to_host(context)
+            for step in self.steps:
+                state = {}
+                for key, value in step.get_state().iteritems():
+                    if isinstance(value, list):
+                        value = [m.to_host(self.context[m.device_id]) for m in value]
+                    state[key] = value
+                snapshot['steps'].append(state)
+            contexts = self.context.values()
+            context = contexts[0]
+            context.wait(*contexts[1:])
+            context.add_callback(self.snapshots.put, snapshot)
+        self.iteration += 1
+
+    def join(self):
+        """
+        Blocks until all pending checkpoints are written.
+        """
+        for context in self.context.itervalues():
+            context.synchronize()
+        self.snapshots.join()
+
+    def get_checkpoint_paths(self):
+        pattern = os.path.join(self.dir_path, '{}_*.hdf5'.format(self.prefix))
+        return sorted(glob.glob(pattern))
+
+    def load(self, path=None):
+        """
+        Restores parameters, steps and policies from the checkpoint at
+        ``path`` or from the latest one in ``dir_path``.
+        """
+        if path is None:
+            paths = self.get_checkpoint_paths()
+            if not paths:
+                raise ValueError('There are no checkpoints in {}!'.format(self.dir_path))
+            path = paths[-1]
+        with h5py.File(path, 'r') as f:
+            for param_name, param in self.params.iteritems():
+                context = self.context[param.device_id]
+                param.assign_npa(context, f['parameters'][param_name][...])
+            for i, step in enumerate(self.steps):
+                self._set_state(step, f['steps'][str(i)])
+            for i, policy in enumerate(self.policies):
+                self._set_state(policy, f['policies'][str(i)])
+            self.iteration = int(f.attrs['iteration']) + 1
+        for context in self.context.itervalues():
+            context.synchronize()
+        self.logger.info('Checkpoint {} is loaded'.format(path))
+
+    def _set_state(self, obj, group):
+        for key, value in json.loads(group.attrs['state']).iteritems():
+            setattr(obj, key, value)
+        for key, value in obj.get_state().iteritems():
+            if isinstance(value, list):
+                for k, matrix in enumerate(value):
+                    npa = group[key][str(k)][...]
+                    matrix.assign_npa(self.context[matrix.device_id], npa)
+
+    def _write_snapshots(self):
+        while True:
+            snapshot = self.snapshots.get()
+            try:
+                self._write_snapshot(snapshot)
+            except Exception:
+                self.logger.exception('Checkpoint saving failed!')
+            finally:
+                self.snapshots.task_done()
+
+    def _write_snapshot(self, snapshot):
+        file_name = '{}_{:09d}.hdf5'.format(self.prefix, snapshot['iteration'])
+        path = os.path.join(self.dir_path, file_name)
+        temp_path = path + '.tmp'
+        with h5py.File(temp_path, 'w') as f:
+            f.attrs['iteration'] = snapshot['iteration']
+            group = f.create_group('parameters')
+            for param_name, npa in snapshot['parameters'].iteritems():
+                self._create_dataset(group, param_name, npa)
+            for i, state in enumerate(snapshot['steps']):
+                self._write_state(f, 'steps/{}'.format(i), state)
+            for i, state in enumerate(snapshot['policies']):
+                self._write_state(f, 'policies/{}'.format(i), state)
+        with open(temp_path, 'rb+') as f:
+            os.fsync(f.fileno())
+        os.rename(temp_path, path)
+        self.logger.info('Checkpoint {} is saved'.format(path))
+        if self.keep_last:
+            for path in self.get_checkpoint_paths()[:-self.keep_last]:
+                os.remove(path)
+
+    def _write_state(self, f, name, state):
+        group = f.create_group(name)
+        scalars = {}
+        for key, value in state.iteritems():
+            if isinstance(value, list):
+                matrices_group = group.create_group(key)
+                for k, npa in enumerate(value):
+                    self._create_dataset(matrices_group, str(k), npa)
+            else:
+                scalars[key] = value
+        group.attrs['state'] = json.dumps(scalars, default=float)
+
+    def _create_dataset(self, group, name, npa):
+        if self.compression:
+            group.create_dataset(name, data=npa, chunks=True, compression=self.compression)
+        else:
+            group[name] = npa
\ No newline at end of file
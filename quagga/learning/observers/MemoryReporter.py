@@ -0,0 +1,40 @@
+# ----------------------------------------------------------------------------
+# Copyright 2015 Grammarly, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ----------------------------------------------------------------------------
+
+
+class MemoryReporter(object):
+    """
+    Logs breakdown of memory accounted by :class:`quagga.matrix.MemoryTracker`
+    together with the peak reached during the last ``period`` iterations.
+
+    Parameters
+    ----------
+    tracker : :class:`quagga.matrix.MemoryTracker`
+    period : int
+    logger
+    """
+    def __init__(self, tracker, period, logger):
+        self.tracker = tracker
+        self.period = period
+        self.logger = logger
+        self.iteration = 0
+
+    def notify(self):
+        if self.iteration % self.period == 0 and self.iteration != 0:
+            self.logger.info('Iteration {}: memory usage:\n{}'.
+                             format(self.iteration, self.tracker.format_report()))
+            self.tracker.reset_peak()
+        self.iteration += 1
\ No newline at end of file
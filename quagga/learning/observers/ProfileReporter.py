@@ -0,0 +1,45 @@
+# ----------------------------------------------------------------------------
+# Copyright 2015 Grammarly, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ----------------------------------------------------------------------------
+
+
+class ProfileReporter(object):
+    """
+    Logs statistics collected by :class:`quagga.utils.Profiler` every
+    ``period`` iterations and resets them, so every report covers only
+    the last ``period`` iterations.
+
+    Parameters
+    ----------
+    profiler : :class:`quagga.utils.Profiler`
+    period : int
+    logger
+    top : int
+        Number of the most expensive entries to log, all if ``None``.
+    """
+    def __init__(self, profiler, period, logger, top=None):
+        self.profiler = profiler
+        self.period = period
+        self.logger = logger
+        self.top = top
+        self.iteration = 0
+
+    def notify(self):
+        if self.iteration % self.period == 0 and self.iteration != 0:
+            self.logger.info('Iteration {}: profile of the last {} iterations:\n{}'.
+                             format(self.iteration, self.period,
+                                    self.profiler.format_report(top=self.top)))
+            self.profiler.reset()
+        self.iteration += 1
\ No newline at end of file
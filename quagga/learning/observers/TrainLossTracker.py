@@ -28,6 +28,9 @@ class TrainLossTracker(object):
         # calculated loss will be correct. Because (very unlikely)
         # probs, true_labels value can be overwritten during calculating loss
         self.context = self.loss_block.context
+        # blocks with `loss_stats` accumulate the loss on the device,
+        # it is enough to calculate it only when it is reported
+        self.accumulating = hasattr(self.loss_block, 'loss_stats')
 
     def add_observer(self, observer):
         self.observers.append(observer)
@@ -40,9 +43,11 @@ class TrainLossTracker(object):
             self.losses.append(loss)
 
     def notify(self):
-        self.loss_block.calculate_loss(self.context)
-        self.context.add_callback(self._accumulate_loss)
-        if self.iteration % self.period == 0 and self.iteration != 0:
+        is_reporting = self.iteration % self.period == 0 and self.iteration != 0
+        if not self.accumulating or is_reporting:
+            self.loss_block.calculate_loss(self.context)
+            self.context.add_callback(self._accumulate_loss)
+        if is_reporting:
             self.context.add_callback(self._notify_observers, self.iteration)
         self.iteration += 1
 
@@ -25,6 +25,9 @@ class ValidLossTracker(object):
         # we must use this context otherwise we can't guarantee that
         # calculated loss will be correct
         self.context = self.loss_block.context
+        # blocks with `loss_stats` accumulate the loss on the device,
+        # it is enough to calculate it only when it is reported
+        self.accumulating = hasattr(self.loss_block, 'loss_stats')
 
     def add_observer(self, observer):
         self.observers.append(observer)
@@ -37,10 +40,14 @@ class ValidLossTracker(object):
             self.losses.append(loss)
 
     def notify_about_fprop(self):
-        self.loss_block.calculate_loss(self.context)
-        self.context.add_callback(self.accumulate_loss)
+        if not self.accumulating:
+            self.loss_block.calculate_loss(self.context)
+            self.context.add_callback(self.accumulate_loss)
 
     def notify(self, iteration):
+        if self.accumulating:
+            self.loss_block.calculate_loss(self.context)
+            self.context.add_callback(self.accumulate_loss)
         self.context.add_callback(self._notify, iteration)
 
     def _notify(self, iteration):
@@ -15,9 +15,11 @@
 # ----------------------------------------------------------------------------
 from quagga.learning.observers.Bproper import Bproper
 from quagga.learning.observers.Fproper import Fproper
+from quagga.learning.observers.Hdf5CheckpointSaver import Hdf5CheckpointSaver
 from quagga.learning.observers.Hdf5Saver import Hdf5Saver
 from quagga.learning.observers.Hdf5ValidationSaver import Hdf5ValidationSaver
-from quagga.learning.observers.TTTrainLossTracker import TTTrainLossTracker
+from quagga.learning.observers.MemoryReporter import MemoryReporter
+from quagga.learning.observers.ProfileReporter import ProfileReporter
 from quagga.learning.observers.TrainLossTracker import TrainLossTracker
 from quagga.learning.observers.ValidAccuracyTracker import ValidAccuracyTracker
 from quagga.learning.observers.ValidLossTracker import ValidLossTracker
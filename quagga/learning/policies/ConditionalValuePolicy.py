@@ -23,6 +23,10 @@ class ConditionalValuePolicy(object):
         self.logger = logger
         self.previous_loss = None
 
+    def get_state(self):
+        return {'value': self.value,
+                'previous_loss': self.previous_loss}
+
     def notify(self, loss):
         if self.previous_loss and loss > self.previous_loss:
             self.value = self.decay_func(self.value)
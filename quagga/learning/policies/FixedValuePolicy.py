@@ -17,5 +17,8 @@ class FixedValuePolicy(object):
     def __init__(self, value):
         self.value = value
 
+    def get_state(self):
+        return {'value': self.value}
+
     def notify(self):
         pass
\ No newline at end of file
@@ -21,6 +21,10 @@ class ScheduledValuePolicy(object):
         self.iteration = 0
         self.value = None
 
+    def get_state(self):
+        return {'iteration': self.iteration,
+                'value': self.value}
+
     def notify(self):
         if self.iteration in self.schedule:
             self.value = self.schedule[self.iteration]
@@ -17,6 +17,7 @@ import numpy as np
 import ctypes as ct
 from itertools import izip
 from quagga.matrix import Matrix
+from quagga.matrix import MemoryTracker
 from quagga.context import Context
 
 
@@ -29,9 +30,11 @@ class AdamStep(object):
         self.contexts = []
         for p in self.parameters:
             m = Matrix.empty_like(p)
+            MemoryTracker.tag(m, 'optimizer state')
             m.sync_fill(0.0)
             self.m.append(m)
             v = Matrix.empty_like(p)
+            MemoryTracker.tag(v, 'optimizer state')
             v.sync_fill(0.0)
             self.v.append(v)
             self.contexts.append(Context(p.device_id))
@@ -42,6 +45,11 @@ class AdamStep(object):
         self.blocking_contexts = []
         self.iteration = 0
 
+    def get_state(self):
+        return {'iteration': self.iteration,
+                'm': self.m,
+                'v': self.v}
+
     def notify(self):
         if self.iteration % 2 != self.kkk:
             return
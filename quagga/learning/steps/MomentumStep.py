@@ -16,6 +16,7 @@
 import ctypes as ct
 from itertools import izip
 from quagga.matrix import Matrix
+from quagga.matrix import MemoryTracker
 from quagga.context import Context
 
 
@@ -25,6 +26,7 @@ class MomentumStep(object):
         self.velocity = []
         for p in self.parameters:
             v = Matrix.empty_like(p)
+            MemoryTracker.tag(v, 'optimizer state')
             v.sync_fill(0.0)
             self.velocity.append(v)
         self.learning_rate_policy = learning_rate_policy
@@ -32,6 +34,9 @@ class MomentumStep(object):
         self.contexts = [Context(p.device_id) for p in parameters]
         self.blocking_contexts = []
 
+    def get_state(self):
+        return {'velocity': self.velocity}
+
     def notify(self):
         del self.blocking_contexts[:]
         learning_rate = ct.c_float(-self.learning_rate_policy.value)
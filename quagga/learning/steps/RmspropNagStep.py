@@ -16,6 +16,7 @@
 import ctypes as ct
 from itertools import izip
 from quagga.matrix import Matrix
+from quagga.matrix import MemoryTracker
 from quagga.context import Context
 
 
@@ -26,9 +27,11 @@ class RmspropNagStep(object):
         self.velocity = []
         for p in self.parameters:
             grad_sqr = Matrix.empty_like(p)
+            MemoryTracker.tag(grad_sqr, 'optimizer state')
             grad_sqr.sync_fill(0.0)
             self.grad_sqr.append(grad_sqr)
             v = Matrix.empty_like(p)
+            MemoryTracker.tag(v, 'optimizer state')
             v.sync_fill(0.0)
             self.velocity.append(v)
         self.learning_rate_policy = learning_rate_policy
@@ -38,6 +41,10 @@ class RmspropNagStep(object):
         self.contexts = [Context(p.device_id) for p in parameters]
         self.blocking_contexts = []
 
+    def get_state(self):
+        return {'grad_sqr': self.grad_sqr,
+                'velocity': self.velocity}
+
     def notify(self):
         del self.blocking_contexts[:]
         learning_rate = ct.c_float(-self.learning_rate_policy.value)
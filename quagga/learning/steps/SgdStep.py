@@ -25,6 +25,9 @@ class SgdStep(object):
         self.contexts = [Context(p.device_id) for p in parameters]
         self.blocking_contexts = []
 
+    def get_state(self):
+        return {}
+
     def notify(self):
         del self.blocking_contexts[:]
         learning_rate = ct.c_float(-self.learning_rate_policy.value)
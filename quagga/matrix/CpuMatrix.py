@@ -13,22 +13,32 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 # ----------------------------------------------------------------------------
+import mmap
 import quagga
-import weakref
+import inspect
+import threading
 import numpy as np
+from functools import wraps
 from itertools import izip
+from quagga.matrix import RowCache
+from quagga.matrix import MemoryTracker
 from quagga.matrix import ShapeElement
+from quagga.context.CpuWorker import CpuWorker
 
 
 class CpuMatrix(object):
-    def __init__(self, data, nrows, ncols, dtype):
+    def __init__(self, data, nrows, ncols, dtype, device_id=None):
         self.data = data
         self._nrows = nrows if isinstance(nrows, ShapeElement) else ShapeElement(nrows)
         self._ncols = ncols if isinstance(ncols, ShapeElement) else ShapeElement(ncols)
         self.dtype = dtype
-        self.device_id = 0
+        self.device_id = device_id if device_id else 0
         self.last_modification_context = None
         self.last_usage_context = None
+        self.row_cache = None
+        self._npa = None
+        self._npa_data = None
+        self._npa_version = None
 
     @staticmethod
     def get_setable_attributes():
@@ -36,11 +46,21 @@ class CpuMatrix(object):
 
     @property
     def npa(self):
-        return self.data[:self.nrows.value, :self.ncols.value]
+        # an operation usually reads `npa` several times, so the view is
+        # kept until the shape or the underlying buffer changes
+        data = self.data
+        version = self._nrows.version, self._ncols.version
+        if version != self._npa_version or data is not self._npa_data:
+            self._npa = data[:self._nrows.value, :self._ncols.value]
+            self._npa_data = data
+            self._npa_version = version
+        return self._npa
 
     @npa.setter
     def npa(self, value):
-        self.data[:self.nrows.value, :self.ncols.value] = value
+        self.npa[...] = value
+        if self.row_cache:
+            self.row_cache.clear()
 
     @property
     def nelems(self):
@@ -52,8 +72,9 @@ class CpuMatrix(object):
 
     @nrows.setter
     def nrows(self, value):
-        data = self.data.base if self.data.base is not None else self.data
-        if value > data.shape[0]:
+        # `data` is the preallocated buffer itself, its `base` may be an
+        # unrelated array, e.g. a file mapping or the parent of a view
+        if value > self.data.shape[0]:
             raise ValueError('There is no so many preallocated memory! '
                              'Maximum for `nrows` is {}'.format(self.data.shape[0]))
         self._nrows[:] = value
@@ -64,33 +85,18 @@ class CpuMatrix(object):
 
     @ncols.setter
     def ncols(self, value):
-        data = self.data.base if self.data.base is not None else self.data
-        if value > data.shape[1]:
+        if value > self.data.shape[1]:
             raise ValueError('There is no so many preallocated memory! '
                              'Maximum for `ncols` is {}'.format(self.data.shape[1]))
         self._ncols[:] = value
 
     def __getitem__(self, key):
+        # views slice the whole preallocated buffer, so they stay valid when
+        # the shape changes, only a position given by ShapeElement is tracked
         # get row
-        self_proxy = weakref.proxy(self)
-        if isinstance(key, int):
-            data = self.npa[key, np.newaxis]
-            a = CpuMatrix(data, 1, self.ncols, self.dtype)
-            a_proxy = weakref.proxy(a)
-            if isinstance(self.ncols, ShapeElement):
-                modif_handler = lambda: setattr(a_proxy, 'data', self_proxy.data[key, np.newaxis])
-                self.ncols.add_modification_handler(modif_handler)
-            return a
-        if isinstance(key, ShapeElement):
-            data = self.npa[key.value, np.newaxis]
-            a = CpuMatrix(data, 1, self.ncols, self.dtype)
-            a_proxy = weakref.proxy(a)
-            modif_handler = lambda: setattr(a, 'data', self_proxy.data[key.value, np.newaxis])
-            key.add_modification_handler(modif_handler)
-            if isinstance(self.ncols, ShapeElement):
-                modif_handler = lambda: setattr(a_proxy, 'data', self_proxy.data[key.value, np.newaxis])
-                self.ncols.add_modification_handler(modif_handler)
-            return a
+        if isinstance(key, (int, ShapeElement)):
+            get_data = lambda: self.data[int(key), np.newaxis]
+            return self._get_view(get_data, [key], 1, self.ncols)
         if isinstance(key, slice) and self.ncols == 1:
             key = (key, 0)
         # get row slice with one column
@@ -98,64 +104,37 @@ class CpuMatrix(object):
             start = key[0].start if key[0].start else 0
             stop = key[0].stop if key[0].stop else self.nrows
             nrows = stop - start
-            if isinstance(start, int) and isinstance(key[1], int):
-                data = self.npa[start:, key[1], np.newaxis]
-                a = CpuMatrix(data, nrows, 1, self.dtype)
-                if isinstance(nrows, ShapeElement):
-                    a_proxy = weakref.proxy(a)
-                    modif_handler = lambda: setattr(a_proxy, 'data', self_proxy.data[start:, key[1], np.newaxis])
-                    nrows.add_modification_handler(modif_handler)
-                return a
-            elif isinstance(start, int) and isinstance(key[1], ShapeElement):
-                data = self.npa[start:, key[1].value, np.newaxis]
-                a = CpuMatrix(data, nrows, 1, self.dtype)
-                a_proxy = weakref.proxy(a)
-                modif_handler = lambda: setattr(a_proxy, 'data', self_proxy.data[start:, key[1].value, np.newaxis])
-                key[1].add_modification_handler(modif_handler)
-                return a
-            elif isinstance(start, ShapeElement) and isinstance(key[1], int):
-                data = self.npa[start.value:, key[1], np.newaxis]
-                a = CpuMatrix(data, nrows, 1, self.dtype)
-                a_proxy = weakref.proxy(a)
-                modif_handler = lambda: setattr(a_proxy, 'data', self_proxy.data[start.value:, key[1], np.newaxis])
-                start.add_modification_handler(modif_handler)
-                return a
-            elif isinstance(start, ShapeElement) and isinstance(key[1], ShapeElement):
-                data = self.npa[start.value:, key[1].value, np.newaxis]
-                a = CpuMatrix(data, nrows, 1, self.dtype)
-                a_proxy = weakref.proxy(a)
-                modif_handler = lambda: setattr(a_proxy, 'data', self_proxy.data[start.value:, key[1].value, np.newaxis])
-                key[1].add_modification_handler(modif_handler)
-                start.add_modification_handler(modif_handler)
-                return a
+            column = key[1]
+            get_data = lambda: self.data[int(start):, int(column), np.newaxis]
+            return self._get_view(get_data, [start, column], nrows, 1)
         # get column slice
         if key[0] == slice(None) and isinstance(key[1], slice) and not key[1].step:
             stop = key[1].stop if key[1].stop else self.ncols
             start = key[1].start if key[1].start else 0
             ncols = stop - start
-            if isinstance(start, int):
-                data = self.npa[:, start:]
-                a = CpuMatrix(data, self.nrows, ncols, self.dtype)
-                a_proxy = weakref.proxy(a)
-                if isinstance(self.nrows, ShapeElement):
-                    modif_handler = lambda: setattr(a_proxy, 'data', self_proxy.data[:, start:])
-                    self.nrows.add_modification_handler(modif_handler)
-                return a
-            elif isinstance(start, ShapeElement):
-                data = self.npa[:, start.value:]
-                a = CpuMatrix(data, self.nrows, ncols, self.dtype)
-                a_proxy = weakref.proxy(a)
-                modif_handler = lambda: setattr(a_proxy, 'data', self_proxy.data[:, start.value:])
-                start.add_modification_handler(modif_handler)
-                if isinstance(self.nrows, ShapeElement):
-                    modif_handler = lambda: setattr(a_proxy, 'data', self_proxy.data[:, start.value:])
-                    self.nrows.add_modification_handler(modif_handler)
-                return a
+            get_data = lambda: self.data[:, int(start):]
+            return self._get_view(get_data, [start], self.nrows, ncols)
         raise ValueError('This slice: {} is unsupported!'.format(key))
 
+    def _get_view(self, get_data, indices, nrows, ncols):
+        shape_elements = [e for e in indices if isinstance(e, ShapeElement)]
+        shape_elements.extend(getattr(self, '_shape_elements', []))
+        if shape_elements:
+            return _LazyCpuMatrixView(get_data, shape_elements, nrows, ncols, self.dtype, self.device_id)
+        return CpuMatrix(get_data(), nrows, ncols, self.dtype, self.device_id)
+
     def same_shape(self, other):
         return self.npa.shape == other.npa.shape
 
+    @staticmethod
+    def wait_matrices(current_context, *matrices):
+        contexts = set(e.last_modification_context for e in matrices)
+        contexts.discard(None)
+        contexts.discard(current_context)
+        current_context.wait(*contexts)
+        for e in matrices:
+            e.last_usage_context = current_context
+
     @staticmethod
     def str_to_dtype(dtype):
         if dtype == 'float':
@@ -182,23 +161,62 @@ class CpuMatrix(object):
             dtype, np_dtype = cls.array_to_dtypes(a)
         if a.dtype != np_dtype:
             a = a.astype(dtype=np_dtype)
-        return cls(np.copy(a), a.shape[0], a.shape[1], dtype)
+        matrix = cls(np.copy(a), a.shape[0], a.shape[1], dtype, device_id)
+        MemoryTracker.on_allocation(matrix)
+        return matrix
+
+    @classmethod
+    def from_memmap(cls, a, device_id=None, row_cache_size=None):
+        """
+        Wraps memory-mapped array without copying it, so that only touched
+        pages are read into memory and in-place updates go to the mapping.
+        """
+        if a.ndim != 2:
+            raise ValueError('CpuMatrix works only with 2-d numpy arrays!')
+        dtype, _ = cls.array_to_dtypes(a)
+        matrix = cls(a, a.shape[0], a.shape[1], dtype, device_id)
+        if row_cache_size:
+            matrix.row_cache = RowCache(row_cache_size)
+        return matrix
 
     @classmethod
     def empty(cls, nrows, ncols, dtype=None, device_id=None):
         dtype = dtype if dtype else quagga.dtype
         np_dtype = cls.str_to_dtype(dtype)
-        a = cls(None, nrows, ncols, dtype)
+        a = cls(None, nrows, ncols, dtype, device_id)
         nrows = nrows.value if isinstance(nrows, ShapeElement) else nrows
         ncols = ncols.value if isinstance(ncols, ShapeElement) else ncols
         a.data = np.nan_to_num(np.empty((nrows, ncols), dtype=np_dtype))
+        MemoryTracker.on_allocation(a)
         return a
 
     @classmethod
     def empty_like(cls, other, device_id=None):
-        return cls.empty(other.nrows, other.ncols, other.dtype)
+        device_id = other.device_id if device_id is None else device_id
+        return cls.empty(other.nrows, other.ncols, other.dtype, device_id)
+
+    def to_shared_memory(self):
+        """
+        Moves the matrix into anonymous shared memory. Processes forked
+        afterwards map the same physical pages instead of private copies.
+        The matrix becomes read-only, any modification raises ValueError.
+        """
+        if isinstance(self.data, np.memmap) and not self.data.flags.writeable:
+            # read-only file mapping is already shared between processes
+            return
+        order = 'F' if np.isfortran(self.data) else 'C'
+        buf = mmap.mmap(-1, max(self.data.nbytes, 1))
+        data = np.ndarray(self.data.shape, self.data.dtype, buf, order=order)
+        data[...] = self.data
+        data.flags.writeable = False
+        self.data = data
 
     def to_host(self, context=None):
+        if CpuWorker.workers and not CpuWorker.is_worker_thread():
+            # the matrix may still be computed by a worker
+            for c in [context, self.last_modification_context]:
+                if c is not None:
+                    c.synchronize()
         return np.copy(self.npa)
 
     def assign(self, context, a):
@@ -242,14 +260,19 @@ class CpuMatrix(object):
         out.npa = self.npa[:, column_indxs.npa.flatten()].T
 
     def slice_rows(self, context, row_indxs, out):
-        out.npa = self.npa[row_indxs.npa.flatten()]
+        if self.row_cache:
+            self.row_cache.gather(self.data, row_indxs.npa.flatten(), out.npa)
+        else:
+            out.npa = self.npa[row_indxs.npa.flatten()]
 
     def add_scaled_rows_slice(self, context, row_indxs, alpha, a):
         """
         self[row_indxs] += alpha * a
         """
-        for i, idx in enumerate(row_indxs.npa.flatten()):
-            self.npa[idx] += alpha * a.npa[i]
+        row_indxs = row_indxs.npa.flatten()
+        np.add.at(self.npa, row_indxs, alpha * a.npa)
+        if self.row_cache:
+            self.row_cache.refresh(self.data, row_indxs)
 
     def add_rows_slice(self, context, row_indxs, a):
         """
@@ -264,16 +287,21 @@ class CpuMatrix(object):
         """
         n = rows_indxs.ncols
         for i in xrange(n):
-            dense_matrices[i].npa = self.npa[rows_indxs.npa[:, i]]
+            if self.row_cache:
+                self.row_cache.gather(self.data, rows_indxs.npa[:, i], dense_matrices[i].npa)
+            else:
+                dense_matrices[i].npa = self.npa[rows_indxs.npa[:, i]]
 
     def add_scaled_rows_batch_slice(self, context, rows_indxs, alpha, dense_matrices):
         """
         for k in range(K):
             self[rows_indxs[:, k]] += alpha * dense_matrices[k]
         """
+        npa = self.npa
         for k, m in enumerate(dense_matrices):
-            for i, idx in enumerate(rows_indxs.npa[:, k]):
-                self.npa[idx] += alpha * m.npa[i]
+            np.add.at(npa, rows_indxs.npa[:, k], alpha * m.npa)
+        if self.row_cache:
+            self.row_cache.refresh(self.data, rows_indxs.npa[:, :len(dense_matrices)].flatten())
 
     def add_rows_batch_slice(self, context, rows_indxs, dense_matrices):
         self.add_scaled_rows_batch_slice(context, rows_indxs, 1.0, dense_matrices)
@@ -478,14 +506,32 @@ class CpuMatrix(object):
         if derivative_matrix:
             derivative_matrix.npa = (self.npa > 0).astype(np.float32)
 
-    def softmax(self, context, softmax_matrix):
+    def softmax(self, context, softmax_matrix, group_width=None):
+        """
+        Softmax of every row or, if ``group_width`` is given, of every
+        group of ``group_width`` consecutive columns of a row.
+        """
+        if group_width:
+            x = self.npa.reshape((self.npa.shape[0], -1, group_width))
+            maximums = np.max(x, axis=2, keepdims=True)
+            e = np.exp(x - maximums)
+            e /= np.sum(e, axis=2, keepdims=True)
+            softmax_matrix.npa = e.reshape(self.npa.shape)
+            return
         maximums = np.max(self.npa, axis=1, keepdims=True)
         softmax_matrix.npa = self.npa - maximums
         np.exp(softmax_matrix.npa, softmax_matrix.npa)
         z = np.sum(softmax_matrix.npa, axis=1, keepdims=True)
         softmax_matrix.npa /= z
 
-    def add_softmax_derivative(self, context, softmax_matrix, deriv_matrix):
+    def add_softmax_derivative(self, context, softmax_matrix, deriv_matrix, group_width=None):
+        if group_width:
+            shape = (self.npa.shape[0], -1, group_width)
+            softmax = softmax_matrix.npa.reshape(shape)
+            grad_x = softmax * deriv_matrix.npa.reshape(shape)
+            grad_x -= softmax * grad_x.sum(axis=2, keepdims=True)
+            self.npa += grad_x.reshape(self.npa.shape)
+            return
         grad_x = softmax_matrix.npa * deriv_matrix.npa
         grad_x -= softmax_matrix.npa * grad_x.sum(axis=1, keepdims=True)
         self.npa += grad_x
@@ -495,9 +541,79 @@ class CpuMatrix(object):
         self.npa[range(probs.nrows), target_classes.npa.flatten()] -= 1.0 / probs.npa.shape[0]
 
     def add_softmax_ce_derivative(self, context, probs, target_classes):
-        temp = probs.npa / probs.npa.shape[0]
-        temp[range(probs.nrows), target_classes.npa.flatten()] -= 1.0 / probs.npa.shape[0]
-        self.npa += temp
+        n = probs.npa.shape[0]
+        self.npa += probs.npa / n
+        self.npa[np.arange(n), target_classes.npa.flatten()] -= 1.0 / n
+
+    def assign_softmax_ce(self, context, x, target_classes, losses):
+        """
+        self = softmax(x)
+        losses[i] = -log(self[i, target_classes[i]])
+
+        The losses are computed from the log-sum-exp of the rows of ``x``,
+        not from the probabilities.
+        """
+        x = x.npa
+        maximums = np.max(x, axis=1, keepdims=True)
+        npa = self.npa
+        np.subtract(x, maximums, npa)
+        np.exp(npa, npa)
+        z = np.sum(npa, axis=1, keepdims=True)
+        npa /= z
+        rows = np.arange(x.shape[0])
+        losses.npa[:, 0] = np.log(z[:, 0]) + maximums[:, 0] - x[rows, target_classes.npa[:, 0]]
+
+    def softmax_ce_derivative(self, context, target_classes, mask=None):
+        """
+        self = (self - one_hot(target_classes)) / nrows             or
+        self = (self - one_hot(target_classes)) / nrows .* mask
+
+        ``self`` holds the output of the softmax, the derivative is
+        written in its place.
+        """
+        npa = self.npa
+        n = npa.shape[0]
+        npa[np.arange(n), target_classes.npa[:, 0]] -= 1.0
+        if mask:
+            npa *= mask.npa / n
+        else:
+            npa /= n
+
+    def accumulate_log_sum_exp(self, context, log_sum_exps, target_classes, offset, target_logits):
+        """
+        log_sum_exps[i] = log(exp(log_sum_exps[i]) + sum(exp(self[i])))
+        target_logits[i] = self[i, target_classes[i] - offset]
+
+        ``self`` is a chunk of columns of logits that starts at the column
+        ``offset``, ``target_logits`` are set only for the rows, which
+        target class is in the chunk.
+        """
+        npa = self.npa
+        maximums = np.max(npa, axis=1, keepdims=True)
+        log_sum_exps.npa = np.logaddexp(log_sum_exps.npa, maximums + np.log(np.sum(np.exp(npa - maximums), axis=1, keepdims=True)))
+        columns = target_classes.npa[:, 0] - offset
+        rows = np.flatnonzero((columns >= 0) & (columns < npa.shape[1]))
+        target_logits.npa[rows, 0] = npa[rows, columns[rows]]
+
+    def chunk_softmax_ce_derivative(self, context, log_sum_exps, target_classes, offset, mask=None):
+        """
+        self = (exp(self - log_sum_exps) - one_hot(target_classes - offset)) / nrows             or
+        self = (exp(self - log_sum_exps) - one_hot(target_classes - offset)) / nrows .* mask
+
+        ``self`` is a chunk of columns of logits that starts at the column
+        ``offset``, the derivative is written in its place.
+        """
+        npa = self.npa
+        n = npa.shape[0]
+        np.subtract(npa, log_sum_exps.npa, npa)
+        np.exp(npa, npa)
+        columns = target_classes.npa[:, 0] - offset
+        rows = np.flatnonzero((columns >= 0) & (columns < npa.shape[1]))
+        npa[rows, columns[rows]] -= 1.0
+        if mask:
+            npa *= mask.npa / n
+        else:
+            npa /= n
 
     def scale(self, context, alpha, out=None):
         if out:
@@ -630,10 +746,148 @@ class CpuMatrix(object):
         """
         self = alpha * op(a) * b + beta * self
         """
+        if context is not None:
+            # BLAS threads are limited by the compute budget of the context
+            context.activate()
         self.npa *= beta
         a = a.npa if matrix_operation_a == 'N' else a.npa.T
         b = b.npa if matrix_operation_b == 'N' else b.npa.T
         self.npa += alpha * np.dot(a, b)
 
+    def assign_batch_dot(self, context, a, b, nrows, matrix_operation_a='N', matrix_operation_b='N'):
+        self.add_batch_dot(context, a, b, nrows, matrix_operation_a, matrix_operation_b, beta=0.0)
+
+    def add_batch_dot(self, context, a, b, nrows, matrix_operation_a='N', matrix_operation_b='N', alpha=1.0, beta=1.0):
+        """
+        self[i] = alpha * op(a[i]) * op(b[i]) + beta * self[i]
+
+        Every row ``i`` of ``a``, ``b`` and ``self`` holds one matrix of a
+        batch in row-major order, ``nrows`` is the number of rows of the
+        matrices of ``self``.
+        """
+        if context is not None:
+            context.activate()
+        ncols = int(self.ncols) // nrows
+        k = int(a.ncols) // nrows
+        a = a.npa.reshape((-1, nrows, k) if matrix_operation_a == 'N' else (-1, k, nrows))
+        b = b.npa.reshape((-1, k, ncols) if matrix_operation_b == 'N' else (-1, ncols, k))
+        a = a if matrix_operation_a == 'N' else a.transpose(0, 2, 1)
+        b = b if matrix_operation_b == 'N' else b.transpose(0, 2, 1)
+        self.npa *= beta
+        self.npa += alpha * np.matmul(a, b).reshape(self.npa.shape)
+
     def argmax(self, context, out, axis=1):
-        out.npa[:, 0] = np.argmax(self.npa, axis=axis)
\ No newline at end of file
+        out.npa[:, 0] = np.argmax(self.npa, axis=axis)
+
+
+class _LazyCpuMatrixView(CpuMatrix):
+    """
+    View whose position in the parent matrix is given by shape elements,
+    the data is sliced again on access when any of them has changed.
+    """
+    def __init__(self, get_data, shape_elements, nrows, ncols, dtype, device_id=None):
+        self._get_data = get_data
+        self._shape_elements = shape_elements
+        self._shape_version = None
+        super(_LazyCpuMatrixView, self).__init__(None, nrows, ncols, dtype, device_id)
+
+    @property
+    def data(self):
+        version = max(e.version for e in self._shape_elements)
+        if version != self._shape_version:
+            self._data = self._get_data()
+            self._shape_version = version
+        return self._data
+
+    @data.setter
+    def data(self, value):
+        self._data = value
+
+
+def _get_matrices(args, matrices, sparse_matrices):
+    for arg in args:
+        if hasattr(arg, 'last_modification_context'):
+            matrices.append(arg)
+        elif isinstance(arg, (list, tuple)) or hasattr(arg, 'elements'):
+            _get_matrices(arg, matrices, sparse_matrices)
+        elif hasattr(arg, 'get_last_modification_contexts'):
+            sparse_matrices.append(arg)
+
+
+_local = threading.local()
+
+
+def _call_operation(function, *args, **kwargs):
+    # operations called by a running operation, e.g. `add_dot` by
+    # `assign_dot`, are executed right away, their dependencies were
+    # already resolved when the outer operation was submitted
+    _local.in_operation = True
+    try:
+        return function(*args, **kwargs)
+    finally:
+        _local.in_operation = False
+
+
+def _asynchronous(function, context_position):
+    """
+    Makes ``function`` an operation that is submitted to the worker of its
+    context. Like on GPU, the operation waits for the contexts that last
+    modified the matrices it gets, and then its context becomes the last
+    one for all of them. Outputs can not be told from inputs here, so
+    inputs are marked too, this only adds waits that are not needed.
+    """
+    @wraps(function)
+    def operation(*args, **kwargs):
+        if not CpuWorker.workers or getattr(_local, 'in_operation', False):
+            return function(*args, **kwargs)
+        context = args[context_position]
+        matrices, sparse_matrices = [], []
+        _get_matrices(args[:context_position] + args[context_position+1:], matrices, sparse_matrices)
+        _get_matrices(kwargs.itervalues(), matrices, sparse_matrices)
+        contexts = set(e.last_modification_context for e in matrices)
+        for sparse_matrix in sparse_matrices:
+            contexts.update(sparse_matrix.get_last_modification_contexts())
+        contexts.discard(None)
+        contexts.discard(context)
+        if context is None:
+            for c in contexts:
+                c.synchronize()
+            return _call_operation(function, *args, **kwargs)
+        context.wait(*contexts)
+        for e in matrices:
+            e.last_modification_context = context
+            e.last_usage_context = context
+        worker = context.worker
+        if worker is None or worker.is_current():
+            return _call_operation(function, *args, **kwargs)
+        # host arrays can be changed by the caller before the worker runs
+        args = [np.copy(a) if isinstance(a, np.ndarray) else a for a in args]
+        worker.submit(_call_operation, function, *args, **kwargs)
+    # lets callers, e.g. Profiler, inspect the original signature
+    operation.__wrapped__ = function
+    return operation
+
+
+def _make_operations_asynchronous():
+    """
+    Replaces CpuMatrix operations, methods that take a context, with their
+    asynchronous versions. It is done once on import, so that methods
+    bound before workers are started, e.g. ``self.f = self.x.tanh`` in
+    blocks, dispatch to the workers too. Operations are called right away
+    while there are no workers.
+    """
+    for name, member in CpuMatrix.__dict__.items():
+        if name.startswith('_') or name in ['to_host', 'wait_matrices']:
+            continue
+        if isinstance(member, staticmethod):
+            function, context_position, wrap = member.__func__, 0, staticmethod
+        elif inspect.isfunction(member):
+            function, context_position, wrap = member, 1, lambda f: f
+        else:
+            continue
+        arg_names = inspect.getargspec(function).args
+        if len(arg_names) > context_position and arg_names[context_position] == 'context':
+            setattr(CpuMatrix, name, wrap(_asynchronous(function, context_position)))
+
+
+_make_operations_asynchronous()
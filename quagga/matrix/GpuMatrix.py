@@ -14,7 +14,6 @@
 # limitations under the License.
 # ----------------------------------------------------------------------------
 import quagga
-import weakref
 import warnings
 import numpy as np
 import ctypes as ct
@@ -25,6 +24,7 @@ from quagga.cuda import cublas
 from quagga.cuda import curand
 from quagga.cuda import nonlinearities
 from quagga.matrix import ShapeElement
+from quagga.matrix import MemoryTracker
 from quagga.cuda import gpu_matrix_kernels
 
 
@@ -46,9 +46,9 @@ class GpuMatrix(object):
         self.dtype = dtype
         self.np_dtype, self.c_dtype = self.str_to_dtypes(dtype)
         self._cudnn_tensor_descriptor = None
+        self._cudnn_tensor_descriptor_version = None
         self.device_id = device_id
         self.is_owner = is_owner
-        self_proxy = weakref.proxy(self)
         if strides:
             self.strides = strides
         else:
@@ -58,13 +58,6 @@ class GpuMatrix(object):
         self.last_modification_context = None
         self.last_usage_context = None
 
-        def change_cudnn_tensor_descriptor():
-            if self_proxy._cudnn_tensor_descriptor:
-                cudnn.destroy_tensor_descriptor(self_proxy._cudnn_tensor_descriptor)
-                self_proxy._cudnn_tensor_descriptor = None
-        self.nrows.add_modification_handler(change_cudnn_tensor_descriptor)
-        self.ncols.add_modification_handler(change_cudnn_tensor_descriptor)
-
     @staticmethod
     def get_setable_attributes():
         return ['nrows', 'ncols', 'last_modification_context']
@@ -95,7 +88,12 @@ class GpuMatrix(object):
 
     @property
     def cudnn_tensor_descriptor(self):
+        version = self._nrows.version, self._ncols.version
+        if self._cudnn_tensor_descriptor and version != self._cudnn_tensor_descriptor_version:
+            cudnn.destroy_tensor_descriptor(self._cudnn_tensor_descriptor)
+            self._cudnn_tensor_descriptor = None
         if not self._cudnn_tensor_descriptor:
+            self._cudnn_tensor_descriptor_version = version
             self._cudnn_tensor_descriptor = cudnn.ct_cudnn_tensor_descriptor()
             cudnn.create_tensor_descriptor(self._cudnn_tensor_descriptor)
             # CUDNN uses C-order, but CUBLAS uses F-order
@@ -112,18 +110,12 @@ class GpuMatrix(object):
             cudnn.destroy_tensor_descriptor(self._cudnn_tensor_descriptor)
 
     def __getitem__(self, key):
+        # pointers of views depend on the leading dimension of the matrix and
+        # on the ShapeElement indexes, see `_LazyGpuMatrixView`
         # get row
-        self_proxy = weakref.proxy(self)
-        if isinstance(key, int):
-            data = self._get_pointer_to_element(key, 0)
-            return GpuMatrix(data, 1, self.ncols, self.dtype, self.device_id, False, self.strides, self)
-        if isinstance(key, ShapeElement):
-            data = self._get_pointer_to_element(key.value, 0)
-            a = GpuMatrix(data, 1, self.ncols, self.dtype, self.device_id, False, self.strides, self)
-            a_proxy = weakref.proxy(a)
-            modif_handler = lambda: setattr(a_proxy, 'data', self_proxy._get_pointer_to_element(key.value, 0))
-            key.add_modification_handler(modif_handler)
-            return a
+        if isinstance(key, (int, ShapeElement)):
+            get_data = lambda: self._get_pointer_to_element(int(key), 0)
+            return self._get_view(get_data, [key], 1, self.ncols, self.strides)
         if isinstance(key, slice) and self.ncols == 1:
             key = (key, 0)
         # get row slice with one column
@@ -131,58 +123,27 @@ class GpuMatrix(object):
             start = key[0].start if key[0].start else 0
             stop = key[0].stop if key[0].stop else self.nrows
             nrows = stop - start
-            if isinstance(start, int) and isinstance(key[1], int):
-                data = self._get_pointer_to_element(start, key[1])
-                a = GpuMatrix(data, nrows, 1, self.dtype, self.device_id, False, self.strides, self)
-                if isinstance(nrows, ShapeElement):
-                    a_proxy = weakref.proxy(a)
-                    modif_handler = lambda: setattr(a_proxy, 'data', self_proxy._get_pointer_to_element(start, key[1]))
-                    nrows.add_modification_handler(modif_handler)
-                return a
-            elif isinstance(start, int) and isinstance(key[1], ShapeElement):
-                data = self._get_pointer_to_element(start, key[1].value)
-                a = GpuMatrix(data, nrows, 1, self.dtype, self.device_id, False, self.strides, self)
-                a_proxy = weakref.proxy(a)
-                modif_handler = lambda: setattr(a_proxy, 'data', self_proxy._get_pointer_to_element(start, key[1].value))
-                key[1].add_modification_handler(modif_handler)
-                return a
-            elif isinstance(start, ShapeElement) and isinstance(key[1], int):
-                data = self._get_pointer_to_element(start.value, key[1])
-                a = GpuMatrix(data, nrows, 1, self.dtype, self.device_id, False, self.strides, self)
-                a_proxy = weakref.proxy(a)
-                modif_handler = lambda: setattr(a_proxy, 'data', self_proxy._get_pointer_to_element(start.value, key[1]))
-                start.add_modification_handler(modif_handler)
-                return a
-            elif isinstance(start, ShapeElement) and isinstance(key[1], ShapeElement):
-                data = self._get_pointer_to_element(start.value, key[1].value)
-                a = GpuMatrix(data, nrows, 1, self.dtype, self.device_id, False, self.strides, self)
-                a_proxy = weakref.proxy(a)
-                modif_handler = lambda: setattr(a_proxy, 'data', self_proxy._get_pointer_to_element(start.value, key[1].value))
-                key[1].add_modification_handler(modif_handler)
-                start.add_modification_handler(modif_handler)
-                return a
+            column = key[1]
+            get_data = lambda: self._get_pointer_to_element(int(start), int(column))
+            indexes = [start, column] if isinstance(column, int) and column == 0 else [start, column, self.nrows]
+            return self._get_view(get_data, indexes, nrows, 1, self.strides)
         # get column slice
         if key[0] == slice(None) and isinstance(key[1], slice) and not key[1].step:
             stop = key[1].stop if key[1].stop else self.ncols
             start = key[1].start if key[1].start else 0
             ncols = stop - start
-            if isinstance(start, int):
-                data = self._get_pointer_to_column(start)
-                a = GpuMatrix(data, self.nrows, ncols, self.dtype, self.device_id, False, base=self)
-                a_proxy = weakref.proxy(a)
-                modif_handler = lambda: setattr(a_proxy, 'data', self_proxy._get_pointer_to_column(start))
-                self.nrows.add_modification_handler(modif_handler)
-                return a
-            elif isinstance(start, ShapeElement):
-                data = self._get_pointer_to_column(start.value)
-                a = GpuMatrix(data, self.nrows, ncols, self.dtype, self.device_id, False, base=self)
-                a_proxy = weakref.proxy(a)
-                modif_handler = lambda: setattr(a_proxy, 'data', self_proxy._get_pointer_to_column(start.value))
-                start.add_modification_handler(modif_handler)
-                self.nrows.add_modification_handler(modif_handler)
-                return a
+            get_data = lambda: self._get_pointer_to_column(int(start))
+            return self._get_view(get_data, [start, self.nrows], self.nrows, ncols)
         raise ValueError('This slice: {} is unsupported!'.format(key))
 
+    def _get_view(self, get_data, indexes, nrows, ncols, strides=None):
+        shape_elements = [e for e in indexes if isinstance(e, ShapeElement)]
+        shape_elements.extend(getattr(self, '_shape_elements', []))
+        if shape_elements:
+            return _LazyGpuMatrixView(get_data, shape_elements, nrows, ncols, self.dtype,
+                                      self.device_id, strides, self)
+        return GpuMatrix(get_data(), nrows, ncols, self.dtype, self.device_id, False, strides, self)
+
     def same_shape(self, other):
         return self.nrows == other.nrows and self.ncols == other.ncols
 
@@ -240,6 +201,12 @@ class GpuMatrix(object):
         cudart.cuda_memcpy(a_gpu.data, host_data, a_gpu.nbytes, 'default')
         return a_gpu
 
+    @classmethod
+    def from_memmap(cls, a, device_id=None, row_cache_size=None):
+        # device memory can't be backed by a file, the mapped array
+        # is uploaded as is
+        return cls.from_npa(a, device_id=device_id)
+
     @classmethod
     def empty(cls, nrows, ncols, dtype=None, device_id=None):
         dtype = dtype if dtype else quagga.dtype
@@ -247,6 +214,7 @@ class GpuMatrix(object):
             device_id = cudart.cuda_get_device()
             a = cls(None, nrows, ncols, dtype, device_id, True)
             a.data = cudart.cuda_malloc(a.nbytes, a.c_dtype)
+        MemoryTracker.on_allocation(a)
         return a
 
     @classmethod
@@ -870,42 +838,69 @@ class GpuMatrix(object):
         else:
             nonlinearities.relu(context.cuda_stream, self.nelems, self.data, relu_matrix.data)
 
-    def softmax(self, context, softmax_matrix):
+    def softmax(self, context, softmax_matrix, group_width=None):
+        """
+        Softmax of every row or, if ``group_width`` is given, of every
+        group of ``group_width`` consecutive columns of a row.
+        """
         GpuMatrix.wait_matrices(context, self)
         softmax_matrix.last_modification_context = context
         context.activate()
+        if group_width:
+            mode = cudnn.softmax_mode['CUDNN_SOFTMAX_MODE_CHANNEL']
+            x_desc = _create_grouped_tensor_descriptor(self, group_width)
+            y_desc = _create_grouped_tensor_descriptor(softmax_matrix, group_width)
+        else:
+            mode = cudnn.softmax_mode['CUDNN_SOFTMAX_MODE_INSTANCE']
+            x_desc = self.cudnn_tensor_descriptor
+            y_desc = softmax_matrix.cudnn_tensor_descriptor
         cudnn.softmax_forward(context.cudnn_handle,
                               cudnn.softmax_algorithm['CUDNN_SOFTMAX_ACCURATE'],
-                              cudnn.softmax_mode['CUDNN_SOFTMAX_MODE_INSTANCE'],
+                              mode,
                               ct.c_float(1.0),
-                              self.cudnn_tensor_descriptor,
+                              x_desc,
                               self.data,
                               ct.c_float(0.0),
-                              softmax_matrix.cudnn_tensor_descriptor,
+                              y_desc,
                               softmax_matrix.data)
+        if group_width:
+            cudnn.destroy_tensor_descriptor(x_desc)
+            cudnn.destroy_tensor_descriptor(y_desc)
 
-    def add_softmax_derivative(self, context, softmax_matrix, deriv_matrix):
+    def add_softmax_derivative(self, context, softmax_matrix, deriv_matrix, group_width=None):
         """
 
         :param context:
         :param softmax_matrix: matrix with softmax
         :param deriv_matrix: gradients that needs to propagate through softmax
+        :param group_width: softmax was computed over groups of this many
+                            columns, see :meth:`softmax`
         :return:
         """
         GpuMatrix.wait_matrices(context, self, softmax_matrix, deriv_matrix)
         self.last_modification_context = context
         context.activate()
+        if group_width:
+            mode = cudnn.softmax_mode['CUDNN_SOFTMAX_MODE_CHANNEL']
+            descs = [_create_grouped_tensor_descriptor(m, group_width)
+                     for m in [softmax_matrix, deriv_matrix, self]]
+        else:
+            mode = cudnn.softmax_mode['CUDNN_SOFTMAX_MODE_INSTANCE']
+            descs = [m.cudnn_tensor_descriptor for m in [softmax_matrix, deriv_matrix, self]]
         cudnn.softmax_backward(context.cudnn_handle,
                                cudnn.softmax_algorithm['CUDNN_SOFTMAX_ACCURATE'],
-                               cudnn.softmax_mode['CUDNN_SOFTMAX_MODE_INSTANCE'],
+                               mode,
                                ct.c_float(1.0),
-                               softmax_matrix.cudnn_tensor_descriptor,
+                               descs[0],
                                softmax_matrix.data,
-                               deriv_matrix.cudnn_tensor_descriptor,
+                               descs[1],
                                deriv_matrix.data,
                                ct.c_float(1.0),
-                               self.cudnn_tensor_descriptor,
+                               descs[2],
                                self.data)
+        if group_width:
+            for desc in descs:
+                cudnn.destroy_tensor_descriptor(desc)
 
     def assign_softmax_ce_derivative(self, context, probs, target_classes):
         GpuMatrix.wait_matrices(context, probs, target_classes)
@@ -919,6 +914,67 @@ class GpuMatrix(object):
         context.activate()
         gpu_matrix_kernels.add_softmax_ce_derivative(context.cuda_stream, probs.nrows, probs.ncols, probs.data, target_classes.data, self.data)
 
+    def assign_softmax_ce(self, context, x, target_classes, losses):
+        """
+        self = softmax(x)
+        losses[i] = -log(self[i, target_classes[i]])
+
+        The losses are computed from the log-sum-exp of the rows of ``x``,
+        which is found in a single pass over ``x``.
+        """
+        GpuMatrix.wait_matrices(context, x, target_classes)
+        self.last_modification_context = context
+        losses.last_modification_context = context
+        context.activate()
+        gpu_matrix_kernels.softmax_ce(context.cuda_stream, x.nrows, x.ncols, x.data, target_classes.data, self.data, losses.data)
+
+    def softmax_ce_derivative(self, context, target_classes, mask=None):
+        """
+        self = (self - one_hot(target_classes)) / nrows             or
+        self = (self - one_hot(target_classes)) / nrows .* mask
+
+        ``self`` holds the output of the softmax, the derivative is
+        written in its place.
+        """
+        if mask:
+            GpuMatrix.wait_matrices(context, self, target_classes, mask)
+        else:
+            GpuMatrix.wait_matrices(context, self, target_classes)
+        self.last_modification_context = context
+        context.activate()
+        gpu_matrix_kernels.softmax_ce_derivative_inplace(context.cuda_stream, self.nrows, self.ncols, target_classes.data, mask.data if mask else None, self.data)
+
+    def accumulate_log_sum_exp(self, context, log_sum_exps, target_classes, offset, target_logits):
+        """
+        log_sum_exps[i] = log(exp(log_sum_exps[i]) + sum(exp(self[i])))
+        target_logits[i] = self[i, target_classes[i] - offset]
+
+        ``self`` is a chunk of columns of logits that starts at the column
+        ``offset``, ``target_logits`` are set only for the rows, which
+        target class is in the chunk.
+        """
+        GpuMatrix.wait_matrices(context, self, log_sum_exps, target_classes)
+        log_sum_exps.last_modification_context = context
+        target_logits.last_modification_context = context
+        context.activate()
+        gpu_matrix_kernels.accumulate_log_sum_exp(context.cuda_stream, self.nrows, self.ncols, self.data, target_classes.data, offset, log_sum_exps.data, target_logits.data)
+
+    def chunk_softmax_ce_derivative(self, context, log_sum_exps, target_classes, offset, mask=None):
+        """
+        self = (exp(self - log_sum_exps) - one_hot(target_classes - offset)) / nrows             or
+        self = (exp(self - log_sum_exps) - one_hot(target_classes - offset)) / nrows .* mask
+
+        ``self`` is a chunk of columns of logits that starts at the column
+        ``offset``, the derivative is written in its place.
+        """
+        if mask:
+            GpuMatrix.wait_matrices(context, self, log_sum_exps, target_classes, mask)
+        else:
+            GpuMatrix.wait_matrices(context, self, log_sum_exps, target_classes)
+        self.last_modification_context = context
+        context.activate()
+        gpu_matrix_kernels.chunk_softmax_ce_derivative(context.cuda_stream, self.nrows, self.ncols, log_sum_exps.data, target_classes.data, offset, mask.data if mask else None, self.data)
+
     def scale(self, context, alpha, out=None):
         GpuMatrix.wait_matrices(context, self)
         if out:
@@ -1146,6 +1202,30 @@ class GpuMatrix(object):
             k = b.nrows if matrix_operation_b == 'N' else b.ncols
             cublas.s_gemm(context.cublas_handle, matrix_operation_a, matrix_operation_b, self.nrows, self.ncols, k, alpha, a.data, a.nrows, b.data, b.nrows, beta, self.data, self.nrows)
 
+    def assign_batch_dot(self, context, a, b, nrows, matrix_operation_a='N', matrix_operation_b='N'):
+        self.add_batch_dot(context, a, b, nrows, matrix_operation_a, matrix_operation_b, beta=ct.c_float(0.0))
+
+    def add_batch_dot(self, context, a, b, nrows, matrix_operation_a='N', matrix_operation_b='N', alpha=ct.c_float(1.0), beta=ct.c_float(1.0)):
+        """
+        self[i] = alpha * op(a[i]) * op(b[i]) + beta * self[i]
+
+        Every row ``i`` of ``a``, ``b`` and ``self`` holds one matrix of a
+        batch in row-major order, ``nrows`` is the number of rows of the
+        matrices of ``self``.
+        """
+
+        if beta.value == 0.0:
+            GpuMatrix.wait_matrices(context, a, b)
+        else:
+            GpuMatrix.wait_matrices(context, a, b, self)
+        self.last_modification_context = context
+        context.activate()
+        ncols = int(self.ncols) // nrows
+        k = int(a.ncols) // nrows
+        gpu_matrix_kernels.batch_dot(context.cuda_stream, self.nrows, nrows, ncols, k,
+                                     matrix_operation_a == 'T', matrix_operation_b == 'T',
+                                     alpha, a.data, b.data, beta, self.data)
+
     def argmax(self, context, out, axis=1):
         GpuMatrix.wait_matrices(context, self)
         out.last_modification_context = context
@@ -1157,6 +1237,19 @@ class GpuMatrix(object):
             raise NotImplementedError
 
 
+def _create_grouped_tensor_descriptor(matrix, group_width):
+    # every group of columns is a channel dimension of its own, softmax
+    # over the channels is computed for every row and every group
+    nrows = int(matrix.nrows)
+    descriptor = cudnn.ct_cudnn_tensor_descriptor()
+    cudnn.create_tensor_descriptor(descriptor)
+    cudnn.set_tensor_4d_descriptor_ex(descriptor,
+                                      cudnn.data_type['CUDNN_DATA_FLOAT'],
+                                      nrows, group_width, int(matrix.ncols) // group_width, 1,
+                                      1, nrows, nrows * group_width, 1)
+    return descriptor
+
+
 def _get_temp_memory(context, N):
     global __temp_pointer
     global __N
@@ -1169,8 +1262,33 @@ def _get_temp_memory(context, N):
         elem_size = ct.sizeof(c_dtype)
         pointer = cudart.cuda_malloc(__N[context] * elem_size, c_dtype)
         __temp_pointer[context] = pointer
+        MemoryTracker.on_scratch(('temp', context), context.device_id, __N[context] * elem_size)
     return pointer
 
 
 __temp_pointer = {}
-__N = {}
\ No newline at end of file
+__N = {}
+
+
+class _LazyGpuMatrixView(GpuMatrix):
+    """
+    View whose pointer depends on shape elements, the pointer is computed
+    again on access when any of them has changed.
+    """
+    def __init__(self, get_data, shape_elements, nrows, ncols, dtype, device_id, strides, base):
+        self._get_data = get_data
+        self._shape_elements = shape_elements
+        self._shape_version = None
+        super(_LazyGpuMatrixView, self).__init__(None, nrows, ncols, dtype, device_id, False, strides, base)
+
+    @property
+    def data(self):
+        version = max(e.version for e in self._shape_elements)
+        if version != self._shape_version:
+            self._data = self._get_data()
+            self._shape_version = version
+        return self._data
+
+    @data.setter
+    def data(self, value):
+        self._data = value
\ No newline at end of file
@@ -14,18 +14,26 @@
 # limitations under the License.
 # ----------------------------------------------------------------------------
 import quagga
-from quagga.matrix import CpuMatrix, GpuMatrix
+from quagga.matrix import CpuMatrix
 
 
 class MatrixType(type):
     def __getattr__(cls, name):
-        return getattr(cls._get_matrix_class(), name)
+        # the backend class is resolved once per processor type, its
+        # attributes are not cached because the profiler, the tracer and
+        # CPU workers patch them while they are enabled
+        try:
+            matrix_class = cls._classes[quagga.processor_type]
+        except KeyError:
+            matrix_class = cls._classes[quagga.processor_type] = cls._get_matrix_class()
+        return getattr(matrix_class, name)
 
     @staticmethod
     def _get_matrix_class():
         if quagga.processor_type == 'cpu':
             return CpuMatrix
         elif quagga.processor_type == 'gpu':
+            from quagga.matrix import GpuMatrix
             return GpuMatrix
         else:
             raise ValueError(u'Processor type: {} is undefined'.
@@ -34,6 +42,7 @@ class MatrixType(type):
 
 class Matrix(object):
     __metaclass__ = MatrixType
+    _classes = {}
 
     def __init__(self, *args, **kwargs):
         raise ValueError('Do not construct directly!')
\ No newline at end of file
@@ -0,0 +1,183 @@
+# ----------------------------------------------------------------------------
+# Copyright 2015 Grammarly, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ----------------------------------------------------------------------------
+import re
+import weakref
+import numpy as np
+from contextlib import contextmanager
+from collections import defaultdict
+
+
+class MemoryTracker(object):
+    """
+    Accounts memory of matrices created by ``Matrix.empty``,
+    ``Matrix.empty_like`` and ``Matrix.from_npa`` while the tracker is
+    enabled, together with scratch buffers that backends keep between
+    operations (temporary memory of ``GpuMatrix`` operations). Every
+    allocation is tagged with an owner and a category.
+
+    The owner is set by wrapping construction of blocks, connectors and
+    optimizer steps into :meth:`owner`. Categories are ``'parameters'``,
+    ``'activations'``, ``'gradients'``, ``'optimizer state'`` and
+    ``'scratch'``. :class:`quagga.connector.Connector`,
+    :class:`quagga.blocks.ParameterContainer` and the optimizer steps set
+    the category of the matrices they hold, all other allocations are
+    ``'scratch'`` unless the category is given to :meth:`owner`.
+
+    Memory of released matrices is returned, the tracker keeps the highest
+    amount of tracked memory since the last :meth:`reset_peak` call.
+    NumPy temporaries created inside ``CpuMatrix`` operations are not
+    tracked, so on Linux the peak resident memory of the process since
+    :meth:`reset_peak` is reported as well, see :meth:`get_peak_rss`.
+
+    Examples
+    --------
+    >>> tracker = MemoryTracker()
+    >>> tracker.enable()
+    >>> with tracker.owner('lstm'):
+    ...     lstm = SequencerBlock(LstmBlock, ...)
+    >>> with tracker.owner('nag', 'optimizer state'):
+    ...     nag_step = NagStep(...)
+    >>> print tracker.format_report()
+    """
+    active = None
+    categories = ['parameters', 'activations', 'gradients', 'optimizer state', 'scratch']
+
+    def __init__(self):
+        self.allocations = {}
+        self.live_bytes = 0
+        self.peak_bytes = 0
+        self._owners = []
+
+    @classmethod
+    def on_allocation(cls, matrix):
+        if cls.active:
+            cls.active._add(matrix)
+
+    @classmethod
+    def tag(cls, matrix, category):
+        if cls.active:
+            allocation = cls.active.allocations.get(id(matrix))
+            if allocation:
+                allocation['category'] = category
+
+    @classmethod
+    def on_scratch(cls, key, device_id, nbytes, owner='temporary memory'):
+        """
+        Accounts a scratch buffer, that is not a matrix, ``nbytes`` replaces
+        the previous size of the buffer with the same ``key``.
+        """
+        if cls.active:
+            cls.active._set_scratch(key, device_id, nbytes, owner)
+
+    def enable(self):
+        MemoryTracker.active = self
+
+    def disable(self):
+        if MemoryTracker.active is self:
+            MemoryTracker.active = None
+
+    @contextmanager
+    def owner(self, name, category=None):
+        self._owners.append((name, category))
+        try:
+            yield
+        finally:
+            self._owners.pop()
+
+    def reset_peak(self):
+        self.peak_bytes = self.live_bytes
+        try:
+            # resets the peak resident set size of the process
+            with open('/proc/self/clear_refs', 'w') as f:
+                f.write('5')
+        except IOError:
+            pass
+
+    @staticmethod
+    def get_peak_rss():
+        """
+        Returns the peak resident memory of the process in bytes since the
+        last :meth:`reset_peak` call or ``None`` if it is unknown.
+        """
+        try:
+            with open('/proc/self/status') as f:
+                match = re.search(r'VmHWM:\s+(\d+) kB', f.read())
+        except IOError:
+            return None
+        return int(match.group(1)) * 1024 if match else None
+
+    def get_breakdown(self, key='category'):
+        """
+        Returns dict that maps ``key`` (``'category'``, ``'owner'`` or
+        ``'device_id'``) of live allocations to the number of bytes.
+        """
+        breakdown = defaultdict(int)
+        for allocation in self.allocations.itervalues():
+            breakdown[allocation[key]] += allocation['nbytes']
+        return dict(breakdown)
+
+    def format_report(self):
+        mb = 2.0 ** 20
+        lines = ['{:40s} {:>12s}'.format('category', 'MB')]
+        breakdown = self.get_breakdown('category')
+        for category in self.categories:
+            lines.append('{:40s} {:12.2f}'.format(category, breakdown.get(category, 0) / mb))
+        lines.append('{:40s} {:>12s}'.format('owner', 'MB'))
+        breakdown = self.get_breakdown('owner')
+        for owner in sorted(breakdown, key=breakdown.get, reverse=True):
+            lines.append('{:40s} {:12.2f}'.format(owner, breakdown[owner] / mb))
+        lines.append('{:40s} {:12.2f}'.format('total', self.live_bytes / mb))
+        lines.append('{:40s} {:12.2f}'.format('peak', self.peak_bytes / mb))
+        peak_rss = self.get_peak_rss()
+        if peak_rss is not None:
+            lines.append('{:40s} {:12.2f}'.format('peak process RSS', peak_rss / mb))
+        return '\n'.join(lines)
+
+    def _add(self, matrix):
+        owner, category = 'unknown', None
+        if self._owners:
+            owner = self._owners[-1][0]
+            for _, category in reversed(self._owners):
+                if category:
+                    break
+        if isinstance(matrix.data, np.ndarray):
+            nbytes = matrix.data.nbytes
+        else:
+            nbytes = matrix.nbytes
+        key = id(matrix)
+        self.allocations[key] = {'owner': owner,
+                                 'category': category if category else 'scratch',
+                                 'device_id': matrix.device_id,
+                                 'nbytes': nbytes,
+                                 'ref': weakref.ref(matrix, lambda _: self._remove(key))}
+        self.live_bytes += nbytes
+        self.peak_bytes = max(self.peak_bytes, self.live_bytes)
+
+    def _set_scratch(self, key, device_id, nbytes, owner):
+        key = 'scratch', key
+        self._remove(key)
+        self.allocations[key] = {'owner': owner,
+                                 'category': 'scratch',
+                                 'device_id': device_id,
+                                 'nbytes': nbytes,
+                                 'ref': None}
+        self.live_bytes += nbytes
+        self.peak_bytes = max(self.peak_bytes, self.live_bytes)
+
+    def _remove(self, key):
+        allocation = self.allocations.pop(key, None)
+        if allocation:
+            self.live_bytes -= allocation['nbytes']
\ No newline at end of file
@@ -0,0 +1,63 @@
+# ----------------------------------------------------------------------------
+# Copyright 2015 Grammarly, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ----------------------------------------------------------------------------
+import numpy as np
+from collections import OrderedDict
+
+
+class RowCache(object):
+    """
+    LRU cache of rows of a memory-mapped matrix. Hot rows (frequent words of
+    an embedding table) are kept in process memory, while the rest of the
+    table stays on disk and is paged in only on demand.
+
+    Parameters
+    ----------
+    capacity : int
+        Maximum number of rows that are kept in the cache.
+    """
+    def __init__(self, capacity):
+        if capacity < 1:
+            raise ValueError('RowCache capacity must be positive!')
+        self.capacity = capacity
+        self.rows = OrderedDict()
+
+    def gather(self, data, row_indxs, out):
+        """
+        out[i] = data[row_indxs[i]]
+        """
+        rows = self.rows
+        for i, idx in enumerate(row_indxs.tolist()):
+            row = rows.pop(idx, None)
+            if row is None:
+                row = np.array(data[idx])
+                if len(rows) >= self.capacity:
+                    rows.popitem(last=False)
+            rows[idx] = row
+            out[i] = row
+
+    def refresh(self, data, row_indxs):
+        """
+        Updates cached copies of ``row_indxs`` rows after they have been
+        modified in ``data``.
+        """
+        rows = self.rows
+        for idx in set(row_indxs.tolist()):
+            row = rows.get(idx)
+            if row is not None:
+                row[...] = data[idx]
+
+    def clear(self):
+        self.rows.clear()
\ No newline at end of file
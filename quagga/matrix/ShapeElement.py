@@ -13,54 +13,127 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 # ----------------------------------------------------------------------------
-import weakref
 import operator
 from numbers import Number
 
 
+# every change of any element gets the next version, a derived element
+# that was checked at the current clock value is known to be up to date
+_clock = [0]
+
+
+# functions called before any element changes, CPU workers use it to
+# finish the work that was submitted with the old shapes
+before_change_hooks = []
+
+
+def _tick():
+    _clock[0] += 1
+    return _clock[0]
+
+
+def _identity(value):
+    return value
+
+
 class ShapeElement(object):
+    """
+    Integer that can change at run time (batch size, sequence length).
+
+    Elements form a dependency graph: an arithmetic operation returns an
+    element computed from its operands and ``element[:] = other`` binds
+    the element to ``other``. Changing an element only increments its
+    version, dependent elements hold references to their operands and
+    recompute their values lazily when any operand's version has changed.
+    Nothing is kept in the changed element for its dependents, so a change
+    costs O(1) and unused dependents are simply garbage collected.
+    """
     def __init__(self, value):
-        self.value = value
-        self.modif_handlers = set()
+        self._value = value
+        self._version = 0
+        self._operation = None
+        self._operands_version = None
+        self._checked_at = None
+
+    @property
+    def value(self):
+        if self._operation is not None and self._checked_at != _clock[0]:
+            self._update()
+        return self._value
+
+    @property
+    def version(self):
+        """
+        Number that increases every time the value may have changed.
+        """
+        if self._operation is None:
+            return self._version
+        if self._checked_at != _clock[0]:
+            self._update()
+        return self._operands_version
+
+    def _update(self):
+        op, operands = self._operation
+        version = self._version
+        values = []
+        for e in operands:
+            if isinstance(e, ShapeElement):
+                if e._operation is not None:
+                    if e._checked_at != _clock[0]:
+                        e._update()
+                    e_version = e._operands_version
+                else:
+                    e_version = e._version
+                if e_version > version:
+                    version = e_version
+                values.append(e._value)
+            else:
+                values.append(e)
+        if version != self._operands_version:
+            self._value = op(*values)
+            self._operands_version = version
+        self._checked_at = _clock[0]
 
     def __setitem__(self, key, value):
         if key != slice(None):
             raise ValueError("key argument must be ':'")
         if isinstance(value, ShapeElement):
-            value = weakref.proxy(value)
-            self_proxy = weakref.proxy(self)
-            modif_handler = lambda: self_proxy.__setitem__(slice(None), value.value)
-            value.add_modification_handler(modif_handler)
-            self[:] = value.value
+            operation = self._operation
+            if value._depends_on(self):
+                # binding would make a cycle, e.g. matrices created with
+                # `empty_like` share shape elements and then `assign` binds
+                # them to each other, the current value is taken instead
+                self[:] = value.value
+            elif operation is None or operation[0] is not _identity or operation[1][0] is not value:
+                for hook in before_change_hooks:
+                    hook()
+                self._operation = _identity, (value, )
+                self._version = _tick()
         elif isinstance(value, int):
-            if self.value != value:
-                self.value = value
-                needless_handlers = []
-                for modif_handler in self.modif_handlers:
-                    try:
-                        modif_handler()
-                    except ReferenceError:
-                        needless_handlers.append(modif_handler)
-                self.modif_handlers.difference_update(needless_handlers)
+            if self._operation is not None or self._value != value:
+                for hook in before_change_hooks:
+                    hook()
+                self._operation = None
+                self._value = value
+                self._version = _tick()
         else:
             raise TypeError("'value' argument must be int or ShapeElement")
 
+    def _depends_on(self, element):
+        stack = [self]
+        while stack:
+            e = stack.pop()
+            if e is element:
+                return True
+            if e._operation is not None:
+                stack.extend(o for o in e._operation[1] if isinstance(o, ShapeElement))
+        return False
+
     def operation(self, other, op):
-        if isinstance(other, ShapeElement):
-            element = ShapeElement(op(self.value, other.value))
-            element_proxy = weakref.proxy(element)
-            self_proxy = weakref.proxy(self)
-            other = weakref.proxy(other)
-            modif_handler = lambda: element_proxy.__setitem__(slice(None), op(self_proxy.value, other.value))
-            other.add_modification_handler(modif_handler)
-        elif isinstance(other, int):
-            element = ShapeElement(op(self.value, other))
-            element_proxy = weakref.proxy(element)
-            self_proxy = weakref.proxy(self)
-            modif_handler = lambda: element_proxy.__setitem__(slice(None), op(self_proxy.value, other))
-        else:
+        if not isinstance(other, (ShapeElement, int)):
             raise TypeError("'other' argument must be int or ShapeElement")
-        self.add_modification_handler(modif_handler)
+        element = ShapeElement(None)
+        element._operation = op, (self, other)
         return element
 
     def __add__(self, other):
@@ -122,7 +195,4 @@ class ShapeElement(object):
         return float(self.value)
 
     def __index__(self):
-        return self.value
-
-    def add_modification_handler(self, fun):
-        self.modif_handlers.add(fun)
\ No newline at end of file
+        return self.value
\ No newline at end of file
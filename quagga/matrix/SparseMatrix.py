@@ -40,6 +40,26 @@ class SparseMatrix(object):
         for k, v in sparse_matrix.rows_batch.iteritems():
             self.rows_batch[k].extend([m for m in ms] for ms in v)
 
+    def scale(self, context, alpha):
+        """
+        Multiplies accumulated derivatives by ``alpha``. Dense matrices are
+        scaled in place, indices are left intact.
+        """
+        dense_matrices = {}
+        for v in self.columns.itervalues():
+            for dense_matrix in v:
+                dense_matrices[id(dense_matrix)] = dense_matrix
+        for v in self.rows.itervalues():
+            for dense_matrix in v:
+                dense_matrices[id(dense_matrix)] = dense_matrix
+        for v in self.rows_batch.itervalues():
+            for ms in v:
+                for dense_matrix in ms:
+                    dense_matrices[id(dense_matrix)] = dense_matrix
+        # the same matrix can be added several times, scale it once
+        for dense_matrix in dense_matrices.itervalues():
+            dense_matrix.scale(context, alpha)
+
     def clear(self):
         self.columns.clear()
         self.rows.clear()
@@ -15,6 +15,9 @@
 # ----------------------------------------------------------------------------
 from quagga.matrix.ShapeElement import ShapeElement
 from quagga.matrix.SparseMatrix import SparseMatrix
+from quagga.matrix.RowCache import RowCache
+from quagga.matrix.MemoryTracker import MemoryTracker
 from quagga.matrix.CpuMatrix import CpuMatrix
-from quagga.matrix.GpuMatrix import GpuMatrix
-from quagga.matrix.Matrix import Matrix
\ No newline at end of file
+from quagga.matrix.Matrix import Matrix
+from quagga.LazyModule import LazyModule
+LazyModule(__name__, {'GpuMatrix': 'quagga.matrix.GpuMatrix'})
\ No newline at end of file
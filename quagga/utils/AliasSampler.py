@@ -0,0 +1,78 @@
+# ----------------------------------------------------------------------------
+# Copyright 2015 Grammarly, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ----------------------------------------------------------------------------
+import numpy as np
+from quagga.matrix import Matrix
+
+
+class AliasSampler(object):
+    """
+    Draws samples of a discrete distribution in constant time per sample
+    with Walker's alias method: a sample is a uniformly chosen bucket,
+    which is kept with the acceptance probability of the bucket or
+    replaced by its alias otherwise.
+
+    Parameters
+    ----------
+    probs : array
+        Unnormalized probabilities of the classes, for example counts of
+        words raised to a ``distortion`` power
+    seed : int
+    """
+    def __init__(self, probs, seed=42):
+        probs = np.asarray(probs, dtype=np.float64).flatten()
+        self.probs = probs / np.sum(probs)
+        self.generator = np.random.RandomState(seed)
+        n = len(self.probs)
+        scaled_probs = self.probs * n
+        self.acceptance_probs = np.ones(n)
+        self.aliases = np.arange(n)
+        small = list(np.flatnonzero(scaled_probs < 1.0))
+        large = list(np.flatnonzero(scaled_probs >= 1.0))
+        while small and large:
+            i, j = small.pop(), large.pop()
+            self.acceptance_probs[i] = scaled_probs[i]
+            self.aliases[i] = j
+            scaled_probs[j] -= 1.0 - scaled_probs[i]
+            if scaled_probs[j] < 1.0:
+                small.append(j)
+            else:
+                large.append(j)
+        self._neg_log_probs = {}
+
+    @classmethod
+    def from_counts(cls, counts, distortion=1.0, seed=42):
+        """
+        Unigram distribution of words with ``counts``, the counts are
+        raised to ``distortion`` power, 0.75 flattens the distribution like
+        in word2vec.
+        """
+        return cls(np.asarray(counts, dtype=np.float64) ** distortion, seed)
+
+    def sample(self, size):
+        buckets = self.generator.randint(len(self.probs), size=size)
+        accepted = self.generator.rand(size) < self.acceptance_probs[buckets]
+        return np.where(accepted, buckets, self.aliases[buckets])
+
+    def get_neg_log_probs(self, device_id):
+        """
+        Returns ``n x 1`` matrix of ``-log(probs)`` on the device, the
+        matrix is created once and shared by all blocks that use the
+        sampler.
+        """
+        if device_id not in self._neg_log_probs:
+            a = -np.log(np.maximum(self.probs, 1e-30)).astype(np.float32).reshape(-1, 1)
+            self._neg_log_probs[device_id] = Matrix.from_npa(a, device_id=device_id)
+        return self._neg_log_probs[device_id]
@@ -0,0 +1,107 @@
+# ----------------------------------------------------------------------------
+# Copyright 2015 Grammarly, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ----------------------------------------------------------------------------
+import json
+import struct
+import numpy as np
+
+
+class Checkpoint(object):
+    """
+    Single-file checkpoint of raw arrays. The file consists of a magic string,
+    the length of a JSON index, the index itself and arrays, each one aligned
+    to ``ALIGNMENT`` bytes::
+
+        +-------+--------------+-------+-----+---------+-----+---------+
+        | MAGIC | index_nbytes | index | pad | array_0 | pad | array_1 | ...
+        +-------+--------------+-------+-----+---------+-----+---------+
+
+    The file is mapped into memory once, every array is a zero-copy view of
+    the mapping, so loading does not depend on the size of the model.
+
+    Parameters
+    ----------
+    path : str
+    mode : str
+        ``'r'`` for read-only mapping (serving), ``'c'`` for copy-on-write
+        mapping (the file stays untouched when parameters are updated),
+        ``'r+'`` to write updates back to the file.
+    """
+    MAGIC = 'QGCKPT01'
+    ALIGNMENT = 64
+
+    def __init__(self, path, mode='r'):
+        self.path = path
+        with open(path, 'rb') as f:
+            if f.read(len(Checkpoint.MAGIC)) != Checkpoint.MAGIC:
+                raise ValueError('{} is not a quagga checkpoint!'.format(path))
+            index_nbytes, = struct.unpack('<Q', f.read(8))
+            self.index = json.loads(f.read(index_nbytes))
+        self.data_offset = Checkpoint._get_data_offset(index_nbytes)
+        self.mmap = np.memmap(path, np.uint8, mode)
+
+    def __getitem__(self, key):
+        entry = self.index[key]
+        dtype = np.dtype(str(entry['dtype']))
+        offset = self.data_offset + entry['offset']
+        nbytes = int(np.prod(entry['shape'])) * dtype.itemsize
+        a = self.mmap[offset:offset + nbytes]
+        return a.view(dtype).reshape(entry['shape'], order=entry['order'])
+
+    def __contains__(self, key):
+        return key in self.index
+
+    def keys(self):
+        return self.index.keys()
+
+    def iteritems(self):
+        for key in self.index:
+            yield key, self[key]
+
+    @staticmethod
+    def save(path, arrays):
+        """
+        Writes ``arrays`` dict into the checkpoint file.
+        """
+        # offsets are stored relative to the beginning of the data section
+        index = {}
+        offset = 0
+        for key, a in arrays.iteritems():
+            offset = Checkpoint._align(offset)
+            index[key] = {'dtype': a.dtype.str,
+                          'shape': list(a.shape),
+                          'order': 'F' if np.isfortran(a) else 'C',
+                          'offset': offset}
+            offset += a.nbytes
+        index_json = json.dumps(index)
+        data_offset = Checkpoint._get_data_offset(len(index_json))
+        with open(path, 'wb') as f:
+            f.write(Checkpoint.MAGIC)
+            f.write(struct.pack('<Q', len(index_json)))
+            f.write(index_json)
+            for key, a in arrays.iteritems():
+                f.write('\0' * (data_offset + index[key]['offset'] - f.tell()))
+                # tofile always writes in C order
+                a = a.T if index[key]['order'] == 'F' else a
+                a.tofile(f)
+
+    @staticmethod
+    def _get_data_offset(index_nbytes):
+        return Checkpoint._align(len(Checkpoint.MAGIC) + 8 + index_nbytes)
+
+    @staticmethod
+    def _align(offset):
+        alignment = Checkpoint.ALIGNMENT
+        return (offset + alignment - 1) // alignment * alignment
\ No newline at end of file
@@ -0,0 +1,196 @@
+# ----------------------------------------------------------------------------
+# Copyright 2015 Grammarly, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ----------------------------------------------------------------------------
+import inspect
+import threading
+import numpy as np
+from functools import wraps
+from timeit import default_timer
+from collections import defaultdict
+from quagga.utils import List
+from quagga.matrix import CpuMatrix
+
+
+def _get_nbytes(arg):
+    # Connector is not imported here, quagga.context imports quagga.utils
+    npa = getattr(arg, 'npa', None)
+    if isinstance(npa, np.ndarray):
+        return npa.nbytes
+    if isinstance(arg, (list, tuple, List)):
+        return sum(_get_nbytes(e) for e in arg)
+    return 0
+
+
+def _get_arg_names(function):
+    # CpuMatrix operations are wrapped to be dispatched to workers
+    function = getattr(function, '__wrapped__', function)
+    return inspect.getargspec(function).args
+
+
+def get_operations(matrix_class):
+    """
+    Returns ``(name, function, is_static)`` for every operation of
+    ``matrix_class``, i.e. a public method that takes a context.
+    """
+    operations = []
+    for name, method in inspect.getmembers(matrix_class, inspect.ismethod):
+        if name.startswith('_') or isinstance(matrix_class.__dict__.get(name), classmethod):
+            continue
+        if _get_arg_names(method.im_func)[1:2] == ['context']:
+            operations.append((name, method.im_func, False))
+    for name, function in inspect.getmembers(matrix_class, inspect.isfunction):
+        # static methods
+        if not name.startswith('_') and _get_arg_names(function)[:1] == ['context']:
+            operations.append((name, function, True))
+    return operations
+
+
+class Profiler(object):
+    """
+    Opt-in profiler of blocks' ``fprop``/``bprop`` and of
+    :class:`quagga.matrix.CpuMatrix` operations. It records number of calls,
+    total wall time and bytes of matrices touched by every operation.
+
+    Nothing is patched until :meth:`enable` is called, so the profiler costs
+    nothing when it is not used.
+
+    Statistics are aggregated by keys:
+
+    * ``('op', 'add_dot')`` -- :class:`CpuMatrix` method, only the outermost
+      call is accounted when operations call each other;
+    * ``('block_class', 'LstmBlock.fprop')`` -- all blocks of the class,
+      including blocks inside :class:`quagga.blocks.SequencerBlock`;
+    * ``('block', 'SequencerBlock#4.fprop')`` -- block of the model with
+      the given index.
+
+    Parameters
+    ----------
+    model : :class:`quagga.Model`
+        Model, whose blocks will be profiled. Only operations are profiled
+        if it is ``None``.
+    """
+    def __init__(self, model=None):
+        self.model = model
+        self.stats = defaultdict(lambda: [0, 0.0, 0])
+        self.enabled = False
+        self._local = threading.local()
+        self._original_ops = {}
+        self._wrapped_blocks = []
+
+    def enable(self):
+        if self.enabled:
+            return
+        self.enabled = True
+        # only operations are profiled, i.e. methods that take a context
+        for name, function, is_static in get_operations(CpuMatrix):
+            self._original_ops[name] = CpuMatrix.__dict__[name]
+            wrapper = self._wrap_op(name, function)
+            setattr(CpuMatrix, name, staticmethod(wrapper) if is_static else wrapper)
+        if self.model:
+            for k, block in enumerate(self.model.blocks):
+                block_name = '{}#{}'.format(block.__class__.__name__, k)
+                self._wrap_block(block, block_name)
+                for sub_block in getattr(block, 'blocks', []):
+                    self._wrap_block(sub_block, None)
+
+    def disable(self):
+        if not self.enabled:
+            return
+        self.enabled = False
+        for name, method in self._original_ops.iteritems():
+            setattr(CpuMatrix, name, method)
+        self._original_ops.clear()
+        for block, method_name, original in self._wrapped_blocks:
+            if original is None:
+                delattr(block, method_name)
+            else:
+                setattr(block, method_name, original)
+        del self._wrapped_blocks[:]
+
+    def reset(self):
+        self.stats.clear()
+
+    def get_report(self, kind=None):
+        """
+        Returns list of ``(kind, name, count, total_time, mean_time, nbytes)``
+        tuples sorted by total time.
+        """
+        report = []
+        for (key_kind, name), (count, total_time, nbytes) in self.stats.iteritems():
+            if kind is None or key_kind == kind:
+                report.append((key_kind, name, count, total_time, total_time / count, nbytes))
+        report.sort(key=lambda e: e[3], reverse=True)
+        return report
+
+    def format_report(self, kind=None, top=None):
+        lines = ['{:12s} {:40s} {:>8s} {:>12s} {:>12s} {:>12s}'.
+                 format('kind', 'name', 'count', 'total, s', 'mean, ms', 'MB')]
+        for key_kind, name, count, total_time, mean_time, nbytes in self.get_report(kind)[:top]:
+            lines.append('{:12s} {:40s} {:8d} {:12.4f} {:12.4f} {:12.2f}'.
+                         format(key_kind, name, count, total_time,
+                                1000.0 * mean_time, nbytes / 2.0 ** 20))
+        return '\n'.join(lines)
+
+    def _record(self, key, elapsed, nbytes=0):
+        stat = self.stats[key]
+        stat[0] += 1
+        stat[1] += elapsed
+        stat[2] += nbytes
+
+    def _wrap_op(self, name, function):
+        local = self._local
+        key = ('op', name)
+
+        @wraps(function)
+        def wrapper(*args, **kwargs):
+            if not self.enabled or getattr(local, 'in_op', False):
+                return function(*args, **kwargs)
+            local.in_op = True
+            try:
+                t = default_timer()
+                result = function(*args, **kwargs)
+                elapsed = default_timer() - t
+            finally:
+                local.in_op = False
+            nbytes = sum(_get_nbytes(arg) for arg in args)
+            nbytes += sum(_get_nbytes(arg) for arg in kwargs.itervalues())
+            self._record(key, elapsed, nbytes)
+            return result
+        return wrapper
+
+    def _wrap_block(self, block, block_name):
+        class_name = block.__class__.__name__
+        for method_name in ['fprop', 'bprop']:
+            method = getattr(block, method_name, None)
+            if method is None:
+                continue
+            keys = [('block_class', '{}.{}'.format(class_name, method_name))]
+            if block_name:
+                keys.append(('block', '{}.{}'.format(block_name, method_name)))
+            self._wrapped_blocks.append((block, method_name, block.__dict__.get(method_name)))
+            setattr(block, method_name, self._get_block_wrapper(method, keys))
+
+    def _get_block_wrapper(self, method, keys):
+        @wraps(method)
+        def wrapper():
+            if not self.enabled:
+                return method()
+            t = default_timer()
+            result = method()
+            elapsed = default_timer() - t
+            for key in keys:
+                self._record(key, elapsed)
+            return result
+        return wrapper
\ No newline at end of file
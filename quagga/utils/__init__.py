@@ -16,4 +16,7 @@
 from quagga.utils.List import List
 from NoGradientWrapper import NoGradientWrapper
 from NoGradientWrapper import get_non_bprobagable
-from quagga.utils.CustomDefaultDict import CustomDefaultDict
\ No newline at end of file
+from quagga.utils.CustomDefaultDict import CustomDefaultDict
+from quagga.utils.Checkpoint import Checkpoint
+from quagga.utils.Profiler import Profiler
+from quagga.utils.AliasSampler import AliasSampler
\ No newline at end of file
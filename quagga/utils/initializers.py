@@ -91,9 +91,65 @@ class Uniform(object):
 
 class H5pyInitializer(object):
     def __init__(self, path, key):
+        self.path = path
+        self.key = key
+
+    def __call__(self):
+        # the dataset is read on demand and only once, no extra copies
+        # are kept around between the calls
+        with h5py.File(self.path, 'r') as f:
+            matrix = f[self.key][...]
+        return matrix.astype(np.float32, copy=False)
+
+
+class MemmapInitializer(object):
+    """
+    Maps raw binary file into memory. Rows are paged in only when
+    they are touched, so huge embedding tables never occupy their full
+    size in RAM. Use ``mode='c'`` for copy-on-write mapping that keeps
+    the file untouched.
+    """
+    def __init__(self, path, nrows, ncols, dtype=np.float32, offset=0, mode='r+'):
+        self.path = path
+        self.shape = (nrows, ncols)
+        self.dtype = dtype
+        self.offset = offset
+        self.mode = mode
+
+    def __call__(self):
+        return np.memmap(self.path, self.dtype, self.mode, self.offset, self.shape)
+
+
+class H5pyMemmapInitializer(object):
+    """
+    Maps contiguous HDF5 dataset into memory without reading it.
+    Chunked and compressed datasets can't be mapped.
+    """
+    def __init__(self, path, key, mode='r+'):
         with h5py.File(path, 'r') as f:
-            matrix = f[key][...]
-        self.matrix = matrix.astype(np.float32)
+            dataset = f[key]
+            offset = dataset.id.get_offset()
+            if offset is None:
+                raise ValueError("Dataset '{}' is not contiguous, it can't "
+                                 "be memory-mapped!".format(key))
+            self.shape = dataset.shape
+            self.dtype = dataset.dtype
+        self.path = path
+        self.offset = offset
+        self.mode = mode
+
+    def __call__(self):
+        return np.memmap(self.path, self.dtype, self.mode, self.offset, self.shape)
+
+
+class CheckpointInitializer(object):
+    """
+    Binds a parameter to the array mapped from
+    :class:`quagga.utils.Checkpoint` without copying it.
+    """
+    def __init__(self, checkpoint, key):
+        self.checkpoint = checkpoint
+        self.key = key
 
     def __call__(self):
-        return np.copy(self.matrix)
\ No newline at end of file
+        return self.checkpoint[self.key]
\ No newline at end of file
@@ -0,0 +1,89 @@
+# ----------------------------------------------------------------------------
+# Copyright 2015 Grammarly, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ----------------------------------------------------------------------------
+import quagga
+import numpy as np
+from unittest import TestCase
+from quagga.utils import List
+from quagga.matrix import Matrix
+from quagga.context import Context
+from quagga.blocks import AttentionBlock
+from quagga.connector import Connector
+from tests.numerical_derivatives import get_numerical_derivatives
+
+
+def attention(encoder_states, queries, mask):
+    e = np.dstack(encoder_states)
+    m = np.hstack(mask)
+    output = []
+    for q in queries:
+        scores = np.einsum('id,idt->it', q, e)
+        scores = np.where(m, scores, -np.inf)
+        weights = np.exp(scores - scores.max(axis=1, keepdims=True))
+        weights /= weights.sum(axis=1, keepdims=True)
+        output.append(np.einsum('it,idt->id', weights, e))
+    return output
+
+
+class TestAttentionBlock(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.rng = np.random.RandomState(seed=42)
+
+    def setUp(self):
+        quagga.processor_type = 'cpu'
+
+    @staticmethod
+    def get_loss(arrays, encoder_len, query_len):
+        output = attention(arrays['encoder_states'][:encoder_len], arrays['queries'][:query_len],
+                           arrays['mask'][:encoder_len])
+        return sum(np.sum(o * d) for o, d in zip(output, arrays['dL_doutput']))
+
+    def test_derivatives(self):
+        max_encoder_len, max_query_len, batch_size, dim = 5, 4, 3, 2
+        for encoder_len, query_len in [(5, 4), (3, 2)]:
+            mask = [(self.rng.rand(batch_size, 1) < 0.7) for _ in xrange(max_encoder_len)]
+            mask[0][:] = True
+            arrays = {'encoder_states': [self.rng.randn(batch_size, dim) for _ in xrange(max_encoder_len)],
+                      'queries': [self.rng.randn(batch_size, dim) for _ in xrange(max_query_len)],
+                      'mask': mask,
+                      'dL_doutput': [self.rng.randn(batch_size, dim) for _ in xrange(max_query_len)]}
+            arrays = dict((k, [e.astype(np.float32) for e in v]) for k, v in arrays.iteritems())
+            expected = get_numerical_derivatives(lambda a: self.get_loss(a, encoder_len, query_len),
+                                                 arrays, ['encoder_states', 'queries'])
+
+            encoder_states = List([Connector(Matrix.from_npa(a), 0) for a in arrays['encoder_states']])
+            queries = List([Connector(Matrix.from_npa(a), 0) for a in arrays['queries']])
+            mask = List([Connector(Matrix.from_npa(a)) for a in arrays['mask']], encoder_states.length)
+            attention_block = AttentionBlock(encoder_states, queries, mask)
+            dL_doutput = [e.register_usage(0, 0)[1] for e in attention_block.output.elements]
+            encoder_states.length = encoder_len
+            queries.length = query_len
+            for e in encoder_states.elements + queries.elements + mask.elements:
+                e.fprop()
+            attention_block.fprop()
+            context = Context()
+            for matrix, a in zip(dL_doutput, arrays['dL_doutput'])[:query_len]:
+                matrix.assign_npa(context, a)
+            attention_block.bprop()
+
+            output = attention(arrays['encoder_states'][:encoder_len], arrays['queries'][:query_len],
+                               arrays['mask'][:encoder_len])
+            self.assertEqual(len(attention_block.output), query_len)
+            for e, o in zip(attention_block.output, output):
+                self.assertTrue(np.allclose(e.to_host(), o, atol=1e-5))
+            for name, sequence in [('encoder_states', encoder_states), ('queries', queries)]:
+                for e, d in zip(sequence.elements, expected[name]):
+                    self.assertTrue(np.allclose(e.backward_matrix.to_host(), d, atol=1e-3))
@@ -0,0 +1,92 @@
+# ----------------------------------------------------------------------------
+# Copyright 2015 Grammarly, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ----------------------------------------------------------------------------
+import quagga
+import numpy as np
+from quagga import Model
+from unittest import TestCase
+from quagga.utils import List
+from quagga.matrix import Matrix
+from quagga.blocks import DotBlock
+from quagga.blocks import LstmBlock
+from quagga.blocks import SoftmaxCeBlock
+from quagga.blocks import SequencerBlock
+from quagga.blocks import ParameterContainer
+from quagga.blocks import HorizontalStackBlock
+from quagga.blocks import BidirectionalLstmBlock
+from quagga.connector import Connector
+
+
+class TestBidirectionalLstmBlock(TestCase):
+    def setUp(self):
+        quagga.processor_type = 'cpu'
+
+    def run_model(self, bidirectional):
+        rng = np.random.RandomState(seed=42)
+        max_len, batch_size, input_dim, dim, nclasses = 6, 4, 3, 5, 7
+        definitions = {'sce_W': (2 * dim, nclasses), 'sce_b': (1, nclasses)}
+        for direction in ['fwd', 'bwd']:
+            definitions.update({direction + '_W': (input_dim, 4 * dim), direction + '_R': (dim, 4 * dim),
+                                direction + '_b': (1, 4 * dim), direction + '_c0': (batch_size, dim),
+                                direction + '_h0': (batch_size, dim)})
+        for name, shape in sorted(definitions.iteritems()):
+            definitions[name] = {'init': lambda a=rng.normal(0.0, 0.5, shape).astype(np.float32): a,
+                                 'device_id': 0}
+        p = ParameterContainer(**definitions)
+        inputs = [Connector(Matrix.from_npa(rng.rand(batch_size, input_dim).astype(np.float32)), 0)
+                  for _ in xrange(max_len)]
+        masks = [Connector(Matrix.from_npa((rng.rand(batch_size, 1) < 0.7).astype(np.float32)))
+                 for _ in xrange(max_len)]
+        labels = [Connector(Matrix.from_npa(rng.randint(nclasses, size=(batch_size, 1)).astype(np.int32)))
+                  for _ in xrange(max_len)]
+        x = List(inputs)
+        mask = List(masks, x.length)
+        y = List(labels, x.length)
+        fwd_params = [p['fwd_W'], p['fwd_R'], p['fwd_b'], None]
+        bwd_params = [p['bwd_W'], p['bwd_R'], p['bwd_b'], None]
+        fwd_paddings = [p['fwd_c0'], p['fwd_h0']]
+        bwd_paddings = [p['bwd_c0'], p['bwd_h0']]
+        if bidirectional:
+            lstm_block = BidirectionalLstmBlock(fwd_params, bwd_params, x, mask, fwd_paddings, bwd_paddings)
+            blocks = [lstm_block]
+            output = lstm_block.output
+        else:
+            fwd_block = SequencerBlock(LstmBlock, fwd_params, [x, mask], ['h'], ['c', 'h'], fwd_paddings)
+            bwd_block = SequencerBlock(LstmBlock, bwd_params, [x, mask], ['h'], ['c', 'h'], bwd_paddings, reverse=True)
+            hstack_block = SequencerBlock(HorizontalStackBlock, [], [fwd_block.h, bwd_block.h], ['output'])
+            blocks = [fwd_block, bwd_block, hstack_block]
+            output = hstack_block.output
+        dot_block = SequencerBlock(DotBlock, [p['sce_W'], p['sce_b']], [output], ['output'])
+        sce_block = SequencerBlock(SoftmaxCeBlock, [], [dot_block.output, y, mask])
+        model = Model([p] + blocks + [dot_block, sce_block])
+        for e in inputs + masks + labels:
+            e.fprop()
+        results = []
+        for length in [max_len, 4]:
+            x.length = length
+            model.fprop()
+            model.bprop()
+            results.append([e.to_host() for e in output])
+            results.append([e.backward_matrix.to_host() for e in inputs[:length]])
+            results.append([p[name].backward_matrix.to_host() for name in sorted(definitions)])
+        return results
+
+    def test_composition(self):
+        expected = self.run_model(False)
+        results = self.run_model(True)
+        for r, e in zip(results, expected):
+            self.assertEqual(len(r), len(e))
+            for a, b in zip(r, e):
+                self.assertTrue(np.allclose(a, b, atol=1e-6))
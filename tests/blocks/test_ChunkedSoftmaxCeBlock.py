@@ -0,0 +1,99 @@
+# ----------------------------------------------------------------------------
+# Copyright 2015 Grammarly, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ----------------------------------------------------------------------------
+import quagga
+import numpy as np
+from unittest import TestCase
+from quagga.utils import List
+from quagga.matrix import Matrix
+from quagga.context import Context
+from quagga.connector import Connector
+from quagga.blocks import DotBlock
+from quagga.blocks import SequencerBlock
+from quagga.blocks import SoftmaxCeBlock
+from quagga.blocks import ChunkedSoftmaxCeBlock
+
+
+class TestChunkedSoftmaxCeBlock(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.rng = np.random.RandomState(seed=42)
+
+    def setUp(self):
+        quagga.processor_type = 'cpu'
+
+    def get_arrays(self, batch_size, dim, vocab_size):
+        return {'W': (0.3 * self.rng.randn(dim, vocab_size)).astype(np.float32),
+                'b': self.rng.randn(1, vocab_size).astype(np.float32),
+                'x': self.rng.randn(batch_size, dim).astype(np.float32),
+                'true_labels': self.rng.randint(vocab_size, size=(batch_size, 1)).astype(np.int32),
+                'mask': (self.rng.rand(batch_size, 1) < 0.7).astype(np.float32)}
+
+    def test_fprop_bprop(self):
+        """
+        compare with `DotBlock` followed by `SoftmaxCeBlock`
+        """
+        for _ in xrange(10):
+            batch_size, dim, vocab_size = self.rng.random_integers(100, size=3)
+            chunk_size = self.rng.random_integers(vocab_size + 10)
+            arrays = self.get_arrays(batch_size, dim, vocab_size)
+            for with_mask in [False, True]:
+                r = []
+                for chunked in [False, True]:
+                    W = Connector(Matrix.from_npa(arrays['W']), 0)
+                    b = Connector(Matrix.from_npa(arrays['b']), 0)
+                    x = Connector(Matrix.from_npa(arrays['x']), 0)
+                    true_labels = Connector(Matrix.from_npa(arrays['true_labels']))
+                    mask = Connector(Matrix.from_npa(arrays['mask'])) if with_mask else None
+                    if chunked:
+                        blocks = [ChunkedSoftmaxCeBlock(W, b, chunk_size, x, true_labels, mask)]
+                    else:
+                        dot_block = DotBlock(W, b, x)
+                        blocks = [dot_block, SoftmaxCeBlock(dot_block.output, true_labels, mask)]
+                    for c in [W, b, x, true_labels, mask]:
+                        if c:
+                            c.fprop()
+                    for block in blocks:
+                        block.fprop()
+                    blocks[-1].calculate_loss(Context())
+                    for block in reversed(blocks):
+                        block.bprop()
+                    r.append([blocks[-1].loss] + [c.backward_matrix.to_host() for c in [W, b, x]])
+                for expected, actual in zip(*r):
+                    self.assertTrue(np.allclose(expected, actual, atol=1e-5))
+
+    def test_sequencer(self):
+        batch_size, dim, vocab_size, chunk_size, max_input_sequence_len = 8, 5, 30, 7, 4
+        W = Connector(Matrix.from_npa(self.rng.randn(dim, vocab_size).astype(np.float32)), 0)
+        b = Connector(Matrix.from_npa(self.rng.randn(1, vocab_size).astype(np.float32)), 0)
+        x = List([Connector(Matrix.from_npa(self.rng.randn(batch_size, dim).astype(np.float32)), 0)
+                  for _ in xrange(max_input_sequence_len)])
+        true_labels = List([Connector(Matrix.from_npa(self.rng.randint(vocab_size, size=(batch_size, 1)).astype(np.int32)))
+                            for _ in xrange(max_input_sequence_len)], x.length)
+        block = SequencerBlock(ChunkedSoftmaxCeBlock, [W, b, chunk_size], [x, true_labels])
+        x.length = 3
+        for c in [W, b] + x.elements + true_labels.elements:
+            c.fprop()
+        block.fprop()
+        block.bprop()
+
+        for k in xrange(3):
+            loss_block = block.blocks[k]
+            loss_block.calculate_loss(Context())
+            # the whole vocabulary in one chunk
+            full_block = ChunkedSoftmaxCeBlock(W, b, vocab_size, x[k], true_labels[k])
+            full_block.fprop()
+            full_block.calculate_loss(Context())
+            self.assertTrue(np.allclose(loss_block.loss, full_block.loss))
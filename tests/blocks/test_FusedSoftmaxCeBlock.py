@@ -0,0 +1,147 @@
+# ----------------------------------------------------------------------------
+# Copyright 2015 Grammarly, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ----------------------------------------------------------------------------
+import quagga
+import logging
+import numpy as np
+from unittest import TestCase
+from quagga.matrix import Matrix
+from quagga.context import Context
+from quagga.connector import Connector
+from quagga.blocks import SoftmaxCeBlock
+from quagga.blocks import FusedSoftmaxCeBlock
+from quagga.learning.observers import TrainLossTracker
+from quagga.learning.observers import ValidLossTracker
+
+
+class TestFusedSoftmaxCeBlock(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.rng = np.random.RandomState(seed=42)
+        cls.logger = logging.getLogger('TestFusedSoftmaxCeBlock')
+
+    def setUp(self):
+        quagga.processor_type = 'cpu'
+
+    def get_blocks(self, batch_size, dim, with_mask):
+        x = Connector(Matrix.empty(batch_size, dim), 0)
+        true_labels = Connector(Matrix.empty(batch_size, 1, 'int'))
+        mask = Connector(Matrix.empty(batch_size, 1)) if with_mask else None
+        blocks = [block_class(x, true_labels, mask) for block_class in [SoftmaxCeBlock, FusedSoftmaxCeBlock]]
+        return blocks, x, true_labels, mask
+
+    def fprop(self, block, x, true_labels, mask, arrays):
+        context = Context()
+        x.assign_npa(context, arrays['x'])
+        true_labels.assign_npa(context, arrays['true_labels'])
+        if mask:
+            mask.assign_npa(context, arrays['mask'])
+        for c in [x, true_labels, mask]:
+            if c:
+                c.fprop()
+        block.fprop()
+
+    def get_arrays(self, batch_size, dim):
+        return {'x': (3 * self.rng.randn(batch_size, dim)).astype(np.float32),
+                'true_labels': self.rng.randint(dim, size=(batch_size, 1)).astype(np.int32),
+                'mask': (self.rng.rand(batch_size, 1) < 0.7).astype(np.float32)}
+
+    def test_fprop_bprop(self):
+        """
+        compare with `SoftmaxCeBlock`
+        """
+        for _ in xrange(10):
+            batch_size, dim = self.rng.random_integers(300, size=2)
+            arrays = self.get_arrays(batch_size, dim)
+            for with_mask in [False, True]:
+                blocks, x, true_labels, mask = self.get_blocks(batch_size, dim, with_mask)
+                r = []
+                for block in blocks:
+                    self.fprop(block, x, true_labels, mask, arrays)
+                    probs = block.probs.to_host()
+                    block.calculate_loss(block.context)
+                    block.bprop()
+                    r.append((probs, block.loss, x.backward_matrix.to_host()))
+                self.assertTrue(np.allclose(r[0][0], r[1][0]))
+                self.assertTrue(np.allclose(r[0][1], r[1][1], rtol=1e-4))
+                self.assertTrue(np.allclose(r[0][2], r[1][2]))
+
+    def test_loss_accumulation(self):
+        batch_size, dim = 20, 10
+        blocks, x, true_labels, mask = self.get_blocks(batch_size, dim, True)
+        block = blocks[1]
+
+        def get_losses(arrays):
+            log_probs = arrays['x'] - arrays['x'].max(axis=1, keepdims=True)
+            log_probs -= np.log(np.sum(np.exp(log_probs), axis=1, keepdims=True))
+            losses = -log_probs[range(batch_size), arrays['true_labels'][:, 0]]
+            return list(losses[arrays['mask'][:, 0] == 1.0])
+
+        train_losses, test_losses = [], []
+        for i in xrange(5):
+            arrays = self.get_arrays(batch_size, dim)
+            if i == 3:
+                block.set_testing_mode()
+            self.fprop(block, x, true_labels, mask, arrays)
+            (train_losses if i < 3 else test_losses).extend(get_losses(arrays))
+        block.calculate_loss(block.context)
+        self.assertTrue(np.allclose(block.loss, np.mean(test_losses), rtol=1e-4))
+        block.set_training_mode()
+        block.calculate_loss(block.context)
+        self.assertTrue(np.allclose(block.loss, np.mean(train_losses), rtol=1e-4))
+        # statistics are reset after calculation
+        arrays = self.get_arrays(batch_size, dim)
+        self.fprop(block, x, true_labels, mask, arrays)
+        block.calculate_loss(block.context)
+        self.assertTrue(np.allclose(block.loss, np.mean(get_losses(arrays)), rtol=1e-4))
+
+    def test_loss_trackers(self):
+        """
+        trackers report the same losses for both blocks
+        """
+        batch_size, dim, period = 16, 12, 3
+        train_arrays = [self.get_arrays(batch_size, dim) for _ in xrange(2 * period + 1)]
+        valid_arrays = [self.get_arrays(batch_size, dim) for _ in xrange(2)]
+        blocks, x, true_labels, mask = self.get_blocks(batch_size, dim, False)
+        reported_losses = []
+        for block in blocks:
+            observer = LossObserver()
+            train_loss_tracker = TrainLossTracker(block, period, self.logger)
+            train_loss_tracker.add_observer(observer)
+            valid_loss_tracker = ValidLossTracker(block, self.logger)
+            valid_loss_tracker.add_observer(observer)
+            for i, arrays in enumerate(train_arrays):
+                self.fprop(block, x, true_labels, mask, arrays)
+                train_loss_tracker.notify()
+                if i == period:
+                    if hasattr(block, 'set_testing_mode'):
+                        block.set_testing_mode()
+                    for arrays in valid_arrays:
+                        self.fprop(block, x, true_labels, mask, arrays)
+                        valid_loss_tracker.notify_about_fprop()
+                    valid_loss_tracker.notify(i)
+                    if hasattr(block, 'set_training_mode'):
+                        block.set_training_mode()
+            reported_losses.append(observer.losses)
+        self.assertEqual(len(reported_losses[0]), 3)
+        self.assertTrue(np.allclose(reported_losses[0], reported_losses[1], rtol=1e-4))
+
+
+class LossObserver(object):
+    def __init__(self):
+        self.losses = []
+
+    def notify(self, loss):
+        self.losses.append(loss)
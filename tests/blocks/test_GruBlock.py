@@ -0,0 +1,101 @@
+# ----------------------------------------------------------------------------
+# Copyright 2015 Grammarly, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ----------------------------------------------------------------------------
+import quagga
+import numpy as np
+from quagga import Model
+from unittest import TestCase
+from quagga.utils import List
+from quagga.matrix import Matrix
+from quagga.context import Context
+from quagga.blocks import GruBlock
+from quagga.blocks import SequencerBlock
+from quagga.blocks import ParameterContainer
+from quagga.connector import Connector
+from tests.numerical_derivatives import get_numerical_derivatives
+
+
+def sigmoid(a):
+    return 1.0 / (1.0 + np.exp(-a))
+
+
+def gru_step(W, R, b, x, prev_h):
+    dim = R.shape[0]
+    pre_x = x.dot(W) + b
+    pre_h = prev_h.dot(R)
+    z = sigmoid(pre_x[:, :dim] + pre_h[:, :dim])
+    r = sigmoid(pre_x[:, dim:2*dim] + pre_h[:, dim:2*dim])
+    n = np.tanh(pre_x[:, 2*dim:] + r * pre_h[:, 2*dim:])
+    return z * prev_h + (1 - z) * n
+
+
+class TestGruBlock(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.rng = np.random.RandomState(seed=42)
+
+    def setUp(self):
+        quagga.processor_type = 'cpu'
+
+    @staticmethod
+    def get_loss(arrays, reverse):
+        h = arrays['h0']
+        loss = 0.0
+        steps = range(len(arrays['x']))
+        for t in reversed(steps) if reverse else steps:
+            mask = arrays['mask'][t]
+            h = mask * gru_step(arrays['W'], arrays['R'], arrays['b'], arrays['x'][t], h) + (1 - mask) * h
+            loss += np.sum(h * arrays['dL_dh'][t])
+        return loss
+
+    def test_derivatives(self):
+        max_len, batch_size, input_dim, dim = 4, 3, 3, 4
+        arrays = {'W': self.rng.normal(0.0, 0.5, (input_dim, 3 * dim)),
+                  'R': self.rng.normal(0.0, 0.5, (dim, 3 * dim)),
+                  'b': self.rng.normal(0.0, 0.5, (1, 3 * dim)),
+                  'h0': self.rng.normal(0.0, 0.5, (batch_size, dim)),
+                  'x': [self.rng.randn(batch_size, input_dim) for _ in xrange(max_len)],
+                  'mask': [(self.rng.rand(batch_size, 1) < 0.7) for _ in xrange(max_len)],
+                  'dL_dh': [self.rng.randn(batch_size, dim) for _ in xrange(max_len)]}
+        arrays = dict((k, [e.astype(np.float32) for e in v] if isinstance(v, list) else v.astype(np.float32))
+                      for k, v in arrays.iteritems())
+        for reverse in [False, True]:
+            expected = get_numerical_derivatives(lambda a: self.get_loss(a, reverse), arrays,
+                                                 ['W', 'R', 'b', 'h0', 'x'])
+            p = ParameterContainer(**dict((name, {'init': lambda a=arrays[name]: a, 'device_id': 0})
+                                          for name in ['W', 'R', 'b', 'h0']))
+            x = List([Connector(Matrix.from_npa(a), 0) for a in arrays['x']])
+            mask = List([Connector(Matrix.from_npa(a)) for a in arrays['mask']], x.length)
+            gru_block = SequencerBlock(GruBlock, [p['W'], p['R'], p['b'], None], [x, mask],
+                                       ['h'], ['h'], [p['h0']], reverse)
+            dL_dh = [h.register_usage(0, 0)[1] for h in gru_block.h]
+            model = Model([p, gru_block])
+            for e in x.elements + mask.elements:
+                e.fprop()
+            model.fprop()
+            context = Context()
+            for matrix, a in zip(dL_dh, arrays['dL_dh']):
+                matrix.assign_npa(context, a)
+            model.bprop()
+
+            h = arrays['h0']
+            for t in reversed(xrange(max_len)) if reverse else xrange(max_len):
+                m = arrays['mask'][t]
+                h = m * gru_step(arrays['W'], arrays['R'], arrays['b'], arrays['x'][t], h) + (1 - m) * h
+                self.assertTrue(np.allclose(gru_block.h[t].to_host(), h, atol=1e-5))
+            for name in ['W', 'R', 'b', 'h0']:
+                self.assertTrue(np.allclose(p[name].backward_matrix.to_host(), expected[name], atol=1e-3))
+            for e, d in zip(x, expected['x']):
+                self.assertTrue(np.allclose(e.backward_matrix.to_host(), d, atol=1e-3))
@@ -0,0 +1,124 @@
+# ----------------------------------------------------------------------------
+# Copyright 2015 Grammarly, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ----------------------------------------------------------------------------
+import quagga
+import numpy as np
+from unittest import TestCase
+from quagga.matrix import Matrix
+from quagga.context import Context
+from quagga.connector import Connector
+from quagga.blocks import HierarchicalSoftmaxCeBlock
+from tests.numerical_derivatives import get_numerical_derivatives
+
+
+def log_softmax(logits):
+    logits = logits - logits.max(axis=1, keepdims=True)
+    return logits - np.log(np.sum(np.exp(logits), axis=1, keepdims=True))
+
+
+def hierarchical_softmax_ce(class_W, word_W, word_classes, x, true_labels, mask):
+    true_labels = true_labels[:, 0]
+    true_classes = word_classes[true_labels]
+    logs = log_softmax(np.dot(x, class_W.T))[np.arange(x.shape[0]), true_classes]
+    for i, (c, label) in enumerate(zip(true_classes, true_labels)):
+        words = np.flatnonzero(word_classes == c)
+        word_logs = log_softmax(np.dot(x[i:i+1], word_W[words].T))
+        logs[i] += word_logs[0, np.flatnonzero(words == label)[0]]
+    return -np.sum(logs * mask[:, 0]) / x.shape[0]
+
+
+class TestHierarchicalSoftmaxCeBlock(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.rng = np.random.RandomState(seed=42)
+
+    def setUp(self):
+        quagga.processor_type = 'cpu'
+
+    def test_get_frequency_classes(self):
+        counts = 1e6 / np.arange(1, 10001)
+        self.rng.shuffle(counts)
+        word_classes = HierarchicalSoftmaxCeBlock.get_frequency_classes(counts)
+        class_sizes = np.bincount(word_classes)
+        self.assertEqual(len(class_sizes), 100)
+        self.assertTrue(np.all(class_sizes > 0))
+        self.assertTrue(np.max(class_sizes) < 300)
+        # classes are made of consecutive words by frequency
+        order = np.argsort(-counts, kind='mergesort')
+        self.assertTrue(np.all(np.diff(word_classes[order]) >= 0))
+
+    def test_derivatives(self):
+        vocab_size, num_classes, dim, batch_size = 20, 4, 3, 6
+        word_classes = HierarchicalSoftmaxCeBlock.get_frequency_classes(
+            self.rng.randint(1, 100, size=vocab_size), num_classes)
+        for with_mask in [False, True]:
+            class_W = self.rng.randn(num_classes, dim).astype(np.float32)
+            word_W = self.rng.randn(vocab_size, dim).astype(np.float32)
+            x = self.rng.randn(batch_size, dim).astype(np.float32)
+            true_labels = self.rng.randint(vocab_size, size=(batch_size, 1)).astype(np.int32)
+            mask = (self.rng.rand(batch_size, 1) < 0.7).astype(np.float32)
+
+            class_W_connector = Connector(Matrix.from_npa(class_W), 0)
+            word_W_connector = Connector(Matrix.from_npa(word_W), 0)
+            x_connector = Connector(Matrix.from_npa(x), 0)
+            true_labels_connector = Connector(Matrix.from_npa(true_labels))
+            mask_connector = Connector(Matrix.from_npa(mask)) if with_mask else None
+            block = HierarchicalSoftmaxCeBlock(class_W_connector, word_W_connector, word_classes,
+                                               x_connector, true_labels_connector, mask_connector)
+            for c in [class_W_connector, word_W_connector, x_connector, true_labels_connector, mask_connector]:
+                if c:
+                    c.fprop()
+            block.fprop()
+            block.bprop()
+            context = Context()
+            dL_dword_W = Matrix.from_npa(np.zeros_like(word_W))
+            dL_dword_W.add(context, word_W_connector.backward_matrix)
+            derivatives = {'class_W': class_W_connector.backward_matrix.to_host(),
+                           'word_W': dL_dword_W.to_host(),
+                           'x': x_connector.backward_matrix.to_host()}
+
+            if not with_mask:
+                mask = np.ones_like(mask)
+            arrays = {'class_W': class_W, 'word_W': word_W, 'x': x}
+
+            def get_loss(arrays):
+                return hierarchical_softmax_ce(arrays['class_W'], arrays['word_W'], word_classes,
+                                               arrays['x'], true_labels, mask)
+            expected = get_numerical_derivatives(get_loss, arrays, arrays.keys())
+            for name in arrays:
+                self.assertTrue(np.allclose(derivatives[name], expected[name], atol=1e-4))
+
+            block.calculate_loss(context)
+            expected_loss = get_loss(arrays) * batch_size / np.sum(mask)
+            self.assertTrue(np.allclose(block.loss, expected_loss, atol=1e-4))
+
+    def test_normalization(self):
+        """
+        probabilities of all words of the vocabulary sum up to one
+        """
+        vocab_size, dim = 30, 5
+        word_classes = HierarchicalSoftmaxCeBlock.get_frequency_classes(self.rng.randint(1, 100, size=vocab_size))
+        class_W = Connector(Matrix.from_npa(self.rng.randn(6, dim).astype(np.float32)))
+        word_W = Connector(Matrix.from_npa(self.rng.randn(vocab_size, dim).astype(np.float32)))
+        x = Connector(Matrix.from_npa(np.tile(self.rng.randn(1, dim).astype(np.float32), (vocab_size, 1))))
+        true_labels = Connector(Matrix.from_npa(np.arange(vocab_size, dtype=np.int32).reshape(-1, 1)))
+        block = HierarchicalSoftmaxCeBlock(class_W, word_W, word_classes, x, true_labels)
+        for c in [class_W, word_W, x, true_labels]:
+            c.fprop()
+        block.fprop()
+        rows = np.arange(vocab_size)
+        class_probs = block.class_probs.to_host()[rows, block.true_classes.to_host()[:, 0]]
+        word_probs = block.word_probs.to_host()[rows, block.true_positions.to_host()[:, 0]]
+        self.assertTrue(np.allclose(np.sum(class_probs * word_probs), 1.0))
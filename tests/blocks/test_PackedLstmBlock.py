@@ -0,0 +1,104 @@
+# ----------------------------------------------------------------------------
+# Copyright 2015 Grammarly, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ----------------------------------------------------------------------------
+import quagga
+import numpy as np
+from quagga import Model
+from unittest import TestCase
+from quagga.utils import List
+from quagga.matrix import Matrix
+from quagga.blocks import DotBlock
+from quagga.blocks import LstmBlock
+from quagga.blocks import PackedLstmBlock
+from quagga.blocks import SoftmaxCeBlock
+from quagga.blocks import SequencerBlock
+from quagga.blocks import ParameterContainer
+from quagga.connector import Connector
+
+
+class TestPackedLstmBlock(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.rng = np.random.RandomState(seed=42)
+
+    def setUp(self):
+        quagga.processor_type = 'cpu'
+
+    def run_model(self, packed, arrays, data, reverse, grad_clipping):
+        definitions = dict((name, {'init': lambda a=a: a, 'device_id': 0}) for name, a in arrays.iteritems())
+        if packed:
+            WRb = PackedLstmBlock.pack(arrays['W'], arrays['R'], arrays['b'])
+            definitions['WRb'] = {'init': lambda: WRb, 'device_id': 0}
+            for name in ['W', 'R', 'b']:
+                del definitions[name]
+        p = ParameterContainer(**definitions)
+        inputs = [Connector(Matrix.from_npa(a), 0) for a in data['x']]
+        masks = [Connector(Matrix.from_npa(a)) for a in data['mask']]
+        labels = [Connector(Matrix.from_npa(a)) for a in data['y']]
+        x = List(inputs)
+        mask = List(masks, x.length)
+        y = List(labels, x.length)
+        if packed:
+            block_class, params = PackedLstmBlock, [p['WRb'], grad_clipping]
+        else:
+            block_class, params = LstmBlock, [p['W'], p['R'], p['b'], grad_clipping]
+        lstm_block = SequencerBlock(block_class, params, [x, mask], ['h'], ['c', 'h'],
+                                    [p['c0'], p['h0']], reverse)
+        dot_block = SequencerBlock(DotBlock, [p['sce_W'], p['sce_b']], [lstm_block.h], ['output'])
+        sce_block = SequencerBlock(SoftmaxCeBlock, [], [dot_block.output, y, mask])
+        model = Model([p, lstm_block, dot_block, sce_block])
+        for e in inputs + masks + labels:
+            e.fprop()
+        results = []
+        for length in [len(inputs), 3]:
+            x.length = length
+            model.fprop()
+            model.bprop()
+            results.append([e.to_host() for e in lstm_block.h])
+            results.append([e.backward_matrix.to_host() for e in inputs[:length]])
+            if packed:
+                input_dim = arrays['W'].shape[0]
+                results.append(list(PackedLstmBlock.split(p['WRb'].backward_matrix.to_host(), input_dim)))
+            else:
+                results.append([p[name].backward_matrix.to_host() for name in ['W', 'R', 'b']])
+            results.append([p[name].backward_matrix.to_host() for name in ['c0', 'h0', 'sce_W', 'sce_b']])
+        return results
+
+    def test_lstm_block(self):
+        max_len, batch_size, input_dim, dim, nclasses = 5, 3, 4, 6, 7
+        shapes = {'W': (input_dim, 4 * dim), 'R': (dim, 4 * dim), 'b': (1, 4 * dim),
+                  'c0': (batch_size, dim), 'h0': (batch_size, dim),
+                  'sce_W': (dim, nclasses), 'sce_b': (1, nclasses)}
+        arrays = dict((name, self.rng.normal(0.0, 0.5, shape).astype(np.float32))
+                      for name, shape in shapes.iteritems())
+        data = {'x': [self.rng.rand(batch_size, input_dim).astype(np.float32) for _ in xrange(max_len)],
+                'mask': [(self.rng.rand(batch_size, 1) < 0.7).astype(np.float32) for _ in xrange(max_len)],
+                'y': [self.rng.randint(nclasses, size=(batch_size, 1)).astype(np.int32) for _ in xrange(max_len)]}
+        for reverse in [False, True]:
+            for grad_clipping in [None, 0.1]:
+                expected = self.run_model(False, arrays, data, reverse, grad_clipping)
+                results = self.run_model(True, arrays, data, reverse, grad_clipping)
+                for r, e in zip(results, expected):
+                    self.assertEqual(len(r), len(e))
+                    for a, b in zip(r, e):
+                        self.assertTrue(np.allclose(a, b, atol=1e-6))
+
+    def test_split(self):
+        W, R, b = self.rng.rand(3, 8), self.rng.rand(2, 8), self.rng.rand(1, 8)
+        WRb = PackedLstmBlock.pack(W, R, b)
+        self.assertEqual(WRb.shape, (6, 8))
+        for a, e in zip(PackedLstmBlock.split(WRb, 3), [W, R, b]):
+            self.assertTrue(np.allclose(a, e))
+            self.assertTrue(np.may_share_memory(a, WRb))
@@ -0,0 +1,97 @@
+# ----------------------------------------------------------------------------
+# Copyright 2015 Grammarly, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ----------------------------------------------------------------------------
+import os
+import json
+import quagga
+import numpy as np
+from unittest import TestCase
+from quagga.context import Context
+from quagga.blocks import ParameterContainer
+
+
+def get_mapping_stats(address):
+    """
+    Returns permissions and memory counters (kB) of the virtual memory area
+    that contains ``address`` in the current process.
+    """
+    stats = None
+    with open('/proc/self/smaps') as f:
+        for line in f:
+            fields = line.split()
+            if '-' in fields[0] and len(fields) >= 5:
+                if stats is not None:
+                    break
+                start, end = [int(e, 16) for e in fields[0].split('-')]
+                if start <= address < end:
+                    stats = {'perms': fields[1]}
+            elif stats is not None and fields[-1] == 'kB':
+                stats[fields[0][:-1]] = int(fields[1])
+    return stats
+
+
+class TestParameterContainer(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.rng = np.random.RandomState(seed=42)
+
+    def get_parameter_container(self):
+        quagga.processor_type = 'cpu'
+        W = self.rng.rand(2048, 512).astype(np.float32)
+        b = self.rng.rand(1, 512).astype(np.float32)
+        p = ParameterContainer(W={'init': lambda: W, 'device_id': 0, 'trainable': False},
+                               b={'init': lambda: b, 'device_id': 0, 'trainable': False})
+        return p, {'W': W, 'b': b}
+
+    def test_to_shared_memory(self):
+        p, arrays = self.get_parameter_container()
+        p.to_shared_memory()
+        r = []
+        for name, a in arrays.iteritems():
+            r.append(np.array_equal(p[name].to_host(), a))
+        self.assertEqual(sum(r), len(r))
+
+    def test_write_is_blocked(self):
+        p, _ = self.get_parameter_container()
+        p.to_shared_memory()
+        context = Context()
+        self.assertRaises(ValueError, p['W'].fill, context, 0.0)
+        self.assertRaises(ValueError, p['b'].scale, context, 2.0)
+
+    def test_pages_are_shared_with_forked_workers(self):
+        p, arrays = self.get_parameter_container()
+        p.to_shared_memory()
+        W = p['W'].data
+        read_fd, write_fd = os.pipe()
+        pid = os.fork()
+        if pid == 0:
+            os.close(read_fd)
+            try:
+                checksum = float(W.sum())
+                stats = get_mapping_stats(W.ctypes.data)
+                stats['checksum'] = checksum
+                os.write(write_fd, json.dumps(stats))
+            finally:
+                os._exit(0)
+        os.close(write_fd)
+        stats = json.loads(os.read(read_fd, 1 << 16))
+        os.close(read_fd)
+        os.waitpid(pid, 0)
+
+        nbytes_kb = W.nbytes / 1024
+        self.assertAlmostEqual(stats['checksum'], float(arrays['W'].sum()), places=0)
+        self.assertIn('s', stats['perms'])
+        self.assertEqual(stats['Private_Clean'] + stats['Private_Dirty'], 0)
+        self.assertGreaterEqual(stats['Shared_Clean'] + stats['Shared_Dirty'], nbytes_kb)
\ No newline at end of file
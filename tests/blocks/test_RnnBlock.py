@@ -0,0 +1,94 @@
+# ----------------------------------------------------------------------------
+# Copyright 2015 Grammarly, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ----------------------------------------------------------------------------
+import quagga
+import numpy as np
+from functools import partial
+from quagga import Model
+from unittest import TestCase
+from quagga.utils import List
+from quagga.matrix import Matrix
+from quagga.context import Context
+from quagga.blocks import RnnBlock
+from quagga.blocks import SequencerBlock
+from quagga.blocks import ParameterContainer
+from quagga.connector import Connector
+from tests.numerical_derivatives import get_numerical_derivatives
+
+
+def rnn_step(W, R, b, x, prev_h, nonlinearity):
+    pre_h = x.dot(W) + prev_h.dot(R) + b
+    return np.tanh(pre_h) if nonlinearity == 'tanh' else np.maximum(pre_h, 0.0)
+
+
+class TestRnnBlock(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.rng = np.random.RandomState(seed=42)
+
+    def setUp(self):
+        quagga.processor_type = 'cpu'
+
+    @staticmethod
+    def get_loss(arrays, reverse, nonlinearity):
+        h = arrays['h0']
+        loss = 0.0
+        steps = range(len(arrays['x']))
+        for t in reversed(steps) if reverse else steps:
+            mask = arrays['mask'][t]
+            h = mask * rnn_step(arrays['W'], arrays['R'], arrays['b'], arrays['x'][t], h, nonlinearity) + (1 - mask) * h
+            loss += np.sum(h * arrays['dL_dh'][t])
+        return loss
+
+    def test_derivatives(self):
+        max_len, batch_size, input_dim, dim = 4, 3, 3, 4
+        arrays = {'W': self.rng.normal(0.0, 0.5, (input_dim, dim)),
+                  'R': self.rng.normal(0.0, 0.5, (dim, dim)),
+                  'b': self.rng.normal(0.0, 0.5, (1, dim)),
+                  'h0': self.rng.normal(0.0, 0.5, (batch_size, dim)),
+                  'x': [self.rng.randn(batch_size, input_dim) for _ in xrange(max_len)],
+                  'mask': [(self.rng.rand(batch_size, 1) < 0.7) for _ in xrange(max_len)],
+                  'dL_dh': [self.rng.randn(batch_size, dim) for _ in xrange(max_len)]}
+        arrays = dict((k, [e.astype(np.float32) for e in v] if isinstance(v, list) else v.astype(np.float32))
+                      for k, v in arrays.iteritems())
+        for reverse, nonlinearity in [(False, 'tanh'), (True, 'tanh'), (False, 'relu')]:
+            expected = get_numerical_derivatives(lambda a: self.get_loss(a, reverse, nonlinearity), arrays,
+                                                 ['W', 'R', 'b', 'h0', 'x'])
+            p = ParameterContainer(**dict((name, {'init': lambda a=arrays[name]: a, 'device_id': 0})
+                                          for name in ['W', 'R', 'b', 'h0']))
+            x = List([Connector(Matrix.from_npa(a), 0) for a in arrays['x']])
+            mask = List([Connector(Matrix.from_npa(a)) for a in arrays['mask']], x.length)
+            rnn_block = SequencerBlock(partial(RnnBlock, nonlinearity=nonlinearity),
+                                       [p['W'], p['R'], p['b'], None], [x, mask],
+                                       ['h'], ['h'], [p['h0']], reverse)
+            dL_dh = [h.register_usage(0, 0)[1] for h in rnn_block.h]
+            model = Model([p, rnn_block])
+            for e in x.elements + mask.elements:
+                e.fprop()
+            model.fprop()
+            context = Context()
+            for matrix, a in zip(dL_dh, arrays['dL_dh']):
+                matrix.assign_npa(context, a)
+            model.bprop()
+
+            h = arrays['h0']
+            for t in reversed(xrange(max_len)) if reverse else xrange(max_len):
+                m = arrays['mask'][t]
+                h = m * rnn_step(arrays['W'], arrays['R'], arrays['b'], arrays['x'][t], h, nonlinearity) + (1 - m) * h
+                self.assertTrue(np.allclose(rnn_block.h[t].to_host(), h, atol=1e-5))
+            for name in ['W', 'R', 'b', 'h0']:
+                self.assertTrue(np.allclose(p[name].backward_matrix.to_host(), expected[name], atol=1e-3))
+            for e, d in zip(x, expected['x']):
+                self.assertTrue(np.allclose(e.backward_matrix.to_host(), d, atol=1e-3))
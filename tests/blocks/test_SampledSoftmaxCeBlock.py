@@ -0,0 +1,113 @@
+# ----------------------------------------------------------------------------
+# Copyright 2015 Grammarly, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ----------------------------------------------------------------------------
+import quagga
+import numpy as np
+from unittest import TestCase
+from quagga.matrix import Matrix
+from quagga.context import Context
+from quagga.connector import Connector
+from quagga.utils import AliasSampler
+from quagga.blocks import SampledSoftmaxCeBlock
+from tests.numerical_derivatives import get_numerical_derivatives
+
+
+def sampled_softmax_ce(W, x, true_labels, sampled_ids, probs, mask):
+    ids = np.hstack((true_labels[:, :1], np.tile(sampled_ids.T, (x.shape[0], 1))))
+    logits = np.einsum('id,ikd->ik', x, W[ids]) - np.log(probs[ids])
+    logits -= logits.max(axis=1, keepdims=True)
+    log_probs = logits - np.log(np.sum(np.exp(logits), axis=1, keepdims=True))
+    return -np.sum(log_probs[:, 0] * mask[:, 0]) / x.shape[0]
+
+
+class TestSampledSoftmaxCeBlock(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.rng = np.random.RandomState(seed=42)
+
+    def setUp(self):
+        quagga.processor_type = 'cpu'
+
+    def test_alias_sampler(self):
+        counts = self.rng.randint(1, 100, size=20)
+        sampler = AliasSampler.from_counts(counts, 0.75)
+        frequencies = np.bincount(sampler.sample(200000), minlength=20) / 200000.0
+        probs = counts ** 0.75 / np.sum(counts ** 0.75)
+        self.assertTrue(np.allclose(frequencies, probs, atol=5e-3))
+
+    def test_derivatives(self):
+        vocab_size, dim, batch_size, num_samples = 30, 4, 5, 6
+        sampler = AliasSampler.from_counts(self.rng.randint(1, 100, size=vocab_size), 0.75)
+        for with_mask in [False, True]:
+            W = self.rng.randn(vocab_size, dim).astype(np.float32)
+            x = self.rng.randn(batch_size, dim).astype(np.float32)
+            true_labels = self.rng.randint(vocab_size, size=(batch_size, 1)).astype(np.int32)
+            mask = (self.rng.rand(batch_size, 1) < 0.7).astype(np.float32)
+
+            W_connector = Connector(Matrix.from_npa(W), 0)
+            x_connector = Connector(Matrix.from_npa(x), 0)
+            true_labels_connector = Connector(Matrix.from_npa(true_labels))
+            mask_connector = Connector(Matrix.from_npa(mask)) if with_mask else None
+            block = SampledSoftmaxCeBlock(W_connector, sampler, num_samples, x_connector,
+                                          true_labels_connector, mask_connector)
+            for c in [W_connector, x_connector, true_labels_connector, mask_connector]:
+                if c:
+                    c.fprop()
+            block.fprop()
+            block.bprop()
+            context = Context()
+            dL_dW = Matrix.from_npa(np.zeros_like(W))
+            dL_dW.add(context, W_connector.backward_matrix)
+            dL_dW = dL_dW.to_host()
+            dL_dx = x_connector.backward_matrix.to_host()
+
+            sampled_ids = block.sampled_ids.to_host()
+            if not with_mask:
+                mask = np.ones_like(mask)
+            arrays = {'W': W, 'x': x}
+
+            def get_loss(arrays):
+                return sampled_softmax_ce(arrays['W'], arrays['x'], true_labels,
+                                          sampled_ids, sampler.probs, mask)
+            expected = get_numerical_derivatives(get_loss, arrays, ['W', 'x'])
+            self.assertTrue(np.allclose(dL_dW, expected['W'], atol=1e-4))
+            self.assertTrue(np.allclose(dL_dx, expected['x'], atol=1e-4))
+
+            block.calculate_loss(context)
+            expected_loss = get_loss(arrays) * batch_size / np.sum(mask)
+            self.assertTrue(np.allclose(block.loss, expected_loss, atol=1e-4))
+
+    def test_testing_mode(self):
+        vocab_size, dim, batch_size = 50, 8, 7
+        sampler = AliasSampler(np.ones(vocab_size))
+        W = self.rng.randn(vocab_size, dim).astype(np.float32)
+        x = self.rng.randn(batch_size, dim).astype(np.float32)
+        true_labels = self.rng.randint(vocab_size, size=(batch_size, 1)).astype(np.int32)
+
+        W_connector = Connector(Matrix.from_npa(W), 0)
+        x_connector = Connector(Matrix.from_npa(x), 0)
+        true_labels_connector = Connector(Matrix.from_npa(true_labels))
+        block = SampledSoftmaxCeBlock(W_connector, sampler, 5, x_connector, true_labels_connector)
+        block.set_testing_mode()
+        for c in [W_connector, x_connector, true_labels_connector]:
+            c.fprop()
+        block.fprop()
+        block.calculate_loss(Context())
+
+        logits = np.dot(x, W.T)
+        logits -= logits.max(axis=1, keepdims=True)
+        log_probs = logits - np.log(np.sum(np.exp(logits), axis=1, keepdims=True))
+        expected_loss = -np.mean(log_probs[range(batch_size), true_labels[:, 0]])
+        self.assertTrue(np.allclose(block.loss, expected_loss, atol=1e-5))
@@ -0,0 +1,142 @@
+# ----------------------------------------------------------------------------
+# Copyright 2015 Grammarly, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ----------------------------------------------------------------------------
+import quagga
+import numpy as np
+from quagga import Model
+from unittest import TestCase
+from quagga.utils import List
+from quagga.matrix import Matrix
+from quagga.context import Context
+from quagga.blocks import TemporalConvBlock
+from quagga.blocks import ParameterContainer
+from quagga.connector import Connector
+from tests.numerical_derivatives import get_numerical_derivatives
+
+
+def temporal_conv(W, b, x, mask, dilation, causal):
+    input_dim = x[0].shape[1]
+    kernel_size = W.shape[0] // input_dim
+    if causal:
+        offsets = [(j - kernel_size + 1) * dilation for j in xrange(kernel_size)]
+    else:
+        offsets = [j * dilation - (kernel_size - 1) * dilation // 2 for j in xrange(kernel_size)]
+    output = []
+    for t in xrange(len(x)):
+        o = np.repeat(b, x[0].shape[0], axis=0)
+        for j, offset in enumerate(offsets):
+            if 0 <= t + offset < len(x):
+                o = o + (mask[t + offset] * x[t + offset]).dot(W[j*input_dim:(j+1)*input_dim])
+        output.append(mask[t] * o)
+    return output
+
+
+class TestTemporalConvBlock(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.rng = np.random.RandomState(seed=42)
+
+    def setUp(self):
+        quagga.processor_type = 'cpu'
+
+    @staticmethod
+    def get_loss(arrays, length, dilation, causal):
+        output = temporal_conv(arrays['W'], arrays['b'], arrays['x'][:length],
+                               arrays['mask'][:length], dilation, causal)
+        return sum(np.sum(o * d) for o, d in zip(output, arrays['dL_doutput']))
+
+    def test_derivatives(self):
+        max_len, batch_size, input_dim, output_dim = 6, 3, 2, 3
+        for kernel_size, dilation, causal, length in [(3, 2, True, 6), (2, 3, False, 6), (3, 1, False, 4)]:
+            arrays = {'W': self.rng.normal(0.0, 0.5, (kernel_size * input_dim, output_dim)),
+                      'b': self.rng.normal(0.0, 0.5, (1, output_dim)),
+                      'x': [self.rng.randn(batch_size, input_dim) for _ in xrange(max_len)],
+                      'mask': [(self.rng.rand(batch_size, 1) < 0.7) for _ in xrange(max_len)],
+                      'dL_doutput': [self.rng.randn(batch_size, output_dim) for _ in xrange(max_len)]}
+            arrays = dict((k, [e.astype(np.float32) for e in v] if isinstance(v, list) else v.astype(np.float32))
+                          for k, v in arrays.iteritems())
+            expected = get_numerical_derivatives(lambda a: self.get_loss(a, length, dilation, causal),
+                                                 arrays, ['W', 'b', 'x'])
+
+            p = ParameterContainer(**dict((name, {'init': lambda a=arrays[name]: a, 'device_id': 0})
+                                          for name in ['W', 'b']))
+            x = List([Connector(Matrix.from_npa(a), 0) for a in arrays['x']])
+            mask = List([Connector(Matrix.from_npa(a)) for a in arrays['mask']], x.length)
+            conv_block = TemporalConvBlock(p['W'], p['b'], x, mask, dilation, causal)
+            dL_doutput = [e.register_usage(0, 0)[1] for e in conv_block.output.elements]
+            model = Model([p, conv_block])
+            x.length = length
+            for e in x.elements + mask.elements:
+                e.fprop()
+            model.fprop()
+            context = Context()
+            for matrix, a in zip(dL_doutput, arrays['dL_doutput']):
+                matrix.assign_npa(context, a)
+            model.bprop()
+
+            output = temporal_conv(arrays['W'], arrays['b'], arrays['x'][:length],
+                                   arrays['mask'][:length], dilation, causal)
+            self.assertEqual(len(conv_block.output), length)
+            for e, o in zip(conv_block.output, output):
+                self.assertTrue(np.allclose(e.to_host(), o, atol=1e-5))
+            for name in ['W', 'b']:
+                self.assertTrue(np.allclose(p[name].backward_matrix.to_host(), expected[name], atol=1e-3))
+            for e, d in zip(x.elements, expected['x']):
+                self.assertTrue(np.allclose(e.backward_matrix.to_host(), d, atol=1e-3))
+
+    def test_variable_batch_size(self):
+        max_len, max_batch_size, input_dim, output_dim = 5, 5, 2, 3
+        kernel_size, dilation, causal = 3, 1, True
+        arrays = {'W': self.rng.normal(0.0, 0.5, (kernel_size * input_dim, output_dim)),
+                  'b': self.rng.normal(0.0, 0.5, (1, output_dim)),
+                  'x': [self.rng.randn(max_batch_size, input_dim) for _ in xrange(max_len)],
+                  'mask': [(self.rng.rand(max_batch_size, 1) < 0.7) for _ in xrange(max_len)],
+                  'dL_doutput': [self.rng.randn(max_batch_size, output_dim) for _ in xrange(max_len)]}
+        arrays = dict((k, [e.astype(np.float32) for e in v] if isinstance(v, list) else v.astype(np.float32))
+                      for k, v in arrays.iteritems())
+
+        p = ParameterContainer(**dict((name, {'init': lambda a=arrays[name]: a, 'device_id': 0})
+                                      for name in ['W', 'b']))
+        x = List([Connector(Matrix.from_npa(a), 0) for a in arrays['x']])
+        mask = List([Connector(Matrix.from_npa(a)) for a in arrays['mask']], x.length)
+        conv_block = TemporalConvBlock(p['W'], p['b'], x, mask, dilation, causal)
+        dL_doutput = [e.register_usage(0, 0)[1] for e in conv_block.output.elements]
+        model = Model([p, conv_block])
+        context = Context()
+        for batch_size, length in [(5, 5), (3, 4), (5, 3)]:
+            batch = dict((k, [e[:batch_size] for e in v] if isinstance(v, list) else v)
+                         for k, v in arrays.iteritems())
+            expected = get_numerical_derivatives(lambda a: self.get_loss(a, length, dilation, causal),
+                                                 batch, ['W', 'b', 'x'])
+            x.length = length
+            for e, a in zip(x.elements, batch['x']):
+                e.assign_npa(context, a)
+            for e, a in zip(mask.elements, batch['mask']):
+                e.assign_npa(context, a)
+            for e in x.elements + mask.elements:
+                e.fprop()
+            model.fprop()
+            for matrix, a in zip(dL_doutput, batch['dL_doutput']):
+                matrix.assign_npa(context, a)
+            model.bprop()
+
+            output = temporal_conv(batch['W'], batch['b'], batch['x'][:length],
+                                   batch['mask'][:length], dilation, causal)
+            for e, o in zip(conv_block.output, output):
+                self.assertTrue(np.allclose(e.to_host(), o, atol=1e-5))
+            for name in ['W', 'b']:
+                self.assertTrue(np.allclose(p[name].backward_matrix.to_host(), expected[name], atol=1e-3))
+            for e, d in zip(x.elements, expected['x']):
+                self.assertTrue(np.allclose(e.backward_matrix.to_host(), d, atol=1e-3))
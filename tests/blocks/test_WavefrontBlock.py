@@ -0,0 +1,99 @@
+# ----------------------------------------------------------------------------
+# Copyright 2015 Grammarly, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ----------------------------------------------------------------------------
+import quagga
+import numpy as np
+from quagga import Model
+from unittest import TestCase
+from quagga.utils import List
+from quagga.matrix import Matrix
+from quagga.context import CpuContext
+from quagga.blocks import DotBlock
+from quagga.blocks import LstmBlock
+from quagga.blocks import RepeatBlock
+from quagga.blocks import SoftmaxCeBlock
+from quagga.blocks import SequencerBlock
+from quagga.blocks import WavefrontBlock
+from quagga.blocks import ParameterContainer
+from quagga.connector import Connector
+from quagga.utils.initializers import Constant
+
+
+class TestWavefrontBlock(TestCase):
+    def setUp(self):
+        quagga.processor_type = 'cpu'
+
+    def tearDown(self):
+        CpuContext.stop_workers()
+
+    def run_model(self, device_ids, wavefront):
+        rng = np.random.RandomState(seed=42)
+        max_len, batch_size, dim, nclasses = 6, 4, 8, 5
+        definitions = {'sce_W': {'init': lambda: rng.normal(0.0, 0.5, (dim, nclasses)).astype(np.float32),
+                                 'device_id': device_ids[-1]},
+                       'sce_b': {'init': Constant(1, nclasses), 'device_id': device_ids[-1]}}
+        for k, device_id in enumerate(device_ids):
+            for name, ncols in [('W', 4 * dim), ('R', 4 * dim), ('b', 4 * dim), ('h0', dim), ('c0', dim)]:
+                nrows = 1 if name in ['b', 'h0', 'c0'] else dim
+                definitions['{}{}'.format(name, k)] = \
+                    {'init': lambda nrows=nrows, ncols=ncols: rng.normal(0.0, 0.5, (nrows, ncols)).astype(np.float32),
+                     'device_id': device_id}
+        p = ParameterContainer(**definitions)
+        inputs = [Connector(Matrix.from_npa(rng.rand(batch_size, dim).astype(np.float32)))
+                  for _ in xrange(max_len)]
+        labels = [Connector(Matrix.from_npa(rng.randint(nclasses, size=(batch_size, 1)).astype(np.int32)))
+                  for _ in xrange(max_len)]
+        x = List(inputs)
+        y = List(labels, x.length)
+        blocks, layers = [p], []
+        h = x
+        for k, device_id in enumerate(device_ids):
+            c_repeat_block = RepeatBlock(p['c0{}'.format(k)], batch_size, axis=0, device_id=device_id)
+            h_repeat_block = RepeatBlock(p['h0{}'.format(k)], batch_size, axis=0, device_id=device_id)
+            layers.append(SequencerBlock(block_class=LstmBlock,
+                                         params=[p['W{}'.format(k)], p['R{}'.format(k)], p['b{}'.format(k)], None],
+                                         sequences=[h, List([None] * max_len, x.length)],
+                                         output_names=['h'],
+                                         prev_names=['c', 'h'],
+                                         paddings=[c_repeat_block.output, h_repeat_block.output],
+                                         device_id=device_id))
+            blocks.extend([c_repeat_block, h_repeat_block])
+            h = layers[-1].h
+        blocks.extend([WavefrontBlock(layers)] if wavefront else layers)
+        dot = SequencerBlock(DotBlock, [p['sce_W'], p['sce_b']], [h], ['output'], device_id=device_ids[-1])
+        sce = SequencerBlock(SoftmaxCeBlock, [], [dot.output, y], device_id=device_ids[-1])
+        model = Model(blocks + [dot, sce])
+        # inputs are copied to the devices that registered their usage
+        for e in inputs + labels:
+            e.fprop()
+        results = []
+        for length in [max_len, 3]:
+            x.length[:] = length
+            model.fprop()
+            model.bprop()
+            results.append([sce.blocks[i].probs.to_host() for i in xrange(length)])
+            results.append([p[name].backward_matrix.to_host() for name in sorted(definitions)])
+        return results
+
+    def test_wavefront(self):
+        expected = self.run_model([0, 0, 0], False)
+        for device_ids in [[0, 0, 0], [1, 2, 3]]:
+            if device_ids[0]:
+                CpuContext.start_workers(device_ids)
+            results = self.run_model(device_ids, True)
+            for r, e in zip(results, expected):
+                for a, b in zip(r, e):
+                    self.assertTrue(np.allclose(a, b, atol=1e-5))
+            CpuContext.stop_workers()
@@ -0,0 +1,88 @@
+# ----------------------------------------------------------------------------
+# Copyright 2015 Grammarly, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ----------------------------------------------------------------------------
+import threading
+import numpy as np
+from unittest import TestCase
+from quagga.context import blas
+from quagga.matrix import CpuMatrix
+from quagga.context import CpuContext
+from quagga.context import ComputeBudget
+
+
+class TestComputeBudget(TestCase):
+    def tearDown(self):
+        CpuContext._budgets.clear()
+
+    def test_divide(self):
+        budgets = ComputeBudget.divide(3, range(8))
+        self.assertEqual([b.cpu_affinity for b in budgets], [[0, 1], [2, 3, 4], [5, 6, 7]])
+        self.assertEqual([b.num_threads for b in budgets], [2, 3, 3])
+        budgets = ComputeBudget.divide(3, [4, 6])
+        self.assertEqual([b.cpu_affinity for b in budgets], [[4], [6], [4]])
+        self.assertEqual([b.num_threads for b in budgets], [1, 1, 1])
+
+    def test_context_budget(self):
+        budgets = CpuContext.divide_cores([0, 1], range(4))
+        self.assertIs(CpuContext(1).budget, budgets[1])
+        self.assertEqual(CpuContext(1, num_threads=3).budget.num_threads, 3)
+        CpuContext.set_compute_budget(1)
+        self.assertIsNone(CpuContext(1).budget)
+
+    def test_activate_in_thread(self):
+        cpus = blas.get_affinity()
+        context = CpuContext(cpu_affinity=cpus[:1])
+        a = CpuMatrix.from_npa(np.ones((4, 4), np.float32))
+        c = CpuMatrix.empty(4, 4)
+        affinity = []
+
+        def work():
+            c.assign_dot(context, a, a)
+            affinity.append(blas.get_affinity())
+        thread = threading.Thread(target=work)
+        thread.start()
+        thread.join()
+        self.assertEqual(affinity, [cpus[:1]])
+        self.assertEqual(blas.get_affinity(), cpus)
+        self.assertTrue(np.allclose(c.to_host(), 4.0))
+
+    def test_dot_operations_apply_budget(self):
+        context = CpuContext(num_threads=1)
+        calls = []
+        context.budget.apply = lambda: calls.append(1)
+        a = CpuMatrix.from_npa(np.ones((3, 4), np.float32))
+        c = CpuMatrix.empty(3, 4)
+        c.assign_dot(context, a, CpuMatrix.from_npa(np.eye(4, dtype=np.float32)))
+        self.assertEqual(len(calls), 1)
+        c.assign_batch_dot(context, a, CpuMatrix.from_npa(np.ones((3, 4), np.float32)), 2)
+        self.assertEqual(len(calls), 2)
+        self.assertTrue(np.allclose(c.to_host(), 2.0))
+
+    def test_process_wide_setting(self):
+        calls = []
+        is_thread_local, set_num_threads = blas.is_thread_local, blas.set_num_threads
+        blas.is_thread_local, blas.set_num_threads = False, calls.append
+        try:
+            a, b = ComputeBudget(7), ComputeBudget(5)
+            a.apply()
+            a.apply()
+            thread = threading.Thread(target=b.apply)
+            thread.start()
+            thread.join()
+            # the other thread changed the process-wide setting
+            a.apply()
+        finally:
+            blas.is_thread_local, blas.set_num_threads = is_thread_local, set_num_threads
+        self.assertEqual(calls, [7, 5, 7])
@@ -0,0 +1,121 @@
+# ----------------------------------------------------------------------------
+# Copyright 2015 Grammarly, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ----------------------------------------------------------------------------
+import os
+import json
+import quagga
+import shutil
+import tempfile
+import numpy as np
+from quagga import Model
+from unittest import TestCase
+from quagga.utils import List
+from quagga.matrix import Matrix
+from quagga.context import Context
+from quagga.matrix import CpuMatrix
+from quagga.context import CpuContext
+from quagga.blocks import DotBlock
+from quagga.context import ContextTracer
+from quagga.blocks import SoftmaxCeBlock
+from quagga.blocks import SequencerBlock
+from quagga.blocks import ParameterContainer
+from quagga.connector import Connector
+from quagga.utils.initializers import Constant
+from quagga.utils.initializers import Orthogonal
+
+
+class TestContextTracer(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.rng = np.random.RandomState(seed=42)
+
+    def setUp(self):
+        quagga.processor_type = 'cpu'
+        self.dir_path = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.dir_path)
+
+    def build(self):
+        max_len, batch_size, dim, nclasses = 4, 8, 16, 10
+        p = ParameterContainer(W={'init': Orthogonal(dim, nclasses), 'device_id': 0},
+                               b={'init': Constant(1, nclasses), 'device_id': 0})
+        x, y = [], []
+        for _ in xrange(max_len):
+            x.append(Connector(Matrix.from_npa(self.rng.rand(batch_size, dim).astype(np.float32))))
+            y.append(Connector(Matrix.from_npa(self.rng.randint(nclasses, size=(batch_size, 1)).astype(np.int32))))
+        for e in x + y:
+            e.fprop()
+        dot = SequencerBlock(DotBlock, [p['W'], p['b']], [List(x)], ['output'])
+        sce = SequencerBlock(SoftmaxCeBlock, [], [dot.output, List(y)])
+        return Model([p, dot, sce]), sce, max_len
+
+    def test_trace(self):
+        model, sce, max_len = self.build()
+        tracer = ContextTracer()
+        tracer.register_model(model)
+        tracer.enable()
+        model.fprop()
+        model.bprop()
+        sce.calculate_loss(Context())
+        tracer.disable()
+        path = os.path.join(self.dir_path, 'trace.json')
+        tracer.save(path)
+        with open(path) as f:
+            events = json.load(f)['traceEvents']
+
+        ops = [e for e in events if e.get('cat') == 'op']
+        op_names = set(e['name'] for e in ops)
+        self.assertIn('add_dot', op_names)
+        # issued through connectors
+        self.assertIn('assign_dot', op_names)
+        self.assertIn('softmax', op_names)
+        self.assertTrue(all(e['dur'] >= 0 for e in ops))
+
+        thread_names = [e['args']['name'] for e in events if e['name'] == 'thread_name']
+        self.assertIn('SequencerBlock#1/DotBlock[0].f_context', thread_names)
+
+        waits = [e for e in events if e['name'] == 'wait' and e['ph'] == 'i']
+        self.assertEqual(len(waits), 1)
+        flows = [e for e in events if e['ph'] == 's' and e.get('cat') == 'dependency']
+        self.assertEqual(len(flows), max_len)
+        flow_ends = set(e['id'] for e in events if e['ph'] == 'f')
+        self.assertTrue(all(e['id'] in flow_ends for e in flows))
+
+        callbacks = [e for e in events if e.get('cat') == 'callback' and e['ph'] == 'X']
+        self.assertEqual(len(callbacks), max_len)
+
+    def test_disable_restores_originals(self):
+        add_dot = CpuMatrix.__dict__['add_dot']
+        wait = CpuContext.__dict__['wait']
+        tracer = ContextTracer()
+        tracer.enable()
+        self.assertIsNot(CpuMatrix.__dict__['add_dot'], add_dot)
+        self.assertIsNot(CpuContext.__dict__['wait'], wait)
+        tracer.disable()
+        self.assertIs(CpuMatrix.__dict__['add_dot'], add_dot)
+        self.assertIs(CpuContext.__dict__['wait'], wait)
+    def test_only_operations_are_traced(self):
+        same_shape = CpuMatrix.__dict__['same_shape']
+        sync_fill = CpuMatrix.__dict__['sync_fill']
+        tracer = ContextTracer()
+        tracer.enable()
+        self.assertIs(CpuMatrix.__dict__['same_shape'], same_shape)
+        self.assertIs(CpuMatrix.__dict__['sync_fill'], sync_fill)
+        a = Matrix.from_npa(np.ones((2, 3), np.float32))
+        a.sync_fill(2.0)
+        a.fill(Context(), 0.0)
+        tracer.disable()
+        self.assertEqual([e['name'] for e in tracer.events if e.get('cat') == 'op'], ['fill'])
@@ -0,0 +1,101 @@
+# ----------------------------------------------------------------------------
+# Copyright 2015 Grammarly, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ----------------------------------------------------------------------------
+import quagga
+import numpy as np
+from quagga import Model
+from unittest import TestCase
+from quagga.utils import List
+from quagga.matrix import Matrix
+from quagga.context import Context
+from quagga.context import CpuWorker
+from quagga.context import CpuContext
+from quagga.blocks import DotBlock
+from quagga.blocks import SoftmaxCeBlock
+from quagga.blocks import SequencerBlock
+from quagga.blocks import NonlinearityBlock
+from quagga.blocks import ParameterContainer
+from quagga.connector import Connector
+from quagga.utils.initializers import Constant
+
+
+class TestCpuWorker(TestCase):
+    def setUp(self):
+        quagga.processor_type = 'cpu'
+
+    def tearDown(self):
+        CpuContext.stop_workers()
+
+    def run_model(self, device_ids, workers_after_build=False):
+        rng = np.random.RandomState(seed=42)
+        max_len, batch_size, dim, nclasses = 5, 8, 16, 10
+        W1 = rng.normal(0.0, 0.5, (dim, dim)).astype(np.float32)
+        W2 = rng.normal(0.0, 0.5, (dim, nclasses)).astype(np.float32)
+        p = ParameterContainer(W1={'init': lambda: W1, 'device_id': device_ids[0]},
+                               W2={'init': lambda: W2, 'device_id': device_ids[1]},
+                               b2={'init': Constant(1, nclasses), 'device_id': device_ids[1]})
+        x, y = [], []
+        for _ in xrange(max_len):
+            x.append(Connector(Matrix.from_npa(rng.rand(batch_size, dim).astype(np.float32))))
+            y.append(Connector(Matrix.from_npa(rng.randint(nclasses, size=(batch_size, 1)).astype(np.int32))))
+        dot1 = SequencerBlock(DotBlock, [p['W1'], None], [List(x)], ['output'], device_id=device_ids[0])
+        # NonlinearityBlock binds x.tanh on construction
+        tanh = SequencerBlock(lambda x, device_id: NonlinearityBlock(x, 'tanh', device_id),
+                              [], [dot1.output], ['output'], device_id=device_ids[0])
+        dot2 = SequencerBlock(DotBlock, [p['W2'], p['b2']], [tanh.output], ['output'], device_id=device_ids[1])
+        sce = SequencerBlock(SoftmaxCeBlock, [], [dot2.output, List(y)], device_id=device_ids[1])
+        model = Model([p, dot1, tanh, dot2, sce])
+        if workers_after_build:
+            CpuContext.start_workers(device_ids)
+        # inputs are copied to the devices that registered their usage
+        for e in x + y:
+            e.fprop()
+        results = []
+        for length in [max_len, 3]:
+            dot1._length[:] = length
+            model.fprop()
+            model.bprop()
+            results.append([sce.blocks[i].probs.to_host() for i in xrange(length)])
+            results.append([e.backward_matrix.to_host() for e in [p['W1'], p['W2'], p['b2']]])
+        sce.calculate_loss(Context(device_ids[1]))
+        Context(device_ids[1]).synchronize()
+        return results, sce.loss
+
+    def test_model_parallel(self):
+        expected, expected_loss = self.run_model([0, 0])
+        CpuContext.start_workers([1, 2])
+        self.assertEqual(sorted(CpuWorker.workers), [1, 2])
+        results, loss = self.run_model([1, 2])
+        for r, e in zip(results, expected):
+            for a, b in zip(r, e):
+                self.assertTrue(np.allclose(a, b, atol=1e-6))
+        self.assertTrue(np.allclose(loss, expected_loss))
+
+    def test_workers_started_after_build(self):
+        expected, expected_loss = self.run_model([0, 0])
+        results, loss = self.run_model([1, 2], workers_after_build=True)
+        self.assertEqual(sorted(CpuWorker.workers), [1, 2])
+        for r, e in zip(results, expected):
+            for a, b in zip(r, e):
+                self.assertTrue(np.allclose(a, b, atol=1e-6))
+        self.assertTrue(np.allclose(loss, expected_loss))
+
+    def test_exception_is_reraised(self):
+        CpuContext.start_workers([1])
+        context = CpuContext(1)
+        a = Matrix.from_npa(np.ones((2, 3), np.float32), device_id=1)
+        b = Matrix.from_npa(np.ones((4, 5), np.float32), device_id=1)
+        a.add(context, b)
+        self.assertRaises(ValueError, context.synchronize)
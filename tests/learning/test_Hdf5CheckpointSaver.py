@@ -0,0 +1,105 @@
+# ----------------------------------------------------------------------------
+# Copyright 2015 Grammarly, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ----------------------------------------------------------------------------
+import os
+import quagga
+import shutil
+import logging
+import tempfile
+import numpy as np
+from quagga import Model
+from unittest import TestCase
+from quagga.matrix import Matrix
+from quagga.blocks import DotBlock
+from quagga.connector import Connector
+from quagga.blocks import SoftmaxCeBlock
+from quagga.blocks import ParameterContainer
+from quagga.learning.steps import NagStep
+from quagga.utils.initializers import Constant
+from quagga.utils.initializers import Orthogonal
+from quagga.learning.policies import ScheduledValuePolicy
+from quagga.learning.observers import Hdf5CheckpointSaver
+
+
+class TestHdf5CheckpointSaver(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.rng = np.random.RandomState(seed=42)
+        cls.logger = logging.getLogger('test_checkpoint_saver')
+
+    def setUp(self):
+        self.dir_path = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.dir_path)
+
+    def build(self, x, y, compression=None, keep_last=None):
+        quagga.processor_type = 'cpu'
+        W = Orthogonal(x.shape[1], 10)()
+        p = ParameterContainer(W={'init': lambda: W, 'device_id': 0},
+                               b={'init': Constant(1, 10), 'device_id': 0})
+        qx = Connector(Matrix.from_npa(x))
+        qy = Connector(Matrix.from_npa(y))
+        dot_block = DotBlock(p['W'], p['b'], qx)
+        sce_block = SoftmaxCeBlock(dot_block.output, qy)
+        model = Model([p, dot_block, sce_block])
+        qx.fprop()
+        qy.fprop()
+        learning_rate_policy = ScheduledValuePolicy({0: 0.1, 4: 0.05, 8: 0.01}, 'lr', self.logger)
+        momentum_policy = ScheduledValuePolicy({0: 0.9, 6: 0.5}, 'momentum', self.logger)
+        nag_step = NagStep(p.trainable_parameters.values(), learning_rate_policy, momentum_policy)
+        saver = Hdf5CheckpointSaver(p.parameters, 3, self.dir_path, self.logger,
+                                    steps=[nag_step],
+                                    policies=[learning_rate_policy, momentum_policy],
+                                    compression=compression,
+                                    keep_last=keep_last)
+        observers = [learning_rate_policy, momentum_policy, nag_step, saver]
+        return p, model, observers, saver
+
+    @staticmethod
+    def train(model, observers, start, end):
+        for _ in xrange(start, end):
+            model.fprop()
+            model.bprop()
+            for observer in observers:
+                observer.notify()
+
+    def test_resume(self):
+        x = self.rng.rand(32, 20).astype(np.float32)
+        y = self.rng.randint(10, size=(32, 1)).astype(np.int32)
+        for compression in [None, 'gzip']:
+            p, model, observers, saver = self.build(x, y, compression)
+            self.train(model, observers, 0, 12)
+            saver.join()
+            expected = {name: param.to_host() for name, param in p.parameters.iteritems()}
+
+            p, model, observers, saver = self.build(x, y, compression)
+            path = os.path.join(self.dir_path, 'checkpoint_000000006.hdf5')
+            saver.load(path)
+            self.assertEqual(saver.iteration, 7)
+            self.train(model, observers, 7, 12)
+            saver.join()
+            for name, param in p.parameters.iteritems():
+                self.assertTrue(np.allclose(param.to_host(), expected[name]))
+
+    def test_retention(self):
+        x = self.rng.rand(16, 5).astype(np.float32)
+        y = self.rng.randint(10, size=(16, 1)).astype(np.int32)
+        p, model, observers, saver = self.build(x, y, keep_last=2)
+        self.train(model, observers, 0, 16)
+        saver.join()
+        file_names = sorted(os.listdir(self.dir_path))
+        self.assertEqual(file_names, ['checkpoint_000000012.hdf5',
+                                      'checkpoint_000000015.hdf5'])
\ No newline at end of file
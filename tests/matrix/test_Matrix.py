@@ -920,6 +920,44 @@ class TestMatrix(TestCase):
 
         self.assertEqual(sum(r), self.N)
 
+    def test_grouped_softmax(self):
+        r = []
+        for _ in xrange(self.N):
+            nrows = self.rng.random_integers(1000)
+            group_width = self.rng.random_integers(50)
+            ncols = group_width * self.rng.random_integers(20)
+            a = 4 * self.rng.rand(nrows, ncols).astype(np.float32) - 2
+            d = self.get_random_array((nrows, ncols))
+            expected = np.empty_like(a)
+            expected_derivative = np.zeros_like(a)
+            for j in xrange(0, ncols, group_width):
+                cols = slice(j, j + group_width)
+                a_group = CpuMatrix.from_npa(np.copy(a[:, cols]))
+                b_group = CpuMatrix.empty_like(a_group)
+                a_group.softmax(self.cpu_context, b_group)
+                expected[:, cols] = b_group.to_host()
+                dx_group = CpuMatrix.from_npa(np.zeros((nrows, group_width), np.float32))
+                dx_group.add_softmax_derivative(self.cpu_context, b_group, CpuMatrix.from_npa(np.copy(d[:, cols])))
+                expected_derivative[:, cols] = dx_group.to_host()
+
+            a_cpu = CpuMatrix.from_npa(a)
+            b_cpu = CpuMatrix.empty_like(a_cpu)
+            dx_cpu = CpuMatrix.from_npa(np.zeros_like(a))
+            a_gpu = GpuMatrix.from_npa(a)
+            b_gpu = GpuMatrix.empty_like(a_gpu)
+            dx_gpu = GpuMatrix.from_npa(np.zeros_like(a))
+
+            a_cpu.softmax(self.cpu_context, b_cpu, group_width)
+            a_gpu.softmax(self.gpu_context, b_gpu, group_width)
+            dx_cpu.add_softmax_derivative(self.cpu_context, b_cpu, CpuMatrix.from_npa(d), group_width)
+            dx_gpu.add_softmax_derivative(self.gpu_context, b_gpu, GpuMatrix.from_npa(d), group_width)
+            r.append(np.allclose(b_cpu.to_host(), expected))
+            r.append(np.allclose(dx_cpu.to_host(), expected_derivative, atol=1e-6))
+            r.append(np.allclose(b_cpu.to_host(), b_gpu.to_host()))
+            r.append(np.allclose(dx_cpu.to_host(), dx_gpu.to_host(), atol=1e-6))
+
+        self.assertEqual(sum(r), len(r))
+
     def test_assign_softmax_ce_derivative(self):
         r = []
         for _ in xrange(self.N):
@@ -960,6 +998,115 @@ class TestMatrix(TestCase):
 
         self.assertEqual(sum(r), self.N)
 
+    def test_assign_softmax_ce(self):
+        r = []
+        for _ in xrange(self.N):
+            nrows = self.rng.random_integers(1000)
+            ncols = self.rng.random_integers(1000)
+            x = 4 * self.rng.rand(nrows, ncols).astype(np.float32) - 2
+            target_classes = self.rng.randint(ncols, size=(nrows, 1)).astype(np.int32)
+
+            x_cpu = CpuMatrix.from_npa(x)
+            target_classes_cpu = CpuMatrix.from_npa(target_classes)
+            probs_cpu = CpuMatrix.empty_like(x_cpu)
+            losses_cpu = CpuMatrix.empty(nrows, 1)
+            x_gpu = GpuMatrix.from_npa(x)
+            target_classes_gpu = GpuMatrix.from_npa(target_classes)
+            probs_gpu = GpuMatrix.empty_like(x_gpu)
+            losses_gpu = GpuMatrix.empty(nrows, 1)
+
+            probs_cpu.assign_softmax_ce(self.cpu_context, x_cpu, target_classes_cpu, losses_cpu)
+            probs_gpu.assign_softmax_ce(self.gpu_context, x_gpu, target_classes_gpu, losses_gpu)
+            expected_losses = -np.log(probs_cpu.to_host()[range(nrows), target_classes[:, 0]])
+            r.append(np.allclose(losses_cpu.to_host()[:, 0], expected_losses, atol=1e-5))
+            r.append(np.allclose(probs_cpu.to_host(), probs_gpu.to_host()))
+            r.append(np.allclose(losses_cpu.to_host(), losses_gpu.to_host(), atol=1e-5))
+
+        self.assertEqual(sum(r), len(r))
+
+    def test_softmax_ce_derivative(self):
+        r = []
+        for _ in xrange(self.N):
+            probs = self.get_random_array()
+            target_classes = self.rng.randint(probs.shape[1], size=(probs.shape[0], 1)).astype(np.int32)
+            mask = (self.rng.rand(probs.shape[0], 1) < 0.8).astype(np.float32)
+            for with_mask in [False, True]:
+                probs_cpu = CpuMatrix.from_npa(probs)
+                target_classes_cpu = CpuMatrix.from_npa(target_classes)
+                mask_cpu = CpuMatrix.from_npa(mask) if with_mask else None
+                probs_gpu = GpuMatrix.from_npa(probs)
+                target_classes_gpu = GpuMatrix.from_npa(target_classes)
+                mask_gpu = GpuMatrix.from_npa(mask) if with_mask else None
+                derivative_cpu = CpuMatrix.empty_like(probs_cpu)
+
+                derivative_cpu.assign_softmax_ce_derivative(self.cpu_context, probs_cpu, target_classes_cpu)
+                if with_mask:
+                    derivative_cpu.hprod(self.cpu_context, mask_cpu)
+                probs_cpu.softmax_ce_derivative(self.cpu_context, target_classes_cpu, mask_cpu)
+                probs_gpu.softmax_ce_derivative(self.gpu_context, target_classes_gpu, mask_gpu)
+                r.append(np.allclose(probs_cpu.to_host(), derivative_cpu.to_host()))
+                r.append(np.allclose(probs_cpu.to_host(), probs_gpu.to_host()))
+
+        self.assertEqual(sum(r), len(r))
+
+    def test_accumulate_log_sum_exp(self):
+        r = []
+        for _ in xrange(self.N):
+            nrows = self.rng.random_integers(500)
+            ncols = self.rng.random_integers(1000)
+            chunk_size = self.rng.random_integers(ncols)
+            logits = 4 * self.rng.rand(nrows, ncols).astype(np.float32) - 2
+            target_classes = self.rng.randint(ncols, size=(nrows, 1)).astype(np.int32)
+
+            target_classes_cpu = CpuMatrix.from_npa(target_classes)
+            log_sum_exps_cpu = CpuMatrix.empty(nrows, 1)
+            log_sum_exps_cpu.fill(self.cpu_context, float('-inf'))
+            target_logits_cpu = CpuMatrix.empty(nrows, 1)
+            target_classes_gpu = GpuMatrix.from_npa(target_classes)
+            log_sum_exps_gpu = GpuMatrix.empty(nrows, 1)
+            log_sum_exps_gpu.fill(self.gpu_context, float('-inf'))
+            target_logits_gpu = GpuMatrix.empty(nrows, 1)
+            for offset in xrange(0, ncols, chunk_size):
+                chunk = logits[:, offset:offset + chunk_size]
+                CpuMatrix.from_npa(chunk).accumulate_log_sum_exp(self.cpu_context, log_sum_exps_cpu, target_classes_cpu, offset, target_logits_cpu)
+                GpuMatrix.from_npa(chunk).accumulate_log_sum_exp(self.gpu_context, log_sum_exps_gpu, target_classes_gpu, offset, target_logits_gpu)
+
+            maximums = logits.max(axis=1, keepdims=True)
+            log_sum_exps = maximums + np.log(np.sum(np.exp(logits - maximums), axis=1, keepdims=True))
+            r.append(np.allclose(log_sum_exps_cpu.to_host(), log_sum_exps, atol=1e-5))
+            r.append(np.allclose(target_logits_cpu.to_host()[:, 0], logits[range(nrows), target_classes[:, 0]]))
+            r.append(np.allclose(log_sum_exps_cpu.to_host(), log_sum_exps_gpu.to_host(), atol=1e-5))
+            r.append(np.allclose(target_logits_cpu.to_host(), target_logits_gpu.to_host()))
+
+        self.assertEqual(sum(r), len(r))
+
+    def test_chunk_softmax_ce_derivative(self):
+        r = []
+        for _ in xrange(self.N):
+            nrows = self.rng.random_integers(500)
+            ncols = self.rng.random_integers(1000)
+            offset = self.rng.randint(ncols)
+            logits = 4 * self.rng.rand(nrows, ncols).astype(np.float32) - 2
+            target_classes = self.rng.randint(ncols, size=(nrows, 1)).astype(np.int32)
+            mask = (self.rng.rand(nrows, 1) < 0.8).astype(np.float32)
+            maximums = logits.max(axis=1, keepdims=True)
+            log_sum_exps = maximums + np.log(np.sum(np.exp(logits - maximums), axis=1, keepdims=True))
+            expected = np.exp(logits - log_sum_exps)
+            expected[range(nrows), target_classes[:, 0]] -= 1.0
+            for with_mask in [False, True]:
+                chunk_cpu = CpuMatrix.from_npa(logits[:, offset:])
+                chunk_gpu = GpuMatrix.from_npa(logits[:, offset:])
+                for chunk, context, matrix_class in [(chunk_cpu, self.cpu_context, CpuMatrix),
+                                                     (chunk_gpu, self.gpu_context, GpuMatrix)]:
+                    chunk.chunk_softmax_ce_derivative(context, matrix_class.from_npa(log_sum_exps),
+                                                      matrix_class.from_npa(target_classes), offset,
+                                                      matrix_class.from_npa(mask) if with_mask else None)
+                derivative = expected[:, offset:] / nrows * (mask if with_mask else 1.0)
+                r.append(np.allclose(chunk_cpu.to_host(), derivative, atol=1e-6))
+                r.append(np.allclose(chunk_cpu.to_host(), chunk_gpu.to_host(), atol=1e-6))
+
+        self.assertEqual(sum(r), len(r))
+
     def test_scale(self):
         r = []
         for _ in xrange(self.N):
@@ -1437,6 +1584,38 @@ class TestMatrix(TestCase):
 
         self.assertEqual(sum(r), len(r))
 
+    def test_add_batch_dot(self):
+        r = []
+        for _ in xrange(self.N):
+            batch_size, n, m, k = self.rng.randint(low=1, high=20, size=4)
+            mat_op_b = self.rng.choice(['T', 'N'], 1)[0]
+            mat_op_c = self.rng.choice(['T', 'N'], 1)[0]
+            a = TestMatrix.get_random_array((batch_size, n * m))
+            b = TestMatrix.get_random_array((batch_size, n * k))
+            c = TestMatrix.get_random_array((batch_size, k * m))
+            alpha = ct.c_float(2 * self.rng.rand() - 1)
+            beta = ct.c_float(2 * self.rng.rand() - 1)
+
+            b_3d = b.reshape((batch_size, n, k) if mat_op_b == 'N' else (batch_size, k, n))
+            c_3d = c.reshape((batch_size, k, m) if mat_op_c == 'N' else (batch_size, m, k))
+            b_3d = b_3d if mat_op_b == 'N' else b_3d.transpose(0, 2, 1)
+            c_3d = c_3d if mat_op_c == 'N' else c_3d.transpose(0, 2, 1)
+            expected = alpha.value * np.matmul(b_3d, c_3d).reshape(a.shape) + beta.value * a
+
+            a_cpu = CpuMatrix.from_npa(a)
+            b_cpu = CpuMatrix.from_npa(b)
+            c_cpu = CpuMatrix.from_npa(c)
+            a_gpu = GpuMatrix.from_npa(a)
+            b_gpu = GpuMatrix.from_npa(b)
+            c_gpu = GpuMatrix.from_npa(c)
+
+            a_cpu.add_batch_dot(self.cpu_context, b_cpu, c_cpu, n, mat_op_b, mat_op_c, alpha, beta)
+            a_gpu.add_batch_dot(self.gpu_context, b_gpu, c_gpu, n, mat_op_b, mat_op_c, alpha, beta)
+            r.append(np.allclose(a_cpu.to_host(), expected, atol=1e-3))
+            r.append(np.allclose(a_cpu.to_host(), a_gpu.to_host(), atol=1e-3))
+
+        self.assertEqual(sum(r), len(r))
+
     def test_column_argmax(self):
         r = []
         for _ in xrange(self.N):
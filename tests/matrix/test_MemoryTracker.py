@@ -0,0 +1,115 @@
+# ----------------------------------------------------------------------------
+# Copyright 2015 Grammarly, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ----------------------------------------------------------------------------
+import quagga
+import numpy as np
+from quagga import Model
+from unittest import TestCase
+from quagga.matrix import Matrix
+from quagga.blocks import DotBlock
+from quagga.connector import Connector
+from quagga.matrix import MemoryTracker
+from quagga.blocks import SoftmaxCeBlock
+from quagga.blocks import ParameterContainer
+from quagga.learning.steps import NagStep
+from quagga.utils.initializers import Constant
+from quagga.utils.initializers import Orthogonal
+from quagga.learning.policies import FixedValuePolicy
+
+
+class TestMemoryTracker(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.rng = np.random.RandomState(seed=42)
+
+    def setUp(self):
+        quagga.processor_type = 'cpu'
+        self.tracker = MemoryTracker()
+        self.tracker.enable()
+
+    def tearDown(self):
+        self.tracker.disable()
+
+    def test_breakdown(self):
+        batch_size, dim, nclasses = 32, 20, 10
+        tracker = self.tracker
+        with tracker.owner('params'):
+            p = ParameterContainer(W={'init': Orthogonal(dim, nclasses), 'device_id': 0},
+                                   b={'init': Constant(1, nclasses), 'device_id': 0})
+        with tracker.owner('data'):
+            x = Connector(Matrix.from_npa(self.rng.rand(batch_size, dim).astype(np.float32)))
+            y = Connector(Matrix.from_npa(self.rng.randint(nclasses, size=(batch_size, 1)).astype(np.int32)))
+        with tracker.owner('dot'):
+            dot_block = DotBlock(p['W'], p['b'], x)
+        with tracker.owner('sce'):
+            sce_block = SoftmaxCeBlock(dot_block.output, y)
+        with tracker.owner('nag'):
+            policy = FixedValuePolicy(0.1)
+            nag_step = NagStep(p.trainable_parameters.values(), policy, policy)
+        model = Model([p, dot_block, sce_block])
+        params_nbytes = 4 * (dim * nclasses + nclasses)
+        output_nbytes = 4 * batch_size * nclasses
+
+        breakdown = tracker.get_breakdown()
+        self.assertEqual(breakdown['parameters'], params_nbytes)
+        self.assertEqual(breakdown['optimizer state'], params_nbytes)
+        self.assertEqual(breakdown['gradients'], params_nbytes + output_nbytes)
+        self.assertEqual(tracker.get_breakdown('owner')['nag'], params_nbytes)
+        self.assertEqual(sum(breakdown.values()), tracker.live_bytes)
+
+        tracker.reset_peak()
+        live_bytes = tracker.live_bytes
+        x.fprop()
+        y.fprop()
+        model.fprop()
+        model.bprop()
+        nag_step.notify()
+        self.assertGreaterEqual(tracker.peak_bytes, live_bytes)
+        self.assertIn('optimizer state', tracker.format_report())
+
+    def test_release(self):
+        tracker = self.tracker
+        live_bytes = tracker.live_bytes
+        a = Matrix.empty(100, 100)
+        self.assertEqual(tracker.live_bytes, live_bytes + 4 * 100 * 100)
+        self.assertEqual(tracker.get_breakdown('owner')['unknown'], 4 * 100 * 100)
+        del a
+        self.assertEqual(tracker.live_bytes, live_bytes)
+        self.assertEqual(tracker.peak_bytes, live_bytes + 4 * 100 * 100)
+
+    def test_disabled(self):
+        self.tracker.disable()
+        Matrix.empty(10, 10)
+        self.assertEqual(self.tracker.live_bytes, 0)
+        self.assertIsNone(MemoryTracker.active)
+    def test_scratch(self):
+        tracker = self.tracker
+        live_bytes = tracker.live_bytes
+        MemoryTracker.on_scratch('buffer', 0, 1000)
+        MemoryTracker.on_scratch('buffer', 0, 3000)
+        self.assertEqual(tracker.live_bytes, live_bytes + 3000)
+        self.assertEqual(tracker.get_breakdown()['scratch'], 3000)
+        self.assertEqual(tracker.get_breakdown('owner')['temporary memory'], 3000)
+
+    def test_peak_rss(self):
+        if MemoryTracker.get_peak_rss() is None:
+            self.skipTest('peak resident memory is unavailable')
+        self.tracker.reset_peak()
+        peak_rss = MemoryTracker.get_peak_rss()
+        # temporaries are not matrices, they are seen only in the process peak
+        a = np.ones((64, 2 ** 20), np.uint8)
+        del a
+        self.assertGreaterEqual(MemoryTracker.get_peak_rss(), peak_rss + 60 * 2 ** 20)
+        self.assertIn('peak process RSS', self.tracker.format_report())
@@ -0,0 +1,116 @@
+# ----------------------------------------------------------------------------
+# Copyright 2015 Grammarly, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ----------------------------------------------------------------------------
+import gc
+import quagga
+import numpy as np
+from unittest import TestCase
+from quagga.matrix import Matrix
+from quagga.matrix import ShapeElement
+
+
+class TestShapeElement(TestCase):
+    def test_derived_elements(self):
+        a = ShapeElement(3)
+        b = ShapeElement(5)
+        c = a + b * 2
+        d = c - 1
+        self.assertEqual(d.value, 12)
+        a[:] = 10
+        self.assertEqual(c.value, 20)
+        self.assertEqual(d.value, 19)
+        version = d.version
+        a[:] = 10
+        self.assertEqual(d.version, version)
+
+    def test_binding(self):
+        a = ShapeElement(3)
+        b = ShapeElement(7)
+        c = a * 2
+        a[:] = b
+        self.assertEqual(c.value, 14)
+        b[:] = 1
+        self.assertEqual(a.value, 1)
+        self.assertEqual(c.value, 2)
+        a[:] = 4
+        b[:] = 100
+        self.assertEqual(c.value, 8)
+
+    def test_cyclic_binding(self):
+        a = ShapeElement(3)
+        a[:] = a
+        self.assertEqual(a.value, 3)
+        b = ShapeElement(5)
+        b[:] = a
+        a[:] = b
+        self.assertEqual(b.value, 3)
+        a[:] = 8
+        self.assertEqual(b.value, 8)
+        quagga.processor_type = 'cpu'
+        m = Matrix.from_npa(np.ones((4, 3), np.float32))
+        n = Matrix.empty_like(m)
+        n.assign(None, m)
+        m.nrows = 2
+        self.assertEqual(n.npa.shape, (2, 3))
+
+    def test_views(self):
+        quagga.processor_type = 'cpu'
+        a = np.arange(20, dtype=np.float32).reshape(5, 4)
+        m = Matrix.from_npa(a)
+        k = ShapeElement(1)
+        row = m[k]
+        column = m[:, 2]
+        columns = m[:, k:]
+        self.assertTrue(np.array_equal(row.to_host(), a[1:2]))
+        self.assertTrue(np.array_equal(columns.to_host(), a[:, 1:]))
+        k[:] = 3
+        m.nrows = 2
+        self.assertTrue(np.array_equal(row.to_host(), a[3:4]))
+        self.assertTrue(np.array_equal(column.to_host(), a[:2, 2:3]))
+        self.assertTrue(np.array_equal(columns.to_host(), a[:2, 3:]))
+        m.nrows = 5
+        self.assertTrue(np.array_equal(column.to_host(), a[:, 2:3]))
+        self.assertTrue(np.array_equal(columns[k - 3].to_host(), a[0:1, 3:]))
+
+    def test_no_growth(self):
+        quagga.processor_type = 'cpu'
+        m = Matrix.from_npa(np.zeros((64, 8), dtype=np.float32))
+        views = [m[:, i] for i in xrange(8)]
+
+        def change_shapes(n):
+            for batch_size in [16, 64, 32, 1] * n:
+                m.nrows = batch_size
+                for view in views:
+                    view.assign(None, m[:, 0])
+            gc.collect()
+            return len(gc.get_objects())
+        nobjects = change_shapes(1)
+        self.assertLess(change_shapes(100), nobjects + 10)
+
+    def test_cached_npa(self):
+        quagga.processor_type = 'cpu'
+        a = np.arange(20, dtype=np.float32).reshape(5, 4)
+        m = Matrix.from_npa(a)
+        npa = m.npa
+        self.assertIs(m.npa, npa)
+        m.nrows = 2
+        self.assertEqual(m.npa.shape, (2, 4))
+        n = ShapeElement(3)
+        m.nrows = n
+        self.assertEqual(m.npa.shape, (3, 4))
+        n[:] = 5
+        self.assertTrue(np.array_equal(m.npa, a))
+        m.to_shared_memory()
+        self.assertIs(m.npa.base, m.data)
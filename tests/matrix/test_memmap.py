@@ -0,0 +1,98 @@
+# ----------------------------------------------------------------------------
+# Copyright 2015 Grammarly, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ----------------------------------------------------------------------------
+import os
+import h5py
+import shutil
+import tempfile
+import numpy as np
+from unittest import TestCase
+from quagga.matrix import CpuMatrix
+from quagga.matrix import SparseMatrix
+from quagga.context import CpuContext
+from quagga.utils.initializers import MemmapInitializer
+from quagga.utils.initializers import H5pyMemmapInitializer
+
+
+class TestMemmap(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.rng = np.random.RandomState(seed=42)
+        cls.context = CpuContext()
+        cls.N = 20
+
+    def setUp(self):
+        self.dir_path = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.dir_path)
+
+    def get_memmap(self, a, mode='r+'):
+        path = os.path.join(self.dir_path, 'W.bin')
+        a.tofile(path)
+        return MemmapInitializer(path, a.shape[0], a.shape[1], mode=mode)()
+
+    def test_slice_rows(self):
+        r = []
+        for i in xrange(self.N):
+            nrows, ncols = self.rng.random_integers(1000, size=2)
+            batch_size = self.rng.random_integers(500)
+            a = self.rng.rand(nrows, ncols).astype(np.float32)
+            indxs = self.rng.randint(nrows, size=(batch_size, 1)).astype(np.int32)
+            row_cache_size = self.rng.random_integers(batch_size) if i % 2 else None
+            W = CpuMatrix.from_memmap(self.get_memmap(a), row_cache_size=row_cache_size)
+            out = CpuMatrix.empty(batch_size, ncols)
+            for _ in xrange(2):
+                W.slice_rows(self.context, CpuMatrix.from_npa(indxs), out)
+                r.append(np.allclose(out.to_host(), a[indxs[:, 0]]))
+        self.assertEqual(sum(r), len(r))
+
+    def test_sparse_update_in_place(self):
+        r = []
+        for i in xrange(self.N):
+            nrows, ncols = self.rng.random_integers(1000, size=2)
+            batch_size = self.rng.random_integers(500)
+            a = self.rng.rand(nrows, ncols).astype(np.float32)
+            indxs = self.rng.randint(nrows, size=(batch_size, 1)).astype(np.int32)
+            grad = self.rng.rand(batch_size, ncols).astype(np.float32)
+            row_cache_size = self.rng.random_integers(batch_size) if i % 2 else None
+            memmap = self.get_memmap(a)
+            W = CpuMatrix.from_memmap(memmap, row_cache_size=row_cache_size)
+            out = CpuMatrix.empty(batch_size, ncols)
+            qindxs = CpuMatrix.from_npa(indxs)
+            W.slice_rows(self.context, qindxs, out)
+
+            dL_dW = SparseMatrix(0)
+            dL_dW.add_rows_slice(qindxs, CpuMatrix.from_npa(grad))
+            W.add_scaled(self.context, -0.1, dL_dW)
+            for k, idx in enumerate(indxs[:, 0]):
+                a[idx] -= 0.1 * grad[k]
+
+            W.slice_rows(self.context, qindxs, out)
+            r.append(W.data is memmap)
+            r.append(np.allclose(memmap, a))
+            r.append(np.allclose(out.to_host(), a[indxs[:, 0]]))
+        self.assertEqual(sum(r), len(r))
+
+    def test_h5py_memmap_initializer(self):
+        path = os.path.join(self.dir_path, 'parameters.hdf5')
+        a = self.rng.rand(100, 30).astype(np.float32)
+        with h5py.File(path, 'w') as f:
+            f['W'] = a
+            f.create_dataset('chunked_W', data=a, chunks=(10, 30))
+        W = H5pyMemmapInitializer(path, 'W')()
+        self.assertIsInstance(W, np.memmap)
+        self.assertTrue(np.array_equal(W, a))
+        self.assertRaises(ValueError, H5pyMemmapInitializer, path, 'chunked_W')
\ No newline at end of file
@@ -0,0 +1,46 @@
+# ----------------------------------------------------------------------------
+# Copyright 2015 Grammarly, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ----------------------------------------------------------------------------
+import numpy as np
+
+
+def get_numerical_derivatives(get_loss, arrays, names, eps=1e-4):
+    """
+    Central differences of ``get_loss(arrays)`` with respect to every
+    element of ``arrays[name]`` for every name in ``names``.
+
+    All arrays are converted to float64 before ``get_loss`` is called, so
+    it must read them from its argument. A list of arrays, e.g. steps of a
+    sequence, gets a list of derivatives.
+    """
+    arrays = dict((k, [e.astype(np.float64) for e in v] if isinstance(v, list) else v.astype(np.float64))
+                  for k, v in arrays.iteritems())
+    derivatives = {}
+    for name in names:
+        derivatives[name] = []
+        for a in arrays[name] if isinstance(arrays[name], list) else [arrays[name]]:
+            d = np.zeros_like(a)
+            for index in np.ndindex(*a.shape):
+                value = a[index]
+                a[index] = value + eps
+                loss_plus = get_loss(arrays)
+                a[index] = value - eps
+                loss_minus = get_loss(arrays)
+                a[index] = value
+                d[index] = (loss_plus - loss_minus) / (2 * eps)
+            derivatives[name].append(d)
+        if not isinstance(arrays[name], list):
+            derivatives[name] = derivatives[name][0]
+    return derivatives
@@ -0,0 +1,34 @@
+# ----------------------------------------------------------------------------
+# Copyright 2015 Grammarly, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ----------------------------------------------------------------------------
+import os
+import sys
+import json
+import subprocess
+from unittest import TestCase
+
+
+class TestLazyModule(TestCase):
+    def test_cpu_backend_does_not_import_gpu_modules(self):
+        code = ("import sys, json, quagga.matrix, quagga.context, quagga.connector\n"
+                "from quagga.matrix import Matrix\n"
+                "from quagga.context import Context\n"
+                "Matrix.empty(2, 3), Context()\n"
+                "print json.dumps(sorted(name for name in sys.modules if sys.modules[name] "
+                "and ('cuda' in name or 'Gpu' in name)))")
+        path = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        env = dict(os.environ, QUAGGA_BACKEND='cpu', PYTHONPATH=path)
+        output = subprocess.check_output([sys.executable, '-c', code], env=env)
+        self.assertEqual(json.loads(output.splitlines()[-1]), [])
@@ -0,0 +1,160 @@
+# ----------------------------------------------------------------------------
+# Copyright 2015 Grammarly, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ----------------------------------------------------------------------------
+import quagga
+import numpy as np
+from quagga import Model
+from unittest import TestCase
+from quagga import PipelineModel
+from quagga.matrix import Matrix
+from quagga.context import Context
+from quagga.context import CpuContext
+from quagga.blocks import DotBlock
+from quagga.blocks import SoftmaxCeBlock
+from quagga.blocks import RowSlicingBlock
+from quagga.blocks import ParameterContainer
+from quagga.connector import Connector
+from quagga.utils.initializers import Constant
+
+
+class TestPipelineModel(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.rng = np.random.RandomState(seed=42)
+
+    def setUp(self):
+        quagga.processor_type = 'cpu'
+
+    def tearDown(self):
+        CpuContext.stop_workers()
+
+    def get_parameters(self, W1, W2, device_ids):
+        return ParameterContainer(W1={'init': lambda: W1, 'device_id': device_ids[0]},
+                                  W2={'init': lambda: W2, 'device_id': device_ids[1]},
+                                  b2={'init': Constant(1, W2.shape[1]), 'device_id': device_ids[1]})
+
+    def get_stages(self, p, x, y, device_ids):
+        x = Connector(Matrix.from_npa(x))
+        y = Connector(Matrix.from_npa(y))
+        dot1 = DotBlock(p['W1'], None, x, device_id=device_ids[0])
+        dot2 = DotBlock(p['W2'], p['b2'], dot1.output, device_id=device_ids[1])
+        sce = SoftmaxCeBlock(dot2.output, y, device_id=device_ids[1])
+        # inputs are copied to the devices that registered their usage
+        x.fprop()
+        y.fprop()
+        return [[dot1], [dot2, sce]]
+
+    def test_order(self):
+        order = PipelineModel.get_order(3, 2, '1f1b')
+        self.assertEqual(order, [('f', 0, 0), ('f', 1, 0), ('f', 0, 1), ('b', 0, 1),
+                                 ('f', 1, 1), ('b', 1, 1), ('b', 0, 0), ('f', 2, 0),
+                                 ('b', 1, 0), ('f', 2, 1), ('b', 2, 1), ('b', 2, 0)])
+        for schedule in ['gpipe', '1f1b']:
+            for m, n in [(1, 1), (2, 4), (4, 2), (5, 3)]:
+                order = PipelineModel.get_order(m, n, schedule)
+                self.assertEqual(len(order), len(set(order)))
+                self.assertEqual(len(order), 2 * m * n)
+                for k, (p, r, s) in enumerate(order):
+                    issued = order[:k]
+                    if p == 'f' and s:
+                        self.assertIn(('f', r, s - 1), issued)
+                    if p == 'b':
+                        self.assertIn(('f', r, s), issued)
+                        if s < n - 1:
+                            self.assertIn(('b', r, s + 1), issued)
+
+    def test_derivatives(self):
+        num_micro_batches, micro_batch_size, dim, nclasses = 3, 4, 8, 5
+        batch_size = num_micro_batches * micro_batch_size
+        W1 = self.rng.normal(0.0, 0.5, (dim, dim)).astype(np.float32)
+        W2 = self.rng.normal(0.0, 0.5, (dim, nclasses)).astype(np.float32)
+        x = self.rng.rand(batch_size, dim).astype(np.float32)
+        y = self.rng.randint(nclasses, size=(batch_size, 1)).astype(np.int32)
+
+        p = self.get_parameters(W1, W2, [0, 0])
+        stages = self.get_stages(p, x, y, [0, 0])
+        model = Model([p] + stages[0] + stages[1])
+        model.fprop()
+        model.bprop()
+        expected = [p[name].backward_matrix.to_host() for name in ['W1', 'W2', 'b2']]
+
+        for schedule in ['gpipe', '1f1b']:
+            for device_ids in [[0, 0], [1, 2]]:
+                if device_ids[0]:
+                    CpuContext.start_workers(device_ids)
+                p = self.get_parameters(W1, W2, device_ids)
+                micro_batches = []
+                for r in xrange(num_micro_batches):
+                    rows = slice(r * micro_batch_size, (r + 1) * micro_batch_size)
+                    micro_batches.append(self.get_stages(p, x[rows], y[rows], device_ids))
+                model = PipelineModel(p, micro_batches, schedule)
+                # derivatives must not leak between iterations
+                for _ in xrange(2):
+                    model.fprop()
+                    model.bprop()
+                    derivatives = [p[name].backward_matrix.to_host() for name in ['W1', 'W2', 'b2']]
+                    for a, b in zip(derivatives, expected):
+                        self.assertTrue(np.allclose(a, b, atol=1e-6))
+                CpuContext.stop_workers()
+
+    def test_sparse_derivatives(self):
+        num_micro_batches, micro_batch_size, vocab_size, dim, nclasses = 3, 4, 20, 8, 5
+        batch_size = num_micro_batches * micro_batch_size
+        E = self.rng.normal(0.0, 0.5, (vocab_size, dim)).astype(np.float32)
+        W2 = self.rng.normal(0.0, 0.5, (dim, nclasses)).astype(np.float32)
+        idxs = self.rng.randint(vocab_size, size=(batch_size, 1)).astype(np.int32)
+        y = self.rng.randint(nclasses, size=(batch_size, 1)).astype(np.int32)
+
+        def get_stages(p, idxs, y, device_ids):
+            idxs = Connector(Matrix.from_npa(idxs, device_id=device_ids[0]))
+            y = Connector(Matrix.from_npa(y))
+            emb = RowSlicingBlock(p['W1'], idxs, dense=False)
+            dot = DotBlock(p['W2'], p['b2'], emb.output, device_id=device_ids[1])
+            sce = SoftmaxCeBlock(dot.output, y, device_id=device_ids[1])
+            y.fprop()
+            return [[emb], [dot, sce]]
+
+        def get_derivatives(p, device_id):
+            context = Context(device_id)
+            dL_dE = Matrix.from_npa(np.zeros_like(E), device_id=device_id)
+            dL_dE.add(context, p['W1'].backward_matrix)
+            derivatives = [dL_dE.to_host()]
+            derivatives += [p[name].backward_matrix.to_host() for name in ['W2', 'b2']]
+            return derivatives
+
+        p = self.get_parameters(E, W2, [0, 0])
+        stages = get_stages(p, idxs, y, [0, 0])
+        model = Model([p] + stages[0] + stages[1])
+        model.fprop()
+        model.bprop()
+        expected = get_derivatives(p, 0)
+
+        for schedule in ['gpipe', '1f1b']:
+            for device_ids in [[0, 0], [1, 2]]:
+                if device_ids[0]:
+                    CpuContext.start_workers(device_ids)
+                p = self.get_parameters(E, W2, device_ids)
+                micro_batches = []
+                for r in xrange(num_micro_batches):
+                    rows = slice(r * micro_batch_size, (r + 1) * micro_batch_size)
+                    micro_batches.append(get_stages(p, idxs[rows], y[rows], device_ids))
+                model = PipelineModel(p, micro_batches, schedule)
+                for _ in xrange(2):
+                    model.fprop()
+                    model.bprop()
+                    derivatives = get_derivatives(p, device_ids[0])
+                    for a, b in zip(derivatives, expected):
+                        self.assertTrue(np.allclose(a, b, atol=1e-6))
+                CpuContext.stop_workers()
@@ -0,0 +1,64 @@
+# ----------------------------------------------------------------------------
+# Copyright 2015 Grammarly, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ----------------------------------------------------------------------------
+import os
+import sys
+import json
+import shutil
+import tempfile
+import subprocess
+from unittest import TestCase
+
+
+class TestBenchmarks(TestCase):
+    def setUp(self):
+        self.dir_path = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.dir_path)
+
+    def test_all_suites_run(self):
+        # one benchmark of every suite, so that the suites stay importable
+        path = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        benchmarks_path = os.path.join(path, 'benchmarks')
+        output_path = os.path.join(self.dir_path, 'results.json')
+        pattern = ('^(matrix/add_dot/1x128|block/LstmBlock.fprop/1x128|model/mnist_mlp|'
+                   'shape/set_nrows/new_view|import/quagga.blocks)$')
+        env = dict(os.environ, PYTHONPATH=path)
+        subprocess.check_output([sys.executable, os.path.join(benchmarks_path, 'run.py'),
+                                 '--output', output_path, '--filter', pattern, '--repeat', '1'],
+                                env=env, stderr=subprocess.STDOUT)
+        with open(output_path) as f:
+            results = json.load(f)['results']
+        self.assertEqual(len(results), 5)
+        subprocess.check_output([sys.executable, os.path.join(benchmarks_path, 'compare.py'),
+                                 output_path, output_path], env=env)
+
+    def test_standalone_scripts_run(self):
+        # scripts that are not suites of run.py are run with tiny sizes
+        path = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        benchmarks_path = os.path.join(path, 'benchmarks')
+        scripts = [('attention.py', '--lengths 4 --batch-size 2 --query-len 3 --dim 4 --repeat 1'),
+                   ('softmax.py', '--vocab-sizes 50 --batch-size 4 --dim 8 --num-samples 10 --repeat 1'),
+                   ('chunked_softmax.py', '--vocab-size 100 --chunk-sizes 32 --batch-size 2 --seq-len 2 --dim 8 --repeat 1'),
+                   ('lstmp.py', '--proj-dim 4 --batch-size 2 --seq-len 3 --dim 8 --repeat 1'),
+                   ('model_parallel.py', '--layers 2 --batch-size 2 --seq-len 3 --dim 8 --repeat 1'),
+                   ('pipeline.py', '--layers 2 --micro-batches 2 --batch-size 4 --seq-len 3 --dim 8 --repeat 1'),
+                   ('blas_threads.py', '--contexts 1 2 --size 16 --gemms 2'),
+                   ('checkpoint_loading.py', '--size-mb 1')]
+        env = dict(os.environ, PYTHONPATH=path)
+        for script, args in scripts:
+            subprocess.check_output([sys.executable, os.path.join(benchmarks_path, script)] + args.split(),
+                                    env=env, stderr=subprocess.STDOUT)
@@ -0,0 +1,91 @@
+# ----------------------------------------------------------------------------
+# Copyright 2015 Grammarly, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ----------------------------------------------------------------------------
+import os
+import quagga
+import shutil
+import tempfile
+import numpy as np
+from unittest import TestCase
+from quagga.utils import Checkpoint
+from quagga.blocks import ParameterContainer
+from quagga.utils.initializers import CheckpointInitializer
+
+
+class TestCheckpoint(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.rng = np.random.RandomState(seed=42)
+        cls.N = 20
+
+    def setUp(self):
+        self.dir_path = tempfile.mkdtemp()
+        self.path = os.path.join(self.dir_path, 'parameters.ckpt')
+
+    def tearDown(self):
+        shutil.rmtree(self.dir_path)
+
+    def test_save_load(self):
+        r = []
+        for _ in xrange(self.N):
+            arrays = {}
+            for i in xrange(self.rng.random_integers(10)):
+                nrows, ncols = self.rng.random_integers(300, size=2)
+                a = self.rng.rand(nrows, ncols).astype(np.float32)
+                if self.rng.randint(2):
+                    a = np.asfortranarray(a)
+                if self.rng.randint(2):
+                    a = (a * 1000).astype(np.int32)
+                arrays['p{}'.format(i)] = a
+            Checkpoint.save(self.path, arrays)
+            checkpoint = Checkpoint(self.path)
+            r.append(sorted(checkpoint.keys()) == sorted(arrays.keys()))
+            for name, a in arrays.iteritems():
+                b = checkpoint[name]
+                r.append(b.dtype == a.dtype)
+                r.append(np.array_equal(b, a))
+                r.append(b.ctypes.data % Checkpoint.ALIGNMENT == 0)
+        self.assertEqual(sum(r), len(r))
+
+    def test_zero_copy_parameters(self):
+        quagga.processor_type = 'cpu'
+        arrays = {'W': self.rng.rand(200, 100).astype(np.float32),
+                  'b': self.rng.rand(1, 100).astype(np.float32)}
+        Checkpoint.save(self.path, arrays)
+        checkpoint = Checkpoint(self.path, 'c')
+        p = ParameterContainer(W={'init': CheckpointInitializer(checkpoint, 'W'), 'device_id': 0},
+                               b={'init': CheckpointInitializer(checkpoint, 'b'), 'device_id': 0})
+        r = []
+        for name, a in arrays.iteritems():
+            data = p[name].data
+            r.append(np.array_equal(p[name].to_host(), a))
+            r.append(np.may_share_memory(data, checkpoint.mmap))
+        self.assertEqual(sum(r), len(r))
+
+    def test_preallocated_shape(self):
+        quagga.processor_type = 'cpu'
+        Checkpoint.save(self.path, {'W': self.rng.rand(10, 5).astype(np.float32)})
+        checkpoint = Checkpoint(self.path, 'c')
+        p = ParameterContainer(W={'init': CheckpointInitializer(checkpoint, 'W'), 'device_id': 0})
+        W = p['W']
+        W.nrows, W.ncols = 3, 2
+        r = [W.to_host().shape == (3, 2)]
+        for attr, value in [('nrows', 50), ('ncols', 6)]:
+            try:
+                setattr(W, attr, value)
+                r.append(False)
+            except ValueError:
+                r.append(True)
+        self.assertEqual(sum(r), len(r))
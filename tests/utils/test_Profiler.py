@@ -0,0 +1,118 @@
+# ----------------------------------------------------------------------------
+# Copyright 2015 Grammarly, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ----------------------------------------------------------------------------
+import quagga
+import numpy as np
+from quagga import Model
+from unittest import TestCase
+from quagga.utils import List
+from quagga.matrix import Matrix
+from quagga.utils import Profiler
+from quagga.matrix import CpuMatrix
+from quagga.blocks import DotBlock
+from quagga.blocks import LstmBlock
+from quagga.blocks import SoftmaxCeBlock
+from quagga.blocks import SequencerBlock
+from quagga.blocks import ParameterContainer
+from quagga.connector import Connector
+from quagga.utils.initializers import Constant
+from quagga.utils.initializers import Orthogonal
+
+
+class TestProfiler(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.rng = np.random.RandomState(seed=42)
+
+    def build(self):
+        quagga.processor_type = 'cpu'
+        max_len, batch_size, dim, nclasses = 5, 8, 16, 10
+        p = ParameterContainer(W={'init': Orthogonal(dim, 4 * dim), 'device_id': 0},
+                               R={'init': Orthogonal(dim, 4 * dim), 'device_id': 0},
+                               b={'init': Constant(1, 4 * dim), 'device_id': 0},
+                               c0={'init': Constant(batch_size, dim), 'device_id': 0, 'trainable': False},
+                               h0={'init': Constant(batch_size, dim), 'device_id': 0, 'trainable': False},
+                               dot_W={'init': Orthogonal(dim, nclasses), 'device_id': 0},
+                               dot_b={'init': Constant(1, nclasses), 'device_id': 0})
+        x, y, mask = [], [], []
+        for _ in xrange(max_len):
+            x.append(Connector(Matrix.from_npa(self.rng.rand(batch_size, dim).astype(np.float32))))
+            y.append(Connector(Matrix.from_npa(self.rng.randint(nclasses, size=(batch_size, 1)).astype(np.int32))))
+            mask.append(Connector(Matrix.from_npa(np.ones((batch_size, 1), np.float32))))
+        x, y, mask = List(x), List(y), List(mask)
+        lstm = SequencerBlock(LstmBlock, [p['W'], p['R'], p['b'], None], [x, mask],
+                              ['h'], ['c', 'h'], [p['c0'], p['h0']])
+        dot = SequencerBlock(DotBlock, [p['dot_W'], p['dot_b']], [lstm.h], ['output'])
+        sce = SequencerBlock(SoftmaxCeBlock, [], [dot.output, y, mask])
+        for e in x.elements + y.elements + mask.elements:
+            e.fprop()
+        return Model([p, lstm, dot, sce]), max_len
+
+    def test_block_and_op_stats(self):
+        model, max_len = self.build()
+        profiler = Profiler(model)
+        profiler.enable()
+        for _ in xrange(3):
+            model.fprop()
+            model.bprop()
+        profiler.disable()
+
+        stats = profiler.stats
+        self.assertEqual(stats[('block', 'SequencerBlock#1.fprop')][0], 3)
+        self.assertEqual(stats[('block', 'SequencerBlock#3.bprop')][0], 3)
+        self.assertEqual(stats[('block_class', 'LstmBlock.fprop')][0], 3 * max_len)
+        self.assertEqual(stats[('block_class', 'DotBlock.bprop')][0], 3 * max_len)
+        self.assertGreater(stats[('op', 'add_dot')][0], 0)
+        self.assertGreater(stats[('op', 'add_dot')][2], 0)
+        # issued through connectors, which were built before enabling
+        self.assertEqual(stats[('op', 'softmax')][0], 3 * max_len)
+        report = profiler.get_report()
+        self.assertEqual(len(report), len(stats))
+        self.assertEqual(report, sorted(report, key=lambda e: e[3], reverse=True))
+        self.assertTrue(profiler.format_report(kind='op', top=3))
+
+    def test_disable_restores_originals(self):
+        model, _ = self.build()
+        add_dot = CpuMatrix.__dict__['add_dot']
+        batch_hstack = CpuMatrix.__dict__['batch_hstack']
+        str_to_dtype = CpuMatrix.__dict__['str_to_dtype']
+        profiler = Profiler(model)
+        profiler.enable()
+        self.assertIsNot(CpuMatrix.__dict__['add_dot'], add_dot)
+        # helpers that take no context are not operations
+        self.assertIs(CpuMatrix.__dict__['str_to_dtype'], str_to_dtype)
+        self.assertIn('fprop', model.blocks[1].__dict__)
+        profiler.disable()
+        self.assertIs(CpuMatrix.__dict__['add_dot'], add_dot)
+        self.assertIs(CpuMatrix.__dict__['batch_hstack'], batch_hstack)
+        self.assertIs(CpuMatrix.__dict__['str_to_dtype'], str_to_dtype)
+        self.assertNotIn('fprop', model.blocks[1].__dict__)
+        self.assertNotIn('fprop', model.blocks[1].blocks[0].__dict__)
+        model.fprop()
+        self.assertEqual(len(profiler.stats), 0)
+
+    def test_static_ops_through_matrix(self):
+        quagga.processor_type = 'cpu'
+        batch_hstack = Matrix.batch_hstack
+        profiler = Profiler()
+        profiler.enable()
+        self.assertIsNot(Matrix.batch_hstack, batch_hstack)
+        x = [Matrix.from_npa(self.rng.rand(3, 2).astype(np.float32)) for _ in xrange(2)]
+        y = [Matrix.from_npa(self.rng.rand(3, 4).astype(np.float32)) for _ in xrange(2)]
+        output = [Matrix.empty(3, 6) for _ in xrange(2)]
+        Matrix.batch_hstack(None, x, y, output)
+        profiler.disable()
+        self.assertIs(Matrix.batch_hstack, batch_hstack)
+        self.assertEqual(profiler.stats[('op', 'batch_hstack')][0], 1)